@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+#Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+#openGauss is licensed under Mulan PSL v2.
+#You can use this software according to the terms and conditions of the Mulan PSL v2.
+#You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+#-------------------------------------------------------------------------
+#
+# dir_size_bench.py
+#    directory sizing with DirSize compared with the ls -l -R | grep | awk
+#    pipeline it replaced and with du, on a synthetic tree laid out like a
+#    data directory or on an existing one.
+#
+# IDENTIFICATION
+#    src/manager/om/other/dir_size_bench.py
+#
+#-------------------------------------------------------------------------
+
+import getopt
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_PATH = os.path.realpath(os.path.join(os.path.dirname(
+    os.path.realpath(__file__)), "..", "script"))
+sys.path.insert(0, SCRIPT_PATH)
+from base_utils.os.dir_size import DirSize
+
+DEFAULT_FILES = 500000
+DEFAULT_DIRS = 1000
+DEFAULT_REPEAT = 3
+# relation files are mostly small, every tenth one gets a few pages
+SMALL_FILE_SIZE = 0
+LARGE_FILE_SIZE = 4 * 8192
+LS_CMD = "ls -l -R %s | grep ^- | awk '{t+=$5;} END {print t}'"
+DU_CMD = "du -s -B1 %s | awk '{print $1}'"
+
+
+def usage():
+    """
+Usage:
+    python3 dir_size_bench.py -h|--help
+    python3 dir_size_bench.py [-d directory] [-f files] [-D dirs]
+                              [-n repeat] [-j parallel] [-k]
+
+General options:
+    -d                Directory to size. If it does not exist, a synthetic
+                      tree is created there, otherwise it is used as is.
+    -f                Number of files of the synthetic tree, %d by default.
+    -D                Number of directories of the synthetic tree, %d by
+                      default.
+    -n                Number of runs of every method, the median is used.
+    -j                Number of threads of DirSize.
+    -k                Keep the synthetic tree after the benchmark.
+    -h, --help        Show help information for this utility,
+                      and exit the command line mode.
+    """
+    print(usage.__doc__ % (DEFAULT_FILES, DEFAULT_DIRS))
+
+
+def createTree(directory, files, dirs):
+    """
+    function: create a tree like base/<db>/<relfilenode>, with one hard
+              link so the dedup is covered
+    input : directory, files, dirs
+    output: NA
+    """
+    perDir = max(1, files // max(1, dirs))
+    data = b"\0" * LARGE_FILE_SIZE
+    count = 0
+    for i in range(dirs):
+        subdir = os.path.join(directory, "base", str(16384 + i))
+        os.makedirs(subdir)
+        for j in range(perDir):
+            if count >= files:
+                break
+            with open(os.path.join(subdir, str(j)), "wb") as fp:
+                fp.write(data if j % 10 == 0 else data[:SMALL_FILE_SIZE])
+            count += 1
+    first = os.path.join(directory, "base", "16384", "0")
+    os.link(first, os.path.join(directory, "base", "16384", "hardlink"))
+
+
+def runShell(cmd):
+    """
+    function: run a size pipeline
+    input : cmd
+    output: int
+    """
+    (status, output) = subprocess.getstatusoutput(cmd)
+    if status != 0:
+        raise Exception("Failed to execute %s. Error:\n%s" % (cmd, output))
+    return int(output.strip() or 0)
+
+
+def timeIt(func, repeat):
+    """
+    function: run func several times
+    input : func, repeat
+    output: median seconds, result of the last run
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.monotonic()
+        result = func()
+        times.append(time.monotonic() - start)
+    times.sort()
+    return times[len(times) // 2], result
+
+
+def main():
+    """
+    main function
+    """
+    try:
+        (opts, args) = getopt.getopt(sys.argv[1:], "d:f:D:n:j:kh", ["help"])
+    except getopt.GetoptError as e:
+        usage()
+        sys.exit("Error: %s" % str(e))
+    if args:
+        usage()
+        sys.exit("Error: unknown parameter %s" % args[0])
+
+    directory = ""
+    files = DEFAULT_FILES
+    dirs = DEFAULT_DIRS
+    repeat = DEFAULT_REPEAT
+    parallel = os.cpu_count() or 1
+    keep = False
+    for (key, value) in opts:
+        if key in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        elif key == "-d":
+            directory = os.path.realpath(value)
+        elif key == "-f":
+            files = int(value)
+        elif key == "-D":
+            dirs = int(value)
+        elif key == "-n":
+            repeat = max(1, int(value))
+        elif key == "-j":
+            parallel = max(1, int(value))
+        elif key == "-k":
+            keep = True
+
+    created = False
+    if not directory:
+        directory = tempfile.mkdtemp(prefix="dir_size_bench_")
+        os.rmdir(directory)
+    if not os.path.exists(directory):
+        print("Creating %d files in %d directories under %s."
+              % (files, dirs, directory))
+        createTree(directory, files, dirs)
+        created = True
+    try:
+        # warm the page cache, so every method sees the same state
+        runShell(DU_CMD % directory)
+        methods = [
+            ("ls -l -R | grep | awk",
+             lambda: runShell(LS_CMD % directory)),
+            ("du -s -B1", lambda: runShell(DU_CMD % directory)),
+            ("DirSize, apparent",
+             lambda: DirSize.get_size(directory, parallel=parallel,
+                                      cache_ttl=0)),
+            ("DirSize, allocated",
+             lambda: DirSize.get_size(directory, allocated=True,
+                                      parallel=parallel, cache_ttl=0)),
+            ("DirSize, cached",
+             lambda: DirSize.get_size(directory, allocated=True,
+                                      parallel=parallel)),
+        ]
+        for (name, func) in methods:
+            (seconds, size) = timeIt(func, repeat)
+            print("%-24s %10.3f s %16d bytes" % (name, seconds, size))
+    finally:
+        if created and not keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
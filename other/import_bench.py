@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+#Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+#openGauss is licensed under Mulan PSL v2.
+#You can use this software according to the terms and conditions of the Mulan PSL v2.
+#You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+#-------------------------------------------------------------------------
+#
+# import_bench.py
+#    startup import time of the om tools, measured with python -X importtime
+#    and compared with a saved baseline.
+#
+# IDENTIFICATION
+#    src/manager/om/other/import_bench.py
+#
+#-------------------------------------------------------------------------
+
+import getopt
+import json
+import os
+import re
+import subprocess
+import sys
+
+SCRIPT_PATH = os.path.realpath(os.path.join(os.path.dirname(
+    os.path.realpath(__file__)), "..", "script"))
+# the tools and the local scripts run most often during install, start and
+# stop, a name without "/" is imported as a module
+DEFAULT_TARGETS = [
+    "gspylib.common.Common",
+    "gs_om",
+    "gs_check",
+    "gs_ssh",
+    "local/PreInstallUtility.py",
+    "local/InitInstance.py",
+    "local/StartInstance.py",
+    "local/StopInstance.py",
+    "local/CleanInstance.py",
+]
+# modules that gspylib.common.Common imports on first use only
+DEFERRED_MODULES = {
+    "gspylib.common.Common": [
+        "cryptography",
+        "gspylib.common.aes_cbc_util",
+        "gspylib.common.DbClusterInfo",
+        "domain_utils.sql_handler.sql_executor",
+        "multiprocessing",
+        "ctypes",
+        "secrets",
+        "csv",
+        "unittest",
+    ],
+}
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 20
+# seconds one import may take, a tool that re-execs itself in a loop
+# would hang otherwise
+IMPORT_TIMEOUT = 60
+IMPORT_TIME_PATTERN = re.compile(
+    r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$")
+# run the module body of a tool without calling its main
+RUN_SCRIPT = """
+import os, runpy, sys
+script = sys.argv[1]
+sys.argv = [script]
+sys.path.insert(0, os.path.dirname(script))
+runpy.run_path(script, run_name="__import_bench__")
+"""
+RUN_MODULE = """
+import importlib, sys
+sys.path.insert(0, sys.argv[2])
+importlib.import_module(sys.argv[1])
+"""
+
+
+def usage():
+    """
+Usage:
+    python3 import_bench.py -h|--help
+    python3 import_bench.py [-t target [...]] [-n repeat] [-s baseline]
+                            [-b baseline [-p tolerance]] [-v]
+
+General options:
+    -t                Tool, local script relative to the script directory,
+                      or module to measure, may be given several times.
+    -n                Number of runs of every target, the median is used.
+    -s                Save the result to this baseline file.
+    -b                Compare the result with this baseline file, and exit
+                      with 1 if a target got slower than the tolerance.
+    -p                Tolerance in percent, %d by default.
+    -v                Show the slowest imports of every target.
+    -h, --help        Show help information for this utility,
+                      and exit the command line mode.
+    """
+    print(usage.__doc__ % DEFAULT_TOLERANCE)
+
+
+def parseImportTime(output):
+    """
+    function: parse the output of python -X importtime
+    input : output
+    output: total self time in us, dict of module to cumulative time of the
+            top level imports
+    """
+    total = 0
+    modules = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if not match:
+            continue
+        total += int(match.group(1))
+        modules[match.group(4)] = int(match.group(2))
+    return total, modules
+
+
+def measure(target):
+    """
+    function: import a target once in a new interpreter
+    input : target
+    output: total self time in us, dict of module to cumulative time
+    """
+    env = dict(os.environ)
+    # the tools re-exec themselves until the bundled libraries are first
+    # in LD_LIBRARY_PATH
+    ldPath = os.path.join(SCRIPT_PATH, "gspylib", "clib")
+    env["LD_LIBRARY_PATH"] = ldPath + ":" + env.get("LD_LIBRARY_PATH", "")
+    if "/" in target or target.startswith("gs_"):
+        cmd = [sys.executable, "-X", "importtime", "-c", RUN_SCRIPT,
+               os.path.join(SCRIPT_PATH, target)]
+    else:
+        cmd = [sys.executable, "-X", "importtime", "-c", RUN_MODULE,
+               target, SCRIPT_PATH]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, env=env)
+    try:
+        (_, stderr) = proc.communicate(timeout=IMPORT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        raise Exception("Importing %s timed out after %d seconds."
+                        % (target, IMPORT_TIMEOUT))
+    stderr = stderr.decode(errors="replace")
+    if proc.returncode != 0:
+        errors = [line for line in stderr.splitlines()
+                  if not line.startswith("import time:")]
+        raise Exception("Failed to import %s. Error:\n%s"
+                        % (target, "\n".join(errors[-10:])))
+    return parseImportTime(stderr)
+
+
+def benchmark(target, repeat):
+    """
+    function: measure a target several times
+    input : target, repeat
+    output: dict
+    """
+    results = [measure(target) for _ in range(repeat)]
+    totals = sorted(total for (total, _) in results)
+    modules = results[-1][1]
+    return {"import_us": totals[len(totals) // 2],
+            "min_us": totals[0],
+            "modules": len(modules),
+            "deferred_loaded": sorted(
+                name for name in DEFERRED_MODULES.get(target, [])
+                if name in modules),
+            "slowest": sorted(modules.items(),
+                              key=lambda item: -item[1])[:10]}
+
+
+def compare(results, baseline, tolerance):
+    """
+    function: compare the results with a baseline
+    input : results, baseline, tolerance
+    output: list of failure messages
+    """
+    failures = []
+    for (target, result) in results.items():
+        if result["deferred_loaded"]:
+            failures.append("%s loads %s at import time."
+                            % (target, ", ".join(result["deferred_loaded"])))
+        if target not in baseline:
+            continue
+        limit = baseline[target]["import_us"] * (100 + tolerance) / 100.0
+        if result["import_us"] > limit:
+            failures.append("%s takes %.1f ms to import, the baseline is "
+                            "%.1f ms." % (target, result["import_us"] / 1000.0,
+                                          baseline[target]["import_us"]
+                                          / 1000.0))
+    return failures
+
+
+def main():
+    """
+    main function
+    """
+    try:
+        (opts, args) = getopt.getopt(sys.argv[1:], "t:n:s:b:p:vh", ["help"])
+    except getopt.GetoptError as e:
+        usage()
+        sys.exit("Error: %s" % str(e))
+    if args:
+        usage()
+        sys.exit("Error: unknown parameter %s" % args[0])
+
+    targets = []
+    repeat = DEFAULT_REPEAT
+    saveFile = ""
+    baselineFile = ""
+    tolerance = DEFAULT_TOLERANCE
+    verbose = False
+    for (key, value) in opts:
+        if key in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        elif key == "-t":
+            targets.append(value)
+        elif key == "-n":
+            repeat = int(value)
+        elif key == "-s":
+            saveFile = value
+        elif key == "-b":
+            baselineFile = value
+        elif key == "-p":
+            tolerance = float(value)
+        elif key == "-v":
+            verbose = True
+    if not targets:
+        targets = DEFAULT_TARGETS
+
+    results = {}
+    for target in targets:
+        try:
+            results[target] = benchmark(target, max(1, repeat))
+        except Exception as e:
+            print(str(e))
+            sys.exit(1)
+        result = results[target]
+        print("%-32s %8.1f ms (min %.1f ms) %4d modules" % (
+            target, result["import_us"] / 1000.0,
+            result["min_us"] / 1000.0, result["modules"]))
+        if verbose:
+            for (name, cumulative) in result["slowest"]:
+                print("    %-40s %8.1f ms" % (name, cumulative / 1000.0))
+
+    if saveFile:
+        with open(saveFile, "w") as fp:
+            json.dump(dict((target, {"import_us": result["import_us"],
+                                     "modules": result["modules"]})
+                           for (target, result) in results.items()),
+                      fp, indent=4, sort_keys=True)
+    baseline = {}
+    if baselineFile:
+        with open(baselineFile, "r") as fp:
+            baseline = json.load(fp)
+    failures = compare(results, baseline, tolerance)
+    for message in failures:
+        print("Regression: %s" % message)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+#Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+#openGauss is licensed under Mulan PSL v2.
+#You can use this software according to the terms and conditions of the Mulan PSL v2.
+#You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS, WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+#-------------------------------------------------------------------------
+#
+# om_sim.py
+#    simulated multi-node cluster on one Linux box, for measuring the
+#    fan-out cost of the om tools without real machines.
+#
+#    Loopback ssh and scp shims are put first in PATH. pssh and pscp start
+#    them as they would start ssh and scp, and the shims run the command,
+#    or copy the files, inside a per-node root directory instead of
+#    connecting anywhere. A static config of the chosen number of nodes is
+#    generated, and a fake gs_ctl answers the status queries, so the real
+#    TaskPool, SshTool, gs_check and gs_om code paths are measured.
+#
+# IDENTIFICATION
+#    src/manager/om/other/om_sim.py
+#
+#-------------------------------------------------------------------------
+
+import getopt
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_PATH = os.path.realpath(os.path.join(os.path.dirname(
+    os.path.realpath(__file__)), "..", "script"))
+GPHOME_PATH = os.path.dirname(SCRIPT_PATH)
+DEFAULT_SIZES = [8, 64, 256]
+SCENARIO_TASKPOOL = "taskpool"
+SCENARIO_SSHTOOL = "sshtool"
+SCENARIO_GS_CHECK = "gs_check"
+SCENARIO_GS_OM_STATUS = "gs_om_status"
+SCENARIO_REMOTE_BATCH = "remote_batch"
+ALL_SCENARIOS = [SCENARIO_TASKPOOL, SCENARIO_SSHTOOL, SCENARIO_GS_CHECK,
+                 SCENARIO_GS_OM_STATUS, SCENARIO_REMOTE_BATCH]
+# scenarios that run a tool as the cluster user
+USER_SCENARIOS = [SCENARIO_GS_CHECK, SCENARIO_GS_OM_STATUS]
+DEFAULT_PARALLEL = 300
+DEFAULT_CHECK_ITEM = "CheckTimeZone"
+DEFAULT_TIMEOUT = 1800
+DATA_PORT_BASE = 15400
+SESSION_LOG = "sessions.log"
+
+# ssh host [options] command: run the command in the root of the node
+SSH_SHIM = r"""#!/bin/bash
+host=""
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -[bcDEeFIiJLlmOoPpQRSWw]) shift 2 ;;
+        -*) shift ;;
+        *) if [ -z "$host" ]; then host="${1#*@}"; shift; else break; fi ;;
+    esac
+done
+node_root="$OM_SIM_ROOT/nodes/$host"
+if [ ! -d "$node_root" ]; then
+    echo "ssh: Could not resolve hostname $host: Name or service not known" >&2
+    exit 255
+fi
+echo "ssh $host" >> "$OM_SIM_ROOT/%(session_log)s"
+cd "$node_root" || exit 255
+export OM_SIM_NODE="$host"
+exec bash -c "$*"
+"""
+# scp [options] source... host:path: copy into the root of the node
+SCP_SHIM = r"""#!/bin/bash
+args=()
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -[cFiloPSJ]) shift 2 ;;
+        -*) shift ;;
+        *) args+=("$1"); shift ;;
+    esac
+done
+target="${args[${#args[@]}-1]}"
+unset 'args[${#args[@]}-1]'
+host="${target%%%%:*}"
+host="${host#*@}"
+node_root="$OM_SIM_ROOT/nodes/$host"
+if [ ! -d "$node_root" ]; then
+    echo "ssh: Could not resolve hostname $host: Name or service not known" >&2
+    exit 255
+fi
+echo "scp $host" >> "$OM_SIM_ROOT/%(session_log)s"
+dest="$node_root/${target#*:}"
+mkdir -p "$(dirname "$dest")" && cp -r "${args[@]}" "$dest"
+"""
+# /etc/profile may reset PATH before pssh starts, put the shims back
+SITE_CUSTOMIZE = """import os
+
+_sim_root = os.environ.get("OM_SIM_ROOT")
+if _sim_root:
+    _sim_bin = os.path.join(_sim_root, "bin")
+    _path = os.environ.get("PATH", "")
+    if not _path.startswith(_sim_bin + ":"):
+        os.environ["PATH"] = _sim_bin + ":" + _path
+"""
+FAKE_GS_CTL = r"""#!/bin/bash
+if [ "$1" = "query" ]; then
+    echo " HA state:           "
+    echo "        local_role                     : Primary"
+    echo "        static_connections             : 0"
+    echo "        db_state                       : Normal"
+    echo "        detail_information             : Normal"
+    echo ""
+    echo " Senders info:       "
+    echo "No information "
+fi
+exit 0
+"""
+ENV_FILE = """export GPHOME=%(gphome)s
+export GAUSSHOME=%(app)s
+export GAUSSLOG=%(log)s
+export PGHOST=%(tmp)s
+export GAUSS_ENV=2
+export OM_SIM_ROOT=%(root)s
+export PYTHONPATH=%(site)s:$PYTHONPATH
+export PATH=%(bin)s:$GAUSSHOME/bin:$PATH
+export LD_LIBRARY_PATH=$GAUSSHOME/lib:$LD_LIBRARY_PATH
+"""
+UPGRADE_VERSION = "5.0.0\n92.301\n0a1b2c3d\n"
+BUILD_STATIC_CONFIG = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from gspylib.common.DbClusterInfo import dbClusterInfo
+clusterInfo = dbClusterInfo()
+clusterInfo.initFromXml(sys.argv[2])
+clusterInfo.saveToStaticConfig(sys.argv[3], 1)
+"""
+RUN_SSHTOOL = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from gspylib.threads.SshTool import SshTool
+with open(sys.argv[2]) as fp:
+    hosts = [line.strip() for line in fp if line.strip()]
+sshTool = SshTool(hosts)
+sshTool.executeCommand("true", env_file=sys.argv[3],
+                       parallel_num=int(sys.argv[4]))
+"""
+# run a batch whose steps hold quotes, $, newlines and a stdin reader
+# through the pssh command line SshTool builds, and check that every node
+# got the script byte for byte
+RUN_REMOTE_BATCH = r"""
+import subprocess
+import sys
+sys.path.insert(0, sys.argv[1])
+from gspylib.threads.SshTool import SshTool
+from base_utils.executor.remote_batch import RemoteBatch
+with open(sys.argv[2]) as fp:
+    hosts = [line.strip() for line in fp if line.strip()][1:]
+steps = [("quotes", "echo \"a  b\" 'c  $HOME'\necho \"$OM_SIM_NODE\"",
+          "a  b c  $HOME\n%s", ""),
+         ("stdin", "head -c 10", "", ""),
+         ("stderr", "echo 'x\"y' >&2", "", 'x"y'),
+         ("last", "printf '%s\\n' \"$((6 * 7))\"", "42", "")]
+cmds = []
+getstatusoutput = subprocess.getstatusoutput
+def record(cmd):
+    cmds.append(cmd)
+    return getstatusoutput(cmd)
+subprocess.getstatusoutput = record
+batch = RemoteBatch(SshTool(hosts), sys.argv[3])
+for (name, cmd, _, _) in steps:
+    batch.add(name, cmd)
+wrapper = batch.get_script_cmd(batch.build_script(
+    [(name, cmd) for (name, cmd, _, _) in steps], "token"))
+if '"' in wrapper or "$" in wrapper:
+    sys.exit("The script command needs quoting: %s" % wrapper)
+results = batch.execute(hosts)
+failures = []
+for host in hosts:
+    for (result, (name, _, output, error)) in zip(results[host], steps):
+        if "%s" in output:
+            output = output % host
+        if (result.output, result.error) != (output, error):
+            failures.append("[%s] %s: got %r %r, expected %r %r" % (
+                host, name, result.output, result.error, output, error))
+psshCmds = [cmd for cmd in cmds if "pssh" in cmd]
+if len(psshCmds) != 1 or "| base64 -d | bash" not in psshCmds[0]:
+    failures.append("Unexpected pssh command lines: %s" % psshCmds)
+if failures:
+    sys.exit("\n".join(failures))
+"""
+
+
+def usage():
+    """
+Usage:
+    python3 om_sim.py -h|--help
+    python3 om_sim.py [-n sizes] [-s scenarios] [-p parallel] [-i item]
+                      [-d directory] [-o result file] [-k]
+
+General options:
+    -n                Comma separated numbers of simulated nodes,
+                      8,64,256 by default.
+    -s                Comma separated scenarios out of taskpool, sshtool,
+                      gs_check, gs_om_status and remote_batch, all of them
+                      by default. gs_check and gs_om_status must run as a
+                      non-root user. remote_batch checks that a batch
+                      script reaches the nodes intact.
+    -p                Parallel number of pssh, 300 by default.
+    -i                Check item of the gs_check scenario, CheckTimeZone by
+                      default.
+    -d                Directory holding the simulated clusters, a new
+                      temporary directory by default.
+    -o                Save the results to this json file.
+    -k                Keep the simulated clusters.
+    -h, --help        Show help information for this utility,
+                      and exit the command line mode.
+    """
+    print(usage.__doc__)
+
+
+def getForkCount():
+    """
+    function: get the number of forks of the box since boot
+    input : NA
+    output: int
+    """
+    with open("/proc/stat", "r") as fp:
+        for line in fp:
+            if line.startswith("processes "):
+                return int(line.split()[1])
+    return 0
+
+
+def writeFile(path, content, mode=0o640):
+    """
+    function: write a file of the simulated cluster
+    input : path, content, mode
+    output: NA
+    """
+    with open(path, "w") as fp:
+        fp.write(content)
+    os.chmod(path, mode)
+
+
+class SimCluster(object):
+    """
+    simulated cluster of one size
+    """
+
+    def __init__(self, root, nodeCount):
+        """
+        function: initialize the cluster
+        input : root, nodeCount
+        output: NA
+        """
+        self.root = root
+        self.nodeCount = nodeCount
+        # the first node is the local one, like the node the tools run on
+        self.hostNames = [socket.gethostname()] + [
+            "simnode%03d" % index for index in range(2, nodeCount + 1)]
+        # every 127.x.y.z address is a loopback address on linux
+        self.ips = ["127.0.0.1"] + [
+            "127.1.%d.%d" % (index // 250, index % 250 + 1)
+            for index in range(1, nodeCount)]
+        self.binPath = os.path.join(root, "bin")
+        self.sitePath = os.path.join(root, "site")
+        self.appPath = os.path.join(root, "app")
+        self.logPath = os.path.join(root, "log")
+        self.tmpPath = os.path.join(root, "tmp")
+        self.hostFile = os.path.join(root, "hosts")
+        self.envFile = os.path.join(root, "env")
+        self.xmlFile = os.path.join(root, "cluster.xml")
+        self.staticConfig = os.path.join(self.appPath, "bin",
+                                         "cluster_static_config")
+        self.staticConfigError = ""
+
+    def getDataDir(self, hostName):
+        """
+        function: get the data directory of the datanode of a node
+        input : hostName
+        output: str
+        """
+        return os.path.join(self.root, "nodes", hostName, "data", "dn")
+
+    def getXml(self):
+        """
+        function: build the cluster xml, one datanode on every node
+        input : NA
+        output: str
+        """
+        params = [("clusterName", "simcluster"),
+                  ("nodeNames", ",".join(self.hostNames)),
+                  ("gaussdbAppPath", self.appPath),
+                  ("gaussdbLogPath", self.logPath),
+                  ("tmpMppdbPath", self.tmpPath),
+                  ("gaussdbToolPath", os.path.join(self.root, "tool")),
+                  ("corePath", os.path.join(self.root, "core")),
+                  ("backIp1s", ",".join(self.ips)),
+                  ("clusterType", "single-inst")]
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<ROOT>',
+                 '  <CLUSTER>']
+        lines.extend('    <PARAM name="%s" value="%s"/>' % item
+                     for item in params)
+        lines.extend(['  </CLUSTER>', '  <DEVICELIST>'])
+        for (hostName, ip) in zip(self.hostNames, self.ips):
+            lines.append('    <DEVICE sn="%s">' % hostName)
+            for item in [("name", hostName), ("backIp1", ip),
+                         ("sshIp1", ip), ("azName", "AZ1"),
+                         ("azPriority", "1"), ("dataNum", "1"),
+                         ("dataPortBase", str(DATA_PORT_BASE)),
+                         ("dataNode1", self.getDataDir(hostName))]:
+                lines.append('      <PARAM name="%s" value="%s"/>' % item)
+            lines.append('    </DEVICE>')
+        lines.extend(['  </DEVICELIST>', '</ROOT>'])
+        return "\n".join(lines) + "\n"
+
+    def setup(self):
+        """
+        function: create the node roots, the shims, the environment file
+                  and the static config
+        input : NA
+        output: NA
+        """
+        for path in [self.binPath, self.sitePath, self.logPath,
+                     self.tmpPath, os.path.join(self.appPath, "bin")]:
+            os.makedirs(path, 0o750, exist_ok=True)
+        for (hostName, ip) in zip(self.hostNames, self.ips):
+            os.makedirs(self.getDataDir(hostName), 0o700, exist_ok=True)
+            # the tools reach a node by name or by ip
+            ipRoot = os.path.join(self.root, "nodes", ip)
+            if not os.path.lexists(ipRoot):
+                os.symlink(hostName, ipRoot)
+        shims = {"session_log": SESSION_LOG}
+        writeFile(os.path.join(self.binPath, "ssh"), SSH_SHIM % shims, 0o750)
+        writeFile(os.path.join(self.binPath, "scp"), SCP_SHIM % shims, 0o750)
+        writeFile(os.path.join(self.sitePath, "sitecustomize.py"),
+                  SITE_CUSTOMIZE)
+        writeFile(os.path.join(self.appPath, "bin", "gs_ctl"), FAKE_GS_CTL,
+                  0o750)
+        writeFile(os.path.join(self.appPath, "bin", "upgrade_version"),
+                  UPGRADE_VERSION)
+        writeFile(self.hostFile, "\n".join(self.hostNames) + "\n")
+        writeFile(self.envFile, ENV_FILE % {
+            "gphome": GPHOME_PATH, "app": self.appPath, "log": self.logPath,
+            "tmp": self.tmpPath, "root": self.root, "site": self.sitePath,
+            "bin": self.binPath})
+        writeFile(self.xmlFile, self.getXml())
+        (status, output) = self.execute(
+            [sys.executable, "-c", BUILD_STATIC_CONFIG, SCRIPT_PATH,
+             self.xmlFile, self.staticConfig])
+        if status != 0:
+            self.staticConfigError = output.strip().splitlines()[-1] \
+                if output.strip() else "status %d" % status
+
+    def getEnv(self):
+        """
+        function: get the environment of the tools run on the local node
+        input : NA
+        output: dict
+        """
+        env = dict(os.environ)
+        env.update({"GPHOME": GPHOME_PATH,
+                    "GAUSSHOME": self.appPath,
+                    "GAUSSLOG": self.logPath,
+                    "PGHOST": self.tmpPath,
+                    "GAUSS_ENV": "2",
+                    "OM_SIM_ROOT": self.root,
+                    "MPPDB_ENV_SEPARATE_PATH": self.envFile,
+                    "PYTHONPATH": ":".join(
+                        [self.sitePath] + ([os.environ["PYTHONPATH"]]
+                                           if os.environ.get("PYTHONPATH")
+                                           else [])),
+                    "PATH": "%s:%s:%s" % (
+                        self.binPath, os.path.join(self.appPath, "bin"),
+                        os.environ.get("PATH", ""))})
+        # pssh switches to the om agent when HOST_IP is set
+        env.pop("HOST_IP", None)
+        return env
+
+    def execute(self, cmd, cwd=None):
+        """
+        function: run a command in the simulated environment
+        input : cmd, cwd
+        output: status, output
+        """
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, env=self.getEnv(),
+                                cwd=cwd or SCRIPT_PATH)
+        try:
+            (output, _) = proc.communicate(timeout=DEFAULT_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            (output, _) = proc.communicate()
+            return -1, "Timed out after %d seconds." % DEFAULT_TIMEOUT
+        return proc.returncode, output.decode(errors="replace")
+
+    def getSessionCount(self):
+        """
+        function: get the number of ssh and scp sessions so far
+        input : NA
+        output: int
+        """
+        path = os.path.join(self.root, SESSION_LOG)
+        if not os.path.isfile(path):
+            return 0
+        with open(path, "r") as fp:
+            return sum(1 for _ in fp)
+
+    def measure(self, scenario, cmd):
+        """
+        function: run a scenario and record its wall time, the forks of
+                  the box and the sessions while it ran
+        input : scenario, cmd
+        output: dict
+        """
+        sessions = self.getSessionCount()
+        forks = getForkCount()
+        start = time.monotonic()
+        (status, output) = self.execute(cmd)
+        wall = time.monotonic() - start
+        return {"scenario": scenario,
+                "nodes": self.nodeCount,
+                "status": status,
+                "wall_time": round(wall, 3),
+                "forks": getForkCount() - forks,
+                "sessions": self.getSessionCount() - sessions,
+                "output": "\n".join(output.strip().splitlines()[-5:])}
+
+    def getScenarioCmd(self, scenario, parallel, checkItem):
+        """
+        function: get the command of a scenario
+        input : scenario, parallel, checkItem
+        output: list
+        """
+        if scenario == SCENARIO_TASKPOOL:
+            return [sys.executable,
+                    os.path.join(SCRIPT_PATH, "gspylib", "pssh", "bin",
+                                 "pssh"),
+                    "-h", self.hostFile, "-t", "300", "-p", str(parallel),
+                    "-o", os.path.join(self.tmpPath, "pssh_out"),
+                    "-e", os.path.join(self.tmpPath, "pssh_err"), "true"]
+        if scenario == SCENARIO_SSHTOOL:
+            return [sys.executable, "-c", RUN_SSHTOOL, SCRIPT_PATH,
+                    self.hostFile, self.envFile, str(parallel)]
+        if scenario == SCENARIO_REMOTE_BATCH:
+            return [sys.executable, "-c", RUN_REMOTE_BATCH, SCRIPT_PATH,
+                    self.hostFile, self.envFile]
+        if scenario == SCENARIO_GS_CHECK:
+            return [sys.executable, os.path.join(SCRIPT_PATH, "gs_check"),
+                    "-i", checkItem, "-o", os.path.join(self.tmpPath,
+                                                        "gs_check")]
+        return [sys.executable, os.path.join(SCRIPT_PATH, "gs_om"),
+                "-t", "status"]
+
+    def run(self, scenario, parallel, checkItem):
+        """
+        function: run a scenario, or report why it is skipped
+        input : scenario, parallel, checkItem
+        output: dict
+        """
+        reason = ""
+        if scenario in USER_SCENARIOS and os.getuid() == 0:
+            reason = "must run as the cluster user, not root"
+        elif scenario in USER_SCENARIOS and self.staticConfigError:
+            reason = "no static config: %s" % self.staticConfigError
+        if reason:
+            return {"scenario": scenario, "nodes": self.nodeCount,
+                    "status": None, "skipped": reason}
+        return self.measure(scenario, self.getScenarioCmd(
+            scenario, parallel, checkItem))
+
+
+def printResult(result):
+    """
+    function: print the result of one scenario
+    input : result
+    output: NA
+    """
+    if result.get("skipped"):
+        print("%-14s %5d nodes  skipped: %s" % (
+            result["scenario"], result["nodes"], result["skipped"]))
+        return
+    print("%-14s %5d nodes  %9.3f s  %7d forks  %6d sessions  %s" % (
+        result["scenario"], result["nodes"], result["wall_time"],
+        result["forks"], result["sessions"],
+        "ok" if result["status"] == 0 else "failed (%s)" % result["status"]))
+    if result["status"] != 0 and result["output"]:
+        for line in result["output"].splitlines():
+            print("    %s" % line)
+
+
+def parseList(value, choices=None):
+    """
+    function: parse a comma separated option
+    input : value, choices
+    output: list
+    """
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    if choices is not None:
+        for item in items:
+            if item not in choices:
+                sys.exit("Error: unknown scenario %s." % item)
+    return items
+
+
+def main():
+    """
+    main function
+    """
+    try:
+        (opts, args) = getopt.getopt(sys.argv[1:], "n:s:p:i:d:o:kh",
+                                     ["help"])
+    except getopt.GetoptError as e:
+        usage()
+        sys.exit("Error: %s" % str(e))
+    if args:
+        usage()
+        sys.exit("Error: unknown parameter %s" % args[0])
+
+    sizes = DEFAULT_SIZES
+    scenarios = ALL_SCENARIOS
+    parallel = DEFAULT_PARALLEL
+    checkItem = DEFAULT_CHECK_ITEM
+    baseDir = ""
+    resultFile = ""
+    keep = False
+    for (key, value) in opts:
+        if key in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        elif key == "-n":
+            sizes = [int(item) for item in parseList(value)]
+        elif key == "-s":
+            scenarios = parseList(value, ALL_SCENARIOS)
+        elif key == "-p":
+            parallel = int(value)
+        elif key == "-i":
+            checkItem = value
+        elif key == "-d":
+            baseDir = os.path.realpath(value)
+        elif key == "-o":
+            resultFile = value
+        elif key == "-k":
+            keep = True
+    if not sys.platform.startswith("linux"):
+        sys.exit("Error: the simulation needs linux.")
+
+    isTempDir = not baseDir
+    if isTempDir:
+        baseDir = tempfile.mkdtemp(prefix="om_sim_")
+    else:
+        os.makedirs(baseDir, 0o750, exist_ok=True)
+    results = []
+    roots = []
+    try:
+        for size in sizes:
+            root = os.path.join(baseDir, "nodes_%d" % size)
+            if os.path.exists(root):
+                sys.exit("Error: %s already exists." % root)
+            roots.append(root)
+            cluster = SimCluster(root, size)
+            cluster.setup()
+            for scenario in scenarios:
+                result = cluster.run(scenario, parallel, checkItem)
+                printResult(result)
+                results.append(result)
+    finally:
+        if keep:
+            print("The simulated clusters are kept in %s." % baseDir)
+        elif isTempDir:
+            shutil.rmtree(baseDir, ignore_errors=True)
+        else:
+            for root in roots:
+                shutil.rmtree(root, ignore_errors=True)
+    if resultFile:
+        with open(resultFile, "w") as fp:
+            json.dump(results, fp, indent=4)
+    sys.exit(1 if any(result["status"] not in (0, None)
+                      for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
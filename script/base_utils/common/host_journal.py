@@ -0,0 +1,100 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : host_journal.py records the steps an operation has
+#                finished on every host, so that a rerun after a partial
+#                failure can skip them.
+#############################################################################
+
+import os
+import shutil
+
+from base_utils.common.constantsbase import ConstantsBase
+
+
+class HostJournal(object):
+    """
+    per host journal of the finished steps, one file per host holding one
+    step name per line
+    """
+
+    def __init__(self, journal_dir):
+        """
+        function: initialize the journal
+        input : journal_dir
+        output: NA
+        """
+        self.journal_dir = journal_dir
+
+    def get_file(self, host):
+        """
+        function: get the journal file of a host
+        input : host
+        output: path
+        """
+        return os.path.join(self.journal_dir, host)
+
+    def get_done(self, host):
+        """
+        function: get the steps finished on a host
+        input : host
+        output: set of step names
+        """
+        journal_file = self.get_file(host)
+        if not os.path.isfile(journal_file):
+            return set()
+        with open(journal_file, "r") as fp:
+            return set(line.strip() for line in fp if line.strip())
+
+    def mark_done(self, host, steps):
+        """
+        function: record steps finished on a host, the record is synced
+                  before it returns so it survives a crash
+        input : host, steps
+        output: NA
+        """
+        if isinstance(steps, str):
+            steps = [steps]
+        if not os.path.isdir(self.journal_dir):
+            os.makedirs(self.journal_dir,
+                        int(str(ConstantsBase.KEY_DIRECTORY_MODE), 8))
+        fd = os.open(self.get_file(host),
+                     os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                     int(str(ConstantsBase.KEY_FILE_MODE), 8))
+        try:
+            os.write(fd, "".join("%s\n" % step for step in steps).encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def get_pending(self, host, steps):
+        """
+        function: get the steps not finished on a host, in their order
+        input : host, steps
+        output: list of step names
+        """
+        done = self.get_done(host)
+        return [step for step in steps if step not in done]
+
+    def clear(self):
+        """
+        function: remove the journal once the operation has finished
+        input : NA
+        output: NA
+        """
+        if os.path.isdir(self.journal_dir):
+            shutil.rmtree(self.journal_dir, ignore_errors=True)
@@ -0,0 +1,153 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : retry_policy.py decides whether and when a failed command
+#                is retried, with exponential backoff and jitter so that the
+#                nodes of a cluster do not retry in lockstep.
+#############################################################################
+
+import random
+import re
+import time
+
+JITTER_NONE = "none"
+JITTER_FULL = "full"
+JITTER_EQUAL = "equal"
+
+# exit code of ssh itself when the connection failed
+SSH_ERROR_CODE = 255
+# transient errors of ssh, pssh and pscp
+SSH_RETRYABLE_PATTERNS = [
+    "Connection reset",
+    "Connection refused",
+    "Connection closed",
+    "Connection timed out",
+    "ssh_exchange_identification",
+    "kex_exchange_identification",
+    "Broken pipe",
+    "No route to host",
+    "Temporary failure in name resolution",
+    "Resource temporarily unavailable",
+]
+
+
+class RetryPolicy(object):
+    """
+    retry policy of a command
+    """
+
+    def __init__(self, max_attempts=4, base_delay=1, max_delay=30,
+                 jitter=JITTER_EQUAL, retryable_codes=None,
+                 retryable_patterns=None, fatal_patterns=None):
+        """
+        function: initialize the policy. A failure is retried when it has
+                  one of the retryable exit codes or matches one of the
+                  retryable patterns, any failure is retried when neither
+                  is given, and a failure matching a fatal pattern is never
+                  retried
+        input : max_attempts, base_delay, max_delay, jitter,
+                retryable_codes, retryable_patterns, fatal_patterns
+        output: NA
+        """
+        if jitter not in (JITTER_NONE, JITTER_FULL, JITTER_EQUAL):
+            raise ValueError("Invalid jitter: %s." % jitter)
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0, base_delay)
+        self.max_delay = max(self.base_delay, max_delay)
+        self.jitter = jitter
+        self.retryable_codes = set(retryable_codes or [])
+        self.retryable_patterns = [re.compile(pattern) for pattern
+                                   in (retryable_patterns or [])]
+        self.fatal_patterns = [re.compile(pattern) for pattern
+                               in (fatal_patterns or [])]
+        # seeded from the OS, so processes on different nodes draw
+        # different delays
+        self.random = random.Random()
+
+    @staticmethod
+    def from_retry_time(retry_time, sleep_time, **kwargs):
+        """
+        function: build the policy of the old retry_time and sleep_time
+                  parameters, retry_time is the number of retries
+        input : retry_time, sleep_time, kwargs
+        output: RetryPolicy
+        """
+        kwargs.setdefault("max_delay", sleep_time * 8)
+        return RetryPolicy(max_attempts=retry_time + 1,
+                           base_delay=sleep_time, **kwargs)
+
+    @staticmethod
+    def for_ssh(max_attempts=3, base_delay=1, max_delay=10):
+        """
+        function: policy of ssh, pssh and pscp commands, only connection
+                  failures are retried and a timeout is not
+        input : max_attempts, base_delay, max_delay
+        output: RetryPolicy
+        """
+        return RetryPolicy(max_attempts, base_delay, max_delay,
+                           retryable_codes=[SSH_ERROR_CODE],
+                           retryable_patterns=SSH_RETRYABLE_PATTERNS,
+                           fatal_patterns=["Timed out"])
+
+    def get_delay(self, attempt):
+        """
+        function: get the delay after the attempt failed, attempts start
+                  at 1
+        input : attempt
+        output: float
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        if self.jitter == JITTER_FULL:
+            return self.random.uniform(0, delay)
+        if self.jitter == JITTER_EQUAL:
+            return delay / 2.0 + self.random.uniform(0, delay / 2.0)
+        return delay
+
+    def is_retryable(self, status, output=""):
+        """
+        function: classify a failure by exit code and output
+        input : status, output
+        output: bool
+        """
+        if status == 0:
+            return False
+        output = str(output)
+        if any(pattern.search(output) for pattern in self.fatal_patterns):
+            return False
+        if not self.retryable_codes and not self.retryable_patterns:
+            return True
+        return (status in self.retryable_codes
+                or any(pattern.search(output)
+                       for pattern in self.retryable_patterns))
+
+    def run(self, func, retryable=None):
+        """
+        function: call func until it succeeds, fails in a way that is not
+                  retryable or the attempts are used up
+        input : func returning (status, output, ...), retryable deciding
+                whether a result is retried, is_retryable by default
+        output: the last result of func
+        """
+        if retryable is None:
+            retryable = lambda result: self.is_retryable(result[0], result[1])
+        attempt = 1
+        while True:
+            result = func()
+            if attempt >= self.max_attempts or not retryable(result):
+                return result
+            time.sleep(self.get_delay(attempt))
+            attempt += 1
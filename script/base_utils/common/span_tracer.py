@@ -0,0 +1,401 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : span_tracer.py records how long the steps of an om
+#                operation take. Every finished span is appended to the
+#                json lines trace file of the operation.
+#############################################################################
+
+import atexit
+import binascii
+import functools
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from base_utils.security.sensitive_mask import SensitiveMask
+
+# the trace of an operation is passed to the child processes, pssh and pscp
+# append one record per host to the same file
+TRACE_FILE_ENV = "OM_TRACE_FILE"
+TRACE_ID_ENV = "OM_TRACE_ID"
+TRACE_PARENT_ENV = "OM_TRACE_PARENT"
+TRACE_DIR_NAME = "trace"
+TRACE_FILE_SUFFIX = ".jsonl"
+# trace files kept in the trace directory
+MAX_TRACE_FILES = 50
+TRACE_FILE_MODE = 0o600
+TRACE_DIR_MODE = 0o700
+# commands longer than this are cut in the trace
+MAX_CMD_LENGTH = 512
+
+KIND_OPERATION = "operation"
+KIND_STEP = "step"
+KIND_SPAN = "span"
+KIND_REMOTE = "remote"
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def new_span_id():
+    """
+    function: get a random span id
+    input : NA
+    output: str
+    """
+    return binascii.hexlify(os.urandom(8)).decode()
+
+
+def mask_cmd(cmd):
+    """
+    function: mask the passwords of a command and cut it
+    input : cmd
+    output: str
+    """
+    if cmd is None:
+        return None
+    cmd = SensitiveMask.mask_pwd(cmd)
+    if len(cmd) > MAX_CMD_LENGTH:
+        cmd = cmd[:MAX_CMD_LENGTH] + "..."
+    return cmd
+
+
+def clean_trace_dir(trace_dir, keep=MAX_TRACE_FILES):
+    """
+    function: remove the oldest trace files, so that at most keep files
+              are left
+    input : trace_dir, keep
+    output: NA
+    """
+    files = []
+    for name in os.listdir(trace_dir):
+        path = os.path.join(trace_dir, name)
+        if name.endswith(TRACE_FILE_SUFFIX) and os.path.isfile(path):
+            files.append((os.path.getmtime(path), path))
+    files.sort()
+    for (_, path) in files[:max(0, len(files) - keep)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class SpanTracer(object):
+    """
+    Trace of one om operation. A span is one timed piece of the operation,
+    spans opened in a thread nest under the span that is open in the same
+    thread, and under the current step otherwise.
+    Tracing never fails the operation, a record that can not be written is
+    dropped.
+    """
+    _current = None
+
+    def __init__(self, trace_file, operation, trace_id=None, parent_id=None):
+        """
+        function: open the trace file
+        input : trace_file, operation, trace_id, parent_id
+        output: NA
+        """
+        self.trace_file = trace_file
+        self.operation = operation
+        self.trace_id = trace_id or new_span_id()
+        self.node = socket.gethostname()
+        self.pid = os.getpid()
+        self.fd = os.open(trace_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                          TRACE_FILE_MODE)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.root = self._new_record(KIND_OPERATION, operation, parent_id,
+                                     None, " ".join(sys.argv), {})
+        self.step = None
+
+    @staticmethod
+    def start(operation, trace_dir):
+        """
+        function: start the trace of an operation. An operation started by
+                  another traced operation appends to the trace of its
+                  parent
+        input : operation, trace_dir
+        output: SpanTracer, or None if the trace file can not be created
+        """
+        if SpanTracer._current is not None:
+            return SpanTracer._current
+        try:
+            trace_file = os.environ.get(TRACE_FILE_ENV, "")
+            if trace_file and os.path.isfile(trace_file):
+                tracer = SpanTracer(trace_file, operation,
+                                    os.environ.get(TRACE_ID_ENV),
+                                    os.environ.get(TRACE_PARENT_ENV))
+            else:
+                if not os.path.isdir(trace_dir):
+                    os.makedirs(trace_dir, TRACE_DIR_MODE)
+                clean_trace_dir(trace_dir, MAX_TRACE_FILES - 1)
+                trace_file = os.path.join(trace_dir, "%s-%s-%d%s" % (
+                    operation, time.strftime("%Y-%m-%d_%H%M%S"),
+                    os.getpid(), TRACE_FILE_SUFFIX))
+                tracer = SpanTracer(trace_file, operation)
+        except (OSError, IOError):
+            return None
+        os.environ[TRACE_FILE_ENV] = tracer.trace_file
+        os.environ[TRACE_ID_ENV] = tracer.trace_id
+        os.environ[TRACE_PARENT_ENV] = tracer.root["span_id"]
+        SpanTracer._current = tracer
+        atexit.register(tracer.finish)
+        return tracer
+
+    @staticmethod
+    def current():
+        """
+        function: get the tracer of the running operation
+        input : NA
+        output: SpanTracer or None
+        """
+        return SpanTracer._current
+
+    def _new_record(self, kind, step, parent_id, node, cmd, fields):
+        """
+        function: create the record of a span that starts now
+        input : kind, step, parent_id, node, cmd, fields
+        output: dict
+        """
+        record = {"trace_id": self.trace_id,
+                  "span_id": new_span_id(),
+                  "parent_id": parent_id,
+                  "operation": self.operation,
+                  "kind": kind,
+                  "step": step,
+                  "node": node or self.node,
+                  "pid": os.getpid(),
+                  "start": round(time.time(), 6)}
+        if cmd is not None:
+            record["cmd"] = mask_cmd(cmd)
+        record.update(fields)
+        record["_begin"] = time.monotonic()
+        return record
+
+    def _write(self, record, status, error=None):
+        """
+        function: write a finished span to the trace file
+        input : record, status, error
+        output: NA
+        """
+        record["duration"] = round(time.monotonic() - record.pop("_begin"), 6)
+        record["status"] = status
+        if error is not None:
+            record["error"] = SensitiveMask.mask_pwd(str(error))[:1024]
+        line = json.dumps(record, sort_keys=True) + "\n"
+        with self.lock:
+            if self.fd is None:
+                return
+            try:
+                # one write of an O_APPEND file, so the records of the
+                # threads and the child processes do not interleave
+                os.write(self.fd, line.encode("utf-8"))
+            except OSError:
+                pass
+
+    def _stack(self):
+        """
+        function: get the open spans of the current thread
+        input : NA
+        output: list
+        """
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def _parent_id(self):
+        """
+        function: get the span id the next span of this thread nests under
+        input : NA
+        output: str
+        """
+        stack = self._stack()
+        if stack:
+            return stack[-1]["span_id"]
+        if self.step is not None:
+            return self.step["span_id"]
+        return self.root["span_id"]
+
+    @contextmanager
+    def span(self, step, node=None, cmd=None, **fields):
+        """
+        function: time the body of a with statement. The child processes
+                  started in the body are traced under this span
+        input : step, node, cmd, fields
+        output: the record of the span, fields may be added to it
+        """
+        record = self._new_record(KIND_SPAN, step, self._parent_id(), node,
+                                  cmd, fields)
+        stack = self._stack()
+        stack.append(record)
+        os.environ[TRACE_PARENT_ENV] = record["span_id"]
+        try:
+            yield record
+        except SystemExit as e:
+            self._close(record, STATUS_OK if not e.code else STATUS_ERROR,
+                        None if not e.code else e.code)
+            raise
+        except BaseException as e:
+            self._close(record, STATUS_ERROR, e)
+            raise
+        else:
+            self._close(record, STATUS_OK)
+
+    def _close(self, record, status, error=None):
+        """
+        function: pop a span of the current thread and write it
+        input : record, status, error
+        output: NA
+        """
+        stack = self._stack()
+        if record in stack:
+            stack.remove(record)
+        os.environ[TRACE_PARENT_ENV] = self._parent_id()
+        self._write(record, status, error)
+
+    def mark_step(self, step):
+        """
+        function: finish the current step of the operation and start the
+                  next one
+        input : step
+        output: NA
+        """
+        with self.lock:
+            previous = self.step
+            self.step = self._new_record(KIND_STEP, str(step),
+                                         self.root["span_id"], None, None, {})
+        if previous is not None:
+            self._write(previous, STATUS_OK)
+        if not self._stack():
+            os.environ[TRACE_PARENT_ENV] = self.step["span_id"]
+
+    def finish(self, error=None):
+        """
+        function: finish the current step and the operation, and close the
+                  trace file
+        input : error
+        output: NA
+        """
+        if SpanTracer._current is self:
+            SpanTracer._current = None
+        # a forked child leaves the trace to the process that started it
+        if self.fd is None or os.getpid() != self.pid:
+            return
+        status = STATUS_OK if error is None else STATUS_ERROR
+        if self.step is not None:
+            self._write(self.step, status, error)
+            self.step = None
+        self._write(self.root, status, error)
+        with self.lock:
+            os.close(self.fd)
+            self.fd = None
+
+
+class _NoSpan(object):
+    """
+    span used when no operation is traced
+    """
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def trace_span(step, node=None, cmd=None, **fields):
+    """
+    function: context manager timing a span of the running operation, it
+              does nothing when the operation is not traced
+    input : step, node, cmd, fields
+    output: context manager
+    """
+    tracer = SpanTracer.current()
+    if tracer is None:
+        return _NoSpan()
+    return tracer.span(step, node, cmd, **fields)
+
+
+def mark_step(step):
+    """
+    function: start the next step of the running operation
+    input : step
+    output: NA
+    """
+    tracer = SpanTracer.current()
+    if tracer is not None:
+        tracer.mark_step(step)
+
+
+def finish_trace(error=None):
+    """
+    function: finish the trace of the running operation, the operation is
+              recorded as failed if an error is given
+    input : error
+    output: NA
+    """
+    tracer = SpanTracer.current()
+    if tracer is not None:
+        tracer.finish(error)
+
+
+def _bind_args(func, args, kwargs):
+    """
+    function: map the arguments of a call to the parameter names
+    input : func, args, kwargs
+    output: dict
+    """
+    code = func.__code__
+    bound = dict(zip(code.co_varnames[:code.co_argcount], args))
+    bound.update(kwargs)
+    return bound
+
+
+def traced(step, cmd_arg=None, nodes_arg=None):
+    """
+    function: decorator timing every call of a function as a span. The step
+              may refer to the arguments of the call, as in
+              "collect.{logType}"
+    input : step, name of the argument holding the command, name of the
+            argument holding the host list
+    output: decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = SpanTracer.current()
+            if tracer is None:
+                return func(*args, **kwargs)
+            bound = _bind_args(func, args, kwargs)
+            try:
+                name = step.format(**bound)
+            except (KeyError, IndexError, ValueError):
+                name = step
+            fields = {}
+            if nodes_arg is not None:
+                nodes = bound.get(nodes_arg)
+                fields["nodes"] = len(nodes) if nodes else "all"
+            with tracer.span(name, cmd=bound.get(cmd_arg) if cmd_arg
+                             else None, **fields):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,459 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : preflight.py checks the nodes before an operation. Rules
+#                declare the facts they need, the facts of a node are
+#                fetched with one remote call and the rules are evaluated
+#                locally, every violation is reported at once.
+#############################################################################
+
+import re
+import time
+from multiprocessing.dummy import Pool as ThreadPool
+
+from gspylib.common.ErrorCode import ErrorCode
+from base_utils.executor.remote_batch import RemoteBatch
+
+LEVEL_ERROR = "ERROR"
+LEVEL_WARNING = "WARNING"
+DEFAULT_PARALLEL_NUM = 8
+# state of a listening socket in /proc/net/tcp
+TCP_LISTEN = "0A"
+SWITCHING_DB_STATES = ("Promoting", "Wait", "Demoting")
+
+
+class Fact(object):
+    """
+    a fact of a node, the output of a command turned into a value
+    """
+
+    def __init__(self, key, cmd, parse=None):
+        """
+        function: initialize the fact
+        input : key, unique name of the fact
+                cmd, command printing the fact
+                parse, function turning the output into the value, the
+                stripped output by default
+        output: NA
+        """
+        self.key = key
+        self.cmd = cmd
+        self.parse = parse or (lambda output: output.strip())
+
+
+class Rule(object):
+    """
+    a rule checked on some nodes
+    """
+
+    def __init__(self, name, facts, check, hosts, level=LEVEL_ERROR):
+        """
+        function: initialize the rule
+        input : name
+                facts, list of Fact the rule needs on each of its hosts
+                check, function(host, facts) returning the list of
+                violation messages of a host, facts maps every host to
+                the dict of its fact values
+                hosts
+                level, LEVEL_ERROR or LEVEL_WARNING
+        output: NA
+        """
+        self.name = name
+        self.facts = facts
+        self.check = check
+        self.hosts = list(hosts)
+        self.level = level
+
+
+class Violation(object):
+    """
+    a rule broken on a node
+    """
+
+    def __init__(self, rule, host, message):
+        """
+        function: initialize the violation
+        input : rule, host, message
+        output: NA
+        """
+        self.rule = rule.name
+        self.level = rule.level
+        self.host = host
+        self.message = message
+
+    def __str__(self):
+        return "[%s] [%s] %s: %s" % (self.level, self.host, self.rule,
+                                     self.message)
+
+
+class PreflightEngine(object):
+    """
+    fetch the facts the rules need and evaluate the rules
+    """
+
+    def __init__(self, ssh_tool=None, mpprc_file="", local_mode=False,
+                 parallel_jobs=DEFAULT_PARALLEL_NUM):
+        """
+        function: initialize the engine
+        input : ssh_tool, mpprc_file, local_mode, parallel_jobs
+        output: NA
+        """
+        self.ssh_tool = ssh_tool
+        self.mpprc_file = mpprc_file
+        self.local_mode = local_mode
+        self.parallel_jobs = parallel_jobs
+        self.rules = []
+        # host -> key -> value, host -> key -> error
+        self.facts = {}
+        self.errors = {}
+        # local time before and after the facts were fetched
+        self.fetch_window = (0.0, 0.0)
+
+    def add_rule(self, rule):
+        """
+        function: add a rule
+        input : rule
+        output: PreflightEngine
+        """
+        self.rules.append(rule)
+        return self
+
+    def add_rules(self, rules):
+        """
+        function: add several rules
+        input : rules
+        output: PreflightEngine
+        """
+        self.rules.extend(rules)
+        return self
+
+    def fetch(self):
+        """
+        function: fetch the facts of all rules, a fact needed by several
+                  rules is fetched once, and a node gets all its facts in
+                  one remote call
+        input : NA
+        output: NA
+        """
+        facts = {}
+        hosts = {}
+        for rule in self.rules:
+            for fact in rule.facts:
+                facts.setdefault(fact.key, fact)
+                hosts.setdefault(fact.key, set()).update(rule.hosts)
+        batch = RemoteBatch(self.ssh_tool, self.mpprc_file, self.local_mode,
+                            stop_on_error=False)
+        for (key, fact) in facts.items():
+            batch.add(key, fact.cmd, sorted(hosts[key]))
+        all_hosts = sorted(set(host for rule in self.rules
+                               for host in rule.hosts))
+        start = time.time()
+        results = batch.run(all_hosts) if facts else {}
+        self.fetch_window = (start, time.time())
+        if batch.local_mode and len(all_hosts) == 1 and results:
+            # the local result is keyed by the local name
+            results = {all_hosts[0]: list(results.values())[0]}
+        for (host, step_results) in results.items():
+            values = self.facts.setdefault(host, {})
+            errors = self.errors.setdefault(host, {})
+            for result in step_results:
+                if result.status != 0:
+                    errors[result.name] = (result.error or result.output
+                                           or "exit code %d" % result.status)
+                    continue
+                try:
+                    values[result.name] = facts[result.name].parse(
+                        result.output)
+                except Exception as e:
+                    errors[result.name] = str(e)
+
+    def evaluate_one(self, item):
+        """
+        function: evaluate a rule on a host, a missing fact is a violation
+        input : (rule, host)
+        output: list of Violation
+        """
+        (rule, host) = item
+        missing = [fact.key for fact in rule.facts
+                   if fact.key not in self.facts.get(host, {})]
+        if missing:
+            return [Violation(rule, host, ErrorCode.GAUSS_502["GAUSS_50219"]
+                              % key + " Error: %s" % self.errors.get(
+                                  host, {}).get(key, "no output").strip())
+                    for key in missing]
+        try:
+            messages = rule.check(host, self.facts) or []
+        except Exception as e:
+            messages = [str(e)]
+        return [Violation(rule, host, message) for message in messages]
+
+    def evaluate(self):
+        """
+        function: evaluate every rule on each of its hosts in parallel
+        input : NA
+        output: list of Violation, in the order of the rules and hosts
+        """
+        items = [(rule, host) for rule in self.rules for host in rule.hosts]
+        if not items:
+            return []
+        pool = ThreadPool(max(1, min(self.parallel_jobs, len(items))))
+        try:
+            results = pool.map(self.evaluate_one, items)
+        finally:
+            pool.close()
+            pool.join()
+        return [violation for result in results for violation in result]
+
+    def run(self):
+        """
+        function: fetch the facts and evaluate the rules
+        input : NA
+        output: list of Violation
+        """
+        self.fetch()
+        return self.evaluate()
+
+    @staticmethod
+    def get_errors(violations):
+        """
+        function: get the violations of the error level
+        input : violations
+        output: list of Violation
+        """
+        return [item for item in violations if item.level == LEVEL_ERROR]
+
+    @staticmethod
+    def format_report(violations):
+        """
+        function: format all violations, the errors first
+        input : violations
+        output: str
+        """
+        ordered = PreflightEngine.get_errors(violations) + [
+            item for item in violations if item.level != LEVEL_ERROR]
+        return "\n".join(str(item) for item in ordered)
+
+
+##############################################################################
+# facts
+##############################################################################
+def fact_clock():
+    """
+    function: the clock of a node in seconds
+    input : NA
+    output: Fact
+    """
+    return Fact("clock", "date +%s.%N", lambda output: float(output.strip()))
+
+
+def parse_entry(output):
+    """
+    function: parse a passwd or group entry of getent
+    input : output
+    output: list of fields, None if there is no entry
+    """
+    line = output.strip()
+    return line.split(":") if line else None
+
+
+def fact_user(user):
+    """
+    function: the passwd entry of a user
+    input : user
+    output: Fact
+    """
+    return Fact("user %s" % user, "getent passwd '%s' || true" % user,
+                parse_entry)
+
+
+def fact_group(group):
+    """
+    function: the group entry of a group
+    input : group
+    output: Fact
+    """
+    return Fact("group %s" % group, "getent group '%s' || true" % group,
+                parse_entry)
+
+
+def fact_dir_entries(path):
+    """
+    function: the entries of a directory, empty if it does not exist
+    input : path
+    output: Fact
+    """
+    return Fact("entries %s" % path,
+                "if [ -d '%s' ]; then ls -A '%s'; fi" % (path, path),
+                lambda output: output.split())
+
+
+def parse_listen_ports(output):
+    """
+    function: parse the listening ports of /proc/net/tcp and tcp6
+    input : output
+    output: set of ports
+    """
+    ports = set()
+    for line in output.splitlines():
+        words = line.split()
+        if len(words) > 3 and words[3] == TCP_LISTEN and ":" in words[1]:
+            ports.add(int(words[1].rsplit(":", 1)[1], 16))
+    return ports
+
+
+def fact_listen_ports():
+    """
+    function: the TCP ports a node listens on
+    input : NA
+    output: Fact
+    """
+    return Fact("listen ports",
+                "cat /proc/net/tcp /proc/net/tcp6 2>/dev/null; true",
+                parse_listen_ports)
+
+
+def parse_db_state(output):
+    """
+    function: parse the db_state of gs_ctl query
+    input : output
+    output: state, None if the instance is not running
+    """
+    if "Is server running?" in output:
+        return None
+    states = re.findall(r'db_state\s*:\s*(\w+)', output)
+    return states[0] if states else ""
+
+
+def fact_db_state(datadir):
+    """
+    function: the state of an instance, the command never fails so a
+              stopped instance is a state too
+    input : datadir
+    output: Fact
+    """
+    return Fact("db_state %s" % datadir,
+                "gs_ctl query -D %s 2>&1; true" % datadir, parse_db_state)
+
+
+##############################################################################
+# rules
+##############################################################################
+def rule_time_sync(hosts, engine, max_skew, level=LEVEL_WARNING):
+    """
+    function: the clock of a node must not be more than max_skew seconds
+              away from the local clock, the time the fetch took is
+              allowed on top
+    input : hosts, engine, max_skew, level
+    output: Rule
+    """
+    def check(host, facts):
+        (start, end) = engine.fetch_window
+        clock = facts[host]["clock"]
+        if start - max_skew <= clock <= end + max_skew:
+            return []
+        skew = clock - start if clock < start else clock - end
+        return ["The clock differs from the local node by %.3fs, more "
+                "than %ss." % (skew, max_skew)]
+    return Rule("time sync", [fact_clock()], check, hosts, level)
+
+
+def rule_user_group(hosts, user, group):
+    """
+    function: the user and the group must exist, the primary group of
+              the user is only checked on the local node
+    input : hosts, user, group
+    output: Rule
+    """
+    user_fact = fact_user(user)
+    group_fact = fact_group(group)
+
+    def check(host, facts):
+        user_entry = facts[host][user_fact.key]
+        group_entry = facts[host][group_fact.key]
+        messages = []
+        if not user_entry:
+            messages.append(ErrorCode.GAUSS_357["GAUSS_35704"]
+                            % ("User", user, host))
+        if not group_entry:
+            messages.append(ErrorCode.GAUSS_357["GAUSS_35704"]
+                            % ("Group", group, host))
+        return messages
+    return Rule("user and group", [user_fact, group_fact], check, hosts)
+
+
+def rule_dir_empty(host_paths):
+    """
+    function: the directories must be empty or not exist
+    input : host_paths, dict of host to list of paths
+    output: list of Rule, one per path
+    """
+    rules = []
+    paths = sorted(set(path for items in host_paths.values()
+                       for path in items))
+    for path in paths:
+        fact = fact_dir_entries(path)
+        hosts = [host for (host, items) in host_paths.items()
+                 if path in items]
+
+        def check(host, facts, key=fact.key, path=path):
+            if not facts[host][key]:
+                return []
+            return [ErrorCode.GAUSS_502["GAUSS_50202"] % path]
+        rules.append(Rule("empty directory", [fact], check, hosts))
+    return rules
+
+
+def rule_ports_free(host_ports, level=LEVEL_ERROR):
+    """
+    function: the ports must not be listened on
+    input : host_ports, dict of host to list of ports
+            level
+    output: Rule
+    """
+    fact = fact_listen_ports()
+
+    def check(host, facts):
+        used = sorted(set(host_ports[host]) & facts[host][fact.key])
+        return [ErrorCode.GAUSS_506["GAUSS_50601"] % port for port in used]
+    return Rule("free ports", [fact], check, list(host_ports.keys()), level)
+
+
+def rule_instance_state(host_dirs, allow_stopped=False):
+    """
+    function: the instances must not be in switchover or failover, and
+              must be running unless allow_stopped
+    input : host_dirs, dict of host to list of data directories
+            allow_stopped
+    output: list of Rule, one per data directory
+    """
+    rules = []
+    dirs = sorted(set(path for items in host_dirs.values()
+                      for path in items))
+    for datadir in dirs:
+        fact = fact_db_state(datadir)
+        hosts = [host for (host, items) in host_dirs.items()
+                 if datadir in items]
+
+        def check(host, facts, key=fact.key):
+            state = facts[host][key]
+            if state in SWITCHING_DB_STATES:
+                return [ErrorCode.GAUSS_358["GAUSS_35808"] % host]
+            if not state and not allow_stopped:
+                return [ErrorCode.GAUSS_516["GAUSS_51651"] % host]
+            return []
+        rules.append(Rule("instance state", [fact], check, hosts))
+    return rules
@@ -0,0 +1,296 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : remote_batch.py collects the commands to run on each host
+#                and runs them as one generated script over one session per
+#                host, reporting the exit code and stderr of every step.
+#############################################################################
+
+import base64
+import subprocess
+import uuid
+
+from base_utils.common.constantsbase import ConstantsBase
+from gspylib.common.ErrorCode import ErrorCode
+from base_utils.os.net_util import NetUtil
+from base_utils.security.sensitive_mask import SensitiveMask
+
+MARKER = "@@OM_BATCH"
+# exit code of a step skipped after an earlier step failed
+SKIPPED = -1
+
+
+class BatchStepResult(object):
+    """
+    result of one step on one host
+    """
+
+    def __init__(self, name, cmd, status=SKIPPED, output="", error=""):
+        """
+        function: initialize the result
+        input : name, cmd, status, output, error
+        output: NA
+        """
+        self.name = name
+        self.cmd = cmd
+        self.status = status
+        self.output = output
+        self.error = error
+
+    def __repr__(self):
+        return "%s(%s)" % (self.name, self.status)
+
+
+class RemoteBatch(object):
+    """
+    per host batch of remote commands
+    """
+
+    def __init__(self, ssh_tool=None, mpprc_file="", local_mode=False,
+                 stop_on_error=True):
+        """
+        function: initialize the batch. Without ssh tool or in local mode
+                  the steps run on the local node only
+        input : ssh_tool, mpprc_file, local_mode, stop_on_error
+        output: NA
+        """
+        self.ssh_tool = ssh_tool
+        self.mpprc_file = mpprc_file
+        self.local_mode = local_mode or ssh_tool is None
+        self.stop_on_error = stop_on_error
+        # (name, cmd, hosts or None for every host)
+        self.steps = []
+
+    def add(self, name, cmd, hosts=None):
+        """
+        function: add a step
+        input : name, cmd, hosts
+        output: RemoteBatch
+        """
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        self.steps.append((name, cmd, list(hosts) if hosts else None))
+        return self
+
+    def add_create_dir(self, path, mode=ConstantsBase.MAX_DIRECTORY_MODE,
+                       hosts=None):
+        """
+        function: add a step creating a directory and its parents
+        input : path, mode, hosts
+        output: RemoteBatch
+        """
+        return self.add("create %s" % path,
+                        "mkdir -p -m %s '%s'" % (mode, path), hosts)
+
+    def add_change_mode(self, mode, path, recursive=False, hosts=None):
+        """
+        function: add a chmod step
+        input : mode, path, recursive, hosts
+        output: RemoteBatch
+        """
+        return self.add("chmod %s" % path, "chmod %s%s '%s'" % (
+            "-R " if recursive else "", mode, path), hosts)
+
+    def add_change_owner(self, owner, path, recursive=False, hosts=None):
+        """
+        function: add a chown step
+        input : owner, path, recursive, hosts
+        output: RemoteBatch
+        """
+        return self.add("chown %s" % path, "chown %s%s '%s'" % (
+            "-R " if recursive else "", owner, path), hosts)
+
+    def get_host_steps(self, hosts):
+        """
+        function: get the steps of every host
+        input : hosts
+        output: dict
+        """
+        return dict((host, [(name, cmd) for (name, cmd, stepHosts)
+                            in self.steps
+                            if stepHosts is None or host in stepHosts])
+                    for host in hosts)
+
+    def build_script(self, steps, token):
+        """
+        function: build the script of one host. Each step runs in its own
+                  subshell with stderr captured and stdin closed, and is
+                  framed by marker lines carrying its index and exit code,
+                  the script itself always exits 0 so the markers decide
+                  the result
+        input : steps, token
+        output: str
+        """
+        lines = ["exec 3>&1", "om_batch_failed=0"]
+        for (index, (_, cmd)) in enumerate(steps):
+            lines.append("if [ $om_batch_failed -eq 0 ]; then")
+            lines.append("echo '%s %s BEGIN %d'" % (MARKER, token, index))
+            lines.append("om_batch_err=$( { %s\n} </dev/null 2>&1 1>&3 3>&-)" % cmd)
+            lines.append("om_batch_rc=$?")
+            lines.append("[ -n \"$om_batch_err\" ] && printf '%%s\\n' "
+                         "\"$om_batch_err\" | sed 's/^/%s %s ERR %d /'"
+                         % (MARKER, token, index))
+            lines.append("echo '%s %s END %d '$om_batch_rc"
+                         % (MARKER, token, index))
+            if self.stop_on_error:
+                lines.append("[ $om_batch_rc -ne 0 ] && om_batch_failed=1")
+            lines.append("fi")
+        lines.append("exit 0")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def get_script_cmd(script):
+        """
+        function: wrap the script into one command line without quotes or
+                  $, the callers embed it in "..." of a local shell, so an
+                  expansion here would run on the local node. The steps
+                  read /dev/null, so none of them can eat the rest of the
+                  script from the pipe
+        input : script
+        output: str
+        """
+        return "echo %s | base64 -d | bash" % base64.b64encode(
+            script.encode()).decode()
+
+    @staticmethod
+    def parse_output(steps, token, output):
+        """
+        function: split the output of a host into the results of its steps
+        input : steps, token, output
+        output: list of BatchStepResult, None if no step started
+        """
+        results = [BatchStepResult(name, cmd) for (name, cmd) in steps]
+        prefix = "%s %s " % (MARKER, token)
+        outputs = [[] for _ in steps]
+        errors = [[] for _ in steps]
+        current = None
+        started = False
+        for line in output.splitlines():
+            if not line.startswith(prefix):
+                if current is not None:
+                    outputs[current].append(line)
+                continue
+            words = line[len(prefix):].split(" ", 2)
+            if len(words) < 2 or not words[1].isdigit() \
+                    or int(words[1]) >= len(steps):
+                continue
+            index = int(words[1])
+            if words[0] == "BEGIN":
+                current = index
+                started = True
+            elif words[0] == "ERR":
+                errors[index].append(words[2] if len(words) > 2 else "")
+            elif words[0] == "END":
+                results[index].status = int(words[2]) \
+                    if len(words) > 2 and words[2].strip().isdigit() else 1
+                current = None
+        if not started:
+            return None
+        for (index, result) in enumerate(results):
+            result.output = "\n".join(outputs[index])
+            result.error = "\n".join(errors[index])
+        return results
+
+    def run_locally(self, script):
+        """
+        function: run the script on the local node
+        input : script
+        output: str
+        """
+        cmd = self.get_script_cmd(script)
+        if self.mpprc_file:
+            cmd = "source %s; %s" % (self.mpprc_file, cmd)
+        return subprocess.getstatusoutput(cmd)[1]
+
+    def run(self, hosts=None):
+        """
+        function: run the steps with one session per host, hosts that get
+                  the same steps share one ssh call
+        input : hosts, every host of the ssh tool by default
+        output: dict of host to list of BatchStepResult
+        """
+        if self.local_mode:
+            hosts = [NetUtil.GetHostIpOrName()]
+        elif not hosts:
+            hosts = self.ssh_tool.hostNames[:]
+        token = uuid.uuid4().hex[:12]
+        groups = {}
+        for (host, steps) in self.get_host_steps(hosts).items():
+            if steps:
+                groups.setdefault(tuple(steps), []).append(host)
+        results = {}
+        for (steps, group_hosts) in groups.items():
+            script = self.build_script(steps, token)
+            if self.local_mode:
+                outputs = {group_hosts[0]: self.run_locally(script)}
+            else:
+                self.ssh_tool.getSshStatusOutput(
+                    self.get_script_cmd(script), group_hosts,
+                    self.mpprc_file)
+                outputs = self.ssh_tool.parseSshOutput(group_hosts)
+            for host in group_hosts:
+                output = outputs.get(host, "")
+                step_results = self.parse_output(steps, token, output)
+                if step_results is None:
+                    # the session itself failed, report it on the first step
+                    step_results = [BatchStepResult(name, cmd)
+                                    for (name, cmd) in steps]
+                    step_results[0].status = 1
+                    step_results[0].error = output
+                results[host] = step_results
+        return results
+
+    @staticmethod
+    def get_failures(results):
+        """
+        function: get the failed steps, a skipped step is a failure unless
+                  an earlier step on the same host failed, as it never ran
+        input : results
+        output: list of (host, BatchStepResult)
+        """
+        failures = []
+        for (host, step_results) in results.items():
+            failed = False
+            for result in step_results:
+                if result.status == 0 or (result.status == SKIPPED
+                                          and failed):
+                    continue
+                failures.append((host, result))
+                failed = True
+        return failures
+
+    def execute(self, hosts=None):
+        """
+        function: run the steps and raise an error naming every failed
+                  step and its host
+        input : hosts
+        output: dict of host to list of BatchStepResult
+        """
+        results = self.run(hosts)
+        failures = self.get_failures(results)
+        if failures:
+            message = "\n".join(
+                "[%s] %s: %s. %s" % (
+                    host, result.name,
+                    "not run" if result.status == SKIPPED
+                    else "exit code %d" % result.status,
+                    SensitiveMask.mask_pwd(result.error or result.output))
+                for (host, result) in failures)
+            raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"]
+                            % SensitiveMask.mask_pwd(failures[0][1].cmd)
+                            + " Error:\n%s" % message)
+        return results
@@ -30,6 +30,7 @@ import pwd
 from gspylib.common.ErrorCode import ErrorCode
 from base_utils.common.exceptions import CommandNotFoundException
 from base_utils.common.fast_popen import FastPopen
+from base_utils.common.retry_policy import RetryPolicy
 from base_utils.security.security_checker import SecurityChecker
 
 CMD_PATH = ['/bin', '/usr/local/bin', '/usr/bin', '/sbin', '/usr/sbin']
@@ -556,26 +557,24 @@ class CmdUtil(object):
         return output
 
     @staticmethod
-    def retryGetstatusoutput(cmd, retry_time=3, sleep_time=1, check_output=False):
+    def retryGetstatusoutput(cmd, retry_time=3, sleep_time=1, check_output=False,
+                             retry_policy=None):
         """
         function : retry getStatusoutput
         @param cmd: command  going to be execute
         @param retry_time: default retry 3 times after execution failure
-        @param sleep_time: default sleep 1 second then start retry
+        @param sleep_time: default sleep 1 second then start retry,
+                           the delay doubles with each retry
+        @param check_output: an empty output is retried as well
+        @param retry_policy: RetryPolicy used instead of retry_time
+                             and sleep_time
         """
-        retry_time += 1
-        for _ in range(retry_time):
-            (status, output) = subprocess.getstatusoutput(cmd)
-            if status != 0:
-                time.sleep(sleep_time)
-            elif check_output:
-                if str(output).strip():
-                    break
-                else:
-                    time.sleep(sleep_time)
-            else:
-                break
-        return status, output
+        if retry_policy is None:
+            retry_policy = RetryPolicy.from_retry_time(retry_time, sleep_time)
+        return retry_policy.run(
+            lambda: subprocess.getstatusoutput(cmd),
+            lambda result: retry_policy.is_retryable(result[0], result[1]) or
+            (result[0] == 0 and check_output and not str(result[1]).strip()))
 
     @staticmethod
     def retry_util_timeout(cmd, timeout, sleep_time=1):
@@ -625,27 +624,25 @@ class CmdUtil(object):
         return env_source_cmd
 
     @staticmethod
-    def retry_exec_by_popen(cmd, retry_time=3, sleep_time=1, check_out=False):
+    def retry_exec_by_popen(cmd, retry_time=3, sleep_time=1, check_out=False,
+                            retry_policy=None):
         """
         function : retry exec_by_popen
         @param cmd: command  going to be execute
         @param retry_time: default retry 3 times after execution failure
-        @param sleep_time: default sleep 1 second then start retry
-        """
-        retry_time += 1
-        for _ in range(retry_time):
-            (status, output) = CmdUtil.exec_by_popen(cmd)
-            if not status:
-                time.sleep(sleep_time)
-
-            elif check_out:
-                if str(output).strip():
-                    break
-                else:
-                    time.sleep(sleep_time)
-            else:
-                break
-        return status, output
+        @param sleep_time: default sleep 1 second then start retry,
+                           the delay doubles with each retry
+        @param retry_policy: RetryPolicy used instead of retry_time
+                             and sleep_time
+        """
+        if retry_policy is None:
+            retry_policy = RetryPolicy.from_retry_time(retry_time, sleep_time)
+        # exec_by_popen returns True on success
+        return retry_policy.run(
+            lambda: CmdUtil.exec_by_popen(cmd),
+            lambda result: (not result[0] and retry_policy.is_retryable(
+                1, result[1])) or
+            (result[0] and check_out and not str(result[1]).strip()))
 
     @staticmethod
     def interactive_with_popen(cmd, password):
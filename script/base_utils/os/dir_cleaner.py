@@ -0,0 +1,236 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : dir_cleaner.py removes the content of instance directories
+#                with os.scandir and unlink, removing the subtrees in
+#                parallel and keeping the entries on the keep list and the
+#                mount points.
+#############################################################################
+
+import errno
+import os
+import stat
+from multiprocessing.dummy import Pool as ThreadPool
+
+from gspylib.common.ErrorCode import ErrorCode
+from base_utils.os.dir_size import DirSize, DEFAULT_PARALLEL_NUM, SPLIT_DEPTH
+
+
+class DirCleaner(object):
+    """
+    parallel directory cleaner
+    """
+
+    @staticmethod
+    def raise_error(path, error):
+        """
+        function: raise the error of removing a path
+        input : path, error
+        output: NA
+        """
+        raise Exception(ErrorCode.GAUSS_502["GAUSS_50207"] % path
+                        + " Error:\n%s." % str(error))
+
+    @staticmethod
+    def remove_file(path, st):
+        """
+        function: unlink one entry that is not a directory, an entry that
+                  is already gone is not an error
+        input : path, st
+        output: size of the removed file
+        """
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            DirCleaner.raise_error(path, e)
+        return DirSize.entry_size(st, False)
+
+    @staticmethod
+    def remove_dir(path, kept):
+        """
+        function: remove an emptied directory, a directory that still
+                  holds a kept mount point is left in place
+        input : path, kept
+        output: NA
+        """
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            if (e.errno in (errno.ENOTEMPTY, errno.EEXIST, errno.EBUSY)
+                    and any(item == path or item.startswith(path + os.sep)
+                            for item in kept)):
+                return
+            DirCleaner.raise_error(path, e)
+
+    @staticmethod
+    def scan(directory, keep_names, keep_paths, targets, kept):
+        """
+        function: remove the files directly under a directory and put its
+                  subdirectories into targets. An entry on keep_names is
+                  kept and its content cleaned, like find ! -name, and a
+                  mount point is kept and its content cleaned
+        input : directory, keep_names, keep_paths, targets, kept
+        output: size and number of the removed files
+        """
+        (size, count) = (0, 0)
+        try:
+            parent_dev = os.lstat(directory).st_dev
+            iterator = os.scandir(directory)
+        except FileNotFoundError:
+            return size, count
+        except OSError as e:
+            DirCleaner.raise_error(directory, e)
+        with iterator:
+            entries = list(iterator)
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            is_dir = stat.S_ISDIR(st.st_mode)
+            if entry.name in keep_names:
+                if is_dir:
+                    (subsize, subcount) = DirCleaner.scan(
+                        entry.path, keep_names, keep_paths, targets, kept)
+                    size += subsize
+                    count += subcount
+                kept.append(entry.path)
+            elif is_dir and (st.st_dev != parent_dev
+                             or entry.path in keep_paths):
+                kept.append(entry.path)
+                (subsize, subcount) = DirCleaner.scan(
+                    entry.path, (), keep_paths, targets, kept)
+                size += subsize
+                count += subcount
+            elif is_dir:
+                targets.append(entry.path)
+            else:
+                size += DirCleaner.remove_file(entry.path, st)
+                count += 1
+        return size, count
+
+    @staticmethod
+    def remove_tree(path, keep_paths=()):
+        """
+        function: remove a directory tree without following symbolic
+                  links, mount points inside it are emptied and kept
+        input : path, keep_paths
+        output: size and number of the removed files, kept mount points
+        """
+        (size, count) = (0, 0)
+        kept = []
+        stack = [(path, False)]
+        while stack:
+            (directory, scanned) = stack.pop()
+            if scanned:
+                DirCleaner.remove_dir(directory, kept)
+                continue
+            stack.append((directory, True))
+            subdirs = []
+            (subsize, subcount) = DirCleaner.scan(
+                directory, (), keep_paths, subdirs, kept)
+            size += subsize
+            count += subcount
+            stack.extend((subdir, False) for subdir in subdirs)
+        return size, count, kept
+
+    @staticmethod
+    def remove_trees(paths, keep_paths=(), parallel=DEFAULT_PARALLEL_NUM):
+        """
+        function: remove several directory trees, splitting them into
+                  subtrees that are removed in parallel
+        input : paths, keep_paths, parallel
+        output: size and number of the removed files
+        """
+        (size, count) = (0, 0)
+        kept = []
+        dirs = []
+        targets = [path for path in paths if os.path.isdir(path)
+                   and not os.path.islink(path)]
+        # go down a few levels until there are enough subtrees to keep the
+        # pool busy, the directories passed on the way are removed last
+        for _ in range(SPLIT_DEPTH):
+            if len(targets) >= parallel:
+                break
+            level = []
+            for path in targets:
+                dirs.append(path)
+                (subsize, subcount) = DirCleaner.scan(
+                    path, (), keep_paths, level, kept)
+                size += subsize
+                count += subcount
+            targets = level
+        if len(targets) > 1 and parallel > 1:
+            pool = ThreadPool(min(parallel, len(targets)))
+            try:
+                results = pool.map(
+                    lambda path: DirCleaner.remove_tree(path, keep_paths),
+                    targets)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [DirCleaner.remove_tree(path, keep_paths)
+                       for path in targets]
+        for (subsize, subcount, subkept) in results:
+            size += subsize
+            count += subcount
+            kept.extend(subkept)
+        for path in reversed(dirs):
+            DirCleaner.remove_dir(path, kept)
+        DirSize.clear_cache()
+        return size, count
+
+    @staticmethod
+    def clean(directory, keep_names=(), keep_paths=(),
+              parallel=DEFAULT_PARALLEL_NUM):
+        """
+        function: remove the content of a directory but keep the directory,
+                  the entries named in keep_names and the mount points
+        input : directory, keep_names, keep_paths, parallel
+        output: size and number of the removed files
+        """
+        if not os.path.isdir(directory):
+            raise Exception(ErrorCode.GAUSS_502["GAUSS_50201"] % directory)
+        targets = []
+        kept = []
+        (size, count) = DirCleaner.scan(directory, keep_names, keep_paths,
+                                        targets, kept)
+        (subsize, subcount) = DirCleaner.remove_trees(targets, keep_paths,
+                                                      parallel)
+        return size + subsize, count + subcount
+
+    @staticmethod
+    def remove_files(paths):
+        """
+        function: remove files such as sockets and lock files
+        input : paths
+        output: size and number of the removed files
+        """
+        (size, count) = (0, 0)
+        for path in paths:
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            size += DirCleaner.remove_file(path, st)
+            count += 1
+        return size, count
@@ -0,0 +1,173 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : dir_size.py sums the size of a directory tree with
+#                os.scandir, walking the top level subdirectories in
+#                parallel and counting hard linked files only once.
+#############################################################################
+
+import os
+import stat
+import threading
+import time
+from multiprocessing.dummy import Pool as ThreadPool
+
+DEFAULT_PARALLEL_NUM = 8
+DEFAULT_CACHE_TTL = 10
+SPLIT_DEPTH = 3
+# st_blocks is always counted in 512 byte units
+BLOCK_UNIT = 512
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class DirSize(object):
+    """
+    directory size walker
+    """
+
+    @staticmethod
+    def entry_size(st, allocated):
+        """
+        function: size of one entry, apparent size only counts regular
+                  files like ls, allocated size counts every block like du
+        input : st, allocated
+        output: int
+        """
+        if allocated:
+            return st.st_blocks * BLOCK_UNIT
+        if stat.S_ISREG(st.st_mode):
+            return st.st_size
+        return 0
+
+    @staticmethod
+    def scan(path, allocated, linked, subdirs):
+        """
+        function: sum the entries of one directory without following
+                  symbolic links, hard linked files are put into linked
+                  and subdirectories into subdirs
+        input : path, allocated, linked, subdirs
+        output: int
+        """
+        total = 0
+        try:
+            iterator = os.scandir(path)
+        except OSError:
+            # removed or unreadable while walking, skip it like ls -R
+            return total
+        with iterator:
+            for entry in iterator:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                size = DirSize.entry_size(st, allocated)
+                if stat.S_ISDIR(st.st_mode):
+                    subdirs.append(entry.path)
+                    total += size
+                elif st.st_nlink > 1:
+                    linked[(st.st_dev, st.st_ino)] = size
+                else:
+                    total += size
+        return total
+
+    @staticmethod
+    def walk(directory, allocated=False):
+        """
+        function: walk one subtree
+        input : directory, allocated
+        output: size of singly linked entries, dict of (dev, ino) to the
+                size of hard linked files
+        """
+        total = 0
+        linked = {}
+        stack = [directory]
+        while stack:
+            total += DirSize.scan(stack.pop(), allocated, linked, stack)
+        return total, linked
+
+    @staticmethod
+    def calculate(directory, allocated=False,
+                  parallel=DEFAULT_PARALLEL_NUM):
+        """
+        function: split the tree into subtrees, walk them in parallel and
+                  merge their results, so a hard link shared by two
+                  subtrees is counted once
+        input : directory, allocated, parallel
+        output: int
+        """
+        st = os.lstat(directory)
+        total = DirSize.entry_size(st, allocated)
+        if not stat.S_ISDIR(st.st_mode):
+            return total
+        linked = {}
+        subdirs = [directory]
+        # a data directory keeps most files under base, so go down a few
+        # levels until there are enough subtrees to keep the pool busy
+        for _ in range(SPLIT_DEPTH):
+            level = []
+            for path in subdirs:
+                total += DirSize.scan(path, allocated, linked, level)
+            subdirs = level
+            if len(subdirs) >= parallel:
+                break
+        if len(subdirs) > 1 and parallel > 1:
+            pool = ThreadPool(min(parallel, len(subdirs)))
+            try:
+                results = pool.map(
+                    lambda path: DirSize.walk(path, allocated), subdirs)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [DirSize.walk(path, allocated) for path in subdirs]
+        for (subtotal, sublinked) in results:
+            total += subtotal
+            linked.update(sublinked)
+        return total + sum(linked.values())
+
+    @staticmethod
+    def get_size(directory, allocated=False, parallel=DEFAULT_PARALLEL_NUM,
+                 cache_ttl=DEFAULT_CACHE_TTL):
+        """
+        function: get the size of a directory or file in bytes, results
+                  are reused for cache_ttl seconds
+        input : directory, allocated, parallel, cache_ttl
+        output: int
+        """
+        key = (os.path.realpath(directory), allocated)
+        now = time.monotonic()
+        if cache_ttl > 0:
+            with _cache_lock:
+                cached = _cache.get(key)
+            if cached and now - cached[0] < cache_ttl:
+                return cached[1]
+        size = DirSize.calculate(key[0], allocated, parallel)
+        with _cache_lock:
+            _cache[key] = (now, size)
+        return size
+
+    @staticmethod
+    def clear_cache():
+        """
+        function: forget the cached results after the tree was changed
+        input : NA
+        output: NA
+        """
+        with _cache_lock:
+            _cache.clear()
@@ -0,0 +1,237 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : disk_bench.py is an in-process storage benchmark engine.
+#                It runs sequential/random read/write workloads with O_DIRECT
+#                against a test file, emulates queue depth with worker
+#                threads and reports IOPS, bandwidth and latency percentiles.
+#############################################################################
+
+import errno
+import mmap
+import os
+import random
+import threading
+import time
+
+MODE_SEQ_READ = "seqread"
+MODE_SEQ_WRITE = "seqwrite"
+MODE_RAND_READ = "randread"
+MODE_RAND_WRITE = "randwrite"
+ALL_MODES = [MODE_SEQ_WRITE, MODE_SEQ_READ, MODE_RAND_WRITE, MODE_RAND_READ]
+
+DEFAULT_BLOCK_SIZE = 8 * 1024
+DEFAULT_IODEPTH = 4
+DEFAULT_RUNTIME = 10
+DEFAULT_FILE_SIZE = 1024 * 1024 * 1024
+# O_DIRECT requires the buffer, offset and length to be aligned
+DIRECT_IO_ALIGN = 4096
+PERCENTILES = [50, 95, 99, 99.9]
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value):
+    """
+    function: parse a size string such as 8K, 1M or 2G to bytes
+    input : value
+    output: int
+    """
+    value = str(value).strip().upper()
+    if value.endswith("B"):
+        value = value[:-1]
+    if value and value[-1] in SIZE_UNITS:
+        return int(value[:-1]) * SIZE_UNITS[value[-1]]
+    return int(value)
+
+
+def percentile(sorted_values, pct):
+    """
+    function: nearest-rank percentile of an already sorted list
+    input : sorted_values, pct
+    output: value
+    """
+    if not sorted_values:
+        return 0
+    rank = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+
+class DiskBench(object):
+    """
+    Benchmark one directory with the configured workloads
+    """
+
+    def __init__(self, directory, block_size=DEFAULT_BLOCK_SIZE,
+                 iodepth=DEFAULT_IODEPTH, runtime=DEFAULT_RUNTIME,
+                 file_size=DEFAULT_FILE_SIZE, modes=None):
+        """
+        function: initialize benchmark options
+        input : directory, block_size, iodepth, runtime, file_size, modes
+        output: NA
+        """
+        self.directory = directory
+        self.block_size = parse_size(block_size)
+        self.iodepth = int(iodepth)
+        self.runtime = float(runtime)
+        self.file_size = parse_size(file_size)
+        self.modes = modes if modes else list(ALL_MODES)
+        for mode in self.modes:
+            if mode not in ALL_MODES:
+                raise ValueError("Unsupported benchmark mode: %s." % mode)
+        if self.block_size <= 0 or self.block_size % DIRECT_IO_ALIGN != 0:
+            raise ValueError("Block size must be a multiple of %d."
+                             % DIRECT_IO_ALIGN)
+        if self.iodepth <= 0 or self.runtime <= 0:
+            raise ValueError("Iodepth and runtime must be greater than 0.")
+        # round the file down to a whole number of blocks
+        self.blocks = self.file_size // self.block_size
+        if self.blocks < self.iodepth:
+            raise ValueError("File size is too small for the block size "
+                             "and iodepth.")
+        self.file_size = self.blocks * self.block_size
+        self.test_file = os.path.join(
+            directory, "tmpfile_SSDperf-%s-%d"
+                       % (time.strftime("%Y-%m-%d_%H%M%S"), os.getpid()))
+        self.direct = True
+
+    def open_file(self, flags):
+        """
+        function: open the test file, falling back to buffered io on
+                  file systems that reject O_DIRECT (e.g. tmpfs)
+        input : flags
+        output: fd
+        """
+        if self.direct:
+            try:
+                return os.open(self.test_file, flags | os.O_DIRECT, 0o600)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                self.direct = False
+        return os.open(self.test_file, flags, 0o600)
+
+    def alloc_buffer(self):
+        """
+        function: allocate a page aligned buffer usable with O_DIRECT
+        input : NA
+        output: mmap
+        """
+        buf = mmap.mmap(-1, self.block_size)
+        buf.write(os.urandom(self.block_size))
+        return buf
+
+    def prepare(self):
+        """
+        function: lay out the test file so reads hit allocated blocks
+        input : NA
+        output: NA
+        """
+        fd = self.open_file(os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+        buf = self.alloc_buffer()
+        try:
+            for block in range(self.blocks):
+                os.pwritev(fd, [buf], block * self.block_size)
+            os.fsync(fd)
+        finally:
+            buf.close()
+            os.close(fd)
+
+    def worker(self, mode, index, deadline, latencies):
+        """
+        function: issue io of one mode until the deadline is reached
+        input : mode, index, deadline, latencies
+        output: NA
+        """
+        is_write = mode in (MODE_SEQ_WRITE, MODE_RAND_WRITE)
+        is_random = mode in (MODE_RAND_READ, MODE_RAND_WRITE)
+        fd = self.open_file(os.O_WRONLY if is_write else os.O_RDONLY)
+        buf = self.alloc_buffer()
+        rand = random.Random(index)
+        # each sequential worker streams through its own slice of the file
+        stripe = self.blocks // self.iodepth
+        first = index * stripe
+        block = first
+        op = os.pwritev if is_write else os.preadv
+        clock = time.perf_counter
+        try:
+            while clock() < deadline:
+                if is_random:
+                    block = rand.randrange(self.blocks)
+                elif block >= first + stripe:
+                    block = first
+                start = clock()
+                op(fd, [buf], block * self.block_size)
+                latencies.append(clock() - start)
+                block += 1
+        finally:
+            buf.close()
+            os.close(fd)
+
+    def run_mode(self, mode):
+        """
+        function: run one workload with iodepth worker threads
+        input : mode
+        output: dict
+        """
+        samples = [[] for _ in range(self.iodepth)]
+        deadline = time.perf_counter() + self.runtime
+        threads = [threading.Thread(target=self.worker,
+                                    args=(mode, i, deadline, samples[i]))
+                   for i in range(self.iodepth)]
+        begin = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - begin
+        latencies = sorted(lat for sample in samples for lat in sample)
+        ios = len(latencies)
+        result = {
+            "mode": mode,
+            "block_size": self.block_size,
+            "iodepth": self.iodepth,
+            "runtime": round(elapsed, 3),
+            "ios": ios,
+            "iops": round(ios / elapsed, 1) if elapsed else 0,
+            "bandwidth_mb": round(ios * self.block_size / elapsed
+                                  / (1024 * 1024), 2) if elapsed else 0,
+            "lat_avg_us": round(sum(latencies) / ios * 1e6, 1) if ios else 0,
+            "lat_max_us": round(latencies[-1] * 1e6, 1) if ios else 0,
+        }
+        for pct in PERCENTILES:
+            result["lat_p%s_us" % pct] = round(
+                percentile(latencies, pct) * 1e6, 1)
+        return result
+
+    def run(self):
+        """
+        function: prepare the test file, run every mode and clean up
+        input : NA
+        output: dict
+        """
+        results = []
+        try:
+            self.prepare()
+            for mode in self.modes:
+                results.append(self.run_mode(mode))
+        finally:
+            if os.path.exists(self.test_file):
+                os.remove(self.test_file)
+        return {"path": self.directory,
+                "direct_io": self.direct,
+                "file_size": self.file_size,
+                "results": results}
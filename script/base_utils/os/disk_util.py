@@ -44,25 +44,6 @@ class DiskUtil(object):
         """
         return psutil.disk_partitions(all_info)
 
-    @staticmethod
-    def getUsageSize(directory):
-        """
-        get directory or file real size. Unit is byte
-        """
-        cmd = ""
-        try:
-            cmd = "%s -l -R %s | %s ^- | %s '{t+=$5;} END {print t}'" % (
-                CmdUtil.getListCmd(), directory, CmdUtil.getGrepCmd(),
-                CmdUtil.getAwkCmd())
-            (status, output) = subprocess.getstatusoutput(cmd)
-            if status == 0:
-                return output.split('\t')[0].strip()
-            else:
-                raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
-                                + " Error: \n%s" % str(output))
-        except Exception:
-            raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd)
-
     # Mtab always keeps the partition information already mounted in the
     # current system.
     # For programs like fdisk and df,
@@ -30,7 +30,6 @@ from gspylib.common.ErrorCode import ErrorCode
 from base_utils.os.cmd_util import CmdUtil
 from base_utils.os.network_info import NetworkInfo
 from base_utils.security.security_checker import SecurityChecker
-from gspylib.threads.parallelTool import parallelTool
 from os_platform.UserPlatform import g_Platform
 
 localDirPath = os.path.dirname(os.path.realpath(__file__))
@@ -157,6 +156,7 @@ class NetUtil(object):
         """
         global g_failed_address_list
         g_failed_address_list = []
+        from gspylib.threads.parallelTool import parallelTool
         parallelTool.parallelExecute(NetUtil.executePingCmd, ip_address_list)
         return g_failed_address_list
 
@@ -0,0 +1,158 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : node_facts.py gathers the memory and cpu facts of the
+#                cluster nodes with one remote call per node, and keeps
+#                them for the later steps of the same operation.
+#############################################################################
+
+from gspylib.common.ErrorCode import ErrorCode
+from base_utils.executor.remote_batch import RemoteBatch
+from base_utils.os.net_util import NetUtil
+
+STEP_MEMINFO = "meminfo"
+STEP_MEMORY_GB = "memory_gb"
+STEP_CPU = "cpu"
+
+
+class NodeFacts(object):
+    """
+    facts of the cluster nodes, gathered once per operation
+    """
+    # facts already gathered by this process, by host
+    _cache = {}
+
+    def __init__(self, facts):
+        """
+        function: initialize the facts
+        input : facts, dict of host to the facts of the host
+        output: NA
+        """
+        self.facts = facts
+
+    @staticmethod
+    def build_batch(ssh_tool, local_mode, mpprc_file=""):
+        """
+        function: build the batch gathering the facts of a node
+        input : ssh_tool, local_mode, mpprc_file
+        output: RemoteBatch
+        """
+        batch = RemoteBatch(ssh_tool, mpprc_file, local_mode,
+                            stop_on_error=False)
+        batch.add(STEP_MEMINFO, "cat /proc/meminfo")
+        batch.add(STEP_MEMORY_GB, "free -g --si | grep Mem")
+        batch.add(STEP_CPU, "grep -c ^processor /proc/cpuinfo")
+        return batch
+
+    @staticmethod
+    def parse_meminfo(output):
+        """
+        function: parse /proc/meminfo
+        input : output
+        output: dict of name to kB
+        """
+        meminfo = {}
+        for line in output.splitlines():
+            words = line.replace(":", " ").split()
+            if len(words) >= 2 and words[1].isdigit():
+                meminfo[words[0]] = int(words[1])
+        return meminfo
+
+    @staticmethod
+    def parse_results(results):
+        """
+        function: get the facts of a node from the results of its batch
+        input : list of BatchStepResult
+        output: dict
+        """
+        outputs = {}
+        errors = {}
+        for result in results:
+            if result.status == 0:
+                outputs[result.name] = result.output.strip()
+            else:
+                errors[result.name] = (result.error or result.output).strip()
+        facts = {"meminfo": NodeFacts.parse_meminfo(
+                     outputs.get(STEP_MEMINFO, "")),
+                 "memory_gb": None, "cpu_count": None, "errors": errors}
+        words = outputs.get(STEP_MEMORY_GB, "").split()
+        if len(words) > 1 and words[1].isdigit():
+            facts["memory_gb"] = int(words[1])
+        if outputs.get(STEP_CPU, "").isdigit():
+            facts["cpu_count"] = int(outputs[STEP_CPU])
+        return facts
+
+    @staticmethod
+    def gather(ssh_tool, local_mode=False, hosts=None, mpprc_file="",
+               refresh=False):
+        """
+        function: get the facts of the nodes, the nodes gathered before in
+                  this process are read from memory
+        input : ssh_tool, local_mode, hosts, mpprc_file, refresh
+        output: NodeFacts
+        """
+        batch = NodeFacts.build_batch(ssh_tool, local_mode, mpprc_file)
+        if batch.local_mode:
+            hosts = [NetUtil.GetHostIpOrName()]
+        elif not hosts:
+            hosts = ssh_tool.hostNames[:]
+        missing = [host for host in hosts
+                   if refresh or host not in NodeFacts._cache]
+        if missing:
+            for (host, results) in batch.run(missing).items():
+                NodeFacts._cache[host] = NodeFacts.parse_results(results)
+        return NodeFacts(dict((host, NodeFacts._cache[host])
+                              for host in hosts if host in NodeFacts._cache))
+
+    def get(self, host):
+        """
+        function: get the facts of a node
+        input : host
+        output: dict
+        """
+        if host not in self.facts:
+            raise Exception(ErrorCode.GAUSS_502["GAUSS_50219"]
+                            % ("the facts of node %s" % host))
+        return self.facts[host]
+
+    def get_value(self, host, key):
+        """
+        function: get one fact of a node, raise the error of the command
+                  when it could not be gathered
+        input : host, key
+        output: value
+        """
+        facts = self.get(host)
+        value = facts.get(key)
+        if value is None or value == {}:
+            step = {"memory_gb": STEP_MEMORY_GB, "cpu_count": STEP_CPU,
+                    "meminfo": STEP_MEMINFO}.get(key, key)
+            raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % step
+                            + " Error:\n[%s] %s"
+                            % (host, facts["errors"].get(step, "")))
+        return value
+
+    def get_min_memory(self, hosts=None):
+        """
+        function: get the smallest physical memory of the nodes in GB,
+                  1024 based as /proc/meminfo
+        input : hosts, every node by default
+        output: float
+        """
+        hosts = hosts or sorted(self.facts.keys())
+        return min(self.get_value(host, "meminfo")["MemTotal"] / 1024 / 1024
+                   for host in hosts)
@@ -0,0 +1,234 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : os_snapshot.py collects the OS facts used by the check/set
+#                items in one pass over /proc and /sys, and caches them as
+#                JSON so that several items evaluated on the same node do
+#                not spawn any shell pipeline.
+#############################################################################
+
+import json
+import os
+import tempfile
+import time
+
+# block devices that fdisk never reports as disks
+IGNORE_BLOCK_PREFIX = ("loop", "dm-", "ram", "sr", "zram", "fd")
+THP_FILE = "/sys/kernel/mm/transparent_hugepage/enabled"
+DEFAULT_SNAPSHOT_TTL = 60
+
+
+class OSSnapshot(object):
+    """
+    one pass snapshot of the local OS facts
+    """
+
+    @staticmethod
+    def read_file(path, default=""):
+        """
+        function: read a small proc/sys file
+        input : path, default
+        output: str
+        """
+        try:
+            with open(path, "r") as fp:
+                return fp.read().strip()
+        except (IOError, OSError):
+            return default
+
+    @staticmethod
+    def collect_mounts():
+        """
+        function: parse /proc/mounts
+        input : NA
+        output: list of [device, dir, type, options]
+        """
+        mounts = []
+        for line in OSSnapshot.read_file("/proc/mounts").splitlines():
+            words = line.split()
+            if len(words) < 4:
+                continue
+            mounts.append([words[0], words[1], words[2],
+                           words[3].split(",")])
+        return mounts
+
+    @staticmethod
+    def collect_block_devices():
+        """
+        function: collect queue attributes of every disk in /sys/block
+        input : NA
+        output: dict
+        """
+        devices = {}
+        try:
+            names = sorted(os.listdir("/sys/block"))
+        except OSError:
+            return devices
+        for name in names:
+            if name.startswith(IGNORE_BLOCK_PREFIX):
+                continue
+            queue = "/sys/block/%s/queue" % name
+            scheduler = OSSnapshot.read_file("%s/scheduler" % queue)
+            active = ""
+            if "[" in scheduler and "]" in scheduler:
+                active = scheduler.split("[")[1].split("]")[0].strip()
+            read_ahead = OSSnapshot.read_file("%s/read_ahead_kb" % queue)
+            devices[name] = {
+                # blockdev --getra reports 512 byte sectors
+                "read_ahead": int(read_ahead) * 2
+                if read_ahead.isdigit() else None,
+                "scheduler": active,
+                "schedulers": scheduler.replace("[", "").replace(
+                    "]", "").split(),
+                "nr_requests": OSSnapshot.read_file(
+                    "%s/nr_requests" % queue),
+                "logical_block_size": OSSnapshot.read_file(
+                    "%s/logical_block_size" % queue)
+            }
+        return devices
+
+    @staticmethod
+    def collect_meminfo():
+        """
+        function: parse /proc/meminfo, values are converted to bytes
+        input : NA
+        output: dict
+        """
+        meminfo = {}
+        for line in OSSnapshot.read_file("/proc/meminfo").splitlines():
+            words = line.replace(":", " ").split()
+            if len(words) < 2 or not words[1].isdigit():
+                continue
+            value = int(words[1])
+            if len(words) > 2 and words[2] == "kB":
+                value *= 1024
+            meminfo[words[0]] = value
+        return meminfo
+
+    @staticmethod
+    def collect_network():
+        """
+        function: collect mtu and speed of the network interfaces
+        input : NA
+        output: dict
+        """
+        network = {}
+        try:
+            names = sorted(os.listdir("/sys/class/net"))
+        except OSError:
+            return network
+        for name in names:
+            path = "/sys/class/net/%s" % name
+            network[name] = {
+                "mtu": OSSnapshot.read_file("%s/mtu" % path),
+                "speed": OSSnapshot.read_file("%s/speed" % path),
+                "bonding_mode": OSSnapshot.read_file(
+                    "%s/bonding/mode" % path)
+            }
+        return network
+
+    @staticmethod
+    def collect():
+        """
+        function: collect all facts in one pass
+        input : NA
+        output: dict
+        """
+        mounts = OSSnapshot.collect_mounts()
+        root_device = ""
+        for (device, directory, _, _) in mounts:
+            if directory == "/":
+                root_device = device
+        return {
+            "collected_at": time.time(),
+            "kernel": OSSnapshot.read_file("/proc/sys/kernel/osrelease"),
+            "timezone": time.strftime("%z"),
+            "mounts": mounts,
+            "root_device": root_device,
+            "block_devices": OSSnapshot.collect_block_devices(),
+            "aio_max_nr": OSSnapshot.read_file("/proc/sys/fs/aio-max-nr"),
+            "meminfo": OSSnapshot.collect_meminfo(),
+            "thp_enabled": OSSnapshot.read_file(THP_FILE, None),
+            "network": OSSnapshot.collect_network()
+        }
+
+    @staticmethod
+    def get_cache_file():
+        """
+        function: get the per user cache file of the snapshot
+        input : NA
+        output: str
+        """
+        return os.path.join(tempfile.gettempdir(),
+                            "gs_os_snapshot_%d.json" % os.getuid())
+
+    @staticmethod
+    def load(ttl=DEFAULT_SNAPSHOT_TTL, cache_file=None):
+        """
+        function: return the cached snapshot if it is fresh enough,
+                  otherwise collect and cache a new one
+        input : ttl, cache_file
+        output: dict
+        """
+        if cache_file is None:
+            cache_file = OSSnapshot.get_cache_file()
+        if ttl > 0:
+            try:
+                stat_info = os.lstat(cache_file)
+                # only trust a regular file owned by the current user
+                if (stat_info.st_uid == os.getuid()
+                        and os.path.isfile(cache_file)
+                        and not os.path.islink(cache_file)):
+                    with open(cache_file, "r") as fp:
+                        snapshot = json.load(fp)
+                    if time.time() - snapshot.get("collected_at", 0) < ttl:
+                        return snapshot
+            except (OSError, IOError, ValueError):
+                pass
+        snapshot = OSSnapshot.collect()
+        OSSnapshot.save(snapshot, cache_file)
+        return snapshot
+
+    @staticmethod
+    def save(snapshot, cache_file):
+        """
+        function: write the snapshot through a temp file and rename it
+        input : snapshot, cache_file
+        output: NA
+        """
+        tmp_file = "%s.%d.tmp" % (cache_file, os.getpid())
+        try:
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                         0o600)
+            with os.fdopen(fd, "w") as fp:
+                json.dump(snapshot, fp)
+            os.rename(tmp_file, cache_file)
+        except (OSError, IOError):
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    @staticmethod
+    def invalidate(cache_file=None):
+        """
+        function: drop the cached snapshot after the OS has been changed
+        input : cache_file
+        output: NA
+        """
+        if cache_file is None:
+            cache_file = OSSnapshot.get_cache_file()
+        if os.path.isfile(cache_file) and not os.path.islink(cache_file):
+            os.remove(cache_file)
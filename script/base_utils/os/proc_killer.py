@@ -0,0 +1,344 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : proc_killer.py finds the processes of the instances in
+#                /proc, stops them with SIGTERM and then SIGKILL, and
+#                reports for every process whether it is gone.
+#############################################################################
+
+import os
+import select
+import signal
+import time
+
+PROC_DIR = "/proc"
+DELETED_SUFFIX = " (deleted)"
+DEFAULT_TERM_TIMEOUT = 3.0
+DEFAULT_KILL_TIMEOUT = 5.0
+POLL_INTERVAL = 0.05
+# the kernel keeps at most 15 characters of the name of a process in comm
+COMM_LENGTH = 15
+
+PROC_TERMINATED = "terminated"
+PROC_KILLED = "killed"
+PROC_GONE = "gone"
+PROC_ALIVE = "alive"
+PROC_FAILED = "failed"
+# flag of the output lines holding the result of one process
+KILL_RESULT_FLAG = "[KILL_PROCESS_RESULT]"
+
+
+class ProcKiller(object):
+    """
+    kill the processes running from or in the given paths
+    """
+
+    def __init__(self, paths=None, keywords=None, uid=None,
+                 term_timeout=DEFAULT_TERM_TIMEOUT,
+                 kill_timeout=DEFAULT_KILL_TIMEOUT):
+        """
+        function: initialize the killer
+        input : paths, a process matches when its executable or its working
+                directory is one of the paths or is under one of them
+                keywords, a process matches when its name is one of them
+                uid, only the processes of the uid, the current one by
+                default
+                term_timeout, seconds to wait after SIGTERM
+                kill_timeout, seconds to wait after SIGKILL
+        output: NA
+        """
+        self.paths = [os.path.realpath(path) for path in (paths or [])]
+        self.keywords = [word for word in (keywords or []) if word]
+        self.uid = os.getuid() if uid is None else uid
+        self.term_timeout = term_timeout
+        self.kill_timeout = kill_timeout
+
+    @staticmethod
+    def read_link(pid, name):
+        """
+        function: read /proc/<pid>/<name>, the suffix of a removed file is
+                  dropped
+        input : pid, name
+        output: str, empty if it can not be read
+        """
+        try:
+            link = os.readlink(os.path.join(PROC_DIR, str(pid), name))
+        except OSError:
+            return ""
+        if link.endswith(DELETED_SUFFIX):
+            link = link[:-len(DELETED_SUFFIX)]
+        return link
+
+    @staticmethod
+    def read_cmdline(pid):
+        """
+        function: read the arguments of a process
+        input : pid
+        output: list of str, empty if it can not be read
+        """
+        try:
+            with open(os.path.join(PROC_DIR, str(pid), "cmdline"), "rb") as fp:
+                data = fp.read()
+        except OSError:
+            return []
+        return [arg.decode("utf-8", "replace")
+                for arg in data.rstrip(b"\0").split(b"\0")] if data else []
+
+    @staticmethod
+    def read_comm(pid):
+        """
+        function: read the name of a process, the name of the executable
+                  or of the script it was started from
+        input : pid
+        output: str, empty if it can not be read
+        """
+        try:
+            with open(os.path.join(PROC_DIR, str(pid), "comm"), "r") as fp:
+                return fp.read().strip()
+        except OSError:
+            return ""
+
+    @staticmethod
+    def read_stat(pid):
+        """
+        function: read the state, the parent and the start time of a
+                  process from /proc/<pid>/stat, the start time tells a
+                  reused pid apart
+        input : pid
+        output: (state, ppid, start time), all None if the process is gone
+        """
+        try:
+            with open(os.path.join(PROC_DIR, str(pid), "stat"), "r") as fp:
+                data = fp.read()
+        except OSError:
+            return None, None, None
+        # the name in brackets may hold spaces, the fields follow the last )
+        fields = data[data.rfind(")") + 2:].split()
+        if len(fields) < 20:
+            return None, None, None
+        return fields[0], int(fields[1]), fields[19]
+
+    def is_under(self, path):
+        """
+        function: check whether a path is one of the paths or under one
+        input : path
+        output: bool
+        """
+        return bool(path) and any(path == item
+                                  or path.startswith(item.rstrip("/") + "/")
+                                  for item in self.paths)
+
+    def is_named(self, pid, exe, argv):
+        """
+        function: check whether the name of a process is one of the
+                  keywords. Only the name is compared, a process that just
+                  carries a keyword in its arguments, such as the ssh
+                  session that started this one, is not matched
+        input : pid, exe, argv
+        output: bool
+        """
+        comm = self.read_comm(pid)
+        names = set([os.path.basename(exe)])
+        if argv:
+            names.add(os.path.basename(argv[0]))
+        return any(word in names
+                   or (comm and word[:COMM_LENGTH] == comm[:COMM_LENGTH])
+                   for word in self.keywords)
+
+    def find_processes(self):
+        """
+        function: scan /proc for the matching processes of the uid, this
+                  process and its parents are never matched
+        input : NA
+        output: list of dict
+        """
+        excluded = set()
+        pid = os.getpid()
+        while pid and pid > 1 and pid not in excluded:
+            excluded.add(pid)
+            pid = self.read_stat(pid)[1]
+        processes = []
+        for name in os.listdir(PROC_DIR):
+            if not name.isdigit() or int(name) in excluded:
+                continue
+            pid = int(name)
+            try:
+                if os.stat(os.path.join(PROC_DIR, name)).st_uid != self.uid:
+                    continue
+            except OSError:
+                continue
+            exe = self.read_link(pid, "exe")
+            cwd = self.read_link(pid, "cwd")
+            argv = self.read_cmdline(pid)
+            if not (self.is_under(exe) or self.is_under(cwd)
+                    or self.is_named(pid, exe, argv)):
+                continue
+            (state, _, start_time) = self.read_stat(pid)
+            if state is None or state == "Z":
+                continue
+            processes.append({"pid": pid, "exe": exe, "cwd": cwd,
+                              "cmdline": " ".join(argv).strip(),
+                              "start_time": start_time,
+                              "signal": "", "status": PROC_ALIVE,
+                              "error": "", "duration": 0.0})
+        return processes
+
+    @staticmethod
+    def open_pidfd(process):
+        """
+        function: open a pidfd of a process, it stays bound to the process
+                  even when the pid is reused. None where pidfd is missing
+        input : process
+        output: fd or None
+        """
+        if not hasattr(os, "pidfd_open"):
+            return None
+        try:
+            fd = os.pidfd_open(process["pid"])
+        except OSError:
+            return None
+        # the pid may have been reused between the scan and the open
+        if ProcKiller.read_stat(process["pid"])[2] != process["start_time"]:
+            os.close(fd)
+            process["status"] = PROC_GONE
+            return None
+        return fd
+
+    @staticmethod
+    def is_gone(process, fd):
+        """
+        function: check whether a process has exited, a zombie has exited
+        input : process, pidfd or None
+        output: bool
+        """
+        if fd is not None:
+            poller = select.poll()
+            poller.register(fd, select.POLLIN)
+            return bool(poller.poll(0))
+        (state, _, start_time) = ProcKiller.read_stat(process["pid"])
+        return state is None or state == "Z" \
+            or start_time != process["start_time"]
+
+    @staticmethod
+    def send_signal(process, fd, sig):
+        """
+        function: send a signal through the pidfd, or to the pid
+        input : process, pidfd or None, signal
+        output: NA
+        """
+        process["signal"] = signal.Signals(sig).name
+        try:
+            if fd is not None and hasattr(signal, "pidfd_send_signal"):
+                signal.pidfd_send_signal(fd, sig)
+            else:
+                os.kill(process["pid"], sig)
+        except ProcessLookupError:
+            pass
+        except OSError as e:
+            process["status"] = PROC_FAILED
+            process["error"] = str(e)
+
+    def wait(self, pending, fds, status, timeout):
+        """
+        function: wait until the pending processes have exited or the
+                  timeout has passed, a process is marked with the status
+                  and its time when its exit is seen
+        input : pending, fds, status, timeout
+        output: list of the processes still alive
+        """
+        deadline = time.time() + timeout
+        while True:
+            alive = []
+            for process in pending:
+                if self.is_gone(process, fds.get(process["pid"])):
+                    process["status"] = status
+                    process["duration"] = round(time.time()
+                                                - process["begin"], 3)
+                else:
+                    alive.append(process)
+            pending = alive
+            remaining = deadline - time.time()
+            if not pending or remaining <= 0:
+                return pending
+            waited = [fds[process["pid"]] for process in pending
+                      if fds.get(process["pid"]) is not None]
+            if len(waited) == len(pending):
+                poller = select.poll()
+                for fd in waited:
+                    poller.register(fd, select.POLLIN)
+                poller.poll(int(remaining * 1000) + 1)
+            else:
+                time.sleep(min(POLL_INTERVAL, remaining))
+
+    def signal_all(self, pending, fds, sig, status, timeout):
+        """
+        function: signal the pending processes and wait for them
+        input : pending, fds, signal, status of the processes that exit,
+                timeout
+        output: list of the processes still alive
+        """
+        for process in pending:
+            self.send_signal(process, fds.get(process["pid"]), sig)
+        pending = [process for process in pending
+                   if process["status"] != PROC_FAILED]
+        return self.wait(pending, fds, status, timeout)
+
+    def kill(self):
+        """
+        function: stop the matching processes, SIGTERM first and SIGKILL
+                  for those still alive after term_timeout
+        input : NA
+        output: list of dict, one per process, with its pid, exe, cwd,
+                cmdline, the last signal sent and the status
+        """
+        processes = self.find_processes()
+        fds = {}
+        try:
+            begin = time.time()
+            for process in processes:
+                process["begin"] = begin
+                fd = self.open_pidfd(process)
+                if fd is not None:
+                    fds[process["pid"]] = fd
+                if process["status"] == PROC_ALIVE \
+                        and self.is_gone(process, fd):
+                    process["status"] = PROC_GONE
+            pending = [process for process in processes
+                       if process["status"] == PROC_ALIVE]
+            pending = self.signal_all(pending, fds, signal.SIGTERM,
+                                      PROC_TERMINATED, self.term_timeout)
+            pending = self.signal_all(pending, fds, signal.SIGKILL,
+                                      PROC_KILLED, self.kill_timeout)
+            for process in pending:
+                process["duration"] = round(time.time() - begin, 3)
+        finally:
+            for fd in fds.values():
+                os.close(fd)
+        for process in processes:
+            process.pop("begin", None)
+            process.pop("start_time", None)
+        return processes
+
+    @staticmethod
+    def get_survivors(report):
+        """
+        function: get the processes that could not be stopped
+        input : report
+        output: list of dict
+        """
+        return [process for process in report
+                if process["status"] in (PROC_ALIVE, PROC_FAILED)]
@@ -0,0 +1,334 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : conf_file.py edits postgresql.conf and pg_hba.conf in
+#                process. A whole batch of parameters or hba entries is
+#                applied to the lines in memory, comments are kept, and the
+#                file is replaced once through a temp file and rename.
+#############################################################################
+
+import fcntl
+import ipaddress
+import os
+import re
+import signal
+
+GUC_CONF_FILE = "postgresql.conf"
+HBA_CONF_FILE = "pg_hba.conf"
+POSTMASTER_PID_FILE = "postmaster.pid"
+# name = value, optionally commented out
+GUC_LINE_PATTERN = re.compile(
+    r"^\s*(#?)\s*([A-Za-z_][A-Za-z0-9_.\-]*)\s*=\s*(.*?)\s*$")
+HBA_SEPARATOR = "    "
+
+
+class ConfFile(object):
+    """
+    a configuration file of an instance kept as lines
+    """
+
+    def __init__(self, path):
+        """
+        function: read the configuration file
+        input : path
+        output: NA
+        """
+        self.path = path
+        with open(path, "r") as fp:
+            self.lines = fp.read().splitlines()
+        self.changed = False
+
+    @staticmethod
+    def write_atomic(path, content, stat_info):
+        """
+        function: write the content to a temp file in the same directory
+                  and rename it over the path
+        input : path, content, stat_info
+        output: NA
+        """
+        tmp_file = "%s.%d.tmp" % (path, os.getpid())
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                     stat_info.st_mode & 0o777)
+        try:
+            with os.fdopen(fd, "w") as fp:
+                fp.write(content)
+                fp.flush()
+                os.fsync(fp.fileno())
+            if os.getuid() == 0:
+                os.chown(tmp_file, stat_info.st_uid, stat_info.st_gid)
+            os.rename(tmp_file, path)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def save(self):
+        """
+        function: replace the file if anything changed, the lock file and
+                  the backup file used by gs_guc are honored
+        input : NA
+        output: bool
+        """
+        if not self.changed:
+            return False
+        content = "\n".join(self.lines) + "\n"
+        stat_info = os.stat(self.path)
+        lock_file = "%s.lock" % self.path
+        lock_fd = None
+        if os.path.isfile(lock_file):
+            lock_fd = os.open(lock_file, os.O_RDWR)
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        try:
+            ConfFile.write_atomic(self.path, content, stat_info)
+            backup_file = "%s.bak" % self.path
+            if os.path.isfile(backup_file):
+                ConfFile.write_atomic(backup_file, content,
+                                      os.stat(backup_file))
+        finally:
+            if lock_fd is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+                os.close(lock_fd)
+        self.changed = False
+        return True
+
+    @staticmethod
+    def reload(data_dir):
+        """
+        function: send one SIGHUP to the postmaster of the data directory
+        input : data_dir
+        output: bool, False if the instance is not running
+        """
+        pid_file = os.path.join(data_dir, POSTMASTER_PID_FILE)
+        try:
+            with open(pid_file, "r") as fp:
+                pid = int(fp.readline().strip())
+            os.kill(pid, signal.SIGHUP)
+        except (IOError, OSError, ValueError):
+            return False
+        return True
+
+
+class GucConfFile(ConfFile):
+    """
+    postgresql.conf
+    """
+
+    @staticmethod
+    def split_value(text):
+        """
+        function: split the text after '=' into the value and the rest of
+                  the line, a quoted value may contain '' and #
+        input : text
+        output: value, rest
+        """
+        if text.startswith("'"):
+            index = 1
+            while index < len(text):
+                if text[index] == "'":
+                    if text[index + 1:index + 2] == "'":
+                        index += 2
+                        continue
+                    break
+                index += 1
+            index += 1
+        else:
+            index = 0
+            while (index < len(text) and not text[index].isspace()
+                   and text[index] != "#"):
+                index += 1
+        return text[:index], text[index:]
+
+    def parse_line(self, line):
+        """
+        function: parse one line
+        input : line
+        output: (commented, name, value, rest) or None
+        """
+        match = GUC_LINE_PATTERN.match(line)
+        if not match:
+            return None
+        (value, rest) = GucConfFile.split_value(match.group(3))
+        rest = rest.rstrip()
+        if rest and not rest.lstrip().startswith("#"):
+            # not a setting, such as the prose of a comment block
+            return None
+        return (match.group(1) == "#", match.group(2).lower(), value, rest)
+
+    def get_parameters(self):
+        """
+        function: get the parameters that are in effect
+        input : NA
+        output: dict
+        """
+        parameters = {}
+        for line in self.lines:
+            parsed = self.parse_line(line)
+            if parsed and not parsed[0]:
+                parameters[parsed[1]] = parsed[2]
+        return parameters
+
+    def set_parameters(self, para_dict):
+        """
+        function: apply all parameters in one pass. The last active line
+                  of a parameter is changed in place, otherwise its
+                  commented default line is enabled, otherwise a new line
+                  is appended
+        input : para_dict
+        output: list of the parameters that changed
+        """
+        active = {}
+        commented = {}
+        for (index, line) in enumerate(self.lines):
+            parsed = self.parse_line(line)
+            if not parsed:
+                continue
+            if parsed[0]:
+                commented.setdefault(parsed[1], index)
+            else:
+                active[parsed[1]] = index
+        changed = []
+        for (name, value) in para_dict.items():
+            key = name.strip().lower()
+            value = str(value).strip()
+            index = active.get(key, commented.get(key))
+            if index is None:
+                self.lines.append("%s = %s" % (name.strip(), value))
+                active[key] = len(self.lines) - 1
+                changed.append(name)
+                continue
+            (is_commented, _, old_value, rest) = \
+                self.parse_line(self.lines[index])
+            if not is_commented and old_value == value:
+                continue
+            self.lines[index] = "%s = %s%s" % (name.strip(), value, rest)
+            active[key] = index
+            changed.append(name)
+        if changed:
+            self.changed = True
+        return changed
+
+
+class HbaConfFile(ConfFile):
+    """
+    pg_hba.conf
+    """
+
+    @staticmethod
+    def normalize_address(address, mask=""):
+        """
+        function: normalize an address so that 10.0.0.1/32 and
+                  10.0.0.1 255.255.255.255 are the same key
+        input : address, mask
+        output: str
+        """
+        try:
+            if mask:
+                return str(ipaddress.ip_network("%s/%s" % (address, mask),
+                                                strict=False))
+            if "/" in address:
+                return str(ipaddress.ip_network(address, strict=False))
+        except ValueError:
+            pass
+        return address.lower()
+
+    @staticmethod
+    def get_key(entry):
+        """
+        function: get the key of an hba record, which is type, database,
+                  user and address; local records have no address
+        input : entry
+        output: tuple or None
+        """
+        fields = entry.split("#", 1)[0].split()
+        if len(fields) < 3:
+            return None
+        if fields[0] == "local":
+            return tuple(fields[:3])
+        if len(fields) < 4:
+            return None
+        mask = ""
+        if ("/" not in fields[3] and len(fields) > 4
+                and re.match(r"^[0-9.:a-fA-F]+$", fields[4])):
+            mask = fields[4]
+        return (fields[0], fields[1], fields[2],
+                HbaConfFile.normalize_address(fields[3], mask))
+
+    def get_entries(self):
+        """
+        function: get the active hba records
+        input : NA
+        output: list
+        """
+        return [line.strip() for line in self.lines
+                if line.strip() and not line.strip().startswith("#")]
+
+    def index_entries(self):
+        """
+        function: map the key of every active record to its line numbers
+        input : NA
+        output: dict
+        """
+        entries = {}
+        for (index, line) in enumerate(self.lines):
+            if not line.strip() or line.strip().startswith("#"):
+                continue
+            key = HbaConfFile.get_key(line)
+            if key is not None:
+                entries.setdefault(key, []).append(index)
+        return entries
+
+    def set_entries(self, entries):
+        """
+        function: add or replace records like gs_guc -h, a record with
+                  the same type, database, user and address is replaced
+        input : entries
+        output: int, number of records changed
+        """
+        existing = self.index_entries()
+        count = 0
+        for entry in entries:
+            entry = HBA_SEPARATOR.join(entry.split())
+            key = HbaConfFile.get_key(entry)
+            if key is None:
+                continue
+            indexes = existing.get(key)
+            if not indexes:
+                self.lines.append(entry)
+                existing[key] = [len(self.lines) - 1]
+                count += 1
+            elif HBA_SEPARATOR.join(self.lines[indexes[-1]].split()) != entry:
+                self.lines[indexes[-1]] = entry
+                count += 1
+        if count:
+            self.changed = True
+        return count
+
+    def remove_entries(self, entries):
+        """
+        function: remove the records matching type, database, user and
+                  address of each entry
+        input : entries
+        output: int, number of records removed
+        """
+        keys = set(HbaConfFile.get_key(entry) for entry in entries)
+        kept = [line for line in self.lines
+                if not line.strip() or line.strip().startswith("#")
+                or HbaConfFile.get_key(line) not in keys]
+        count = len(self.lines) - len(kept)
+        if count:
+            self.lines = kept
+            self.changed = True
+        return count
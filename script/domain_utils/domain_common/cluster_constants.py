@@ -35,6 +35,7 @@ class ClusterConstants:
     DILATAION_LOG_FILE = "gs_expand.log"
     UNPREINSTALL_LOG_FILE = "gs_postuninstall.log"
     GS_CHECKPERF_LOG_FILE = "gs_checkperf.log"
+    GS_CHECKPERF_HISTORY_DIR = "perf_history"
     GS_BACKUP_LOG_FILE = "gs_backup.log"
     GS_COLLECTOR_LOG_FILE = "gs_collector.log"
     GS_COLLECTOR_CONFIG_FILE = "./gspylib/etc/conf/gs_collector.json"
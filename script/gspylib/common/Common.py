@@ -17,25 +17,20 @@
 # ----------------------------------------------------------------------------
 # Description  : Common is a utility with a lot of common functions
 #############################################################################
-import ctypes
+import importlib
 import sys
 import subprocess
 import os
-import platform
 import socket
 import types
 import re
 import time
-import multiprocessing
 import _thread as thread
 import pwd
 import json
 import base64
-import secrets
 import string
 import stat
-import csv
-import copy
 from subprocess import PIPE
 from subprocess import Popen
 from base_utils.os.password_util import PasswordUtil
@@ -55,7 +50,6 @@ while num < 10:
         time.sleep(1)
 
 import shutil
-from ctypes import *
 from datetime import datetime
 
 localDirPath = os.path.dirname(os.path.realpath(__file__))
@@ -102,7 +96,6 @@ from gspylib.common.ErrorCode import ErrorCode
 from os_platform.UserPlatform import g_Platform
 from gspylib.os.gsfile import g_file
 from os_platform.gsservice import g_service
-from gspylib.threads.parallelTool import parallelTool
 from base_utils.executor.cmd_executor import CmdExecutor
 from base_utils.executor.local_remote_cmd import LocalRemoteCmd
 from domain_utils.cluster_file.cluster_config_file import ClusterConfigFile
@@ -113,23 +106,52 @@ from domain_utils.cluster_file.version_info import VersionInfo
 from domain_utils.cluster_file.cluster_dir import ClusterDir
 from domain_utils.security.random_value import RandomValue
 from base_utils.os.process_util import ProcessUtil
-from domain_utils.sql_handler.sql_executor import SqlExecutor
 from domain_utils.sql_handler.sql_file import SqlFile
 from base_utils.os.net_util import NetUtil
 from base_utils.common.constantsbase import ConstantsBase
 from base_utils.security.sensitive_mask import SensitiveMask
 from os_platform.linux_distro import LinuxDistro
 from base_diff.sql_commands import SqlCommands
-from gspylib.common.DbClusterInfo import dbClusterInfo
 from base_utils.common.fast_popen import FastPopen
+from base_utils.common.retry_policy import RetryPolicy
 from gspylib.common.Constants import Constants
 from domain_utils.cluster_file.profile_file import ProfileFile
 from domain_utils.domain_common.cluster_constants import ClusterConstants
-from gspylib.common.aes_cbc_util import AesCbcUtil
 
 noPassIPs = []
 g_lock = thread.allocate_lock()
 
+# names that only a few functions need are imported on first use, so that
+# the tools and the local scripts do not load them at startup
+LAZY_IMPORTS = {
+    "dbClusterInfo": ("gspylib.common.DbClusterInfo", "dbClusterInfo"),
+    "AesCbcUtil": ("gspylib.common.aes_cbc_util", "AesCbcUtil"),
+    "SqlExecutor": ("domain_utils.sql_handler.sql_executor", "SqlExecutor"),
+    "parallelTool": ("gspylib.threads.parallelTool", "parallelTool"),
+    "ctypes": ("ctypes", None),
+    "multiprocessing": ("multiprocessing", None),
+    "secrets": ("secrets", None),
+    "csv": ("csv", None),
+    "copy": ("copy", None),
+}
+
+
+def __getattr__(name):
+    """
+    function: resolve the names imported on first use, see PEP 562
+    input : name
+    output: module or class
+    """
+    if name not in LAZY_IMPORTS:
+        raise AttributeError("module %r has no attribute %r"
+                             % (__name__, name))
+    (moduleName, attrName) = LAZY_IMPORTS[name]
+    value = importlib.import_module(moduleName)
+    if attrName is not None:
+        value = getattr(value, attrName)
+    globals()[name] = value
+    return value
+
 
 def check_content_key(content, key):
     if not (type(content) == bytes):
@@ -1733,6 +1755,7 @@ class DefaultValue():
         """
         global noPassIPs
         noPassIPs = []
+        from gspylib.threads.parallelTool import parallelTool
         parallelTool.parallelExecute(DefaultValue.sendNetworkCmd,
                                                ips)
         return noPassIPs
@@ -1814,16 +1837,10 @@ class DefaultValue():
         input : cmd
         output : NA
         """
-        retryTimes = 0
-        while True:
-            (status, output) = subprocess.getstatusoutput(cmd)
-            if (status == 0):
-                break
-            if (retryTimes > 1):
-                raise Exception(ErrorCode.GAUSS_500["GAUSS_50008"] +
-                                " Command:%s. Error:\n%s" % (cmd, output))
-            retryTimes = retryTimes + 1
-            time.sleep(3)
+        (status, output) = CmdUtil.retryGetstatusoutput(cmd, 2, 3)
+        if (status != 0):
+            raise Exception(ErrorCode.GAUSS_500["GAUSS_50008"] +
+                            " Command:%s. Error:\n%s" % (cmd, output))
 
 
     @staticmethod
@@ -1897,6 +1914,7 @@ class DefaultValue():
             normalCNList = []
         localhost = NetUtil.GetHostIpOrName()
         sql = "show default_transaction_read_only;"
+        from domain_utils.sql_handler.sql_executor import SqlExecutor
         try:
             if (len(normalCNList)):
                 cnList = normalCNList
@@ -1964,7 +1982,7 @@ class DefaultValue():
         output: cpuSet
         """
         # do this function to get the parallel number
-        cpuSet = multiprocessing.cpu_count()
+        cpuSet = os.cpu_count() or 1
         if (cpuSet > 1):
             return cpuSet
         else:
@@ -2042,42 +2060,47 @@ class DefaultValue():
     @staticmethod
     def getPhysicMemo(PhsshTool, instaLocalMode):
         """
+        function: get the smallest physical memory of the nodes in GB, the
+                  facts are gathered once per operation, if they could not
+                  be gathered the memory is read with one call per node
+        input : PhsshTool, instaLocalMode
+        output: float
         """
+        from base_utils.os.node_facts import NodeFacts
+        try:
+            return NodeFacts.gather(PhsshTool,
+                                    instaLocalMode).get_min_memory()
+        except Exception:
+            return DefaultValue.readPhysicMemo(PhsshTool, instaLocalMode)
+
+    @staticmethod
+    def readPhysicMemo(PhsshTool, instaLocalMode):
+        """
+        function: read the smallest physical memory of the nodes in GB
+                  from /proc/meminfo
+        input : PhsshTool, instaLocalMode
+        output: float
+        """
+        cmd = g_file.SHELL_CMD_DICT["physicMemory"]
         if instaLocalMode:
-            cmd = g_file.SHELL_CMD_DICT["physicMemory"]
             (status, output) = subprocess.getstatusoutput(cmd)
-            if (status != 0):
-                raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd +
-                                "Error:\n%s" % str(output))
-            else:
-                memTotalList = output.split("\n")
-                for content in memTotalList:
-                    if ("MemTotal" in content):
-                        memoList = content.split(":")
-                        memo = memoList[1]
-                        memo = memo.replace("kB", "")
-                        memo = memo.replace("\n", "")
-                        memo = memo.strip()
-                        memo = int(memo) / 1024 / 1024
-            return memo
+            failed = status != 0
+        else:
+            (status, output) = PhsshTool.getSshStatusOutput(cmd)
+            failed = any(ret != DefaultValue.SUCCESS
+                         for ret in status.values())
+        if failed:
+            raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd +
+                            "Error:\n%s" % str(output))
         physicMemo = []
-        cmd = g_file.SHELL_CMD_DICT["physicMemory"]
-        (status, output) = PhsshTool.getSshStatusOutput(cmd)
-        for ret in status.values():
-            if (ret != DefaultValue.SUCCESS):
-                raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd +
-                                "Error:\n%s" % str(output))
-        memTotalList = output.split("\n")
-        for content in memTotalList:
-            if ("MemTotal" in content):
-                memoList = content.split(":")
-                memo = memoList[1]
-                memo = memo.replace("kB", "")
-                memo = memo.strip()
-                memo = int(memo) / 1024 / 1024
-                physicMemo.append(memo)
-        minPhysicMemo = min(physicMemo)
-        return minPhysicMemo
+        for content in output.split("\n"):
+            if "MemTotal" in content:
+                memo = content.split(":")[1].replace("kB", "").strip()
+                physicMemo.append(int(memo) / 1024 / 1024)
+        if not physicMemo:
+            raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd +
+                            "Error:\n%s" % str(output))
+        return min(physicMemo)
 
     @staticmethod
     def getDataNodeNum(dbClusterInfoGucDn):
@@ -2439,6 +2462,7 @@ class DefaultValue():
         input : int
         output : string
         """
+        import secrets
         secret_types = string.ascii_letters + string.digits + string.punctuation
         exception_str = "`;$'\"{}[\\"
         while True:
@@ -2462,6 +2486,7 @@ class DefaultValue():
         """
         Check need install CM instance
         """
+        from gspylib.common.DbClusterInfo import dbClusterInfo
         old_cluster_info = dbClusterInfo()
         new_cluster_info = dbClusterInfo()
         user = pwd.getpwuid(os.getuid()).pw_name
@@ -2476,27 +2501,30 @@ class DefaultValue():
         return False
 
     @staticmethod
-    def try_fast_popen(cmd, retry_time=3, sleep_time=1, check_output=False):
+    def try_fast_popen(cmd, retry_time=3, sleep_time=1, check_output=False,
+                       retry_policy=None):
         """
         function : retry getStatusoutput
         @param cmd: command  going to be execute
         @param retry_time: default retry 3 times after execution failure
-        @param sleep_time: default sleep 1 second then start retry
+        @param sleep_time: default sleep 1 second then start retry,
+                           the delay doubles with each retry
+        @param retry_policy: RetryPolicy used instead of retry_time
+                             and sleep_time
         """
-        retry_time += 1
-        for i in range(retry_time):
+        if retry_policy is None:
+            retry_policy = RetryPolicy.from_retry_time(retry_time, sleep_time)
+
+        def execute():
             proc = FastPopen(cmd, stdout=PIPE, stderr=PIPE)
             stdout, stderr = proc.communicate()
-            if proc.returncode != 0:
-                time.sleep(sleep_time)
-            elif check_output:
-                if str(stdout+stderr).strip():
-                    break
-                else:
-                    time.sleep(sleep_time)
-            else:
-                break
-        return proc.returncode, stdout, stderr
+            return proc.returncode, stdout + stderr, stdout, stderr
+
+        (status, _, stdout, stderr) = retry_policy.run(
+            execute,
+            lambda result: retry_policy.is_retryable(result[0], result[1]) or
+            (result[0] == 0 and check_output and not str(result[1]).strip()))
+        return status, stdout, stderr
 
     @staticmethod
     def get_ssh_protect_path():
@@ -2957,6 +2985,7 @@ class DefaultValue():
         """
         logger.debug("Start remove CM metadata directory and dynamic_config_file.")
         # This cluster info is new cluster info.
+        from gspylib.common.DbClusterInfo import dbClusterInfo
         cluster_info = dbClusterInfo()
         cluster_info.initFromStaticConfig(user)
         cluster_dynamic_config = os.path.realpath(os.path.join(cluster_info.appPath,
@@ -3176,6 +3205,7 @@ class DefaultValue():
         rand_file = os.path.join(EnvUtil.getTmpDirFromEnv(), "binary_upgrade/hadr.key.rand")
         if os.path.isfile(cipher_file) and os.path.isfile(rand_file):
             bin_path = os.path.join(EnvUtil.getTmpDirFromEnv(), "binary_upgrade")
+        from gspylib.common.aes_cbc_util import AesCbcUtil
         rand_pwd = AesCbcUtil.aes_cbc_decrypt_with_path(bin_path, bin_path, key_name="hadr")
         if rand_pwd:
             logger.debug("Successfully decrypt rand pwd.")
@@ -3209,6 +3239,7 @@ class DefaultValue():
         """
         new_name = name.encode('ascii', 'replace')
         try:
+            import ctypes
             libc = ctypes.CDLL('libc.so.6')
             proc_name = ctypes.c_char_p.in_dll(libc, '__progname_full')
             with open('/proc/self/cmdline') as fp:
@@ -3257,6 +3288,8 @@ class DefaultValue():
         step = -1 means we just check if step in all the specified nodes is the
         same otherwise, we check if all the specified nodes is the given step
         """
+        import csv
+        from gspylib.common.DbClusterInfo import dbClusterInfo
         try:
             if nodes:
                 logger.debug(
@@ -3270,7 +3303,7 @@ class DefaultValue():
                 cluster_info.initFromStaticConfig(user)
                 for dbNode in cluster_info.dbNodes:
                     clusterNodes.append(dbNode.name)
-                nodes = copy.deepcopy(clusterNodes)
+                nodes = clusterNodes[:]
             
             logger.debug(
                 "IsgreyUpgradeNodeSpecify: all the nodes is %s" % nodes)
@@ -3314,6 +3347,8 @@ class ClusterCommand():
     def __init__(self):
         pass
 
+    # gsql is retried when a tuple was concurrently updated
+    SQL_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=1, max_delay=4)
     # gs_sshexkey execution takes total steps
     TOTAL_STEPS_SSHEXKEY = 11
     # gs_preinstall -L execution takes total steps
@@ -3557,16 +3592,39 @@ class ClusterCommand():
         return (0, "".join(rowList)[:-1])
 
 
+    @staticmethod
+    def execSQLFileWithRetry(cmd, sqlFile, retry_policy):
+        """
+        function : Execute gsql with a sql file, a tuple concurrently
+                   updated error is retried
+        input : cmd, sqlFile, retry_policy
+        output : status, output
+        """
+        def execSQLFile():
+            proc = FastPopen(cmd, stdout=PIPE, stderr=PIPE,
+                             preexec_fn=os.setsid, close_fds=True)
+            stdout, stderr = proc.communicate()
+            output = stdout + stderr
+            if SqlFile.findErrorInSqlFile(sqlFile, output):
+                return 1, output, SqlFile.findTupleErrorInSqlFile(output)
+            return proc.returncode, output, False
+
+        (status, output, _) = retry_policy.run(execSQLFile,
+                                               lambda result: result[2])
+        return status, output
+
     @staticmethod
     def remoteSQLCommand(sql, user, host, port, ignoreError=True,
                          database="postgres", useTid=False,
                          IsInplaceUpgrade=False, maintenance_mode=False,
-                         user_name="", user_pwd=""):
+                         user_name="", user_pwd="", retry_policy=None):
         """
         function : Execute sql command on remote host
         input : String,String,String,int
         output : String,String
         """
+        if retry_policy is None:
+            retry_policy = ClusterCommand.SQL_RETRY_POLICY
         database = database.replace('$', '\$')
         currentTime = datetime.utcnow().strftime("%Y-%m-%d_%H%M%S%f")
         pid = os.getpid()
@@ -3583,9 +3641,9 @@ class ClusterCommand():
                                            str(port),
                                            str(currentTime),
                                            str(pid)))
-        RE_TIMES = 3
         if useTid:
-            threadPid = CDLL('libc.so.6').syscall(186)
+            import ctypes
+            threadPid = ctypes.CDLL('libc.so.6').syscall(186)
             sqlFile = sqlFile + str(threadPid)
             queryResultFile = queryResultFile + str(threadPid)
         if (os.path.exists(sqlFile) or os.path.exists(queryResultFile)):
@@ -3657,20 +3715,8 @@ class ClusterCommand():
                     cmd = "%s '%s'" % (sshCmd, cmd)
                 if ignoreError:
                     cmd += " 2>/dev/null"
-            for i in range(RE_TIMES):
-                proc = FastPopen(cmd, stdout=PIPE, stderr=PIPE,
-                                 preexec_fn=os.setsid, close_fds=True)
-                stdout, stderr = proc.communicate()
-                output1 = stdout + stderr
-                status1 = proc.returncode
-                if SqlFile.findErrorInSqlFile(sqlFile, output1):
-                    if SqlFile.findTupleErrorInSqlFile(output1):
-                        time.sleep(1)  # find tuple error --> retry
-                    else:  # find error not tuple error
-                        status1 = 1
-                        break
-                else:  # not find error
-                    break
+            (status1, output1) = ClusterCommand.execSQLFileWithRetry(
+                cmd, sqlFile, retry_policy)
             # if failed to execute gsql, then clean the sql query file on
             # current node and other node
             if (status1 != 0):
@@ -3697,20 +3743,8 @@ class ClusterCommand():
                                                            queryResultFile)
                 if (ignoreError):
                     cmd += " 2>/dev/null"
-            for i in range(RE_TIMES):
-                proc = FastPopen(cmd, stdout=PIPE, stderr=PIPE,
-                                 preexec_fn=os.setsid, close_fds=True)
-                stdout, stderr = proc.communicate()
-                output1 = stdout + stderr
-                status1 = proc.returncode
-                if SqlFile.findErrorInSqlFile(sqlFile, output1):
-                    if SqlFile.findTupleErrorInSqlFile(output1):
-                        time.sleep(1)  # find tuple error --> retry
-                    else:  # find error not tuple error
-                        status1 = 1
-                        break
-                else:  # not find error
-                    break
+            (status1, output1) = ClusterCommand.execSQLFileWithRetry(
+                cmd, sqlFile, retry_policy)
             # if failed to execute gsql, then clean the sql query file
             # on current node and other node
             if (status1 != 0):
@@ -3892,6 +3926,7 @@ class ClusterCommand():
         """
         encrypt_dir = DefaultValue.get_ssh_protect_path()
         if os.path.isdir(encrypt_dir):
+            from gspylib.common.aes_cbc_util import AesCbcUtil
             output = AesCbcUtil.aes_cbc_decrypt_with_multi(*AesCbcUtil.format_path(encrypt_dir))
             if len(str(output).strip().split()) < 1:
                 raise Exception(
@@ -156,6 +156,43 @@ g_networkType = 0
 # global param to cache gs_om query instance result.
 global_cls_query_rst = {}
 
+# static configuration read by a long running process, such as
+# local/OmAgent.py, so that the processes it forks do not parse it again.
+# None when the cache is disabled
+g_staticConfigCache = None
+
+
+def enableStaticConfigCache():
+    """
+    function: enable the cache of initFromStaticConfig in this process
+    input : NA
+    output: NA
+    """
+    global g_staticConfigCache
+    if g_staticConfigCache is None:
+        g_staticConfigCache = {}
+
+
+def getStaticConfigSignature(staticConfigFile, user):
+    """
+    function: get the signature of the files initFromStaticConfig reads,
+              a cached cluster info is valid while it does not change
+    input : staticConfigFile, user
+    output: tuple
+    """
+    envFile = os.getenv(EnvUtil.MPPRC_FILE_ENV) or \
+        os.path.join(pwd.getpwnam(user).pw_dir, ".bashrc")
+    versionFile = os.path.join(os.path.dirname(staticConfigFile),
+                               "upgrade_version")
+    signature = [os.path.realpath(os.getenv("GAUSSHOME", ""))]
+    for path in (staticConfigFile, versionFile, envFile):
+        try:
+            fileStat = os.stat(path)
+            signature.append((path, fileStat.st_mtime_ns, fileStat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
 
 def ignoreCheck(Object, member, model):
     """
@@ -1081,6 +1118,14 @@ class dbClusterInfo():
         """
         # check Os user
         self.__checkOsUser(user)
+        cacheKey = (user, static_config_file, isLCCluster, ignoreLocalEnv)
+        if g_staticConfigCache is not None and \
+                cacheKey in g_staticConfigCache:
+            (staticConfigFile, signature, attributes) = \
+                g_staticConfigCache[cacheKey]
+            if getStaticConfigSignature(staticConfigFile, user) == signature:
+                self.__dict__.update(copy.deepcopy(attributes))
+                return
         # get static_config_file
         if (static_config_file == ""):
             staticConfigFile = self.__getStaticConfigFilePath(user)
@@ -1089,6 +1134,11 @@ class dbClusterInfo():
         # read static_config_file 
         self.__readStaticConfigFile(staticConfigFile, user, isLCCluster,
                                     ignoreLocalEnv=ignoreLocalEnv)
+        if g_staticConfigCache is not None:
+            g_staticConfigCache[cacheKey] = (
+                staticConfigFile,
+                getStaticConfigSignature(staticConfigFile, user),
+                copy.deepcopy(self.__dict__))
 
     def queryNodeInfo(self, sshtool, localHostName, nodeId, fileName="", azName=""):
         """
@@ -38,15 +38,9 @@ from gspylib.common.ErrorCode import OmError as _OmError
 from base_utils.os.file_util import FileUtil
 from base_utils.common.constantsbase import ConstantsBase
 from base_utils.security.sensitive_mask import SensitiveMask
+from base_utils.common.span_tracer import finish_trace
 from domain_utils.domain_common.cluster_constants import ClusterConstants
 
-# import typing for comment.
-try:
-    from typing import Dict
-    from typing import List
-except ImportError:
-    Dict = dict
-    List = list
 
 # max log file size
 # 16M
@@ -364,6 +358,7 @@ class GaussLog:
                 self.__writeLog("ERROR", sanitized_msg)
             except Exception as ex:
                 print(str(ex))
+        finish_trace(msg)
         self.closeLog()
         sys.exit(1)
 
@@ -451,6 +446,7 @@ class GaussLog:
         output: NA
         """
         sys.stderr.write("%s\n" % msg)
+        finish_trace(msg)
         sys.exit(status)
 
     @staticmethod
@@ -34,6 +34,13 @@ from base_utils.os.file_util import FileUtil
 from base_utils.os.user_util import UserUtil
 from base_utils.os.cmd_util import CmdUtil
 
+# set to "on" in the environment of the cluster user to run these local
+# scripts through local/OmAgent.py, which falls back to a new interpreter
+# on the nodes where no agent runs
+OM_AGENT_ENV = "GS_OM_AGENT"
+OM_AGENT_SCRIPTS = ["Local_Check_Config", "Local_Init_Instance",
+                    "Local_Check", "Local_Backup"]
+
 
 class OMCommand():
     """
@@ -73,6 +80,8 @@ class OMCommand():
                 Current_Path + "/../../local/CleanInstance.py"),
             "Local_Clean_OsUser": os.path.normpath(
                 Current_Path + "/../../local/CleanOsUser.py"),
+            "Local_Kill_Process": os.path.normpath(
+                Current_Path + "/../../local/KillProcess.py"),
             "Local_Config_Hba": os.path.normpath(
                 Current_Path + "/../../local/ConfigHba.py"),
             "Local_Config_CM_Res": os.path.normpath(
@@ -127,6 +136,8 @@ class OMCommand():
                 Current_Path + "/../../local/StopInstance.py"),
             "Local_Check_Upgrade": os.path.normpath(
                 Current_Path + "/../../local/CheckUpgrade.py"),
+            "Local_Collect_Config": os.path.normpath(
+                Current_Path + "/../../local/CollectConfig.py"),
             "Local_Check_SshAgent": os.path.normpath(Current_Path
                                                      + "/../../local/CheckSshAgent.py"),
             "Local_Upgrade_Utility": os.path.normpath(
@@ -135,6 +146,11 @@ class OMCommand():
                 Current_Path + "/../../local/upgrade_cm_utility.py")
         }
 
+        if script in OM_AGENT_SCRIPTS and EnvUtil.getEnv(OM_AGENT_ENV) == "on":
+            # -S: the client imports nothing from site-packages
+            return "python3 -S '%s' '%s'" % (
+                os.path.normpath(Current_Path + "/../../local/OmAgent.py"),
+                LocalScript[script])
         return "python3 '%s'" % LocalScript[script]
 
     @staticmethod
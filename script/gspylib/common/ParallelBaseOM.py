@@ -18,6 +18,7 @@ import os
 import socket
 import sys
 import getpass
+import pwd
 from subprocess import PIPE
 
 sys.path.append(sys.path[0] + "/../../")
@@ -36,6 +37,8 @@ from base_utils.os.env_util import EnvUtil
 from base_utils.os.file_util import FileUtil
 from base_utils.os.net_util import NetUtil
 from base_utils.common.fast_popen import FastPopen
+from base_utils.common.span_tracer import SpanTracer, TRACE_DIR_NAME, \
+    mark_step
 from base_utils.security.sensitive_mask import SensitiveMask
 from domain_utils.domain_common.cluster_constants import ClusterConstants
 
@@ -192,6 +195,31 @@ class ParallelBaseOM(object):
         dirName = os.path.dirname(self.logFile)
         self.localLog = os.path.join(dirName, ClusterConstants.LOCAL_LOG_FILE)
 
+    def initTracer(self, operation):
+        """
+        function: Start the step trace of the operation, the trace file is
+                  written to the trace directory next to the log file
+        input : operation
+        output: NA
+        """
+        traceDir = os.path.join(os.path.dirname(self.logger.logFile),
+                                TRACE_DIR_NAME)
+        tracer = SpanTracer.start(operation, traceDir)
+        if tracer is None:
+            self.logger.debug("Failed to create the trace file in %s."
+                              % traceDir)
+            return
+        self.logger.debug("Trace file: %s." % tracer.trace_file)
+        # the steps run as the cluster user append to the same trace
+        if os.getuid() == 0 and self.user:
+            try:
+                userInfo = pwd.getpwnam(self.user)
+                for path in (traceDir, tracer.trace_file):
+                    os.chown(path, userInfo.pw_uid, userInfo.pw_gid)
+            except (KeyError, OSError) as e:
+                self.logger.debug("Failed to change the owner of the trace "
+                                  "file. Error: %s" % str(e))
+
     def initClusterInfo(self, refreshCN=True):
         """
         function: Init cluster info
@@ -295,6 +323,7 @@ class ParallelBaseOM(object):
         """
         if nodes is None:
             nodes = []
+        mark_step(stepName)
         try:
             # write the step into INSTALL_STEP
             # open the INSTALL_STEP
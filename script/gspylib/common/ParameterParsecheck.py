@@ -48,12 +48,16 @@ PARA_CHECK_LIST = ["-t", "-h", "-m", "--mode",
                    "--parallel-jobs", '--redis-mode', "--ring-num",
                    "--virtual-ip",
                    "--nodeName", "--name", "--failure-limit", "--skip-items",
+                   "--bench-mode", "--block-size", "--iodepth", "--runtime",
+                   "--history",
                    "script_type=", "oldcluster_num=", "guc_string=", "setType="]
 PATH_CHEKC_LIST = ["-M", "-o", "-f", "-X", "-P", "-s", "-R", "-Q",
                    "--position", "-B",
                    "--backupdir", "--sep-env-file", "-l", "--logpath",
                    "--backup-dir",
-                   "--priority-tables", "--exclude-tables", "upgrade_bak_path=",
+                   "--priority-tables", "--exclude-tables", "--baseline",
+                   "--trace-file",
+                   "upgrade_bak_path=",
                    "old_cluster_app_path=", "new_cluster_app_path="]
 VALUE_CHECK_LIST = ["|", ";", "&", "$", "<", ">", "`", "\\", "'", "\"", "{",
                     "}", "(", ")",
@@ -81,7 +85,8 @@ gs_check = ["-?", "--help", "-V", "--version", "-e:", "-i:",
             "--ShrinkNodes=", "--nodegroup-name=",
             "--skip-root-items", "--set", "--non-print"]
 gs_sshexkey = ["-?", "--help", "-V", "--version",
-               "-f:", "--skip-hostname-set", "-l:", "-h:", "-W:", "--no-deduplicate"]
+               "-f:", "--skip-hostname-set", "-l:", "-h:", "-W:", "--no-deduplicate",
+               "--batch"]
 gs_backup = ["-?", "--help", "-V", "--version", "--backup-dir=",
              "--parameter", "--force",
              "--binary", "--all", "-l:", "-h:", "-t:", "-X:"]
@@ -90,8 +95,10 @@ gs_collector = ["-?", "--help", "-V", "--version", "--begin-time=",
                 "--keyword=", "--speed-limit=", "-h:", "-f:", "-o:",
                 "-l:", "-C:"]
 gs_checkperf = ["-?", "--help", "-V", "--version", "--detail", "-o:",
-                "-i:", "-l:", "-U:"]
-gs_ssh = ["-?", "--help", "-V", "--version", "-c:"]
+                "-i:", "-l:", "-U:", "--bench-mode=", "--block-size=",
+                "--iodepth=", "--runtime=", "--format=", "--history="]
+gs_ssh = ["-?", "--help", "-V", "--version", "-c:", "--stream",
+          "--parallel-jobs=", "--time-out="]
 gs_checkos = ["-?", "--help", "-V", "--version", "-h:", "-f:", "-o:",
               "-i:", "--detail",
               "-l:", "-X:"]
@@ -103,12 +110,13 @@ gs_dropnode = ["-?", "--help", "-V", "--version", "-U:", "-G:",
 # gs_om child branch
 gs_om_start = ["-t:", "-?", "--help", "-V", "--version", "-h:", "-I:",
                "--time-out=", "--az=", "-l:", "--nodeId=", "-D:",
-               "--security-mode=", "--cluster-number="]
+               "--security-mode=", "--cluster-number=", "--parallel-jobs="]
 gs_om_stop = ["-t:", "-?", "--help", "-V", "--version", "-h:", "-I:", "-m:",
-              "--az=", "-l:", "--mode=", "--nodeId=", "--time-out=", "-D:"]
+              "--az=", "-l:", "--mode=", "--nodeId=", "--time-out=", "-D:",
+              "--parallel-jobs="]
 gs_om_restart = ["-t:", "-?", "--help", "-V", "--version", "-h:", "-I:",
                "--time-out=", "--az=", "-l:", "--nodeId=", "-D:",
-               "--security-mode=", "--mode=", "-m:"]
+               "--security-mode=", "--mode=", "-m:", "--parallel-jobs="]
 gs_om_view = ["-t:", "-?", "--help", "-V", "--version", "-o:", "-l:", "--dynamic"]
 gs_om_query = ["-t:", "-?", "--help", "-V", "--version", "-o:", "-l:", "--time-out="]
 gs_om_status = ["-t:", "-?", "--help", "-V", "--version", "-h:", "-o:",
@@ -120,6 +128,10 @@ gs_om_cert = ["-t:", "-?", "--help", "-V", "--version", "-L", "-l:",
 gs_om_kerberos = ["-t:", "-?", "--help", "-V", "--version", "-m:", "-U:",
                   "-X:", "-l:", "--krb-server", "--krb-client"]
 gs_om_refreshconf = ["-t:", "-?", "--help", "-V", "--version", "-l:"]
+gs_om_config_drift = ["-t:", "-?", "--help", "-V", "--version", "-o:", "-l:",
+                      "--baseline=", "--format="]
+gs_om_trace_report = ["-t:", "-?", "--help", "-V", "--version", "-o:", "-l:",
+                      "--trace-file=", "--top=", "--format="]
 # gs_upgradectl child branch
 # AP and TP are same
 gs_upgradectl_chose_strategy = ["-t:", "-?", "--help", "-V", "--version",
@@ -162,6 +174,8 @@ ParameterDict = {"preinstall": gs_preinstall,
                  "view": gs_om_view,
                  "query": gs_om_query,
                  "refreshconf": gs_om_refreshconf,
+                 "config_drift": gs_om_config_drift,
+                 "trace_report": gs_om_trace_report,
                  "expansion": gs_expansion,
                  "dropnode": gs_dropnode
                  }
@@ -171,7 +185,8 @@ special_list = ["gs_om", "backup", "upgradectl"]
 
 # The -t parameter list
 action_om = ["start", "stop", "status", "restart", "generateconf", "kerberos",
-             "cert", "view", "query", "refreshconf"]
+             "cert", "view", "query", "refreshconf", "config_drift",
+             "trace_report"]
 action_upgradectl = ["chose-strategy", "auto-upgrade", "auto-rollback",
                      "commit-upgrade", "upgrade-cm"]
 
@@ -337,7 +352,14 @@ class Parameter():
                               "--dbuser": "dbuser",
                               "--nodeId": "nodeId",
                               "--security-mode": "security_mode",
-                              "--cluster-number": "cluster_number"
+                              "--cluster-number": "cluster_number",
+                              "--bench-mode": "bench_mode",
+                              "--block-size": "block_size",
+                              "--iodepth": "iodepth",
+                              "--runtime": "runtime",
+                              "--history": "history",
+                              "--baseline": "baseline",
+                              "--trace-file": "traceFile"
                               }
         parameterNeedValue_keys = parameterNeedValue.keys()
 
@@ -347,6 +369,8 @@ class Parameter():
                            "--non-interactive": "preMode",
                            "--skip-os-set": "skipOSSet",
                            "--skip-hostname-set": "skipHostnameSet",
+                           "--batch": "batchMode",
+                           "--stream": "streamMode",
                            "--reset": "reset",
                            "--parameter": "isParameter",
                            "--binary": "isBinary",
@@ -456,6 +480,8 @@ class Parameter():
             elif (key == "--ring-num"):
                 ringNumbers = self.checkParamternum(key, value)
                 PARAMETER_VALUEDICT['ringNumbers'] = ringNumbers
+            elif (key == "--top"):
+                PARAMETER_VALUEDICT['top'] = self.checkParamternum(key, value)
             elif (key == "--cert-file"):
                 PARAMETER_VALUEDICT['cert-file'] = \
                     os.path.realpath(value.strip())
@@ -38,7 +38,6 @@ from gspylib.component.DSS.dss_checker import DssConfig
 
 METHOD_TRUST = "trust"
 METHOD_SHA = "sha256"
-MAX_PARA_NUMBER = 1000
 INSTANCE_TYPE_UNDEFINED = -1
 MASTER_INSTANCE = 0
 STANDBY_INSTANCE = 1
@@ -406,6 +405,9 @@ class DN_OLAP(Kernel):
         commonDict = self.setCommonItems()
         self.setGucConfig(commonDict)
 
+        # the dynamic parameters and the data node config come from the
+        # user, gs_guc checks them after the values built here are set
+        userDict = {}
         self.logger.debug("Check if tmp_guc file exists.")
         tmpGucFile = ""
         tmpGucPath = EnvUtil.getTmpDirFromEnv(user)
@@ -429,15 +431,18 @@ class DN_OLAP(Kernel):
                                       "current datanode is dummy one.")
                     dummydynamicDict = dynamicDict
                     dummydynamicDict.pop("max_process_memory")
-                    tmpDNDict.update(dummydynamicDict)
+                    userDict.update(dummydynamicDict)
                 else:
-                    tmpDNDict.update(dynamicDict)
+                    userDict.update(dynamicDict)
             else:
                 raise Exception(ErrorCode.GAUSS_502["GAUSS_50219"] %
                                 "guc_list.conf")
-        tmpDNDict.update(dataConfig)
+        userDict.update(dataConfig)
         tmpDNDict["alarm_component"] = "'%s'" % alarm_component
+        for name in userDict:
+            tmpDNDict.pop(name, None)
         self.setGucConfig(tmpDNDict)
+        self.setGucConfig(userDict, checked=True)
 
         if (len(peerInsts)):
             self.setPrimaryStandyConnInfo(peerInsts)
@@ -470,53 +475,39 @@ class DN_OLAP(Kernel):
                                 "krb5.conf" + "Error:\n%s" % output)
             principal = output.split("=")[1].strip()
 
-        # build ip string list
-        # Every 1000 records merged into one
-        i = 0
-        guc_paras_str = ""
-        GUCParasStrList = []
+        # build all records, they are written to pg_hba.conf at once
+        hbaEntries = []
         pg_user = ClusterUser.get_pg_user()
         for ip_address in clusterAllIpList:
-            i += 1
             # Set the initial user and initial database access permissions
+            if ip_address.startswith("floatIp"):
+                hbaEntries.append("host    all    all    %s/32    %s" %
+                                  (float_ips[ip_address], METHOD_SHA))
+                continue
             if principal is None:
-                if ip_address.startswith("floatIp"):
-                    guc_paras_str += "-h \"host    all    all    %s/32    %s\" " % \
-                                     (float_ips[ip_address], METHOD_SHA)
-                else:
-                    guc_paras_str += "-h \"host    all    %s    %s/32    %s\" " % \
-                                     (pg_user, ip_address, METHOD_TRUST)
-                    guc_paras_str += "-h \"host    all    all    %s/32    %s\" " % \
-                                     (ip_address, METHOD_SHA)
+                hbaEntries.append("host    all    %s    %s/32    %s" %
+                                  (pg_user, ip_address, METHOD_TRUST))
             else:
-                if ip_address.startswith("floatIp"):
-                    guc_paras_str += "-h \"host    all    all    %s/32    %s\" " % \
-                                     (float_ips[ip_address], METHOD_SHA)
-                else:
-                    guc_paras_str += "-h \"host    all    %s    %s/32    gss    include_realm=1 " \
-                                     "   krb_realm=%s\" " % (pg_user, ip_address, principal)
-                    guc_paras_str += "-h \"host    all    all    %s/32    %s\" " % \
-                                     (ip_address, METHOD_SHA)
-            if (i % MAX_PARA_NUMBER == 0):
-                GUCParasStrList.append(guc_paras_str)
-                i = 0
-                guc_paras_str = ""
+                hbaEntries.append("host    all    %s    %s/32    gss    "
+                                  "include_realm=1    krb_realm=%s"
+                                  % (pg_user, ip_address, principal))
+            hbaEntries.append("host    all    all    %s/32    %s" %
+                              (ip_address, METHOD_SHA))
         # Used only streaming disaster cluster
         streaming_dn_ips = self.get_streaming_relate_dn_ips(self.instInfo)
         if streaming_dn_ips:
             for dn_ip in streaming_dn_ips:
-                guc_paras_str += "-h \"host    all    %s    %s/32    %s\" " \
-                               % (pg_user, dn_ip, METHOD_TRUST)
-                guc_paras_str += "-h \"host    all    all    %s/32    %s\" " \
-                               % (dn_ip, METHOD_SHA)
+                hbaEntries.append("host    all    %s    %s/32    %s"
+                                  % (pg_user, dn_ip, METHOD_TRUST))
+                hbaEntries.append("host    all    all    %s/32    %s"
+                                  % (dn_ip, METHOD_SHA))
                 ip_segment = '.'.join(dn_ip.split('.')[:2]) + ".0.0/16"
-                guc_paras_str += "-h \"host    replication    all    %s    sha256\" " % ip_segment
-
-        if (guc_paras_str != ""):
-            GUCParasStrList.append(guc_paras_str)
+                hbaEntries.append("host    replication    all    %s    sha256"
+                                  % ip_segment)
 
-        for parasStr in GUCParasStrList:
-            self.doGUCConfig("set", parasStr, True, try_reload=try_reload)
+        if hbaEntries:
+            self.doConfFileConfig("set", hbaEntries=hbaEntries,
+                                  try_reload=try_reload)
 
     """
     Desc: 
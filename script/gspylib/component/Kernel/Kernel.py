@@ -28,13 +28,21 @@ from gspylib.common.GaussLog import GaussLog
 from gspylib.component.BaseComponent import BaseComponent
 from gspylib.common.Common import DefaultValue
 from base_utils.os.cmd_util import CmdUtil
+from base_utils.os.dir_cleaner import DirCleaner
 from base_utils.os.env_util import EnvUtil
 from base_utils.os.file_util import FileUtil
+from base_utils.os.os_snapshot import OSSnapshot
 from base_utils.security.security_checker import SecurityChecker
 from domain_utils.cluster_os.cluster_user import ClusterUser
+from domain_utils.cluster_file.conf_file import ConfFile, GucConfFile, \
+    HbaConfFile, GUC_CONF_FILE, HBA_CONF_FILE
 
 MAX_PARA_NUMBER = 1000
 
+# entries kept when a data directory is cleaned
+CLEAN_DIR_IGNORES = ('pg_location', 'cfg', 'log', 'dss_inst.ini',
+                     'dss_vg_conf.ini', 'nodedata.cfg')
+
 
 class Kernel(BaseComponent):
     '''
@@ -230,111 +238,52 @@ class Kernel(BaseComponent):
     def removeSocketFile(self, fileName):
         """
         """
-        FileUtil.removeFile(fileName, "shell")
+        return DirCleaner.remove_files([fileName])
 
     def removeTbsDir(self, tbsDir):
         """
         """
-        FileUtil.removeDirectory(tbsDir)
+        return DirCleaner.remove_trees([tbsDir])
+
+    def getMountPoints(self, path):
+        """
+        function: Get the mount points under a path
+        input : path
+        output: list
+        """
+        path = os.path.realpath(path)
+        return [directory for (_, directory, _, _)
+                in OSSnapshot.collect_mounts()
+                if directory == path or directory.startswith(path + "/")]
 
     def cleanDir(self, instDir):
         """
         function: Clean the dirs
         input : instDir
-        output: NA
+        output: size and number of the removed files
         """
         if (not os.path.exists(instDir)):
-            return
+            return 0, 0
 
-        dataDir = []
         dataDir = os.listdir(instDir)
+        pglDir = '%s/pg_location' % instDir
         if (os.getuid() == 0):
-            pglDir = '%s/pg_location' % instDir
             isPglDirEmpty = False
             if (os.path.exists(pglDir) and len(os.listdir(pglDir)) == 0):
                 isPglDirEmpty = True
             if (len(dataDir) == 0 or isPglDirEmpty):
-                FileUtil.cleanDirectoryContent(instDir)
-        else:
-            for info in dataDir:
-                if (str(info) == "pg_location"):
-                    resultMount = []
-                    resultDir = []
-                    pglDir = '%s/pg_location' % instDir
-
-                    # delete all files in the mount point
-                    cmd = "%s | %s '%s' | %s '{printf $3}'" % \
-                          (CmdUtil.getMountCmd(), CmdUtil.getGrepCmd(),
-                           pglDir, CmdUtil.getAwkCmd())
-                    (status, outputMount) = subprocess.getstatusoutput(cmd)
-                    if (status != 0):
-                        raise Exception(ErrorCode.GAUSS_502["GAUSS_50207"] %
-                                        instDir + " Error:\n%s." %
-                                        str(outputMount) +
-                                        "The cmd is %s" % cmd)
-                    else:
-                        if (len(outputMount) > 0):
-                            resultMount = str(outputMount).split()
-                            for infoMount in resultMount:
-                                FileUtil.cleanDirectoryContent(infoMount)
-                        else:
-                            FileUtil.cleanDirectoryContent(instDir)
-                            continue
-
-                    # delete file in the pg_location directory
-                    if (not os.path.exists(pglDir)):
-                        continue
-                    cmd = "cd '%s'" % pglDir
-                    (status, output) = subprocess.getstatusoutput(cmd)
-                    if (status != 0):
-                        raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] %
-                                        cmd + " Error: \n%s " % output)
-
-                    outputFile = FileUtil.findFile(".", "f", "type")
-                    if (len(outputFile) > 0):
-                        for infoFile in outputFile:
-                            tmpinfoFile = pglDir + infoFile[1:]
-                            for infoMount in resultMount:
-                                if (tmpinfoFile.find(infoMount) < 0 and
-                                        infoMount.find(tmpinfoFile) < 0):
-                                    realFile = "'%s/%s'" % (pglDir, infoFile)
-                                    FileUtil.removeFile(realFile, "shell")
-
-                    # delete directory in the pg_location directory
-                    cmd = "if [ -d '%s' ]; then cd '%s' && find -type d; fi" \
-                          % \
-                          (pglDir, pglDir)
-                    (status, outputDir) = subprocess.getstatusoutput(cmd)
-                    if (status != 0):
-                        raise Exception(ErrorCode.GAUSS_502["GAUSS_50207"] %
-                                        instDir + " Error:\n%s." %
-                                        str(outputDir) + "The cmd is %s" % cmd)
-                    else:
-                        resultDir = FileUtil.findFile(".", "d", "type")
-                        resultDir.remove(".")
-                        if (len(resultDir) > 0):
-                            for infoDir in resultDir:
-                                tmpinfoDir = pglDir + infoDir[1:]
-                                for infoMount in resultMount:
-                                    if (tmpinfoDir.find(infoMount) < 0 and
-                                            infoMount.find(tmpinfoDir) < 0):
-                                        realPath = "'%s/%s'" % (
-                                        pglDir, infoDir)
-                                        FileUtil.removeDirectory(realPath)
-
-            ignores = [
-                'pg_location', 'cfg', 'log', 'dss_inst.ini', 'dss_vg_conf.ini',
-                'nodedata.cfg', '.', '..'
-            ]
-            extra_cmd = '! -name'.join([' \'{}\' '.format(ig) for ig in ignores])
-
-            cmd = "if [ -d '%s' ];then cd '%s' && find . ! -name %s -print0" \
-                  " |xargs -r -0 -n100 rm -rf; fi "   % (instDir, instDir, extra_cmd)
-            (status, output) = subprocess.getstatusoutput(cmd)
-            if (status != 0):
-                raise Exception(ErrorCode.GAUSS_502["GAUSS_50207"] %
-                                instDir + " Error:\n%s." % str(output) +
-                                "The cmd is %s" % cmd)
+                return DirCleaner.clean(instDir)
+            return 0, 0
+
+        keepNames = CLEAN_DIR_IGNORES
+        mountPoints = []
+        if (os.path.exists(pglDir)):
+            # the mount points of pg_location are emptied and kept, without
+            # any mount point the whole directory is cleaned
+            mountPoints = self.getMountPoints(pglDir)
+            if (len(mountPoints) == 0):
+                keepNames = ()
+        return DirCleaner.clean(instDir, keepNames, mountPoints)
 
     def uninstall(self, instNodeName):
         """
@@ -351,45 +300,37 @@ class Kernel(BaseComponent):
 
         # sockete file
         socketFiles = self.getLockFiles()
+        (removedSize, removedCount) = (0, 0)
 
         # clean tablespace dir
+        tbsDirList = [tbsDir for tbsDir in tbsDirList
+                      if DefaultValue.non_root_owner(tbsDir)]
         if (len(tbsDirList) != 0):
-            try:
-                self.logger.debug("Deleting instances tablespace directories.")
-                for tbsDir in tbsDirList:
-                    if DefaultValue.non_root_owner(tbsDir):
-                        self.removeTbsDir(tbsDir)
-            except Exception as e:
-                raise Exception(str(e))
+            self.logger.debug("Deleting instances tablespace directories.")
+            (size, count) = DirCleaner.remove_trees(tbsDirList)
+            removedSize += size
+            removedCount += count
             self.logger.log("Successfully cleaned instance tablespace.")
 
-        if (len(self.instInfo.datadir) != 0):
-            try:
-                self.logger.debug("Deleting instances directories.")
-                if DefaultValue.non_root_owner(self.instInfo.datadir):
-                    self.cleanDir(self.instInfo.datadir)
-            except Exception as e:
-                raise Exception(str(e))
-            self.logger.log("Successfully cleaned instances.")
-
-        if (len(self.instInfo.xlogdir) != 0):
-            try:
-                self.logger.debug("Deleting instances xlog directories.")
-                if DefaultValue.non_root_owner(self.instInfo.xlogdir):
-                    self.cleanDir(self.instInfo.xlogdir)
-            except Exception as e:
-                raise Exception(str(e))
+        for (instDir, dirType) in [(self.instInfo.datadir, ""),
+                                   (self.instInfo.xlogdir, "xlog ")]:
+            if (len(instDir) == 0):
+                continue
+            self.logger.debug("Deleting instances %sdirectories." % dirType)
+            if DefaultValue.non_root_owner(instDir):
+                (size, count) = self.cleanDir(instDir)
+                removedSize += size
+                removedCount += count
             self.logger.log("Successfully cleaned instances.")
 
         if (len(socketFiles) != 0):
-            try:
-                self.logger.debug("Deleting socket files.")
-                for socketFile in socketFiles:
-                    if DefaultValue.non_root_owner(socketFile):
-                        self.removeSocketFile(socketFile)
-            except Exception as e:
-                raise Exception(str(e))
+            self.logger.debug("Deleting socket files.")
+            socketFiles = [socketFile for socketFile in socketFiles
+                           if DefaultValue.non_root_owner(socketFile)]
+            DirCleaner.remove_files(socketFiles)
             self.logger.log("Successfully cleaned socket files.")
+        self.logger.debug("Removed %d files of %d bytes."
+                          % (removedCount, removedSize))
 
     def setCommonItems(self):
         """
@@ -449,29 +390,79 @@ class Kernel(BaseComponent):
             raise Exception(ErrorCode.GAUSS_500["GAUSS_50007"] % "GUC" +
                             " Command: %s. Error:\n%s" % (cmd, output))
 
-    def setGucConfig(self, paraDict=None, setMode='set'):
+    def setGucConfig(self, paraDict=None, setMode='set', checked=False):
         """
+        function: set the parameters of the instance. The values built by
+                  OM are written to postgresql.conf directly, with checked
+                  they go through gs_guc so that the names, types and
+                  ranges of the values given by the user are validated
+        input : paraDict, setMode, checked
+        output: NA
         """
-        i = 0
-        guc_paras_str = ""
-        guc_paras_str_list = []
-        if paraDict is None:
-            paraDict = {}
+        if not paraDict:
+            return
+        gucDict = {}
         for paras in paraDict:
-            i += 1
             value = str(paraDict[paras])
             if (paras.startswith('dcf') and paras.endswith(('path', 'config'))):
                 value = "'%s'" % value
-            guc_paras_str += " -c \"%s=%s\" " % (paras, value)
-            if (i % MAX_PARA_NUMBER == 0):
-                guc_paras_str_list.append(guc_paras_str)
-                i = 0
-                guc_paras_str = ""
-        if guc_paras_str != "":
-            guc_paras_str_list.append(guc_paras_str)
+            gucDict[paras] = value
+        if not checked:
+            self.doConfFileConfig(setMode, gucDict=gucDict)
+            return
+        items = list(gucDict.items())
+        for i in range(0, len(items), MAX_PARA_NUMBER):
+            self.doGUCConfig(setMode, "".join(
+                " -c \"%s=%s\" " % item
+                for item in items[i:i + MAX_PARA_NUMBER]), False)
+
+    def doConfFileConfig(self, action, gucDict=None, hbaEntries=None,
+                         hbaRemoved=None, try_reload=False):
+        """
+        function: apply all parameters, or all hba records, to the conf
+                  file of the instance in one write, and reload the
+                  instance once for action reload or try_reload
+        input : action, gucDict, hbaEntries, hbaRemoved, try_reload
+        output: NA
+        """
+        # check instance data directory
+        if (self.instInfo.datadir == "" or not os.path.exists(
+                self.instInfo.datadir)):
+            raise Exception(ErrorCode.GAUSS_502["GAUSS_50219"] %
+                            ("data directory of the instance[%s]" %
+                             str(self.instInfo)))
 
-        for parasStr in guc_paras_str_list:
-            self.doGUCConfig(setMode, parasStr, False)
+        # check conf file
+        isHba = (gucDict is None)
+        configFile = os.path.join(self.instInfo.datadir,
+                                  HBA_CONF_FILE if isHba else GUC_CONF_FILE)
+        if (not os.path.exists(configFile)):
+            raise Exception(ErrorCode.GAUSS_502["GAUSS_50201"] % configFile)
+
+        try:
+            if isHba:
+                confFile = HbaConfFile(configFile)
+                if hbaRemoved:
+                    confFile.remove_entries(hbaRemoved)
+                if hbaEntries:
+                    confFile.set_entries(hbaEntries)
+            else:
+                confFile = GucConfFile(configFile)
+                confFile.set_parameters(gucDict)
+            changed = confFile.save()
+        except Exception as e:
+            raise Exception(ErrorCode.GAUSS_500["GAUSS_50007"] % "GUC" +
+                            " File: %s. Error:\n%s" % (configFile, str(e)))
+        self.logger.debug("Applied the settings to %s, file changed: %s."
+                          % (configFile, changed))
+
+        if changed and (action == "reload" or try_reload):
+            if ConfFile.reload(self.instInfo.datadir):
+                self.logger.debug("Successfully reloaded the instance[%s]."
+                                  % self.instInfo.datadir)
+            else:
+                self.logger.debug("The instance[%s] is not running, "
+                                  "skip reloading." % self.instInfo.datadir)
 
     def get_streaming_relate_dn_ips(self, instance):
         """
@@ -509,20 +500,11 @@ class Kernel(BaseComponent):
     def removeIpInfoOnPghbaConfig(self, ipAddressList):
         """
         """
-        i = 0
-        GUCParasStr = ""
-        GUCParasStrList = []
+        hbaRemoved = []
         pg_user = ClusterUser.get_pg_user()
         for ipAddress in ipAddressList:
-            i += 1
-            GUCParasStr += " -h \"host    all    all    %s/32\"" % (ipAddress)
-            GUCParasStr += " -h \"host    all    %s    %s/32\"" % (pg_user, ipAddress)
-            if i * 2 % MAX_PARA_NUMBER == 0:
-                GUCParasStrList.append(GUCParasStr)
-                i = 0
-                GUCParasStr = ""
-        if (GUCParasStr != ""):
-            GUCParasStrList.append(GUCParasStr)
-
-        for parasStr in GUCParasStrList:
-            self.doGUCConfig("set", parasStr, True)
+            hbaRemoved.append("host    all    all    %s/32" % ipAddress)
+            hbaRemoved.append("host    all    %s    %s/32"
+                              % (pg_user, ipAddress))
+        if hbaRemoved:
+            self.doConfFileConfig("set", hbaRemoved=hbaRemoved)
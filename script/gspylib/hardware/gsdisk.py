@@ -29,18 +29,17 @@ from gspylib.os.gsplatform import g_Platform
 
 """
 Requirements:
-1. getUsageSize(directory) -> get directory or file real size. Unit is byte.
-2. getMountPathByDataDir(directory) -> get the input directory of the mount 
+1. getMountPathByDataDir(directory) -> get the input directory of the mount 
 disk
-3. getMountPathAvailSize(directory) -> get the avail size about the input 
+2. getMountPathAvailSize(directory) -> get the avail size about the input 
 directory of the mount disk. Unit MB
-4. getDiskSpaceUsage(directory) -> get directory or file space size. Unit is 
+3. getDiskSpaceUsage(directory) -> get directory or file space size. Unit is 
 byte.
-5. getDiskInodeUsage(directory) -> get directory or file inode uage. Unit is 
+4. getDiskInodeUsage(directory) -> get directory or file inode uage. Unit is 
 byte.
-6. getDiskMountType(directory) -> get the type about the input directory of 
+5. getDiskMountType(directory) -> get the type about the input directory of 
 the mount disk.
-7. getDiskReadWritespeed(inputFile, outputFile, bs, count, iflag = '', 
+6. getDiskReadWritespeed(inputFile, outputFile, bs, count, iflag = '', 
 oflag = '') -> get disk read/write speed
 """
 
@@ -61,24 +60,6 @@ class diskInfo():
         """
         return psutil.disk_partitions(allInfo)
 
-    def getUsageSize(self, directory):
-        """
-        get directory or file real size. Unit is byte
-        """
-        cmd = ""
-        try:
-            cmd = "%s -l -R %s | %s ^- | %s '{t+=$5;} END {print t}'" % (
-                g_Platform.getListCmd(), directory, g_Platform.getGrepCmd(),
-                g_Platform.getAwkCmd())
-            (status, output) = subprocess.getstatusoutput(cmd)
-            if (status == 0):
-                return output.split('\t')[0].strip()
-            else:
-                raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
-                                + " Error: \n%s" % str(output))
-        except Exception as e:
-            raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd)
-
     # Mtab always keeps the partition information already mounted in the
     # current system.
     # For programs like fdisk and df, 
@@ -18,6 +18,8 @@
 # Description  : TaskPool.py is a utility to manage tasks.
 # ############################################################################
 
+import binascii
+import json
 import os
 import signal
 import subprocess
@@ -28,6 +30,10 @@ import time
 import pwd
 
 PROCESS_INIT = 1
+# set by the om operation that runs pssh or pscp, see span_tracer.py
+TRACE_FILE_ENV = "OM_TRACE_FILE"
+TRACE_ID_ENV = "OM_TRACE_ID"
+TRACE_PARENT_ENV = "OM_TRACE_PARENT"
 SELF_FD_DIR = "/proc/self/fd"
 MAXFD = os.sysconf("SC_OPEN_MAX")
 def fast_close_fds(self, but):
@@ -189,6 +195,7 @@ class TaskThread(threading.Thread):
         self.failures = []
         self.proc = None
         self.timestamp = time.time()
+        self.end_time = None
         self.isKill = False
         self.agent_mode = agent_mode
         self.writer = WriterThread(f_out, f_err) if (f_out or f_err) else None
@@ -285,6 +292,7 @@ class TaskThread(threading.Thread):
                                   close_fds=True)
 
         stdout, stderr = self.proc.communicate()
+        self.end_time = time.time()
         self.stdout += stdout
         self.stderr += stderr
         self.status = self.proc.returncode
@@ -371,6 +379,7 @@ class TaskPool(object):
         self.running_tasks = []
         self.writers = []
         self.task_status = {}
+        self.trace_file = os.environ.get(TRACE_FILE_ENV, "")
 
     def __get_task_files(self, host):
         """
@@ -423,9 +432,40 @@ class TaskPool(object):
             writer = task.write(index)
             if writer:
                 self.writers.append(writer)
+            if self.trace_file:
+                self.__trace_task(task)
 
         self.running_tasks = still_running
 
+    def __trace_task(self, task):
+        """
+        Append the time the task took on its host to the trace file of the
+        om operation. The command is not recorded, it may hold passwords.
+        """
+        end_time = task.end_time or time.time()
+        record = {"trace_id": os.environ.get(TRACE_ID_ENV),
+                  "span_id": binascii.hexlify(os.urandom(8)).decode(),
+                  "parent_id": os.environ.get(TRACE_PARENT_ENV),
+                  "kind": "remote",
+                  "step": os.path.basename(sys.argv[0]),
+                  "node": task.host,
+                  "pid": os.getpid(),
+                  "start": round(task.timestamp, 6),
+                  "duration": round(end_time - task.timestamp, 6),
+                  "status": "ok" if task.status == 0 else "error",
+                  "exit_code": task.status}
+        if task.failures:
+            record["error"] = ", ".join(task.failures)
+        try:
+            fd = os.open(self.trace_file, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, (json.dumps(record, sort_keys=True) + "\n")
+                         .encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
     def __start_limit_task(self):
         """
         Starts the tasks within a specified number of parallel.
@@ -0,0 +1,158 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : InstanceScheduler.py starts or stops the instances of one
+#                node concurrently. Instances of the same rank run together,
+#                a rank starts when the rank before it has finished.
+#############################################################################
+import time
+from multiprocessing.dummy import Pool as ThreadPool
+
+from gspylib.common.Common import DefaultValue
+from gspylib.threads.parallelTool import parallelTool
+
+# ranks of the jobs of a node, a start runs them from the lowest rank to
+# the highest one and a stop the other way round
+RANK_PREREQUISITE = 0
+RANK_PRIMARY = 1
+RANK_STANDBY = 2
+RANK_CASCADE_STANDBY = 3
+
+JOB_SUCCESS = "Success"
+JOB_FAILED = "Failed"
+JOB_SKIPPED = "Skipped"
+
+
+def getInstanceRank(instInfo):
+    """
+    function: get the rank of a DN instance, a primary is started before
+              its standbys and stopped after them
+    input : instInfo
+    output: rank
+    """
+    if instInfo.instanceType == DefaultValue.MASTER_INSTANCE:
+        return RANK_PRIMARY
+    if instInfo.instanceType == DefaultValue.CASCADE_STANDBY:
+        return RANK_CASCADE_STANDBY
+    return RANK_STANDBY
+
+
+class InstanceScheduler():
+    """
+    Run the start or stop jobs of the instances of a node
+    """
+
+    def __init__(self, logger, parallelJobs=0):
+        """
+        function: constructor
+        input : logger, number of jobs run at the same time, 0 for the
+                number of cpus
+        output: NA
+        """
+        self.logger = logger
+        self.parallelJobs = parallelJobs
+        self.jobs = []
+
+    def addJob(self, name, func, rank):
+        """
+        function: add a job
+        input : name shown in the results, function without parameters,
+                rank
+        output: NA
+        """
+        self.jobs.append({"name": name, "func": func, "rank": rank})
+
+    def runJob(self, job):
+        """
+        function: run one job and record its time and error
+        input : job
+        output: result
+        """
+        result = {"name": job["name"], "rank": job["rank"],
+                  "status": JOB_SUCCESS, "duration": 0.0, "error": ""}
+        startTime = time.time()
+        try:
+            job["func"]()
+        except BaseException as e:
+            # Kernel.stop exits on some errors, in a thread that would only
+            # end the thread silently
+            result["status"] = JOB_FAILED
+            result["error"] = str(e)
+        result["duration"] = time.time() - startTime
+        self.logger.debug("%s %s in %.3fs." % (job["name"],
+                                                result["status"].lower(),
+                                                result["duration"]))
+        return result
+
+    def run(self, reverse=False):
+        """
+        function: run the jobs rank by rank, the jobs of a rank run at the
+                  same time. The ranks after a failed job are skipped
+        input : reverse, run the highest rank first
+        output: list of results in the order the jobs were added
+        """
+        ranks = sorted(set(job["rank"] for job in self.jobs),
+                       reverse=reverse)
+        results = {}
+        failed = False
+        for rank in ranks:
+            jobs = [job for job in self.jobs if job["rank"] == rank]
+            if failed:
+                for job in jobs:
+                    results[id(job)] = {"name": job["name"], "rank": rank,
+                                        "status": JOB_SKIPPED,
+                                        "duration": 0.0, "error": ""}
+                continue
+            jobNum = min(parallelTool.getCpuCount(self.parallelJobs),
+                         len(jobs))
+            if jobNum <= 1:
+                rankResults = [self.runJob(job) for job in jobs]
+            else:
+                pool = ThreadPool(jobNum)
+                try:
+                    rankResults = pool.map(self.runJob, jobs)
+                finally:
+                    pool.close()
+                    pool.join()
+            for (job, result) in zip(jobs, rankResults):
+                results[id(job)] = result
+                if result["status"] == JOB_FAILED:
+                    failed = True
+        return [results[id(job)] for job in self.jobs]
+
+    @staticmethod
+    def formatResults(results):
+        """
+        function: format the time and the status of every job
+        input : results
+        output: str
+        """
+        return "\n".join("%-40s %-8s %9.3fs" % (result["name"],
+                                                 result["status"],
+                                                 result["duration"])
+                         for result in results)
+
+    @staticmethod
+    def getErrors(results):
+        """
+        function: collect the errors of the failed jobs
+        input : results
+        output: str, empty if no job failed
+        """
+        return "\n".join("[%s] %s" % (result["name"], result["error"])
+                         for result in results
+                         if result["status"] == JOB_FAILED)
@@ -24,7 +24,6 @@ import os
 import sys
 import datetime
 import weakref
-import time
 from random import sample
 import copy
 sys.path.append(sys.path[0] + "/../../")
@@ -34,6 +33,8 @@ from base_utils.os.env_util import EnvUtil
 from base_utils.os.file_util import FileUtil
 from base_utils.os.net_util import NetUtil
 from base_utils.os.cmd_util import CmdUtil
+from base_utils.common.retry_policy import RetryPolicy
+from base_utils.common.span_tracer import traced
 from domain_utils.domain_common.cluster_constants import ClusterConstants
 from base_utils.security.sensitive_mask import SensitiveMask
 from gspylib.common.Constants import Constants
@@ -58,6 +59,11 @@ except ImportError as ex:
     except ImportError as ex:
             raise Exception(ErrorCode.GAUSS_522["GAUSS_52200"] % str(ex))
 
+# pscp is retried once after a connection failure, not after a timeout
+SCP_RETRY_POLICY = RetryPolicy.for_ssh(max_attempts=2, base_delay=3,
+                                       max_delay=3)
+
+
 class SshTool():
     """
     Class for controling multi-hosts
@@ -371,6 +377,7 @@ class SshTool():
             logger.debug("{timeout clean} status: %s, output: %s" % (
                 status, SensitiveMask.mask_pwd(output)))
 
+    @traced("ssh.executeCommand", cmd_arg="cmd", nodes_arg="hostList")
     def executeCommand(self, cmd, cmdReturn=DefaultValue.SUCCESS,
                        hostList=None, env_file="", parallel_num=300,
                        checkenv=False, parallelism=True ):
@@ -524,6 +531,7 @@ class SshTool():
                     raise Exception(ErrorCode.GAUSS_518["GAUSS_51808"]
                                     % res + "Please check %s." % envfile)
 
+    @traced("ssh.getSshStatusOutput", cmd_arg="cmd", nodes_arg="hostList")
     def getSshStatusOutput(self, cmd, hostList=None, env_file="",
                            gp_path="", parallel_num=300, ssh_config=""):
         """
@@ -721,6 +729,7 @@ class SshTool():
 
         return resultMap
 
+    @traced("ssh.scpFiles", cmd_arg="srcFile", nodes_arg="hostList")
     def scpFiles(self, srcFile, targetDir, hostList=None, env_file="",
                  gp_path="", parallel_num=300):
         """
@@ -784,14 +793,11 @@ class SshTool():
                                               self.__outputPath,
                                               self.__errorPath, srcFile,
                                               targetDir, self.__resultFile)
-            (status, output) = subprocess.getstatusoutput(scpCmd)
-
-            # If sending the file fails, we retry after 3s to avoid the 
-            # failure caused by intermittent network disconnection.
+            # If sending the file fails, we retry to avoid the failure
+            # caused by intermittent network disconnection.
             # If the fails is caused by timeout. no need to retry.
-            if status != 0 and output.find("Timed out") < 0:
-                time.sleep(3)
-                (status, output) = subprocess.getstatusoutput(scpCmd)
+            (status, output) = CmdUtil.retryGetstatusoutput(
+                scpCmd, retry_policy=SCP_RETRY_POLICY)
 
             if status != 0:
                 raise Exception(ErrorCode.GAUSS_502["GAUSS_50216"]
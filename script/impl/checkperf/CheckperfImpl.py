@@ -40,6 +40,14 @@ class CheckperfImpl():
         """
         pass
 
+    def CheckPMKHistory(self, outputInfo):
+        """
+        function: check pmk history
+        input  : outputInfo
+        output : NA
+        """
+        pass
+
     def CheckSSDPerf(self, outputInfo):
         """
         function: check ssd perf
@@ -67,7 +75,10 @@ class CheckperfImpl():
                 outputInfo = sys.stdout
             # check check item
             for key in self.opts.checkItem:
-                if key == "PMK":
+                if key == "PMK" and self.opts.historyWindow:
+                    # report PMK history of this node
+                    self.CheckPMKHistory(outputInfo)
+                elif key == "PMK":
                     # check PMK
                     self.CheckPMKPerf(outputInfo)
                 elif key == "SSD":
@@ -27,14 +27,24 @@ from gspylib.common.OMCommand import OMCommand
 from gspylib.common.ErrorCode import ErrorCode
 from gspylib.threads.parallelTool import parallelTool
 from impl.checkperf.CheckperfImpl import CheckperfImpl
+from impl.checkperf.PerfHistory import PerfHistoryStore, CLUSTER_SERIES, \
+    KIND_COUNTER, METRICS, RATIOS
 from base_utils.os.env_util import EnvUtil
 from base_utils.os.file_util import FileUtil
 from domain_utils.sql_handler.sql_executor import SqlExecutor
 from base_utils.os.net_util import NetUtil
 from base_utils.os.cmd_util import CmdUtil
+from domain_utils.cluster_file.cluster_log import ClusterLog
+from domain_utils.domain_common.cluster_constants import ClusterConstants
 
 # Database size inspection interval
 DB_SIZE_CHECK_INTERVAL = 21600
+# columns of pmk_snapshot_datanode_stat that need quotes in INSERT
+NODE_STAT_TEXT_COLUMNS = [1, 2, 3]
+# raw counter columns of a node stat record, the delta of each counter
+# is kept in the next column
+PREV_STAT_COLUMNS = [5, 7, 9, 11, 17, 19, 21, 23, 25, 32, 34, 41, 43, 45, 47]
+PREV_NODE_STAT_FILE = "pmk_prev_node_stat.json"
 
 
 class CheckperfImplOLAP(CheckperfImpl):
@@ -1312,7 +1322,6 @@ class CheckperfImplOLAP(CheckperfImpl):
         """
         self.logger.debug(
             "Inserting the node stat of all hosts into the cluster.")
-        insertSql = ""
         currTimeTemp = ""
         lastTimeTemp = ""
         snapshotIdTempNum = 0
@@ -1348,54 +1357,29 @@ class CheckperfImplOLAP(CheckperfImpl):
                         dnInst = dntmpInst
                         break
 
-            for record in self.recordColumn.keys():
-                column = self.recordColumn[record]
-                insertSql += "INSERT INTO pmk.pmk_snapshot_datanode_stat" \
-                             " VALUES("
-                insertSql += "%s, '%s', '%s', '%s', %s," % (
-                    column[0], column[1], column[2], column[3], column[4])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[5], column[6], column[7], column[8], column[9])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[10], column[11], column[12], column[13], column[14])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[15], column[16], column[17], column[18], column[19])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[20], column[21], column[22], column[23], column[24])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[25], column[26], column[27], column[28], column[29])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[30], column[31], column[32], column[33], column[34])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[35], column[36], column[37], column[38], column[39])
-                insertSql += "%s, %s, %s, %s, %s," % (
-                    column[40], column[41], column[42], column[43], column[44])
-                insertSql += "%s, %s, %s, %s);\n" % (
-                    column[45], column[46], column[47], column[48])
-
-            if (insertSql != ""):
-                startSql = "START TRANSACTION;"
-                commitSql = "COMMIT;"
+            if (len(self.recordColumn) != 0):
+                startSql = "START TRANSACTION;\n"
+                commitSql = "COMMIT;\n"
                 tempSql = "INSERT INTO pmk.pmk_snapshot VALUES (%s, %s, %s, " \
                           "current_timestamp);\n" % (snapshotIdTempStr,
                                                      currTimeTemp,
                                                      lastTimeTemp)
                 updateSql = "UPDATE pmk.pmk_meta_data SET last_snapshot_id" \
-                            " = %s, last_snapshot_collect_time = %s; " % \
+                            " = %s, last_snapshot_collect_time = %s;\n" % \
                             (snapshotIdTempStr, currTimeTemp)
-                # execute the insert sql
+                # execute all statements over one connection
+                # and in one transaction
                 local_host = NetUtil.GetHostIpOrName()
                 if self.DWS_mode:
+                    # libpq PQexec can not feed COPY data,
+                    # so use one multi-row INSERT instead
+                    insertSql = self.getNodeStatInsertSql()
+                    sql = startSql + tempSql + insertSql \
+                          + updateSql + commitSql
                     if local_host == hostName:
                         (status, result,
-                         error_output1) = SqlExecutor.excuteSqlOnLocalhost(
-                            port, tempSql)
-                        (status, result,
-                         error_output2) = SqlExecutor.excuteSqlOnLocalhost(
-                            port, insertSql)
-                        (status, result,
-                         error_output3) = SqlExecutor.excuteSqlOnLocalhost(
-                            port, updateSql)
+                         error_output) = SqlExecutor.excuteSqlOnLocalhost(
+                            port, sql)
                     else:
                         currentTime = time.strftime("%Y-%m-%d_%H:%M:%S")
                         pid = os.getpid()
@@ -1405,51 +1389,22 @@ class CheckperfImplOLAP(CheckperfImpl):
                         filepath = os.path.join(tmpDir, outputfile)
                         ClusterCommand.executeSQLOnRemoteHost(dnInst.hostname,
                                                               dnInst.port,
-                                                              tempSql,
-                                                              filepath)
-                        (status, result,
-                         error_output1) = SqlExecutor.getSQLResult(
-                            dnInst.hostname, outputfile)
-                        ClusterCommand.executeSQLOnRemoteHost(dnInst.hostname,
-                                                              dnInst.port,
-                                                              insertSql,
+                                                              sql,
                                                               filepath)
                         (status, result,
-                         error_output2) = SqlExecutor.getSQLResult(
+                         error_output) = SqlExecutor.getSQLResult(
                             dnInst.hostname, outputfile)
-                        ClusterCommand.executeSQLOnRemoteHost(dnInst.hostname,
-                                                              dnInst.port,
-                                                              updateSql,
-                                                              filepath)
-                        (status, result,
-                         error_output3) = SqlExecutor.getSQLResult(
-                            dnInst.hostname, outputfile)
-                    if error_output1 != "":
+                    if error_output != "":
                         self.logger.debug(
-                            "Failed to execute SQL: %s" % startSql
-                            + "\nError: \n%s" % str(error_output1))
-                        raise Exception(ErrorCode.GAUSS_530["GAUSS_53012"]
-                                        + "\nError: \n%s\n" \
-                                        % str(error_output1)
-                                        + "Please check the log for detail.")
-                    if error_output2 != "":
-                        self.logger.debug(
-                            "Failed to execute SQL: %s" % insertSql
-                            + "\nError: \n%s" % str(error_output2))
-                        raise Exception(ErrorCode.GAUSS_530["GAUSS_53012"]
-                                        + "\nError: \n%s\n" \
-                                        % str(error_output2)
-                                        + "Please check the log for detail.")
-                    if error_output3 != "":
-                        self.logger.debug(
-                            "Failed to execute SQL: %s" % insertSql
-                            + "\nError: \n%s" % str(error_output3))
+                            "Failed to execute SQL: %s" % sql
+                            + "\nError: \n%s" % str(error_output))
                         raise Exception(ErrorCode.GAUSS_530["GAUSS_53012"]
                                         + "\nError: \n%s\n" \
-                                        % str(error_output3)
+                                        % str(error_output)
                                         + "Please check the log for detail.")
                 else:
-                    sql = startSql + tempSql + insertSql \
+                    # gsql reads the COPY data inline from the sql file
+                    sql = startSql + tempSql + self.getNodeStatCopySql() \
                           + updateSql + commitSql
                     (status, output) = ClusterCommand.remoteSQLCommand(
                         sql, self.opts.user,
@@ -1462,6 +1417,8 @@ class CheckperfImplOLAP(CheckperfImpl):
                                             "GAUSS_53012"]
                                         + "\nError: \n%s\n" % str(output)
                                         + "Please check the log for detail.")
+                # keep the raw counters for the next collection
+                self.savePrevNodeStat(snapshotIdTempStr)
             else:
                 raise Exception(
                     ErrorCode.GAUSS_502["GAUSS_50203"] % ("sql statement"))
@@ -1472,6 +1429,103 @@ class CheckperfImplOLAP(CheckperfImpl):
         except Exception as e:
             raise Exception(str(e))
 
+    def getNodeStatCopySql(self):
+        """
+        function: get the COPY statement with inline data that loads
+                  the node stat of all hosts
+        input : NA
+        output: str
+        """
+        copySql = "COPY pmk.pmk_snapshot_datanode_stat FROM STDIN " \
+                  "WITH (DELIMITER '|');\n"
+        for record in self.recordColumn.keys():
+            copySql += "%s\n" % "|".join(
+                [str(value).strip() for value in self.recordColumn[record]])
+        copySql += "\\.\n"
+        return copySql
+
+    def getNodeStatInsertSql(self):
+        """
+        function: get one multi-row INSERT statement
+                  of the node stat of all hosts
+        input : NA
+        output: str
+        """
+        rows = []
+        for record in self.recordColumn.keys():
+            column = self.recordColumn[record]
+            values = []
+            for (index, value) in enumerate(column):
+                if index in NODE_STAT_TEXT_COLUMNS:
+                    values.append("'%s'" % value)
+                else:
+                    values.append("%s" % value)
+            rows.append("(%s)" % ", ".join(values))
+        return "INSERT INTO pmk.pmk_snapshot_datanode_stat VALUES\n%s;\n" \
+               % ",\n".join(rows)
+
+    def getPrevNodeStatFile(self):
+        """
+        function: get the file that keeps the raw counters of the
+                  last snapshot inserted by this node
+        input : NA
+        output: str
+        """
+        return os.path.join(EnvUtil.getTmpDirFromEnv(self.opts.user),
+                            PREV_NODE_STAT_FILE)
+
+    def savePrevNodeStat(self, snapshotId):
+        """
+        function: save the raw counters of the current snapshot, so the
+                  next collection computes deltas without querying them
+        input : snapshotId
+        output: NA
+        """
+        prevStat = {}
+        for record in self.recordColumn.keys():
+            column = self.recordColumn[record]
+            recordName = (column[1]).strip()
+            prevStat[recordName] = [recordName] + \
+                [str(column[index]).strip() for index in PREV_STAT_COLUMNS]
+        try:
+            filePath = self.getPrevNodeStatFile()
+            FileUtil.createFileInSafeMode(filePath)
+            with open(filePath, "w") as fp:
+                json.dump({"snapshot_id": str(snapshotId),
+                           "node_stat": prevStat}, fp)
+        except Exception as e:
+            # the cache is only an optimization
+            self.logger.debug("Failed to save prev node stat. "
+                              "Error: %s" % str(e))
+
+    def loadPrevNodeStat(self, snapshotId):
+        """
+        function: load the raw counters of the previous snapshot kept
+                  in memory by the last collection of this node
+        input : snapshotId
+        output: bool
+        """
+        filePath = self.getPrevNodeStatFile()
+        if snapshotId == "" or not os.path.isfile(filePath):
+            return False
+        try:
+            with open(filePath, "r") as fp:
+                cache = json.load(fp)
+        except Exception as e:
+            self.logger.debug("Failed to load prev node stat. "
+                              "Error: %s" % str(e))
+            return False
+        if cache.get("snapshot_id") != str(snapshotId).strip():
+            return False
+        prevStat = cache.get("node_stat", {})
+        for record in self.recordColumn.keys():
+            if (self.recordColumn[record][1]).strip() not in prevStat:
+                return False
+        self.recordPrevStat.update(prevStat)
+        self.logger.debug("Got prev node stat of snapshot %s from memory."
+                          % snapshotId)
+        return True
+
     def getDWSMode(self):
         """
         function: get collect pmk infromation mode
@@ -1818,14 +1872,18 @@ class CheckperfImplOLAP(CheckperfImpl):
 
             # get node stat of all hosts
             self.getAllHostsNodeStat()
-            # get prev node stat of all hosts
-            self.getAllHostsPrevNodeStat(hostname, port, last_snapshot_id)
+            # get prev node stat of all hosts, the previous snapshot
+            # is only queried when this node did not insert it
+            if not self.loadPrevNodeStat(last_snapshot_id):
+                self.getAllHostsPrevNodeStat(hostname, port, last_snapshot_id)
             # handle the node stat of all hosts
             self.handleNodeStat()
             # insert the node stat of all hosts into the cluster
             self.insertNodeStat(hostname, port,
                                  pmk_curr_collect_start_time,
                                  pmk_last_collect_start_time, last_snapshot_id)
+            # keep the raw counters in the local history store
+            self.saveNodeStatHistory()
 
             # display pmk stat
             showDetail = ""
@@ -1876,6 +1934,100 @@ class CheckperfImplOLAP(CheckperfImpl):
                 FileUtil.removeFile(tmpFile)
             raise Exception(str(e))
 
+    def getPerfHistoryStore(self):
+        """
+        function: get the local time series store of the node stat
+        input : NA
+        output: PerfHistoryStore
+        """
+        return PerfHistoryStore(ClusterLog.getOMLogPath(
+            ClusterConstants.GS_CHECKPERF_HISTORY_DIR, self.opts.user))
+
+    def saveNodeStatHistory(self):
+        """
+        function: append the node stat of this collection to the local
+                  history store
+        input : NA
+        output: NA
+        """
+        try:
+            self.getPerfHistoryStore().append_node_stat(
+                list(self.recordColumn.values()))
+        except Exception as e:
+            # the history is only an addition to the pmk schema
+            self.logger.debug("Failed to save node stat history. "
+                              "Error: %s" % str(e))
+
+    def CheckPMKHistory(self, outputInfo):
+        """
+        function: report the node stat kept in the local history store
+                  without querying the database
+        input : outputInfo
+        output: NA
+        """
+        self.logger.debug("Checking PMK history.")
+        report = self.getPerfHistoryStore().report(self.opts.historyWindow)
+        if self.opts.outputFormat == "json":
+            print(json.dumps(report, indent=4), file=outputInfo)
+            self.logger.debug("Successfully checked PMK history.")
+            return
+        print("PMK history from %s to %s:"
+              % (time.strftime("%Y-%m-%d %H:%M:%S",
+                               time.localtime(report["start"])),
+                 time.strftime("%Y-%m-%d %H:%M:%S",
+                               time.localtime(report["end"]))),
+              file=outputInfo)
+        if not report["series"]:
+            print("    No statistics were collected in this window.",
+                  file=outputInfo)
+        # the cluster series comes first, then the nodes
+        seriesList = sorted(report["series"].keys(),
+                            key=lambda name: (name != CLUSTER_SERIES, name))
+        for series in seriesList:
+            stat = report["series"][series]
+            print("\n%s statistics (%d samples):"
+                  % ("Cluster" if series == CLUSTER_SERIES
+                     else "Node %s" % series, stat["samples"]),
+                  file=outputInfo)
+            for (name, _, _) in RATIOS:
+                print("    %-45s:    %s %%" % (name, stat["ratios"][name]),
+                      file=outputInfo)
+            print("    %-22s %14s %14s %14s %14s %14s %14s"
+                  % ("Metric", "Delta/Last", "Rate/Avg", "Min", "P50",
+                     "P95", "Max"), file=outputInfo)
+            for (name, _, kind) in METRICS:
+                metric = stat["metrics"][name]
+                if not metric["samples"]:
+                    continue
+                if kind == KIND_COUNTER:
+                    first = (metric["delta"], metric["rate"])
+                else:
+                    first = (metric["last"], metric["avg"])
+                print("    %-22s %14.2f %14.2f %14.2f %14.2f %14.2f %14.2f"
+                      % (name, first[0], first[1], metric["min"],
+                         metric["p50"], metric["p95"], metric["max"]),
+                      file=outputInfo)
+        self.logger.debug("Successfully checked PMK history.")
+
+    def getSSDBenchOptions(self):
+        """
+        function: get the benchmark options passed to the local script
+        input : NA
+        output: str
+        """
+        options = ""
+        if self.opts.benchMode:
+            options += " --bench-mode=%s" % self.opts.benchMode
+        if self.opts.blockSize:
+            options += " --block-size=%s" % self.opts.blockSize
+        if self.opts.iodepth:
+            options += " --iodepth=%s" % self.opts.iodepth
+        if self.opts.runtime:
+            options += " --runtime=%s" % self.opts.runtime
+        if self.opts.outputFormat == "json":
+            options += " --format=json"
+        return options
+
     def CheckSSDPerf(self, outputInfo):
         """
         function: check the performance about SSD
@@ -1883,22 +2035,29 @@ class CheckperfImplOLAP(CheckperfImpl):
         output: NA
         """
         self.logger.debug("Checking SSD performance.")
+        isJson = (self.opts.outputFormat == "json")
         # print SSD performance statistics information to output file
-        print(
-            "SSD performance statistics information:",
-            end="", file=outputInfo)
+        if not isJson:
+            print(
+                "SSD performance statistics information:",
+                end="", file=outputInfo)
         try:
-            # check SSD
-            cmd = "%s -t SSDPerfCheck -U %s -l %s" \
+            # check SSD, all nodes run the benchmark at the same time
+            cmd = "%s -t SSDPerfCheck -U %s -l %s%s" \
                   % (OMCommand.getLocalScript("LOCAL_PERFORMANCE_CHECK"),
-                     self.opts.user, self.opts.localLog)
+                     self.opts.user, self.opts.localLog,
+                     self.getSSDBenchOptions())
             gp_path = os.path.join(
                 DefaultValue.ROOT_SCRIPTS_PATH, self.opts.user)
             (status, output) = self.sshTool.getSshStatusOutput(cmd,
                                                                gp_path=gp_path)
             outputMap = self.sshTool.parseSshOutput(self.sshTool.hostNames)
+            jsonResult = {}
             for node in status.keys():
-                if (status[node] == DefaultValue.SUCCESS):
+                if isJson:
+                    jsonResult[node] = self.parseSSDJsonOutput(
+                        status[node], outputMap[node])
+                elif (status[node] == DefaultValue.SUCCESS):
                     result = outputMap[node]
                     print(
                         "    %s:\n%s" % (node, result),
@@ -1908,6 +2067,26 @@ class CheckperfImplOLAP(CheckperfImpl):
                         "    %s:\n        Failed to check SSD performance." \
                         " Error: %s" % (node, outputMap[node]),
                         end="", file=outputInfo)
+            if isJson:
+                print(json.dumps(jsonResult, indent=4), file=outputInfo)
             self.logger.debug("Successfully checked SSD performance.")
         except Exception as e:
             raise Exception(str(e))
+
+    def parseSSDJsonOutput(self, nodeStatus, nodeOutput):
+        """
+        function: get the json document printed by the local script
+        input : nodeStatus, nodeOutput
+        output: dict
+        """
+        if nodeStatus == DefaultValue.SUCCESS:
+            for line in reversed(nodeOutput.strip().split("\n")):
+                line = line.strip()
+                if not line.startswith("{"):
+                    continue
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    break
+        return {"error": "Failed to check SSD performance. Error: %s"
+                         % nodeOutput.strip()}
@@ -0,0 +1,341 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : PerfHistory.py keeps the node statistics collected by
+#                gs_checkperf in a node local, append-only time series store
+#                of packed doubles, and computes deltas, rates, min/max and
+#                percentiles over a time window column by column.
+#############################################################################
+
+import math
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from base_utils.os.disk_bench import percentile
+
+KIND_COUNTER = "counter"
+KIND_GAUGE = "gauge"
+
+# (metric name, column of the pmk_snapshot_datanode_stat record, kind)
+METRICS = [
+    ("number_of_files", 4, KIND_GAUGE),
+    ("physical_reads", 5, KIND_COUNTER),
+    ("physical_writes", 7, KIND_COUNTER),
+    ("read_time", 9, KIND_COUNTER),
+    ("write_time", 11, KIND_COUNTER),
+    ("db_size", 13, KIND_GAUGE),
+    ("active_sql_count", 14, KIND_GAUGE),
+    ("session_count", 16, KIND_GAUGE),
+    ("xact_commit", 17, KIND_COUNTER),
+    ("xact_rollback", 19, KIND_COUNTER),
+    ("checkpoints_timed", 21, KIND_COUNTER),
+    ("checkpoints_req", 23, KIND_COUNTER),
+    ("physical_memory", 27, KIND_GAUGE),
+    ("db_memory_usage", 28, KIND_GAUGE),
+    ("shared_buffer_size", 29, KIND_GAUGE),
+    ("blocks_read", 32, KIND_COUNTER),
+    ("blocks_hit", 34, KIND_COUNTER),
+    ("sorts_in_memory", 37, KIND_COUNTER),
+    ("sorts_in_disk", 39, KIND_COUNTER),
+    ("busy_time", 41, KIND_COUNTER),
+    ("idle_time", 43, KIND_COUNTER),
+    ("iowait_time", 45, KIND_COUNTER),
+    ("db_cpu_time", 47, KIND_COUNTER),
+]
+METRIC_NAMES = [metric[0] for metric in METRICS]
+# ratios reported like clusterStatistics: (name, numerator, denominators)
+RATIOS = [
+    ("host_cpu_busy_time_perc", "busy_time", ["busy_time", "idle_time"]),
+    ("host_cpu_iowait_time_perc", "iowait_time", ["busy_time", "idle_time"]),
+    ("mppdb_cpu_time_in_busy_time", "db_cpu_time", ["busy_time"]),
+    ("share_buffer_hit_ratio", "blocks_hit", ["blocks_hit", "blocks_read"]),
+    ("in_memory_sort_ratio", "sorts_in_memory",
+     ["sorts_in_memory", "sorts_in_disk"]),
+]
+HISTORY_PERCENTILES = [50, 95, 99]
+
+CLUSTER_SERIES = "cluster"
+SERIES_SUFFIX = ".tsdb"
+FILE_MAGIC = b"GSPH"
+FILE_VERSION = 1
+# magic, version, number of metrics
+HEADER = struct.Struct("<4sHH")
+# timestamp followed by one double per metric, NaN when not collected
+RECORD = struct.Struct("<%dd" % (len(METRICS) + 1))
+DEFAULT_RETENTION = 7 * 24 * 3600
+TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+NAN = float("nan")
+
+
+def parse_window(value):
+    """
+    function: parse a time window such as 30m, 12h or 7d to seconds,
+              a plain number is taken as seconds
+    input : value
+    output: int
+    """
+    value = str(value).strip().lower()
+    if value and value[-1] in TIME_UNITS:
+        seconds = int(value[:-1]) * TIME_UNITS[value[-1]]
+    else:
+        seconds = int(value)
+    if seconds <= 0:
+        raise ValueError("The time window must be greater than 0.")
+    return seconds
+
+
+def to_float(value):
+    """
+    function: convert a column of the node stat record to float
+    input : value
+    output: float
+    """
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return NAN
+
+
+def counter_deltas(values):
+    """
+    function: deltas between adjacent samples of a counter, a counter
+              that goes backwards was reset so its new value is the delta
+    input : values
+    output: array
+    """
+    return array("d", [NAN if math.isnan(prev) or math.isnan(cur)
+                       else cur - prev if cur >= prev else cur
+                       for (prev, cur) in zip(values, values[1:])])
+
+
+def column_stats(times, values, kind):
+    """
+    function: compute the statistics of one metric column in a window
+    input : times, values, kind
+    output: dict
+    """
+    if kind == KIND_COUNTER:
+        deltas = counter_deltas(values)
+        intervals = [cur - prev for (prev, cur) in zip(times, times[1:])]
+        # a NaN on either side of an interval drops the interval
+        pairs = [(delta, interval)
+                 for (delta, interval) in zip(deltas, intervals)
+                 if not math.isnan(delta) and interval > 0]
+        samples = sorted(delta / interval for (delta, interval) in pairs)
+        total = sum(delta for (delta, _) in pairs)
+        elapsed = sum(interval for (_, interval) in pairs)
+        result = {"kind": kind,
+                  "samples": len(samples),
+                  "delta": total,
+                  "rate": total / elapsed if elapsed else 0}
+    else:
+        valid = [value for value in values if not math.isnan(value)]
+        samples = sorted(valid)
+        result = {"kind": kind,
+                  "samples": len(samples),
+                  "last": valid[-1] if valid else 0,
+                  "avg": sum(samples) / len(samples) if samples else 0}
+    result["min"] = samples[0] if samples else 0
+    result["max"] = samples[-1] if samples else 0
+    for pct in HISTORY_PERCENTILES:
+        result["p%d" % pct] = percentile(samples, pct)
+    return result
+
+
+class PerfHistoryStore(object):
+    """
+    append-only store with one file of packed records per series
+    """
+
+    def __init__(self, directory, retention=DEFAULT_RETENTION):
+        """
+        function: initialize the store
+        input : directory, retention
+        output: NA
+        """
+        self.directory = directory
+        self.retention = retention
+
+    def get_series_file(self, series):
+        """
+        function: get the file of one series, the node name is
+                  reduced to a safe file name
+        input : series
+        output: str
+        """
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", series)
+        return os.path.join(self.directory, name + SERIES_SUFFIX)
+
+    def list_series(self):
+        """
+        function: list the series kept in the store
+        input : NA
+        output: list
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(SERIES_SUFFIX)]
+                      for name in os.listdir(self.directory)
+                      if name.endswith(SERIES_SUFFIX))
+
+    def append(self, series, timestamp, values):
+        """
+        function: append one sample to a series and apply the retention
+        input : series, timestamp, values
+        output: NA
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        file_path = self.get_series_file(series)
+        fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                     0o600)
+        try:
+            data = RECORD.pack(timestamp, *values)
+            if os.fstat(fd).st_size == 0:
+                data = HEADER.pack(FILE_MAGIC, FILE_VERSION,
+                                   len(METRICS)) + data
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        self.purge(series, timestamp)
+
+    def append_node_stat(self, record_columns, timestamp=None):
+        """
+        function: append the node stat records of one collection, and
+                  their sum as the cluster series
+        input : record_columns, timestamp
+        output: NA
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        cluster = [NAN] * len(METRICS)
+        for column in record_columns:
+            values = [to_float(column[index]) for (_, index, _) in METRICS]
+            self.append(str(column[1]).strip(), timestamp, values)
+            cluster = [value if math.isnan(total)
+                       else total if math.isnan(value) else total + value
+                       for (total, value) in zip(cluster, values)]
+        if record_columns:
+            self.append(CLUSTER_SERIES, timestamp, cluster)
+
+    def read_raw(self, file_path):
+        """
+        function: read the records of a series file as flat doubles,
+                  a file of another layout or a torn last record is
+                  not returned
+        input : file_path
+        output: array
+        """
+        with open(file_path, "rb") as fp:
+            data = fp.read()
+        if len(data) < HEADER.size:
+            return array("d")
+        (magic, version, count) = HEADER.unpack_from(data)
+        if (magic != FILE_MAGIC or version != FILE_VERSION
+                or count != len(METRICS)):
+            return array("d")
+        records = (len(data) - HEADER.size) // RECORD.size
+        flat = array("d")
+        flat.frombytes(data[HEADER.size:HEADER.size + records * RECORD.size])
+        if sys.byteorder != "little":
+            flat.byteswap()
+        return flat
+
+    def read(self, series, start=None, end=None):
+        """
+        function: read the samples of a series in [start, end] split
+                  into one array per column
+        input : series, start, end
+        output: times, dict of metric name to array
+        """
+        file_path = self.get_series_file(series)
+        flat = self.read_raw(file_path) if os.path.isfile(file_path) \
+            else array("d")
+        width = len(METRICS) + 1
+        times = flat[0::width]
+        first = 0 if start is None else bisect_left(times, start)
+        last = len(times) if end is None else bisect_right(times, end)
+        columns = {}
+        for (index, name) in enumerate(METRIC_NAMES):
+            columns[name] = flat[index + 1::width][first:last]
+        return times[first:last], columns
+
+    def purge(self, series, now):
+        """
+        function: drop the samples older than the retention, the file
+                  is only rewritten when its first sample expired
+        input : series, now
+        output: NA
+        """
+        file_path = self.get_series_file(series)
+        cutoff = now - self.retention
+        with open(file_path, "rb") as fp:
+            head = fp.read(HEADER.size + RECORD.size)
+        if len(head) < HEADER.size + RECORD.size:
+            return
+        if struct.unpack_from("<d", head, HEADER.size)[0] >= cutoff:
+            return
+        flat = self.read_raw(file_path)
+        width = len(METRICS) + 1
+        first = bisect_left(flat[0::width], cutoff)
+        kept = flat[first * width:]
+        if sys.byteorder != "little":
+            kept.byteswap()
+        tmp_file = "%s.%d.tmp" % (file_path, os.getpid())
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, len(METRICS)))
+                fp.write(kept.tobytes())
+            os.rename(tmp_file, file_path)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def report(self, window, now=None):
+        """
+        function: compute the statistics of every series in the window
+        input : window, now
+        output: dict
+        """
+        if now is None:
+            now = time.time()
+        start = now - window
+        report = {"start": start, "end": now, "series": {}}
+        for series in self.list_series():
+            (times, columns) = self.read(series, start, now)
+            if not times:
+                continue
+            metrics = {}
+            for (name, _, kind) in METRICS:
+                metrics[name] = column_stats(times, columns[name], kind)
+            ratios = {}
+            for (name, numerator, denominators) in RATIOS:
+                total = sum(metrics[item]["delta"] for item in denominators)
+                ratios[name] = round(metrics[numerator]["delta"] * 100.0
+                                     / total, 2) if total else 0
+            report["series"][series] = {"samples": len(times),
+                                        "first": times[0],
+                                        "last": times[-1],
+                                        "metrics": metrics,
+                                        "ratios": ratios}
+        return report
@@ -44,6 +44,7 @@ class CollectImpl:
         '''
         try:
             self.context.initLogger("gs_collector")
+            self.context.initTracer("gs_collector")
         except Exception as e:
             self.context.logger.closeLog()
             raise Exception(str(e))
@@ -28,6 +28,7 @@ from gspylib.common.OMCommand import OMCommand
 from gspylib.common.ErrorCode import ErrorCode
 from impl.collect.CollectImpl import CollectImpl
 from base_utils.executor.cmd_executor import CmdExecutor
+from base_utils.common.span_tracer import traced
 from base_utils.os.cmd_util import CmdUtil
 from domain_utils.cluster_file.cluster_dir import ClusterDir
 from base_utils.os.compress_util import CompressUtil
@@ -457,6 +458,7 @@ class CollectImplOLAP(CollectImpl):
             self.context.logger.debug("check plan result failed %s." % str(e))
             return 1
 
+    @traced("collect.System")
     def systemCheck(self, sysInfo):
         """
         function: collected OS information
@@ -488,6 +490,7 @@ class CollectImplOLAP(CollectImpl):
             self.context.logger.log("The cmd is %s " % cmd)
             self.context.logger.log("Failed to collect OS information.")
 
+    @traced("collect.Database")
     def databaseCheck(self, data):
         """
         function: collected catalog informatics
@@ -520,6 +523,7 @@ class CollectImplOLAP(CollectImpl):
             self.context.logger.log("The cmd is %s " % cmd)
             self.context.logger.log("Failed collected catalog statistics.")
 
+    @traced("collect.{log}")
     def logCopy(self, log, l):
         """
         function: collected log files
@@ -579,6 +583,7 @@ class CollectImplOLAP(CollectImpl):
             self.context.logger.log("The cmd is %s " % cmd)
             self.context.logger.log("Failed collected %s files." % log)
 
+    @traced("collect.{check}")
     def confGstack(self, check, s):
         """
         function: collected configuration files and processed stack information
@@ -615,6 +620,7 @@ class CollectImplOLAP(CollectImpl):
             self.context.logger.log(
                 "Failed collected %s files." % s["TypeName"])
 
+    @traced("collect.Plan")
     def planSimulator(self, data):
         """
         function: collect plan simulator files
@@ -646,6 +652,7 @@ class CollectImplOLAP(CollectImpl):
             self.context.logger.log("The cmd is %s " % cmd)
             self.context.logger.log("Failed collected plan simulator.")
 
+    @traced("collect.copyFile")
     def copyFile(self):
         """
         function: collected result files
@@ -716,6 +723,7 @@ class CollectImplOLAP(CollectImpl):
         else:
             self.context.logger.log("Successfully collected files.")
 
+    @traced("collect.tarResultFiles")
     def tarResultFiles(self, currentTime, targetdir, resultdir):
         """
         :return:
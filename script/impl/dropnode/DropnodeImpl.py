@@ -26,9 +26,11 @@ import pwd
 import datetime
 import grp
 import socket
+import time
 
 sys.path.append(sys.path[0] + "/../../../../")
 from gspylib.threads.SshTool import SshTool
+from gspylib.threads.parallelTool import parallelTool
 from gspylib.common.ErrorCode import ErrorCode
 from gspylib.common.Common import DefaultValue
 from gspylib.common.GaussLog import GaussLog
@@ -36,6 +38,9 @@ from gspylib.inspection.common.Exception import CheckException
 from gspylib.common.OMCommand import OMCommand
 from base_utils.os.env_util import EnvUtil
 from base_utils.os.net_util import NetUtil
+from base_utils.executor.remote_batch import RemoteBatch
+from base_utils.executor.preflight import PreflightEngine, \
+    rule_instance_state
 from domain_utils.domain_common.cluster_constants import ClusterConstants
 
 
@@ -46,6 +51,14 @@ STANDBY_INSTANCE = 1
 
 # status failed
 STATUS_FAIL = "Failure"
+# hosts processed at the same time when the target node is dropped on the
+# other hosts
+DROP_NODE_PARALLEL_NUM = 16
+# seconds to wait for the walsenders of the dropped nodes to release their
+# replication slots, and for a restarted instance to accept connections
+SLOT_RELEASE_TIMEOUT = 30
+INSTANCE_READY_TIMEOUT = 300
+PROBE_INTERVAL = 0.5
 
 
 class DropnodeImpl():
@@ -111,23 +124,30 @@ class DropnodeImpl():
         """
         check all standby state whether switchover is happening
         """
-        for hostNameLoop in self.context.hostMapForExist.keys():
-            sshtool_host = SshTool([hostNameLoop])
-            for i in self.context.hostMapForExist[hostNameLoop]['datadir']:
-                # check whether switchover/failover is happening
-                self.commonOper.checkStandbyState(hostNameLoop, i,
-                                                  sshtool_host,
-                                                  self.userProfile)
-            self.cleanSshToolFile(sshtool_host)
+        # check whether switchover/failover is happening on every node
+        # at once, the instances of the target nodes may be stopped
+        hostsForDel = [host for host in self.context.hostMapForDel.keys()
+                       if host not in self.context.failureHosts]
+        rules = rule_instance_state(dict(
+            (host, self.context.hostMapForExist[host]['datadir'])
+            for host in self.context.hostMapForExist.keys()))
+        rules.extend(rule_instance_state(dict(
+            (host, self.context.hostMapForDel[host]['datadir'])
+            for host in hostsForDel), True))
+        sshTool = SshTool(list(self.context.hostMapForExist.keys())
+                          + hostsForDel)
+        try:
+            violations = PreflightEngine(sshTool, self.userProfile).add_rules(
+                rules).run()
+        finally:
+            self.cleanSshToolFile(sshTool)
+        if violations:
+            GaussLog.exitWithError(PreflightEngine.format_report(violations))
 
         for hostNameLoop in self.context.hostMapForDel.keys():
             if hostNameLoop not in self.context.failureHosts:
                 sshtool_host = SshTool([hostNameLoop])
                 for i in self.context.hostMapForDel[hostNameLoop]['datadir']:
-                    # check whether switchover/failover is happening
-                    self.commonOper.checkStandbyState(hostNameLoop, i,
-                                                      sshtool_host,
-                                                      self.userProfile, True)
                     self.commonOper.stopInstance(hostNameLoop, sshtool_host, i,
                                                  self.userProfile)
                 cmdDelCert = "ls %s/share/sslcert/grpc/* | " \
@@ -146,83 +166,139 @@ class DropnodeImpl():
                                 "and delete the GRPC sslcert of %s manually."
                                 % (hostNameLoop, hostNameLoop))
 
-    def dropNodeOnAllHosts(self):
+    def dropNodeOnHost(self, hostNameLoop, sshtool_host, floatIpsForDel):
         """
-        drop the target node on the other host
+        drop the target node on one host, the config files are read with
+        one remote call and the new values are set for every data dir, a
+        data dir that fails to be set is rolled back
         """
-        for hostNameLoop in self.context.hostMapForExist.keys():
-            sshtool_host = SshTool([hostNameLoop])
-            # backup
-            backupfile = self.commonOper.backupConf(
-                self.gphomepath, self.user,
-                hostNameLoop, self.userProfile, sshtool_host, self.pghostPath)
-            self.logger.log(
-                "[gs_dropnode]The backup file of " + hostNameLoop + " is " + backupfile)
+        # backup
+        backupfile = self.commonOper.backupConf(
+            self.gphomepath, self.user,
+            hostNameLoop, self.userProfile, sshtool_host, self.pghostPath)
+        self.logger.log(
+            "[gs_dropnode]The backup file of " + hostNameLoop + " is " + backupfile)
+        if hostNameLoop == self.localhostname:
+            self.backupFilePrimary = backupfile
+        # parse
+        resultList = self.commonOper.readConfigFiles(
+            hostNameLoop, self.context.hostMapForExist[hostNameLoop]['datadir'],
+            self.context.hostMapForExist[hostNameLoop]['dn_id'], backupfile,
+            self.dnIdForDel, self.context.hostIpListForDel, floatIpsForDel,
+            sshtool_host, self.envFile)
+        for (i, (resultDict, resultDictForRollback)) in zip(
+                self.context.hostMapForExist[hostNameLoop]['datadir'],
+                resultList):
             if hostNameLoop == self.localhostname:
-                self.backupFilePrimary = backupfile
-            indexForuse = 0
-            for i in self.context.hostMapForExist[hostNameLoop]['datadir']:
-                # parse
-                resultDict = self.commonOper.parseConfigFile(hostNameLoop, i,
-                                                             self.dnIdForDel,
-                                                             self.context.hostIpListForDel,
-                                                             sshtool_host,
-                                                             self.envFile)
-                resultDictForRollback = self.commonOper.parseBackupFile(
-                    hostNameLoop, backupfile,
-                    self.context.hostMapForExist[hostNameLoop][
-                        'dn_id'][indexForuse],
-                    resultDict['replStr'], sshtool_host,
-                    self.envFile)
-                if hostNameLoop == self.localhostname:
-                    self.resultDictOfPrimary.append(resultDict)
-                # try set
-                try:
-                    self.commonOper.SetPgsqlConf(resultDict['replStr'],
-                                                 hostNameLoop, i,
-                                                 resultDict['syncStandbyStr'],
-                                                 sshtool_host,
-                                                 self.userProfile,
-                                                 '',
-                                                 self.context.flagOnlyPrimary)
-                except ValueError:
-                    self.logger.log("[gs_dropnode]Rollback pgsql process.")
-                    self.commonOper.SetPgsqlConf(resultDict['replStr'],
-                                                 hostNameLoop, i,
-                                                 resultDict['syncStandbyStr'],
-                                                 sshtool_host,
-                                                 self.userProfile,
-                                                 resultDictForRollback[
-                                                     'rollbackReplStr'])
-                indexForuse += 1
-            self.cleanSshToolFile(sshtool_host)
+                self.resultDictOfPrimary.append(resultDict)
+            # try set
+            try:
+                self.commonOper.SetPgsqlConf(resultDict['replStr'],
+                                             hostNameLoop, i,
+                                             resultDict['syncStandbyStr'],
+                                             sshtool_host,
+                                             self.userProfile,
+                                             '',
+                                             self.context.flagOnlyPrimary)
+            except ValueError:
+                self.logger.log("[gs_dropnode]Rollback pgsql process.")
+                self.commonOper.SetPgsqlConf(resultDict['replStr'],
+                                             hostNameLoop, i,
+                                             resultDict['syncStandbyStr'],
+                                             sshtool_host,
+                                             self.userProfile,
+                                             resultDictForRollback[
+                                                 'rollbackReplStr'])
+
+    def dropNodeOnAllHosts(self):
+        """
+        drop the target node on the other host, the hosts are processed at
+        the same time
+        """
+        hostNames = list(self.context.hostMapForExist.keys())
+        if not hostNames:
+            return
+        floatIpsForDel = self.commonOper.get_float_ips_for_del(
+            self.context.hostIpListForDel)
+        sshTools = dict((hostName, SshTool([hostName]))
+                        for hostName in hostNames)
+
+        def dropNode(hostNameLoop):
+            try:
+                self.dropNodeOnHost(hostNameLoop, sshTools[hostNameLoop],
+                                    floatIpsForDel)
+            finally:
+                self.cleanSshToolFile(sshTools[hostNameLoop])
+
+        self.parallelRun(dropNode, hostNames,
+                         "drop the target node on")
+
+    def parallelRun(self, func, items, action):
+        """
+        run func on every item at the same time, and exit with an error
+        after all of them have finished if any failed
+        """
+        if not items:
+            return
+
+        def runOne(item):
+            try:
+                func(item)
+                return ""
+            except SystemExit as e:
+                # the error has been printed by exitWithError
+                return "exit with code %s" % e.code
+            except BaseException as e:
+                return str(e)
+
+        errors = parallelTool.parallelExecute(
+            runOne, items, min(len(items), DROP_NODE_PARALLEL_NUM))
+        failedItems = [(item, error) for (item, error)
+                       in zip(items, errors) if error]
+        if failedItems:
+            for (item, error) in failedItems:
+                self.logger.debug("[gs_dropnode]Failed to %s %s: %s"
+                                  % (action, item, error))
+            GaussLog.exitWithError(ErrorCode.GAUSS_358["GAUSS_35809"])
 
     def operationOnlyOnPrimary(self):
         """
-        operation only need to be executed on primary node
+        operation only need to be executed on primary node, the pg_hba of
+        the hosts and the replication slots of the local instances are set
+        at the same time
         """
-        for hostNameLoop in self.context.hostMapForExist.keys():
+        pghbaStr = self.resultDictOfPrimary[0]['pghbaStr']
+
+        def setPghba(hostNameLoop):
             try:
                 self.commonOper.SetPghbaConf(self.userProfile, hostNameLoop,
-                                             self.resultDictOfPrimary[0][
-                                             'pghbaStr'], False)
+                                             pghbaStr, False)
             except ValueError:
                 self.logger.log("[gs_dropnode]Rollback pghba conf.")
                 self.commonOper.SetPghbaConf(self.userProfile, hostNameLoop,
-                                             self.resultDictOfPrimary[0][
-                                             'pghbaStr'], True)
-        indexLoop = 0
-        for i in self.context.hostMapForExist[self.localhostname]['datadir']:
+                                             pghbaStr, True)
+
+        def setReplSlot(port):
+            # the slots are read once, the rollback recreates them from it
+            replslot = self.commonOper.get_repl_slot(self.localhostname,
+                                                     self.gsql_path, port)
             try:
-                self.commonOper.SetReplSlot(self.localhostname, self.gsql_path,
-                    self.context.hostMapForExist[self.localhostname]['port'][indexLoop],
-                    self.dnIdForDel)
+                self.commonOper.SetReplSlot(self.localhostname,
+                                            self.gsql_path, port,
+                                            self.dnIdForDel,
+                                            replslot=replslot)
             except ValueError:
                 self.logger.log("[gs_dropnode]Rollback replslot")
-                self.commonOper.SetReplSlot(self.localhostname, self.gsql_path,
-                    self.context.hostMapForExist[self.localhostname]['port'][indexLoop],
-                    self.dnIdForDel, True)
-                indexLoop += 1
+                self.commonOper.SetReplSlot(self.localhostname,
+                                            self.gsql_path, port,
+                                            self.dnIdForDel, True, replslot)
+
+        self.parallelRun(setPghba, list(self.context.hostMapForExist.keys()),
+                         "set the pg_hba config file on")
+        self.parallelRun(
+            setReplSlot,
+            self.context.hostMapForExist[self.localhostname]['port'],
+            "set the repl slot of the instance on port")
 
     def modifyStaticConf(self):
         """
@@ -246,11 +322,15 @@ class DropnodeImpl():
             nameLoop = backIpDict_keys[backIpDict_values.index(ipLoop)]
             dnLoop = self.context.clusterInfo.getDbNodeByName(nameLoop)
             self.context.clusterInfo.dbNodes.remove(dnLoop)
+        # the header of the file holds the id of the node it is on, so
+        # every node gets its own copy, written once here
         for dbNode in self.context.clusterInfo.dbNodes:
             if dbNode.name == self.localhostname:
                 self.context.clusterInfo.saveToStaticConfig(staticConfigPath,
                                                             dbNode.id)
                 continue
+            if self.context.flagOnlyPrimary:
+                continue
             staticConfigPath_dn = "%s/cluster_static_config_%s" % (
                 tmpDir, dbNode.name)
             self.context.clusterInfo.saveToStaticConfig(staticConfigPath_dn,
@@ -261,18 +341,26 @@ class DropnodeImpl():
         if not self.context.flagOnlyPrimary:
             cmd = "%s/script/gs_om -t refreshconf" % self.gphomepath
             subprocess.getstatusoutput(cmd)
-            for hostName in self.context.hostMapForExist.keys():
+
+            def sendStaticConf(hostName):
+                staticConfigPath_name = "%s/cluster_static_config_%s" % (
+                    tmpDir, hostName)
                 hostSsh = SshTool([hostName])
-                if hostName != self.localhostname:
-                    staticConfigPath_name = "%s/cluster_static_config_%s" % (
-                tmpDir, hostName)
+                try:
                     hostSsh.scpFiles(staticConfigPath_name, staticConfigPath,
                                      [hostName], self.envFile)
+                finally:
+                    self.cleanSshToolFile(hostSsh)
                     try:
                         os.unlink(staticConfigPath_name)
                     except FileNotFoundError:
                         pass
-                self.cleanSshToolFile(hostSsh)
+
+            self.parallelRun(sendStaticConf,
+                             [hostName for hostName in
+                              self.context.hostMapForExist.keys()
+                              if hostName != self.localhostname],
+                             "send the cluster static conf to")
 
         self.logger.log("[gs_dropnode]End of modify the cluster static conf.")
 
@@ -354,12 +442,23 @@ class DropnodeImpl():
                        "restart the node.\nDo you want to restart the primary " \
                        "node now (yes/no)? "
             self.context.checkInput(msgPrint)
-            sshTool = SshTool([self.localhostname])
-            for i in self.context.hostMapForExist[self.localhostname]['datadir']:
-                self.commonOper.stopInstance(self.localhostname, sshTool, i,
-                                             self.userProfile)
-                self.commonOper.startInstance(i, self.userProfile)
-            self.cleanSshToolFile(sshTool)
+            localMap = self.context.hostMapForExist[self.localhostname]
+
+            def restart(item):
+                (dirDn, port) = item
+                sshTool = SshTool([self.localhostname])
+                try:
+                    self.commonOper.stopInstance(self.localhostname, sshTool,
+                                                 dirDn, self.userProfile)
+                finally:
+                    self.cleanSshToolFile(sshTool)
+                self.commonOper.startInstance(dirDn, self.userProfile)
+                self.commonOper.waitInstanceReady(self.localhostname,
+                                                  self.gsql_path, port)
+
+            self.parallelRun(restart,
+                             list(zip(localMap['datadir'], localMap['port'])),
+                             "restart the instance")
         else:
             pass
 
@@ -475,24 +574,41 @@ class OperCommon:
         self.logger.log("Successfully get float IP from json, %s." % float_ip)
         return float_ip
 
-    def get_float_ip_config(self, host, dn_dir, host_ips_for_del, ssh_tool, env_file):
+    def get_float_ips_for_del(self, host_ips_for_del):
         """
-        Get float IP configuration str
+        Get the float IPs of the nodes to drop, None if the cluster does not
+        support VIP
         """
         if not self.check_is_vip_mode():
             self.logger.log("The current cluster does not support VIP.")
-            return ""
+            return None
 
         float_ips_for_del = []
         for _ip in host_ips_for_del:
             float_ip = self.get_float_ip_from_json(_ip, host_ips_for_del)
             if float_ip and float_ip not in float_ips_for_del:
                 float_ips_for_del.append(float_ip)
+        return float_ips_for_del
+
+    def get_float_ip_config(self, host, dn_dir, host_ips_for_del, ssh_tool, env_file):
+        """
+        Get float IP configuration str
+        """
+        float_ips_for_del = self.get_float_ips_for_del(host_ips_for_del)
+        if float_ips_for_del is None:
+            return ""
         cmd = "grep '^host.*sha256' %s" % os.path.join(dn_dir, 'pg_hba.conf')
         stat_map, output = ssh_tool.getSshStatusOutput(cmd, [host], env_file)
         if stat_map[host] != 'Success':
             self.logger.debug("[gs_dropnode]Parse pg_hba file failed:" + output)
             GaussLog.exitWithError(ErrorCode.GAUSS_358["GAUSS_35809"])
+        return self.parse_float_ip_config(output, float_ips_for_del)
+
+    @staticmethod
+    def parse_float_ip_config(output, float_ips_for_del):
+        """
+        Get float IP configuration str from the sha256 lines of pg_hba.conf
+        """
         ret = ""
         for float_ip in float_ips_for_del:
             if float_ip in output:
@@ -508,7 +624,6 @@ class OperCommon:
         """
         self.logger.log(
             "[gs_dropnode]Start to parse parameter config file on %s." % host)
-        resultDict = {'replStr': '', 'syncStandbyStr': '*', 'pghbaStr': ''}
         pgConfName = os.path.join(dirDn, 'postgresql.conf')
         pghbaConfName = os.path.join(dirDn, 'pg_hba.conf')
 
@@ -524,31 +639,101 @@ class OperCommon:
             self.logger.debug(
                 "[gs_dropnode]Parse synchronous_standby_names failed:" + output)
             GaussLog.exitWithError(ErrorCode.GAUSS_358["GAUSS_35809"])
-        output_v = output.split("'")[-2]
-        if output_v == '*':
-            resultDict['syncStandbyStr'] = output_v
-        else:
-            resultDict['syncStandbyStr'] = self.check_syncStandbyStr(dnId,
-                                                                     output_v)
+        output2 = output
 
         cmd = "grep '^host.*trust' %s" % pghbaConfName
         (statusMap, output) = sshTool.getSshStatusOutput(cmd, [host], envfile)
         if statusMap[host] != 'Success':
             self.logger.debug("[gs_dropnode]Parse pg_hba file failed:" + output)
-        for ip in hostIpListForDel:
-            if ip in output1:
-                i = output1.rfind('replconninfo', 0, output1.find(ip)) + 12
-                resultDict['replStr'] += output1[i]
-            if ip in output:
-                s = output.rfind('host', 0, output.find(ip))
-                e = output.find('\n', output.find(ip), len(output))
-                resultDict['pghbaStr'] += output[s:e] + '|'
+        resultDict = self.parseConfigOutput(output1, output2, output, dnId,
+                                            hostIpListForDel)
         resultDict['pghbaStr'] += self.get_float_ip_config(host, dirDn, hostIpListForDel,
                                                            sshTool, envfile)
         self.logger.log(
             "[gs_dropnode]End to parse parameter config file on %s." % host)
         return resultDict
 
+    def parseConfigOutput(self, replOutput, syncOutput, hbaOutput, dnId,
+                          hostIpListForDel):
+        """
+        get the replication info from the replconninfo and
+        synchronous_standby_names lines of postgresql.conf and the trust
+        lines of pg_hba.conf
+        """
+        resultDict = {'replStr': '', 'syncStandbyStr': '*', 'pghbaStr': ''}
+        output_v = syncOutput.split("'")[-2]
+        if output_v == '*':
+            resultDict['syncStandbyStr'] = output_v
+        else:
+            resultDict['syncStandbyStr'] = self.check_syncStandbyStr(dnId,
+                                                                     output_v)
+        for ip in hostIpListForDel:
+            if ip in replOutput:
+                i = replOutput.rfind('replconninfo', 0, replOutput.find(ip)) + 12
+                resultDict['replStr'] += replOutput[i]
+            if ip in hbaOutput:
+                s = hbaOutput.rfind('host', 0, hbaOutput.find(ip))
+                e = hbaOutput.find('\n', hbaOutput.find(ip), len(hbaOutput))
+                resultDict['pghbaStr'] += hbaOutput[s:e] + '|'
+        return resultDict
+
+    def readConfigFiles(self, host, dirDnList, dnIdList, backupfile, dnId,
+                        hostIpListForDel, floatIpsForDel, sshTool, envfile):
+        """
+        read the config files of all the data dirs of a host and their
+        backup with one remote call, and get the values to set and the
+        values to roll back for every data dir
+        """
+        self.logger.log(
+            "[gs_dropnode]Start to parse parameter config file on %s." % host)
+        backupdir = os.path.dirname(backupfile)
+        batch = RemoteBatch(sshTool, envfile, stop_on_error=False)
+        batch.add("untar", "tar xf %s -C %s" % (backupfile, backupdir))
+        for (dirDn, hostDnId) in zip(dirDnList, dnIdList):
+            pgConfName = os.path.join(dirDn, 'postgresql.conf')
+            pghbaConfName = os.path.join(dirDn, 'pg_hba.conf')
+            backupConfName = "%s/%s/%s_postgresql.conf" % (
+                backupdir, 'parameter_' + host, hostDnId[3:])
+            batch.add("replconninfo %s" % dirDn,
+                      "grep -o '^replconninfo.*' %s" % pgConfName)
+            batch.add("synchronous_standby_names %s" % dirDn,
+                      "grep -o '^synchronous_standby_names.*' %s"
+                      % pgConfName)
+            batch.add("pg_hba %s" % dirDn,
+                      "grep '^host.*trust' %s" % pghbaConfName)
+            if floatIpsForDel is not None:
+                batch.add("float ip %s" % dirDn,
+                          "grep '^host.*sha256' %s" % pghbaConfName)
+            batch.add("backup %s" % dirDn,
+                      "grep -o '^replconninfo.*' %s;"
+                      "grep -o '^synchronous_standby_names.*' %s"
+                      % (backupConfName, backupConfName))
+        outputs = {}
+        for result in batch.run([host])[host]:
+            if result.status != 0 and not result.name.startswith("pg_hba"):
+                self.logger.debug("[gs_dropnode]Parse %s failed:%s"
+                                  % (result.name,
+                                     result.error or result.output))
+                GaussLog.exitWithError(ErrorCode.GAUSS_358["GAUSS_35809"])
+            # the parsers cut a line at its newline, so keep the one after
+            # the last line as the ssh output had it
+            outputs[result.name] = result.output + "\n"
+        resultList = []
+        for dirDn in dirDnList:
+            resultDict = self.parseConfigOutput(
+                outputs["replconninfo %s" % dirDn],
+                outputs["synchronous_standby_names %s" % dirDn],
+                outputs["pg_hba %s" % dirDn], dnId, hostIpListForDel)
+            if floatIpsForDel is not None:
+                resultDict['pghbaStr'] += self.parse_float_ip_config(
+                    outputs["float ip %s" % dirDn], floatIpsForDel)
+            resultDictForRollback = self.parseBackupOutput(
+                outputs["backup %s" % dirDn], resultDict['replStr'])
+            resultList.append((resultDict, resultDictForRollback))
+        self.logger.log(
+            "[gs_dropnode]End to parse parameter config file on %s." % host)
+        return resultList
+
     def check_syncStandbyStr(self, dnlist, output):
         output_no = '0'
         output_result = output
@@ -602,7 +787,6 @@ class OperCommon:
         """
         self.logger.log(
             "[gs_dropnode]Start to parse backup parameter config file on %s." % host)
-        resultDict = {'rollbackReplStr': '', 'syncStandbyStr': ''}
         backupdir = os.path.dirname(backupfile)
         cmd = "tar xf %s -C %s;grep -o '^replconninfo.*' %s/%s/%s_postgresql.conf;" \
               "grep -o '^synchronous_standby_names.*' %s/%s/%s_postgresql.conf;" \
@@ -614,6 +798,18 @@ class OperCommon:
             self.logger.log(
                 "[gs_dropnode]Parse backup parameter config file failed:" + output)
             GaussLog.exitWithError(ErrorCode.GAUSS_358["GAUSS_35809"])
+        resultDict = self.parseBackupOutput(output, replstr)
+        self.logger.log(
+            "[gs_dropnode]End to parse backup parameter config file %s." % host)
+        return resultDict
+
+    @staticmethod
+    def parseBackupOutput(output, replstr):
+        """
+        get the values for rollback from the replconninfo and
+        synchronous_standby_names lines of the backup file
+        """
+        resultDict = {'rollbackReplStr': '', 'syncStandbyStr': ''}
         for i in replstr:
             tmp_v = 'replconninfo' + i
             s = output.index(tmp_v)
@@ -621,8 +817,6 @@ class OperCommon:
             resultDict['rollbackReplStr'] += output[s:e].split("'")[-2] + '|'
         s = output.index('synchronous_standby_names')
         resultDict['syncStandbyStr'] = output[s:].split("'")[-2]
-        self.logger.log(
-            "[gs_dropnode]End to parse backup parameter config file %s." % host)
         return resultDict
 
     def SetPgsqlConf(self, replNo, host, dndir, syncStandbyValue, sshTool, envfile,
@@ -713,21 +907,70 @@ class OperCommon:
             GaussLog.exitWithError(ErrorCode.GAUSS_358["GAUSS_35809"])
         return ','.join(output.split('\n'))
 
+    def probeSql(self, gsqlPath, port, sql, expected, timeout):
+        """
+        run the query until it returns the expected output or the timeout
+        has passed
+        """
+        cmd = "%s -p %s postgres -A -t -c \"%s\"" % (gsqlPath, port, sql)
+        deadline = time.time() + timeout
+        while True:
+            (status, output) = subprocess.getstatusoutput(cmd)
+            if status == 0 and output.strip() == expected:
+                return True, output
+            if time.time() >= deadline:
+                return False, output
+            time.sleep(PROBE_INTERVAL)
+
+    def waitReplSlotsReleased(self, host, gsqlPath, port, slots,
+                              timeout=SLOT_RELEASE_TIMEOUT):
+        """
+        wait until no walsender holds the replication slots, a slot in use
+        can not be dropped
+        """
+        sql = "SELECT count(*) FROM pg_replication_slots WHERE active " \
+              "AND slot_name IN (%s);" % ",".join("'%s'" % i for i in slots)
+        (released, output) = self.probeSql(gsqlPath, port, sql, "0", timeout)
+        if not released:
+            self.logger.debug("[gs_dropnode]The repl slots on %s are still "
+                              "in use after %ss: %s" % (host, timeout, output))
+
+    def waitInstanceReady(self, host, gsqlPath, port,
+                          timeout=INSTANCE_READY_TIMEOUT):
+        """
+        wait until the instance accepts connections
+        """
+        (ready, output) = self.probeSql(gsqlPath, port, "SELECT 1;", "1",
+                                        timeout)
+        if not ready:
+            self.logger.log("[gs_dropnode]The instance on port %s of %s does "
+                            "not accept connections after %ss: %s"
+                            % (port, host, timeout, output))
+
     def SetReplSlot(self, host, gsqlPath, port, dnid,
-                    flag_rollback=False):
+                    flag_rollback=False, replslot=None):
+        """
+        drop the replication slots of the dropped nodes in one session, or
+        create them again from replslot when flag_rollback
+        """
         self.logger.log("[gs_dropnode]Start to set repl slot on %s." % host)
-        replslot = self.get_repl_slot(host, gsqlPath, port)
+        if replslot is None:
+            replslot = self.get_repl_slot(host, gsqlPath, port)
         setcmd = ''
         sql = ''
         if not flag_rollback:
-            for i in dnid:
-                if i in replslot:
-                    sql += "SELECT pg_drop_replication_slot('%s');" % i
-            sql = "SET enable_slot_log TO 1;" + sql
-            setcmd = "sleep 5;%s -p %s postgres -A -t -c \"%s\";" % (gsqlPath, port, sql)
+            slots = [i for i in dnid if i in replslot]
+            if slots:
+                self.waitReplSlotsReleased(host, gsqlPath, port, slots)
+                sql = "SET enable_slot_log TO 1;" + "".join(
+                    "SELECT pg_drop_replication_slot('%s');" % i
+                    for i in slots)
+            setcmd = "%s -p %s postgres -A -t -c \"%s\";" % (gsqlPath, port, sql)
         if flag_rollback:
             list_o = [i.split('|') for i in replslot.split(',')]
             for r in list_o:
+                if len(r) < 3:
+                    continue
                 if r[0] in dnid and r[2] == 'physical':
                     sql += "SELECT * FROM pg_create_physical_replication_slot('%s', " \
                         "false);" % r[0]
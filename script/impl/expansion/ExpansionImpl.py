@@ -46,6 +46,9 @@ from gspylib.os.gsfile import g_file
 
 from domain_utils.cluster_file.cluster_dir import ClusterDir
 from base_utils.os.env_util import EnvUtil
+from base_utils.common.span_tracer import traced
+from base_utils.executor.preflight import PreflightEngine, rule_user_group, \
+    rule_dir_empty, rule_ports_free
 
 #boot/build mode
 MODE_PRIMARY = "primary"
@@ -360,6 +363,7 @@ class ExpansionImpl():
             idx += 1
         return newInsIds
 
+    @traced("expansion.installDatabaseOnHosts")
     def installDatabaseOnHosts(self):
         """
         install database on each standby node
@@ -511,6 +515,7 @@ class ExpansionImpl():
             self.logger.log("Failed to preinstall on: \n%s" % ", ".join(failedPreinstallHosts))
         self.logger.log("End to preinstall database step.")
     
+    @traced("expansion.buildStandbyRelation")
     def buildStandbyRelation(self):
         """
         func: after install single database on standby nodes. 
@@ -777,6 +782,7 @@ gs_guc set -D {dn} -c "available_zone='{azName}'"
         return primaryHost
 
 
+    @traced("expansion.buildStandbyHosts")
     def buildStandbyHosts(self):
         """
         stop the new standby host`s database and build it as standby mode
@@ -963,6 +969,7 @@ gs_guc set -D {dn} -c "available_zone='{azName}'"
             else:
                 self.logger.log("%s:\tFailed" % newHost)
 
+    @traced("expansion.generateClusterStaticFile")
     def generateClusterStaticFile(self):
         """
         generate static_config_files and send to all hosts
@@ -1080,6 +1087,7 @@ remoteservice={remoteservice}'"
             gucDict[hostName] = guc_tempate_str
         return gucDict
 
+    @traced("expansion.checkGaussdbAndGsomVersionOfStandby")
     def checkGaussdbAndGsomVersionOfStandby(self):
         """
         check whether gaussdb and gs_om version of standby are same with priamry
@@ -1169,6 +1177,7 @@ remoteservice={remoteservice}'"
             GaussLog.exitWithError(ErrorCode.GAUSS_357["GAUSS_35706"] %
                 "check gaussdb and gs_om version")
 
+    @traced("expansion.preInstall")
     def preInstall(self):
         """
         preinstall on new hosts.
@@ -1265,6 +1274,7 @@ remoteservice={remoteservice}'"
                 g_file.SHELL_CMD_DICT["deleteDir"] % (temp_file_dir, temp_file_dir),
                 hostList=[host_name])
     
+    @traced("expansion.checkNodesDetail")
     def checkNodesDetail(self):
         """
         """
@@ -1274,7 +1284,9 @@ remoteservice={remoteservice}'"
         self.checkClusterStatus()
         self.validNodeInStandbyList()
         self.checkXMLConsistency()
-        self.checkDnDirEmpty()
+        # the nodes not in the cluster yet are checked together, all
+        # violations are reported
+        self.runPreflightChecks(self.getNewInstanceRules())
 
     def checkNetworkDelay(self):
         """
@@ -1297,35 +1309,48 @@ remoteservice={remoteservice}'"
                          the delay" % backip)
 
 
-    def checkDnDirEmpty(self):
+    def getNewInstanceRules(self):
         """
-        Check whether datanode dir is empty on new nodes.
-        If not empty, we assume that the datanode directory exists 
-        with other database. We should exit and check it.
+        function: get the rules the new instances must meet: the datanode
+                  dir is empty and the datanode ports are free. A datanode
+                  dir that is not empty may hold another database
+        input : NA
+        output: list of Rule
         """
         if self.context.standbyLocalMode:
+            return []
+        nodeInfos = dict((node, self.context.clusterInfoDict[
+            self.context.backIpNameMap[node]])
+            for node in self.context.newHostList)
+        rules = rule_dir_empty(dict(
+            (node, [nodeInfo["dataNode"]])
+            for (node, nodeInfo) in nodeInfos.items()))
+        rules.append(rule_ports_free(dict(
+            (node, [int(nodeInfo["port"]), int(nodeInfo["localport"])])
+            for (node, nodeInfo) in nodeInfos.items())))
+        return rules
+
+    def runPreflightChecks(self, rules):
+        """
+        function: check the rules on the new nodes with one call per node,
+                  and exit with every violation
+        input : rules
+        output: NA
+        """
+        if not rules:
             return
-        excepNodes = []
-        for node in self.context.newHostList:
-            nodename = self.context.backIpNameMap[node]
-            dn_dir = self.context.clusterInfoDict[nodename]["dataNode"]
-            cmd = """
-            if [ ! -d "%s" ]; then echo ""; else ls %s; fi;
-            """ % (dn_dir,dn_dir)
-            sshTool = SshTool([node])
-            (statusMap, output) = sshTool.getSshStatusOutput(cmd, 
-                env_file="/etc/profile")
-            if statusMap[node] == DefaultValue.SUCCESS:
-                prefix = '[%s] %s:' % ("SUCCESS", node)
-                result = output[len(prefix):]
-                if result.strip():
-                    excepNodes.append(node)
-        if len(excepNodes) > 0:
-            self.logger.log("The datanode dir of [%s] is not empty.\
-                 Please check it." % ",".join(excepNodes))
-            sys.exit(1)
-        self.logger.debug("Successfully Check datanode dir is empty.")
-
+        sshTool = SshTool(self.context.newHostList)
+        try:
+            violations = PreflightEngine(sshTool, self.envFile).add_rules(
+                rules).run()
+        finally:
+            self.cleanSshToolFile(sshTool)
+        report = PreflightEngine.format_report(violations)
+        if PreflightEngine.get_errors(violations):
+            GaussLog.exitWithError(report)
+        if report:
+            self.logger.warn(report)
+        self.logger.debug("Successfully checked the new nodes.")
 
     def checkXMLConsistency(self):
         """
@@ -1507,14 +1532,10 @@ remoteservice={remoteservice}'"
             os.chown(xmlFile, uid, gid)
             os.chmod(xmlFile, stat.S_IRUSR)
 
-    def checkUserAndGroupExists(self):
+    def checkLocalUserAndGroup(self):
         """
-        check system user and group exists and be same
-        on primary and standby nodes
+        check system user and group exists and be same on the local node
         """
-        inputUser = self.user
-        inputGroup = self.group
-
         user_group_id = ""
         isUserExits = False
         localHost = socket.gethostname()
@@ -1540,33 +1561,15 @@ remoteservice={remoteservice}'"
             GaussLog.exitWithError(ErrorCode.GAUSS_357["GAUSS_35712"]
                  % (self.user, self.group))
 
-        hostNames = self.context.newHostList
-        envfile = self.envFile
-        sshTool = SshTool(hostNames)
-
-        #get username in the other standy nodes
-        getUserNameCmd = "cat /etc/passwd | grep -w %s" % inputUser
-        resultMap, outputCollect = sshTool.getSshStatusOutput(getUserNameCmd,
-        [], envfile)
-
-        for hostKey in resultMap:
-            if resultMap[hostKey] == STATUS_FAIL:
-                self.cleanSshToolFile(sshTool)
-                GaussLog.exitWithError(ErrorCode.GAUSS_357["GAUSS_35704"] \
-                       % ("User", self.user, hostKey))
-
-        #get groupname in the other standy nodes
-        getGroupNameCmd = "cat /etc/group | grep -w %s" % inputGroup
-        resultMap, outputCollect = sshTool.getSshStatusOutput(getGroupNameCmd,
-        [], envfile)
-        for hostKey in resultMap:
-            if resultMap[hostKey] == STATUS_FAIL:
-                self.cleanSshToolFile(sshTool)
-                GaussLog.exitWithError(ErrorCode.GAUSS_357["GAUSS_35704"] \
-                       % ("Group", self.group, hostKey))
-        self.cleanSshToolFile(sshTool)
+    def checkUserAndGroupExists(self):
+        """
+        check system user and group exists and be same
+        on primary and standby nodes
+        """
+        self.checkLocalUserAndGroup()
+        self.runPreflightChecks([rule_user_group(self.context.newHostList,
+                                                 self.user, self.group)])
 
-    
     def installAndExpansion(self):
         """
         install database and expansion standby node with db om user
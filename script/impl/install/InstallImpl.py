@@ -33,6 +33,8 @@ from gspylib.common.DbClusterInfo import dbNodeInfo, \
 from base_utils.executor.cmd_executor import CmdExecutor
 from domain_utils.cluster_file.cluster_dir import ClusterDir
 from base_utils.os.env_util import EnvUtil
+from base_utils.executor.preflight import PreflightEngine, rule_time_sync, \
+    rule_ports_free
 
 
 #############################################################################
@@ -48,6 +50,8 @@ STEP_INIT = "Init Install"
 STEP_INSTALL = "Install cluster"
 STEP_CONFIG = "Config cluster"
 STEP_START = "Start cluster"
+# seconds the clock of a node may differ from the local node
+MAX_TIME_SKEW = 2
 
 #############################################################################
 # TP cluster type
@@ -102,8 +106,9 @@ class InstallImpl:
             self.check_cm_server_node_number()
             # creating the backup directory
             self.prepareBackDir()
-            # Check time consistency(only TP use it must less 2s)
-            self.checkTimeConsistency()
+            # Check time consistency(only TP use it must less 2s) and
+            # the datanode ports
+            self.checkNodesPreflight()
             # install clueter
             self.context.logger.log("begin deploy..")
             self.doDeploy()
@@ -208,12 +213,38 @@ class InstallImpl:
         """
         pass
 
-    def checkTimeConsistency(self):
+    def checkNodesPreflight(self):
         """
-        Check time consistency between hosts in cluster
+        Check time consistency between hosts in cluster and that the
+        datanode ports are free, with one call per host. The ports are not
+        checked when resuming, the instances of the last run may use them
         :return: NA
         """
-        pass
+        if self.context.isSingle or self.context.localMode:
+            return
+        self.context.logger.debug("Checking the time consistency and "
+                                  "the datanode ports.")
+        engine = PreflightEngine(self.context.sshTool,
+                                 self.context.mpprcFile)
+        engine.add_rule(rule_time_sync(self.context.sshTool.hostNames,
+                                       engine, MAX_TIME_SKEW))
+        if not os.path.exists(self.context.operateStepFile):
+            hostPorts = {}
+            for dbNode in self.context.clusterInfo.dbNodes:
+                for inst in dbNode.datanodes:
+                    hostPorts.setdefault(dbNode.name, []).extend(
+                        [port for port in (inst.port, inst.haPort) if port])
+            if hostPorts:
+                engine.add_rule(rule_ports_free(hostPorts))
+        violations = engine.run()
+        report = PreflightEngine.format_report(violations)
+        if PreflightEngine.get_errors(violations):
+            raise Exception(report)
+        if report:
+            self.context.logger.warn(report)
+        else:
+            self.context.logger.debug("Successfully checked the time "
+                                      "consistency and the datanode ports.")
 
     def prepareBackDir(self):
         """
@@ -528,6 +559,15 @@ class InstallImpl:
         """
         pass
 
+    def initAndConfigInstance(self):
+        """
+        function: init and config the instances
+        input : NA
+        output: NA
+        """
+        self.initNodeInstance()
+        self.configInstance()
+
 
     def doConfig(self):
         """
@@ -540,8 +580,7 @@ class InstallImpl:
             # prepared config cluster
             # AP: clean instance directory and check node config
             self.prepareConfigCluster()
-            self.initNodeInstance()
-            self.configInstance()
+            self.initAndConfigInstance()
             DefaultValue.enableWhiteList(
                 self.context.sshTool,
                 self.context.mpprcFile,
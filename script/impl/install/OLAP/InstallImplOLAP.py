@@ -29,9 +29,11 @@ from gspylib.common.ErrorCode import ErrorCode
 from gspylib.os.gsfile import g_file
 from impl.install.InstallImpl import InstallImpl
 from base_utils.executor.cmd_executor import CmdExecutor
+from base_utils.executor.remote_batch import RemoteBatch
 from base_utils.os.env_util import EnvUtil
 from base_utils.os.file_util import FileUtil
 from base_utils.os.net_util import NetUtil
+from base_utils.os.node_facts import NodeFacts
 from domain_utils.cluster_file.version_info import VersionInfo
 from gspylib.component.DSS.dss_checker import DssConfig
 from base_utils.os.cmd_util import CmdUtil
@@ -273,11 +275,29 @@ class InstallImplOLAP(InstallImpl):
         output: NA
         """
         self.context.logger.log("Initializing instances on all nodes.")
+        cmd = self.singleCmd(self.getInitInstanceCmd())
+
+        parallelism = False if self.context.clusterInfo.enable_dss == 'on' else True
+        CmdExecutor.execCommandWithMode(cmd,
+                                        self.context.sshTool,
+                                        self.context.isSingle,
+                                        parallelism=parallelism)
+        self.context.logger.debug("Successfully initialized node instance.")
+
+    def getInitInstanceCmd(self, quoted=True):
+        """
+        function: get the command initializing the instances of a node
+        input : quoted, escape the quotes for the ssh command line
+        output: str
+        """
         # init instance applications
         cmdParam = ""
         # get the --gsinit-parameter parameter values
         for param in self.context.dbInitParam:
-            cmdParam += " -P \\\"%s\\\"" % param
+            if quoted:
+                cmdParam += " -P \\\"%s\\\"" % param
+            else:
+                cmdParam += " -P \"%s\"" % param
 
         cmd = "source %s;" % self.context.mpprcFile
         # init instances on all nodes
@@ -293,15 +313,7 @@ class InstallImplOLAP(InstallImpl):
             cmd += f" --dss_mode --dss_config={dss_config}"
         self.context.logger.debug(
             "Command for initializing instances: %s" % cmd)
-
-        cmd = self.singleCmd(cmd)
-
-        parallelism = False if self.context.clusterInfo.enable_dss == 'on' else True
-        CmdExecutor.execCommandWithMode(cmd,
-                                        self.context.sshTool,
-                                        self.context.isSingle,
-                                        parallelism=parallelism)
-        self.context.logger.debug("Successfully initialized node instance.")
+        return cmd
 
     def configInstance(self):
         """
@@ -315,6 +327,36 @@ class InstallImplOLAP(InstallImpl):
         self.updateInstanceConfig()
         self.updateHbaConfig()
 
+    def initAndConfigInstance(self):
+        """
+        function: init and config the instances. Every node runs its init,
+                  instance config and pg_hba config back to back in one
+                  session, so a slow node does not hold back the others
+                  between the phases. The disks of dss are initialized one
+                  node after another, so dss mode keeps the phases
+        input : NA
+        output: NA
+        """
+        if self.context.clusterInfo.enable_dss == 'on':
+            InstallImpl.initAndConfigInstance(self)
+            return
+        # the guc values depend on all nodes, get them before any node starts
+        tmpGucCmd = self.getTmpGucCmd()
+        configCmd = self.getConfigInstanceCmd()
+        self.context.logger.log(
+            "Initializing and configuring instances on all nodes.")
+        batch = RemoteBatch(self.context.sshTool, self.context.mpprcFile,
+                            self.context.isSingle)
+        batch.add("create tmp_guc file", tmpGucCmd)
+        batch.add("initialize instances", self.getInitInstanceCmd(False))
+        if self.context.clusterInfo.float_ips:
+            batch.add("configure cm resource file", self.getConfigCmResCmd())
+        batch.add("update instance configuration", configCmd)
+        batch.add("configure pg_hba", self.getConfigHbaCmd())
+        batch.execute()
+        self.context.logger.debug(
+            "Successfully initialized and configured node instance.")
+
     def checkMemAndCores(self):
         """
         function: memCheck and coresCheck
@@ -341,22 +383,25 @@ class InstallImplOLAP(InstallImpl):
         self.context.logger.debug(
             "Check consistence of memCheck and coresCheck on database node: %s"
             % [node.name for node in all_dn])
+        # the facts are shared with the other steps of the installation,
+        # a node whose facts could not be gathered is checked on its own
+        try:
+            facts = NodeFacts.gather(self.context.sshTool,
+                                     self.context.isSingle,
+                                     hosts=[node.name for node in all_dn])
+        except Exception as e:
+            self.context.logger.debug("Failed to gather the node facts. "
+                                      "Error: \n%s" % str(e))
+            facts = NodeFacts({})
         for dbNode in all_dn:
-            memCheck = "cat /proc/cpuinfo | grep processor | wc -l"
-            coresCheck = "free -g --si | grep 'Mem' | awk -F ' ' '{print \$2}'"
-            cmd = "pssh -s -H %s \"%s & %s\"" % (
-                dbNode.name, memCheck, coresCheck)
-            (status, output) = subprocess.getstatusoutput(cmd)
-            if status != 0 or len(output.strip().split()) != 2:
-                self.context.logger.debug(
-                    ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
-                    + " Error: \n%s" % str(
-                        output))
-                raise Exception(
-                    ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
-                    + " Error: \n%s" % str(
-                        output))
-            data_check_info[dbNode.name] = str(output).strip().split()
+            try:
+                data_check_info[dbNode.name] = [
+                    str(facts.get_value(dbNode.name, "cpu_count")),
+                    str(facts.get_value(dbNode.name, "memory_gb"))]
+            except Exception as e:
+                self.context.logger.debug(str(e))
+                data_check_info[dbNode.name] = self.readMemAndCores(
+                    dbNode.name)
         self.context.logger.debug(
             "The check info on each node. \nNode : Info(MemSize | CPUCores)")
         for each_node, check_info in data_check_info.items():
@@ -375,6 +420,24 @@ class InstallImplOLAP(InstallImpl):
             "and coresCheck on all nodes.")
         return checkConsistence
 
+    def readMemAndCores(self, nodeName):
+        """
+        function: read the CPU cores and the memory size of one node
+        input  : nodeName
+        output : [cores, memory size]
+        """
+        memCheck = "cat /proc/cpuinfo | grep processor | wc -l"
+        coresCheck = "free -g --si | grep 'Mem' | awk -F ' ' '{print \\$2}'"
+        cmd = "pssh -s -H %s \"%s & %s\"" % (nodeName, memCheck, coresCheck)
+        (status, output) = subprocess.getstatusoutput(cmd)
+        if status != 0 or len(output.strip().split()) != 2:
+            self.context.logger.debug(
+                ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
+                + " Error: \n%s" % str(output))
+            raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
+                            + " Error: \n%s" % str(output))
+        return str(output).strip().split()
+
     def updateInstanceConfig(self):
         """
         function: Update instances config on all nodes
@@ -383,6 +446,78 @@ class InstallImplOLAP(InstallImpl):
         """
         self.context.logger.log(
             "Updating instance configuration on all nodes.")
+        tmp_guc_file = self.getTmpGucFile()
+        cmd = g_file.SHELL_CMD_DICT["createFile"] % (
+            tmp_guc_file, DefaultValue.MAX_DIRECTORY_MODE, tmp_guc_file)
+        CmdExecutor.execCommandWithMode(cmd,
+                                        self.context.sshTool,
+                                        self.context.isSingle,
+                                        self.context.mpprcFile)
+        self.context.logger.debug("Create tmp_guc file successfully.")
+
+        cmd = g_file.SHELL_CMD_DICT["overWriteFile"] % (
+            self.getTmpGucContent(), tmp_guc_file)
+        CmdExecutor.execCommandWithMode(cmd,
+                                        self.context.sshTool,
+                                        self.context.isSingle,
+                                        self.context.mpprcFile)
+        self.context.logger.debug("Write tmp_guc file successfully.")
+
+        cmd = self.getConfigInstanceCmd()
+        CmdExecutor.execCommandWithMode(cmd,
+                                        self.context.sshTool,
+                                        self.context.isSingle)
+        self.context.logger.debug("Successfully configured node instance.")
+
+    def getTmpGucFile(self):
+        """
+        function: get the file passing the guc values computed from all
+                  nodes to the instance config
+        input : NA
+        output: str
+        """
+        tmp_guc_path = EnvUtil.getTmpDirFromEnv(self.context.user)
+        return "%s/tmp_guc" % tmp_guc_path
+
+    def getTmpGucContent(self):
+        """
+        function: get the guc values computed from all nodes, comm_max_datanode
+                  and max_process_memory depend on them
+        input : NA
+        output: str
+        """
+        # get the master datanode number
+        primary_dn_num = DefaultValue.getPrimaryDnNum(self.context.clusterInfo)
+        self.context.logger.debug(
+            "get master datanode number : %s" % primary_dn_num)
+        # get the physic memory of all node and choose the min one
+        physic_memo = DefaultValue.getPhysicMemo(self.context.sshTool,
+                                                self.context.isSingle)
+        self.context.logger.debug("get physic memory value : %s" % physic_memo)
+        # get the datanode number in all nodes and choose the max one
+        data_node_num = DefaultValue.getDataNodeNum(self.context.clusterInfo)
+        self.context.logger.debug("get min datanode number : %s" % data_node_num)
+        return str(primary_dn_num) + "," + str(
+            physic_memo) + "," + str(data_node_num)
+
+    def getTmpGucCmd(self):
+        """
+        function: get the command writing the tmp_guc file of a node
+        input : NA
+        output: str
+        """
+        tmp_guc_file = self.getTmpGucFile()
+        return (g_file.SHELL_CMD_DICT["createFile"] % (
+            tmp_guc_file, DefaultValue.MAX_DIRECTORY_MODE, tmp_guc_file)
+                + " && " + g_file.SHELL_CMD_DICT["overWriteFile"] % (
+                    self.getTmpGucContent(), tmp_guc_file))
+
+    def getConfigInstanceCmd(self):
+        """
+        function: get the command updating the instance config of a node
+        input : NA
+        output: str
+        """
         # update instances config on all nodes
         cmd_param = ""
         para_list_dn = [param.split('=')[0].strip() for param in
@@ -407,42 +542,6 @@ class InstallImplOLAP(InstallImpl):
             cmd_param += "*==SYMBOL==*-D*==SYMBOL==*%s" % (
                     "dcf_config=" + self.context.clusterInfo.dcf_config.replace('"', '\\"'))
             cmd_param += "*==SYMBOL==*-X*==SYMBOL==*%s" % (self.context.xmlFile)
-        # create tmp file for guc parameters
-        # comm_max_datanode and max_process_memory
-        self.context.logger.debug("create tmp_guc file.")
-        tmp_guc_path = EnvUtil.getTmpDirFromEnv(self.context.user)
-        tmp_guc_file = "%s/tmp_guc" % tmp_guc_path
-        cmd = g_file.SHELL_CMD_DICT["createFile"] % (
-            tmp_guc_file, DefaultValue.MAX_DIRECTORY_MODE, tmp_guc_file)
-        CmdExecutor.execCommandWithMode(cmd,
-                                        self.context.sshTool,
-                                        self.context.isSingle,
-                                        self.context.mpprcFile)
-        self.context.logger.debug("Create tmp_guc file successfully.")
-
-        # get the master datanode number
-        primary_dn_num = DefaultValue.getPrimaryDnNum(self.context.clusterInfo)
-        self.context.logger.debug(
-            "get master datanode number : %s" % primary_dn_num)
-        # get the physic memory of all node and choose the min one
-        physic_memo = DefaultValue.getPhysicMemo(self.context.sshTool,
-                                                self.context.isSingle)
-        self.context.logger.debug("get physic memory value : %s" % physic_memo)
-        # get the datanode number in all nodes and choose the max one
-        data_node_num = DefaultValue.getDataNodeNum(self.context.clusterInfo)
-        self.context.logger.debug("get min datanode number : %s" % data_node_num)
-
-        # write the value in tmp file
-        self.context.logger.debug("Write value in tmp_guc file.")
-        guc_value_content = str(primary_dn_num) + "," + str(
-            physic_memo) + "," + str(data_node_num)
-        cmd = g_file.SHELL_CMD_DICT["overWriteFile"] % (
-            guc_value_content, tmp_guc_file)
-        CmdExecutor.execCommandWithMode(cmd,
-                                        self.context.sshTool,
-                                        self.context.isSingle,
-                                        self.context.mpprcFile)
-        self.context.logger.debug("Write tmp_guc file successfully.")
 
         # update instances config
         cmd = "source %s;" % self.context.mpprcFile
@@ -458,26 +557,32 @@ class InstallImplOLAP(InstallImpl):
 
         self.context.logger.debug(
             "Command for updating instances configuration: %s" % cmd)
-        CmdExecutor.execCommandWithMode(cmd,
-                                        self.context.sshTool,
-                                        self.context.isSingle)
-        self.context.logger.debug("Successfully configured node instance.")
+        return cmd
 
     def config_cm_res_json(self):
         """
         Config cm resource json file.
         """
         self.context.logger.log("Configuring cm resource file on all nodes.")
+        cmd = self.getConfigCmResCmd()
+        CmdExecutor.execCommandWithMode(cmd,
+                                        self.context.sshTool,
+                                        self.context.isSingle)
+        self.context.logger.log("Successfully configured cm resource file.")
+
+    def getConfigCmResCmd(self):
+        """
+        function: get the command configuring the cm resource file of a node
+        input : NA
+        output: str
+        """
         cmd = "source %s; " % self.context.mpprcFile
         cmd += "%s -t %s -U %s -X '%s' -l '%s' " % (
                OMCommand.getLocalScript("Local_Config_CM_Res"), ACTION_INSTALL_CLUSTER,
                self.context.user, self.context.xmlFile, self.context.localLog)
         self.context.logger.debug(
             "Command for configuring cm resource file: %s" % cmd)
-        CmdExecutor.execCommandWithMode(cmd,
-                                        self.context.sshTool,
-                                        self.context.isSingle)
-        self.context.logger.log("Successfully configured cm resource file.")
+        return cmd
 
     def updateHbaConfig(self):
         """
@@ -486,18 +591,24 @@ class InstallImplOLAP(InstallImpl):
         output: NA
         """
         self.context.logger.log("Configuring pg_hba on all nodes.")
+        CmdExecutor.execCommandWithMode(self.getConfigHbaCmd(),
+                                        self.context.sshTool,
+                                        self.context.isSingle)
+        self.context.logger.debug("Successfully configured HBA.")
 
-        # Configuring pg_hba
+    def getConfigHbaCmd(self):
+        """
+        function: get the command configuring pg_hba of a node
+        input : NA
+        output: str
+        """
         cmd = "source %s;" % self.context.mpprcFile
         cmd += "%s -U %s -X '%s' -l '%s' " % (
             OMCommand.getLocalScript("Local_Config_Hba"), self.context.user,
             self.context.xmlFile, self.context.localLog)
         self.context.logger.debug(
             "Command for configuring Hba instance: %s" % cmd)
-        CmdExecutor.execCommandWithMode(cmd,
-                                        self.context.sshTool,
-                                        self.context.isSingle)
-        self.context.logger.debug("Successfully configured HBA.")
+        return cmd
 
     def rollbackInstall(self):
         """
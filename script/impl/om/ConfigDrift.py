@@ -0,0 +1,339 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : ConfigDrift.py compares the configuration files collected
+#                from every instance, and reports the parameters that differ
+#                between instances of the same role or from a baseline.
+#############################################################################
+
+import json
+import re
+from collections import Counter
+
+from domain_utils.cluster_file.conf_file import HbaConfFile, HBA_CONF_FILE
+
+# value printed for a parameter that is not set in the file
+UNSET_VALUE = "(default)"
+BOOL_VALUES = {"on": "on", "true": "on", "yes": "on",
+               "off": "off", "false": "off", "no": "off"}
+# memory units are normalized to bytes, time units to milliseconds
+MEMORY_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3,
+                "tb": 1024 ** 4}
+TIME_UNITS = {"us": 0.001, "ms": 1, "s": 1000, "min": 60000,
+              "h": 3600000, "d": 86400000}
+UNIT_PATTERN = re.compile(r"^(-?[0-9]+(?:\.[0-9]+)?)\s*([A-Za-z]+)$")
+# parameters that are expected to differ between instances
+INSTANCE_PARAMETERS = [
+    re.compile(r"^(port|listen_addresses|local_bind_address|"
+               r"pgxc_node_name|application_name|available_zone|"
+               r"ss_instance_id|unix_socket_directory)$"),
+    re.compile(r"^(cross_cluster_)?replconninfo[0-9]+$"),
+    re.compile(r"^dcf_(node_id|data_path|log_path|config)$"),
+    re.compile(r".*_(dir|directory|path|file)$"),
+    re.compile(r"^(cm_server|agent|ha)_.*(port|ip)[0-9]*$"),
+]
+
+
+def normalize_value(value):
+    """
+    function: normalize a parameter value, so that quoting, case of
+              booleans and units do not count as a difference
+    input : value
+    output: str
+    """
+    if value is None:
+        return UNSET_VALUE
+    value = str(value).strip()
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        value = value[1:-1].replace("''", "'").strip()
+    if value.lower() in BOOL_VALUES:
+        return BOOL_VALUES[value.lower()]
+    match = UNIT_PATTERN.match(value)
+    if match:
+        unit = match.group(2).lower()
+        for units in (MEMORY_UNITS, TIME_UNITS):
+            if unit in units:
+                number = float(match.group(1)) * units[unit]
+                return str(int(number)) if number.is_integer() \
+                    else str(number)
+    return value
+
+
+def normalize_hba_entry(entry):
+    """
+    function: normalize an hba record, spacing and the form of the
+              address mask do not count as a difference
+    input : entry
+    output: str
+    """
+    fields = entry.split("#", 1)[0].split()
+    key = HbaConfFile.get_key(entry)
+    if key is None:
+        return " ".join(fields)
+    count = len(key)
+    if (count == 4 and "/" not in fields[3] and len(fields) > 4
+            and key[3] != fields[3].lower()):
+        # the address was given with a separate mask
+        count = 5
+    return " ".join(list(key) + fields[count:])
+
+
+def is_instance_parameter(name):
+    """
+    function: check whether a parameter is specific to one instance
+    input : name
+    output: bool
+    """
+    return any(pattern.match(name) for pattern in INSTANCE_PARAMETERS)
+
+
+def load_baseline(baseline_file):
+    """
+    function: load a baseline file like
+              {"datanode": {"postgresql.conf": {"max_connections": "5000"},
+                            "pg_hba.conf": ["host all all ::1/128 trust"]}}
+    input : baseline_file
+    output: dict
+    """
+    with open(baseline_file, "r") as fp:
+        baseline = json.load(fp)
+    if not isinstance(baseline, dict):
+        raise ValueError("The baseline must be a json object.")
+    for (role, files) in baseline.items():
+        if not isinstance(files, dict):
+            raise ValueError("The baseline of %s must be a json object."
+                             % role)
+    return baseline
+
+
+class ConfigDrift(object):
+    """
+    configuration drift of the instances of a cluster
+    """
+
+    def __init__(self, baseline=None):
+        """
+        function: initialize the comparison
+        input : baseline
+        output: NA
+        """
+        self.baseline = baseline or {}
+        # (role, file name) -> list of (instance label, content)
+        self.groups = {}
+        self.failed_nodes = {}
+        self.missing_files = []
+        self.instance_count = 0
+
+    def add_node(self, node, document):
+        """
+        function: add the document printed by the local script of a node
+        input : node, document
+        output: NA
+        """
+        for instance in document.get("instances", []):
+            label = "%s:%s" % (node, instance.get("instance_id"))
+            self.instance_count += 1
+            for (file_name, content) in instance.get("files", {}).items():
+                if content is None:
+                    self.missing_files.append(
+                        "%s %s/%s" % (label, instance.get("datadir"),
+                                      file_name))
+                    continue
+                self.groups.setdefault((instance.get("role"), file_name),
+                                       []).append((label, content))
+
+    def add_failed_node(self, node, message):
+        """
+        function: record a node whose files could not be collected
+        input : node, message
+        output: NA
+        """
+        self.failed_nodes[node] = message.strip()
+
+    @staticmethod
+    def compare_parameters(members):
+        """
+        function: find the parameters that differ between the instances
+                  of one group, the value most instances have is taken as
+                  the expected one
+        input : members
+        output: list
+        """
+        names = set()
+        for (_, parameters) in members:
+            names.update(parameters.keys())
+        drifts = []
+        for name in sorted(names):
+            if is_instance_parameter(name):
+                continue
+            values = [(label, parameters.get(name))
+                      for (label, parameters) in members]
+            counter = Counter(normalize_value(value)
+                              for (_, value) in values)
+            if len(counter) < 2:
+                continue
+            # ties are broken by the value so that the result is stable
+            expected = sorted(counter.items(),
+                              key=lambda item: (-item[1], item[0]))[0][0]
+            drifts.append({
+                "parameter": name,
+                "expected": expected,
+                "instances": counter[expected],
+                "deviations": [
+                    {"instance": label,
+                     "value": UNSET_VALUE if value is None else value}
+                    for (label, value) in values
+                    if normalize_value(value) != expected]})
+        return drifts
+
+    @staticmethod
+    def compare_hba(members):
+        """
+        function: find the hba records that some instances of one group
+                  do not have
+        input : members
+        output: list
+        """
+        entry_sets = [(label, set(normalize_hba_entry(entry)
+                                  for entry in entries))
+                      for (label, entries) in members]
+        union = set()
+        for (_, entries) in entry_sets:
+            union.update(entries)
+        drifts = []
+        for entry in sorted(union):
+            missing = [label for (label, entries) in entry_sets
+                       if entry not in entries]
+            if missing:
+                drifts.append({"entry": entry,
+                               "instances": len(members) - len(missing),
+                               "missing": missing})
+        return drifts
+
+    def compare_baseline(self, role, file_name, members):
+        """
+        function: compare the instances of one group with the baseline,
+                  a parameter declared in the baseline is always checked
+        input : role, file_name, members
+        output: list
+        """
+        declared = self.baseline.get(role, {}).get(file_name)
+        if not declared:
+            return []
+        drifts = []
+        if file_name == HBA_CONF_FILE:
+            for entry in declared:
+                entry = normalize_hba_entry(entry)
+                missing = [label for (label, entries) in members
+                           if entry not in set(normalize_hba_entry(item)
+                                               for item in entries)]
+                if missing:
+                    drifts.append({"entry": entry, "missing": missing})
+            return drifts
+        for (name, expected) in sorted(declared.items()):
+            name = name.lower()
+            deviations = [
+                {"instance": label,
+                 "value": parameters.get(name, UNSET_VALUE)}
+                for (label, parameters) in members
+                if normalize_value(parameters.get(name))
+                != normalize_value(expected)]
+            if deviations:
+                drifts.append({"parameter": name,
+                               "expected": str(expected),
+                               "deviations": deviations})
+        return drifts
+
+    def report(self):
+        """
+        function: compare every group
+        input : NA
+        output: dict
+        """
+        groups = []
+        for (role, file_name) in sorted(self.groups.keys()):
+            members = self.groups[(role, file_name)]
+            if file_name == HBA_CONF_FILE:
+                drifts = ConfigDrift.compare_hba(members)
+            else:
+                drifts = ConfigDrift.compare_parameters(members)
+            baseline = self.compare_baseline(role, file_name, members)
+            groups.append({"role": role,
+                           "file": file_name,
+                           "instances": len(members),
+                           "drifts": drifts,
+                           "baseline": baseline})
+        return {"instances": self.instance_count,
+                "failed_nodes": self.failed_nodes,
+                "missing_files": self.missing_files,
+                "groups": groups}
+
+    @staticmethod
+    def has_drift(report):
+        """
+        function: check whether the report found anything
+        input : report
+        output: bool
+        """
+        return any(group["drifts"] or group["baseline"]
+                   for group in report["groups"])
+
+    @staticmethod
+    def format_text(report):
+        """
+        function: format the report as text
+        input : report
+        output: str
+        """
+        lines = ["Checked %d instances." % report["instances"]]
+        for (node, message) in sorted(report["failed_nodes"].items()):
+            lines.append("Failed to collect the configuration of %s: %s"
+                         % (node, message))
+        for item in report["missing_files"]:
+            lines.append("Missing configuration file: %s" % item)
+        for group in report["groups"]:
+            if not group["drifts"] and not group["baseline"]:
+                continue
+            lines.append("")
+            lines.append("[%s] %s (%d instances)" % (
+                group["role"], group["file"], group["instances"]))
+            for drift in group["drifts"]:
+                if "entry" in drift:
+                    lines.append("    %s" % drift["entry"])
+                    lines.append("        missing on: %s"
+                                 % ", ".join(drift["missing"]))
+                    continue
+                lines.append("    %s = %s (%d instances)" % (
+                    drift["parameter"], drift["expected"],
+                    drift["instances"]))
+                for deviation in drift["deviations"]:
+                    lines.append("        %-30s: %s" % (
+                        deviation["instance"], deviation["value"]))
+            for drift in group["baseline"]:
+                if "entry" in drift:
+                    lines.append("    baseline %s" % drift["entry"])
+                    lines.append("        missing on: %s"
+                                 % ", ".join(drift["missing"]))
+                    continue
+                lines.append("    baseline %s = %s" % (
+                    drift["parameter"], drift["expected"]))
+                for deviation in drift["deviations"]:
+                    lines.append("        %-30s: %s" % (
+                        deviation["instance"], deviation["value"]))
+        if not ConfigDrift.has_drift(report):
+            lines.append("No configuration drift found.")
+        return "\n".join(lines)
@@ -17,6 +17,8 @@
 # ----------------------------------------------------------------------------
 # Description : omManagerImplOLAP.py is a utility to manage a Gauss200 cluster.
 #############################################################################
+import json
+import os
 import subprocess
 import sys
 import re
@@ -31,9 +33,13 @@ from gspylib.common.DbClusterStatus import DbClusterStatus
 from gspylib.common.Common import DefaultValue
 from gspylib.common.OMCommand import OMCommand
 from impl.om.OmImpl import OmImpl
+from impl.om.ConfigDrift import ConfigDrift, load_baseline
+from impl.om.TraceReport import TraceReport, find_latest_trace, load_trace
+from base_utils.common.span_tracer import TRACE_DIR_NAME
 from gspylib.os.gsfile import g_file
 from base_utils.os.net_util import NetUtil
 from base_utils.os.env_util import EnvUtil
+from base_utils.os.file_util import FileUtil
 from gspylib.component.DSS.dss_checker import DssConfig
 
 
@@ -238,6 +244,8 @@ class OmImplOLAP(OmImpl):
                 self.context.g_opts.security_mode)
         if self.dataDir != "":
             cmd += " -D %s" % self.dataDir
+        if self.context.g_opts.parallelJobs:
+            cmd += " --parallel-jobs=%d" % self.context.g_opts.parallelJobs
         failedOutput = ''
         for nodeName in hostList:
             (statusMap, output) = self.sshTool.getSshStatusOutput(cmd, [nodeName])
@@ -337,6 +345,8 @@ class OmImplOLAP(OmImpl):
             cmd += " -D %s" % self.dataDir
         if self.mode != "":
             cmd += " -m %s" % self.mode
+        if self.context.g_opts.parallelJobs:
+            cmd += " --parallel-jobs=%d" % self.context.g_opts.parallelJobs
         (statusMap, output) = self.sshTool.getSshStatusOutput(cmd, host_list)
         for nodeName in host_list:
             if statusMap[nodeName] != 'Success':
@@ -395,3 +405,101 @@ class OmImplOLAP(OmImpl):
                                                sshtool)
 
         self.logger.log("Successfully generated dynamic configuration file.")
+
+    def doConfigDrift(self):
+        """
+        function: collect the configuration files of every instance in one
+                  remote call per node, and report the parameters that
+                  differ between instances of the same role
+        input  : NA
+        output : NA
+        """
+        baseline = None
+        if self.context.g_opts.baselineFile:
+            try:
+                baseline = load_baseline(self.context.g_opts.baselineFile)
+            except Exception as e:
+                raise Exception(ErrorCode.GAUSS_502["GAUSS_50204"]
+                                % self.context.g_opts.baselineFile
+                                + " Error:\n%s" % str(e))
+        self.logger.log("Collecting the configuration files of all nodes.")
+        nodeNames = self.context.clusterInfo.getClusterNodeNames()
+        self.context.initSshTool(nodeNames)
+        cmd = "source %s; %s -U %s" % (
+            self.context.g_opts.mpprcFile,
+            OMCommand.getLocalScript("Local_Collect_Config"),
+            self.context.user)
+        self.logger.debug("Command for collecting configuration: %s" % cmd)
+        (status, output) = self.context.sshTool.getSshStatusOutput(cmd)
+        outputMap = self.context.sshTool.parseSshOutput(nodeNames)
+        drift = ConfigDrift(baseline)
+        for node in nodeNames:
+            document = None
+            if status[node] == DefaultValue.SUCCESS:
+                for line in reversed(outputMap[node].strip().split("\n")):
+                    if line.strip().startswith("{"):
+                        try:
+                            document = json.loads(line.strip())
+                        except ValueError:
+                            # a truncated output fails this node only
+                            document = None
+                        break
+            if document is None:
+                drift.add_failed_node(node, outputMap[node])
+            else:
+                drift.add_node(node, document)
+        report = drift.report()
+        if self.context.g_opts.outputFormat == "json":
+            result = json.dumps(report, indent=4)
+        else:
+            result = ConfigDrift.format_text(report)
+        if self.context.g_opts.outFile:
+            FileUtil.createFile(self.context.g_opts.outFile, True,
+                                DefaultValue.KEY_FILE_MODE)
+            FileUtil.writeFile(self.context.g_opts.outFile, [result], "w")
+            self.logger.log("The result has been saved to %s."
+                            % self.context.g_opts.outFile)
+        else:
+            self.logger.log(result)
+        self.logger.debug("Operation succeeded: config_drift.")
+
+    def doTraceReport(self):
+        """
+        function: summarise the slowest steps and nodes of the step trace
+                  of an om operation
+        input  : NA
+        output : NA
+        """
+        traceFile = self.context.g_opts.traceFile
+        if not traceFile:
+            traceDir = os.path.join(
+                os.path.dirname(self.logger.logFile), TRACE_DIR_NAME)
+            traceFile = find_latest_trace(traceDir)
+            if not traceFile:
+                raise Exception(ErrorCode.GAUSS_502["GAUSS_50201"]
+                                % os.path.join(traceDir, "*.jsonl"))
+        self.logger.debug("Trace file: %s." % traceFile)
+        try:
+            (records, skipped) = load_trace(traceFile)
+        except Exception as e:
+            raise Exception(ErrorCode.GAUSS_502["GAUSS_50204"] % traceFile
+                            + " Error:\n%s" % str(e))
+        if skipped:
+            self.logger.debug("Skipped %d lines of the trace file."
+                              % skipped)
+        report = TraceReport(records, self.context.g_opts.top).report()
+        report["trace_file"] = traceFile
+        if self.context.g_opts.outputFormat == "json":
+            result = json.dumps(report, indent=4)
+        else:
+            result = "Trace file: %s\n%s" % (traceFile,
+                                             TraceReport.format_text(report))
+        if self.context.g_opts.outFile:
+            FileUtil.createFile(self.context.g_opts.outFile, True,
+                                DefaultValue.KEY_FILE_MODE)
+            FileUtil.writeFile(self.context.g_opts.outFile, [result], "w")
+            self.logger.log("The result has been saved to %s."
+                            % self.context.g_opts.outFile)
+        else:
+            self.logger.log(result)
+        self.logger.debug("Operation succeeded: trace_report.")
@@ -0,0 +1,233 @@
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : TraceReport.py summarises the step trace of an om
+#                operation: the slowest steps, the slowest commands and the
+#                nodes that kept the others waiting.
+#############################################################################
+
+import json
+import os
+
+from base_utils.common.span_tracer import TRACE_FILE_SUFFIX, \
+    KIND_OPERATION, KIND_STEP, KIND_SPAN, KIND_REMOTE, STATUS_OK
+
+DEFAULT_TOP = 10
+
+
+def find_latest_trace(trace_dir):
+    """
+    function: get the trace file written last in a directory
+    input : trace_dir
+    output: path, or "" if there is none
+    """
+    if not os.path.isdir(trace_dir):
+        return ""
+    latest = ("", 0)
+    for name in os.listdir(trace_dir):
+        path = os.path.join(trace_dir, name)
+        if not name.endswith(TRACE_FILE_SUFFIX) or not os.path.isfile(path):
+            continue
+        mtime = os.path.getmtime(path)
+        if mtime >= latest[1]:
+            latest = (path, mtime)
+    return latest[0]
+
+
+def load_trace(trace_file):
+    """
+    function: read the records of a trace file, a line that is not a
+              record, such as the last line of a killed operation, is
+              skipped
+    input : trace_file
+    output: list of records, number of skipped lines
+    """
+    records = []
+    skipped = 0
+    with open(trace_file, "r") as fp:
+        for line in fp:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(record, dict) or "duration" not in record:
+                skipped += 1
+                continue
+            records.append(record)
+    return records, skipped
+
+
+def summarise(records, key):
+    """
+    function: count, total and maximum duration of the records grouped by
+              a key
+    input : records, key function
+    output: list of dict, the largest total first
+    """
+    groups = {}
+    for record in records:
+        name = key(record)
+        group = groups.setdefault(name, {"name": name, "count": 0,
+                                         "total": 0.0, "max": 0.0,
+                                         "failed": 0})
+        group["count"] += 1
+        group["total"] += record["duration"]
+        group["max"] = max(group["max"], record["duration"])
+        if record.get("status") != STATUS_OK:
+            group["failed"] += 1
+    result = sorted(groups.values(), key=lambda item: -item["total"])
+    for group in result:
+        group["total"] = round(group["total"], 3)
+        group["max"] = round(group["max"], 3)
+        group["avg"] = round(group["total"] / group["count"], 3)
+    return result
+
+
+class TraceReport(object):
+    """
+    Summary of the records of a trace file
+    """
+
+    def __init__(self, records, top=DEFAULT_TOP):
+        """
+        function: group the records by kind
+        input : records, number of entries of every list
+        output: NA
+        """
+        self.top = top
+        self.operations = [r for r in records
+                           if r.get("kind") == KIND_OPERATION]
+        self.steps = [r for r in records if r.get("kind") == KIND_STEP]
+        self.spans = [r for r in records if r.get("kind") == KIND_SPAN]
+        self.remotes = [r for r in records if r.get("kind") == KIND_REMOTE]
+
+    def stragglers(self):
+        """
+        function: count for every node how often it was the last one of a
+                  command run on several nodes
+        input : NA
+        output: dict of node to count
+        """
+        children = {}
+        for record in self.remotes:
+            children.setdefault(record.get("parent_id"), []).append(record)
+        counts = {}
+        for records in children.values():
+            if len(records) < 2:
+                continue
+            last = max(records,
+                       key=lambda item: item["start"] + item["duration"])
+            counts[last["node"]] = counts.get(last["node"], 0) + 1
+        return counts
+
+    def report(self):
+        """
+        function: summarise the trace
+        input : NA
+        output: dict
+        """
+        operations = [{"operation": r.get("operation"),
+                       "node": r.get("node"),
+                       "start": r.get("start"),
+                       "duration": round(r["duration"], 3),
+                       "status": r.get("status"),
+                       "error": r.get("error", "")}
+                      for r in sorted(self.operations,
+                                      key=lambda item: item.get("start", 0))]
+        steps = [{"operation": r.get("operation"),
+                  "step": r.get("step"),
+                  "duration": round(r["duration"], 3),
+                  "status": r.get("status")}
+                 for r in sorted(self.steps, key=lambda item: -item["duration"])]
+        commands = [{"step": r.get("step"),
+                     "cmd": r.get("cmd", ""),
+                     "nodes": r.get("nodes", ""),
+                     "duration": round(r["duration"], 3),
+                     "status": r.get("status")}
+                    for r in sorted(self.spans,
+                                    key=lambda item: -item["duration"])]
+        stragglers = self.stragglers()
+        nodes = summarise(self.remotes, lambda item: item.get("node"))
+        for node in nodes:
+            node["last"] = stragglers.get(node["name"], 0)
+        return {"operations": operations,
+                "complete": bool(self.operations),
+                "steps": steps[:self.top],
+                "spans": summarise(self.spans,
+                                   lambda item: item.get("step"))[:self.top],
+                "commands": commands[:self.top],
+                "nodes": nodes[:self.top]}
+
+    @staticmethod
+    def format_text(report):
+        """
+        function: format the report as text
+        input : report
+        output: str
+        """
+        lines = []
+        for operation in report["operations"]:
+            line = "Operation %s on %s took %.3fs, %s." % (
+                operation["operation"], operation["node"],
+                operation["duration"], operation["status"])
+            if operation["error"]:
+                line += " Error: %s" % operation["error"]
+            lines.append(line)
+        if not report["complete"]:
+            lines.append("The operation has not finished, or was killed.")
+        if report["steps"]:
+            lines.append("")
+            lines.append("Slowest steps:")
+            for step in report["steps"]:
+                lines.append("    %-40s %10.3fs  %s" % (
+                    "%s %s" % (step["operation"], step["step"]),
+                    step["duration"], step["status"]))
+        if report["spans"]:
+            lines.append("")
+            lines.append("Time by span:")
+            lines.append("    %-40s %6s %10s %10s %6s" % (
+                "span", "count", "total", "max", "failed"))
+            for span in report["spans"]:
+                lines.append("    %-40s %6d %9.3fs %9.3fs %6d" % (
+                    span["name"], span["count"], span["total"], span["max"],
+                    span["failed"]))
+        if report["commands"]:
+            lines.append("")
+            lines.append("Slowest commands:")
+            for command in report["commands"]:
+                nodes = ""
+                if command["nodes"] != "":
+                    nodes = " (nodes: %s)" % command["nodes"]
+                lines.append("    %10.3fs  %s%s %s" % (
+                    command["duration"], command["step"], nodes,
+                    command["status"]))
+                if command["cmd"]:
+                    lines.append("        %s" % command["cmd"])
+        if report["nodes"]:
+            lines.append("")
+            lines.append("Slowest nodes:")
+            lines.append("    %-30s %6s %10s %10s %6s %6s" % (
+                "node", "count", "total", "max", "last", "failed"))
+            for node in report["nodes"]:
+                lines.append("    %-30s %6d %9.3fs %9.3fs %6d %6d" % (
+                    node["name"], node["count"], node["total"], node["max"],
+                    node["last"], node["failed"]))
+        return "\n".join(lines)
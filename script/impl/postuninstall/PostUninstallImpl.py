@@ -21,6 +21,7 @@ import subprocess
 import grp
 import pwd
 import getpass
+import shlex
 
 from base_utils.os.user_util import UserUtil
 
@@ -31,6 +32,8 @@ from gspylib.common.OMCommand import OMCommand
 from gspylib.common.ErrorCode import ErrorCode
 import impl.upgrade.UpgradeConst as Const
 from base_utils.executor.cmd_executor import CmdExecutor
+from base_utils.executor.remote_batch import RemoteBatch, SKIPPED
+from base_utils.common.host_journal import HostJournal
 from domain_utils.cluster_file.cluster_config_file import ClusterConfigFile
 from domain_utils.cluster_file.cluster_dir import ClusterDir
 from base_utils.os.file_util import FileUtil
@@ -60,6 +63,15 @@ ACTION_CLEAN_GAUSS_ENV = "clean_gauss_env"
 ACTION_DELETE_GROUP = "delete_group"
 ACTION_CLEAN_SYSLOG_CONFIG = 'clean_syslog_config'
 ACTION_CLEAN_DEPENDENCY = "clean_dependency"
+# directory under the tool path keeping the steps finished on every node
+JOURNAL_DIR_NAME = "postuninstall_journal"
+# steps of the cleanup of the nodes
+STEP_REMOVE_APP_PATH = "remove_app_path"
+STEP_DELETE_USER = "delete_user"
+STEP_CLEAN_GAUSS_ENV = "clean_gauss_env"
+STEP_CLEAN_TOOL_ENV = "clean_tool_env"
+STEP_CLEAN_LOG = "clean_log"
+STEP_DELETE_GROUP = "delete_group"
 
 
 class PostUninstallImpl:
@@ -120,16 +132,14 @@ class PostUninstallImpl:
             self.checkUnPreInstall()
             # clean app/log/data/temp dirs
             self.cleanDirectory()
-            # clean other user
-            self.cleanRemoteOsUser()
-            # clean other nodes environment software and variable
-            self.cleanOtherNodesEnvSoftware()
-            # clean other nodes log
-            self.cleanOtherNodesLog()
+            # clean other user, environment software, variable and log of
+            # the nodes, the nodes are cleaned at the same time
+            self.cleanNodes()
             # clean local node environment software and variable
             self.cleanLocalNodeEnvSoftware()
             # clean local user
             self.cleanLocalOsUser()
+            self.getJournal().clear()
         except Exception as e:
             self.logger.logExit(str(e))
         self.logger.debug("Do clean Environment succeeded.", "constant")
@@ -153,9 +163,11 @@ class PostUninstallImpl:
         output: NA
         """
         self.logger.log("Checking unpreinstallation.")
+        hostList = None
         if not self.localMode:
-            ProfileFile.checkAllNodesMpprcFile(
-                self.clusterInfo.getClusterNodeNames(), self.mpprcFile)
+            # the user of a node cleaned by an earlier run is gone
+            hostList = self.getUnfinishedNodes()
+            ProfileFile.checkAllNodesMpprcFile(hostList, self.mpprcFile)
 
         cmd = "%s -t %s -u %s -l '%s' -X '%s'" % (
             OMCommand.getLocalScript("Local_UnPreInstall"),
@@ -167,7 +179,7 @@ class PostUninstallImpl:
         # check if do postuninstall in all nodes
         CmdExecutor.execCommandWithMode(cmd,
                                         self.sshTool, self.localMode,
-                                        self.mpprcFile)
+                                        self.mpprcFile, hostList)
         self.logger.log("Successfully checked unpreinstallation.")
 
     def cleanDirectory(self):
@@ -257,151 +269,144 @@ class PostUninstallImpl:
 
         self.logger.log("Successfully deleted the instance's directory.")
 
-    def cleanRemoteOsUser(self):
+    def getJournal(self):
         """
-        function: Clean remote os user
+        function: get the journal of the steps finished on every node
         input : NA
-        output: NA
+        output: HostJournal
         """
-        # check if local mode
-        if (self.localMode):
-            return
+        return HostJournal(os.path.join(self.clusterToolPath,
+                                        JOURNAL_DIR_NAME))
 
-        if (not self.deleteUser):
+    def getCleanPlan(self):
+        """
+        function: get the steps cleaning the nodes, in their order. The
+                  group is deleted last, its failure is only reported
+        input : NA
+        output: list of (step, cmd, hosts)
+        """
+        hostName = NetUtil.GetHostIpOrName()
+        allNodes = self.clusterInfo.getClusterNodeNames()
+        otherNodes = [node for node in allNodes if node != hostName]
+        plan = []
+        if not self.deleteUser:
             # clean static config file
             if os.stat(os.path.dirname(self.clusterInfo.appPath)).st_uid != 0:
-                cmd = "rm -rf '%s'" % self.clusterInfo.appPath
-                CmdExecutor.execCommandWithMode(cmd,
-                                            self.sshTool, self.localMode,
-                                            self.mpprcFile)
-            return
-
-        group = grp.getgrgid(pwd.getpwnam(self.user).pw_gid).gr_name
-
-        # get other nodes
-        hostName = NetUtil.GetHostIpOrName()
-        otherNodes = self.clusterInfo.getClusterNodeNames()
-        for otherNode in otherNodes:
-            if (otherNode == hostName):
-                otherNodes.remove(otherNode)
-
-        # clean remote user
-        self.logger.log("Deleting remote OS user.")
-        cmd = "%s -U %s -l %s" % (
-            OMCommand.getLocalScript("Local_Clean_OsUser"), self.user,
-            self.localLog)
-        self.logger.debug("Command for deleting remote OS user: %s" % cmd)
-        CmdExecutor.execCommandWithMode(cmd, self.sshTool,
-                                        self.localMode, self.mpprcFile,
-                                        otherNodes)
-        self.logger.log("Successfully deleted remote OS user.")
-
-        if (self.deleteGroup):
-            # clean remote group
-            self.logger.debug("Deleting remote OS group.")
-            cmd = "%s -t %s -u %s -l '%s' -X '%s'" % (
-                OMCommand.getLocalScript("Local_UnPreInstall"),
-                ACTION_DELETE_GROUP, group, self.localLog, self.xmlFile)
-            self.logger.debug("Command for deleting remote OS group: %s" % cmd)
-            status = self.sshTool.getSshStatusOutput(cmd, otherNodes,
-                                                               self.mpprcFile)[0]
-            outputMap = self.sshTool.parseSshOutput(otherNodes)
-            for node in status.keys():
-                if (status[node] != DefaultValue.SUCCESS):
-                    self.logger.log((outputMap[node]).strip("\n"))
-            self.logger.debug("Deleting remote group is completed.")
-
-    def cleanOtherNodesEnvSoftware(self):
-        """
-        function: clean other nodes environment software and variable
+                plan.append((STEP_REMOVE_APP_PATH,
+                             "rm -rf '%s'" % self.clusterInfo.appPath,
+                             allNodes))
+            plan.append((STEP_CLEAN_GAUSS_ENV, "%s -t %s -u %s -l '%s' -X '%s'"
+                         % (OMCommand.getLocalScript("Local_UnPreInstall"),
+                            ACTION_CLEAN_GAUSS_ENV, self.user, self.localLog,
+                            self.xmlFile), otherNodes))
+        else:
+            plan.append((STEP_DELETE_USER, "%s -U %s -l %s"
+                         % (OMCommand.getLocalScript("Local_Clean_OsUser"),
+                            self.user, self.localLog), otherNodes))
+        plan.append((STEP_CLEAN_TOOL_ENV, "%s -t %s -u %s -l '%s' -X '%s'"
+                     % (OMCommand.getLocalScript("Local_UnPreInstall"),
+                        ACTION_CLEAN_TOOL_ENV, self.user, self.localLog,
+                        self.xmlFile), allNodes))
+        # clean log
+        if os.stat(ClusterDir.getClusterToolPath(self.user)).st_uid != 0 or \
+                os.stat(self.clusterInfo.logPath).st_uid != 0:
+            cmd = "rm -rf '%s/%s'; rm -rf /tmp/gauss_*;" % (
+                self.clusterInfo.logPath, self.user)
+            python_path = "%s/Python-2.7.9" % ClusterDir.getClusterToolPath(
+                self.user)
+            if DefaultValue.non_root_owner(python_path):
+                cmd += "rm -rf '%s/Python-2.7.9'" % \
+                       ClusterDir.getClusterToolPath(self.user)
+            plan.append((STEP_CLEAN_LOG, cmd, otherNodes))
+        if self.deleteUser and self.deleteGroup:
+            group = grp.getgrgid(pwd.getpwnam(self.user).pw_gid).gr_name
+            plan.append((STEP_DELETE_GROUP, "%s -t %s -u %s -l '%s' -X '%s'"
+                         % (OMCommand.getLocalScript("Local_UnPreInstall"),
+                            ACTION_DELETE_GROUP, group, self.localLog,
+                            self.xmlFile), otherNodes))
+        return [(step, cmd, hosts) for (step, cmd, hosts) in plan if hosts]
+
+    def getUnfinishedNodes(self):
+        """
+        function: get the nodes whose cleanup is not finished, the local
+                  node is cleaned at last and always kept
         input : NA
-        output: NA
+        output: list of node names
         """
-        # check if local mode
-        if self.localMode:
-            return
-        self.logger.log(
-            "Deleting software packages "
-            "and environmental variables of other nodes.")
-        try:
-            # get other nodes
-            hostName = NetUtil.GetHostIpOrName()
-            otherNodes = self.clusterInfo.getClusterNodeNames()
-            for otherNode in otherNodes:
-                if (otherNode == hostName):
-                    otherNodes.remove(otherNode)
-            self.logger.debug(
-                "Deleting environmental variables of nodes: %s." % otherNodes)
-
-            # clean $GAUSS_ENV
-            if (not self.deleteUser):
-                cmd = "%s -t %s -u %s -l '%s' -X '%s'" % (
-                    OMCommand.getLocalScript("Local_UnPreInstall"),
-                    ACTION_CLEAN_GAUSS_ENV,
-                    self.user,
-                    self.localLog,
-                    self.xmlFile)
-                self.logger.debug("Command for deleting $GAUSS_ENV: %s" % cmd)
-                CmdExecutor.execCommandWithMode(cmd,
-                                                self.sshTool, self.localMode,
-                                                self.mpprcFile, otherNodes)
-            cmd = "%s -t %s -u %s -l '%s' -X '%s'" % (
-                OMCommand.getLocalScript("Local_UnPreInstall"),
-                ACTION_CLEAN_TOOL_ENV,
-                self.user,
-                self.localLog,
-                self.xmlFile)
-            self.logger.debug(
-                "Command for deleting environmental variables: %s" % cmd)
-            CmdExecutor.execCommandWithMode(cmd,
-                                            self.sshTool,
-                                            self.localMode,
-                                            self.mpprcFile,
-                                            otherNodes.append(hostName))
-        except Exception as e:
-            self.logger.logExit(str(e))
-        self.logger.log(
-            "Successfully deleted software packages "
-            "and environmental variables of other nodes.")
-
-    def cleanOtherNodesLog(self):
-        """
-        function: clean other nodes log
+        hostName = NetUtil.GetHostIpOrName()
+        journal = self.getJournal()
+        steps = self.getCleanPlan()
+        return [node for node in self.clusterInfo.getClusterNodeNames()
+                if node == hostName or journal.get_pending(
+                    node, [step for (step, _, hosts) in steps
+                           if node in hosts])]
+
+    def cleanNodes(self):
+        """
+        function: clean the OS user, the environment software and variable
+                  and the log of the nodes. Every node runs its steps in one
+                  session and the nodes run at the same time. The finished
+                  steps are recorded in the journal, a rerun after a failure
+                  skips them
         input : NA
         output: NA
         """
-        # check if local mode
         if self.localMode:
             return
-        self.logger.log("Deleting logs of other nodes.")
-        try:
-            # get other nodes
-            hostName = NetUtil.GetHostIpOrName()
-            otherNodes = self.clusterInfo.getClusterNodeNames()
-            for otherNode in otherNodes:
-                if (otherNode == hostName):
-                    otherNodes.remove(otherNode)
-
-            # clean log
-            if os.stat(ClusterDir.getClusterToolPath(self.user)).st_uid != 0 or \
-                    os.stat(self.clusterInfo.logPath).st_uid != 0:
-                cmd = "rm -rf '%s/%s'; rm -rf /tmp/gauss_*;" % (self.clusterInfo.logPath, self.user)
-                python_path = "%s/Python-2.7.9" % ClusterDir.getClusterToolPath(self.user)
-                if DefaultValue.non_root_owner(python_path):
-                    cmd += "rm -rf '%s/Python-2.7.9'" % ClusterDir.getClusterToolPath(self.user)
-                self.logger.debug("Command for deleting logs of other nodes: %s" % cmd)
-                CmdExecutor.execCommandWithMode(cmd,
-                                                self.sshTool,
-                                                self.localMode,
-                                                self.mpprcFile,
-                                                otherNodes)
-                self.logger.debug(
-                    "Successfully deleted logs of the nodes: %s." % otherNodes)
-        except Exception as e:
-            self.logger.logExit(
-                ErrorCode.GAUSS_502["GAUSS_50207"] % "other nodes log"
-                + " Error: \n%s." % str(e))
-        self.logger.log("Successfully deleted logs of other nodes.")
+        self.logger.log("Deleting OS user, software packages, environmental "
+                        "variables and logs of the nodes.")
+        journal = self.getJournal()
+        batch = RemoteBatch(self.sshTool, self.mpprcFile)
+        pendingNodes = set()
+        for (step, cmd, hosts) in self.getCleanPlan():
+            hosts = [host for host in hosts
+                     if step not in journal.get_done(host)]
+            if not hosts:
+                self.logger.debug("Step %s has been finished on all nodes."
+                                  % step)
+                continue
+            self.logger.debug("Command of step %s on %s: %s"
+                              % (step, hosts, cmd))
+            batch.add(step, cmd, hosts)
+            pendingNodes.update(hosts)
+        if not pendingNodes:
+            self.logger.log("All nodes have been cleaned.")
+            return
+        results = batch.run(sorted(pendingNodes))
+        errors = []
+        for (host, stepResults) in sorted(results.items()):
+            failed = False
+            for result in stepResults:
+                # a step skipped after a failure is expected, a step that
+                # never ran on its own is not finished either
+                if result.status == SKIPPED and failed:
+                    continue
+                if result.status == SKIPPED:
+                    errors.append("[%s] %s: not run. %s" % (
+                        host, result.name,
+                        (result.error or result.output).strip()))
+                    failed = True
+                    continue
+                if result.status != 0 and result.name != STEP_DELETE_GROUP:
+                    errors.append("[%s] %s: exit code %d. %s" % (
+                        host, result.name, result.status,
+                        (result.error or result.output).strip()))
+                    failed = True
+                    continue
+                if result.status != 0:
+                    self.logger.log("[%s] %s: exit code %d. %s" % (
+                        host, result.name, result.status,
+                        (result.error or result.output).strip()))
+                journal.mark_done(host, result.name)
+        if errors:
+            self.logger.logExit(ErrorCode.GAUSS_502["GAUSS_50207"]
+                                % "the environment of the nodes"
+                                + " Error:\n%s\n" % "\n".join(errors)
+                                + "The finished steps are recorded in %s, "
+                                  "rerun the command to continue."
+                                % journal.journal_dir)
+        self.logger.log("Successfully deleted OS user, software packages, "
+                        "environmental variables and logs of the nodes.")
 
     def cleanLocalNodeEnvSoftware(self):
         """
@@ -643,14 +648,41 @@ class PostUninstallImpl:
         except Exception as e:
             self.logger.logExit(str(e))
 
+    @staticmethod
+    def getCleanGphomeCmd():
+        """
+        function: get the command cleaning gphome of a node, a gphome owned
+                  by root is kept
+        input : NA
+        output: str
+        """
+        return "if [ $(stat -c \"%s\" %s) == 0 ];then echo 'OKOKOK';" \
+               "else rm -rf %s/* && echo 'OKOKOK';fi" % ("%u", gphome, gphome)
+
+    def sshExecWithTrust(self, host):
+        """
+        function: clean gphome of a node through the ssh trust of root
+        input : host
+        output: NA
+        """
+        cmd = self.getCleanGphomeCmd()
+        sshCmd = "ssh -n %s %s %s" % (DefaultValue.SSH_OPTION, host,
+                                      shlex.quote(cmd))
+        (status, output) = subprocess.getstatusoutput(sshCmd)
+        self.logger.debug("%s: %s" % (str(host), str(output)))
+        if status != 0 or output.find('OKOKOK') < 0:
+            raise Exception(
+                ErrorCode.GAUSS_514["GAUSS_51400"]
+                % cmd + "host: %s. Error:\n%s"
+                % (host, output))
+
     def sshExecWithPwd(self, host):
         """
         function: execute command with root password
         input : host
         output: NA
         """
-        cmd = "if [ $(stat -c \"%s\" %s) == 0 ];then echo 'OKOKOK';" \
-              "else rm -rf %s/* && echo 'OKOKOK';fi" % ("%u", gphome, gphome)
+        cmd = self.getCleanGphomeCmd()
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         ssh.connect(host, 22, "root", self.sshpwd)
@@ -775,7 +807,7 @@ class PostUninstallImpl:
                 if SSH_TRUST and not self.localMode:
                     # SSH trust has been created
                     self.verifyCleanGphome()
-                    parallelTool.parallelExecute(self.sshExecWithPwd,
+                    parallelTool.parallelExecute(self.sshExecWithTrust,
                                                  self.nodeList)
                 if not SSH_TRUST or self.localMode:
                     # SSH trust has not been created
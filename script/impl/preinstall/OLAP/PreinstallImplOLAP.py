@@ -266,47 +266,6 @@ class PreinstallImplOLAP(PreinstallImpl):
         except Exception as e:
             raise Exception(str(e))
 
-    def setEnvParameter(self):
-        """
-        function: setting DBA environmental variables
-        input: NA
-        output: NA
-        """
-        self.context.logger.log("Setting user environmental variables.",
-                                "addStep")
-
-        try:
-            # Setting DBA environmental variables
-            cmdParam = ""
-            # get then envParams
-            for param in self.context.envParams:
-                cmdParam += " -e \\\"%s\\\"" % param
-
-            # set the environmental variables on all nodes
-            cmd = "%s -t %s -u %s %s -l %s" % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_SET_USER_ENV,
-                self.context.user,
-                cmdParam,
-                self.context.localLog)
-            # check the mpprcFile
-            if (self.context.mpprcFile != ""):
-                cmd += " -s '%s'" % self.context.mpprcFile
-            self.context.logger.debug(
-                "Command for setting user's environmental variables: %s" % cmd)
-
-            # set user's environmental variables
-            CmdExecutor.execCommandWithMode(
-                cmd,
-                self.context.sshTool,
-                self.context.localMode or self.context.isSingle,
-                self.context.mpprcFile)
-        except Exception as e:
-            raise Exception(str(e))
-
-        self.context.logger.log(
-            "Successfully set user environmental variables.", "constant")
-
     def setCorePath(self):
         """
         function: set file size and path with core file
@@ -410,71 +369,49 @@ class PreinstallImplOLAP(PreinstallImpl):
             raise Exception(str(e))
         self.context.logger.log("Successfully set host ip env.", "constant")
 
-    def setCgroup(self):
+    def isArmPlatform(self):
         """
-        function: setting Cgroup
+        function: check whether the local node is an ARM platform
         input: NA
-        output: NA
+        output: bool
         """
-        self.context.logger.log("Setting Cgroup.", "addStep")
-        try:
-            # set the cgroup
-            cmd = "%s -t %s -u %s -X '%s' -l '%s' -Q %s" % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_SET_CGROUP,
-                self.context.user,
-                self.context.xmlFile,
-                self.context.localLog,
-                self.context.clusterToolPath)
-            self.context.logger.debug("Command for setting Cgroup: %s." % cmd)
-            # exec cmd fro set cgroup
-            CmdExecutor.execCommandWithMode(cmd,
-                                            self.context.sshTool,
-                                            self.context.localMode or self.context.isSingle,
-                                            self.context.mpprcFile)
-        except Exception as e:
-            # failed set Cgroup
-            self.context.logger.log("Error: Failed to set Cgroup.")
-            self.context.logger.logExit(str(e))
-        # Successfully set Cgroup
-        self.context.logger.log("Successfully set Cgroup.", "constant")
-
-    def setArmOptimization(self):
-        """
-        function: setting ARM Optimization
-        input: NA
-        output: NA
-        """
-        self.context.logger.log("Set ARM Optimization.", "addStep")
         cmd = "python3 -c 'import platform;print(platform.machine())'"
         (status, output) = subprocess.getstatusoutput(cmd)
         if status != 0:
             self.context.logger.logExit("Command for set platform ARM:"
                                       "%s" % cmd + " Error: \n%s" % output)
-        if output != "aarch64":
-            self.context.logger.log("No need to set ARM Optimization.", "constant")
-            return
+        return output == "aarch64"
 
-        try:
-            # exec cmd for set platform ARM
-            cmd = "%s -t %s -u %s -l %s -Q %s" % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_SET_ARM_OPTIMIZATION,
-                self.context.user,
-                self.context.localLog,
-                self.context.clusterToolPath)
-            self.context.logger.debug("Command for set platform ARM: %s" % cmd)
+    def getConfigureSteps(self):
+        """
+        function: get the steps run on every node after the OS parameters
+                  are set, with the user environment
+        input: NA
+        output: list of (action, start message, finish message)
+        """
+        steps = PreinstallImpl.getConfigureSteps(self)
+        steps.append((ACTION_SET_USER_ENV,
+                      "Setting user environmental variables.",
+                      "Successfully set user environmental variables."))
+        return steps
 
-            CmdExecutor.execCommandWithMode(
-                cmd,
-                self.context.sshTool,
-                self.context.localMode or self.context.isSingle,
-                self.context.mpprcFile)
-        except Exception as e:
-            raise Exception(str(e))
-        # Successfully set ARM Optimization
-        self.context.logger.log("Successfully set ARM Optimization.",
-                                "constant")
+    def getOptimizeSteps(self):
+        """
+        function: get the steps run on every node after the core path and
+                  pssh are set, Cgroup and ARM Optimization
+        input: NA
+        output: list of (action, start message, finish message)
+        """
+        steps = PreinstallImpl.getOptimizeSteps(self)
+        steps.append((ACTION_SET_CGROUP, "Setting Cgroup.",
+                      "Successfully set Cgroup."))
+        if self.isArmPlatform():
+            steps.append((ACTION_SET_ARM_OPTIMIZATION, "Set ARM Optimization.",
+                          "Successfully set ARM Optimization."))
+        else:
+            steps.append((None, "Set ARM Optimization.",
+                          "No need to set ARM Optimization."))
+        return steps
 
     # AP
     def setVirtualIp(self):
@@ -20,6 +20,7 @@ import pwd
 import sys
 import re
 import getpass
+import json
 
 sys.path.append(sys.path[0] + "/../")
 
@@ -28,6 +29,7 @@ from gspylib.common.Common import ClusterCommand, DefaultValue
 from gspylib.common.OMCommand import OMCommand
 from gspylib.os.gsfile import g_file
 from base_utils.executor.cmd_executor import CmdExecutor
+from base_utils.executor.remote_batch import RemoteBatch
 from domain_utils.cluster_file.cluster_config_file import ClusterConfigFile
 from base_utils.os.cmd_util import CmdUtil
 from domain_utils.cluster_file.cluster_dir import ClusterDir
@@ -80,6 +82,12 @@ ACTION_CHECK_OS_SOFTWARE = "check_os_software"
 ACTION_CHANGE_TOOL_ENV = "change_tool_env"
 #check config
 ACTION_CHECK_CONFIG = "check_config"
+# several actions run by one call of the local script, every action prints
+# one result record
+ACTION_SEPARATOR = ","
+ACTION_RESULT_FLAG = "[PREINSTALL_ACTION_RESULT]"
+ACTION_SUCCESS = "Success"
+ACTION_FAILED = "Failed"
 #############################################################################
 # Global variables
 #   self.context.logger: globle logger
@@ -353,17 +361,17 @@ class PreinstallImpl:
                                 self.context.mpprcFile)
 
             # Delete the old bak package in GPHOME before copy the new one.
+            batch = RemoteBatch(self.context.sshTool, stop_on_error=False)
             for bakPack in DefaultValue.PACKAGE_BACK_LIST:
                 bakFile = os.path.join(self.context.clusterToolPath, bakPack)
                 cmd = g_file.SHELL_CMD_DICT["deleteFile"] % (bakFile, bakFile)
                 self.context.logger.debug(
                     "Command for deleting bak-package: %s." % cmd)
-                (status, output) = self.context.sshTool.getSshStatusOutput(
-                    cmd, hosts)
-                for ret in list(status.values()):
-                    if ret != DefaultValue.SUCCESS:
-                        self.context.logger.debug(
-                            "Failed delete bak-package, result: %s." % output)
+                batch.add("delete %s" % bakFile, cmd)
+            for (host, result) in RemoteBatch.get_failures(batch.run(hosts)):
+                self.context.logger.debug(
+                    "Failed delete bak-package on %s, result: %s."
+                    % (host, result.error or result.output))
 
             # Retry 3 times, if distribute failed.
             for i in range(3):
@@ -512,19 +520,13 @@ class PreinstallImpl:
                 FileUtil.changeOwner(self.context.user, onePath, recursive=True,
                                      cmd_type="shell", link=True)
 
-            # fix remote toolpath's owner
+            # fix remote toolpath's owner, one session per node
+            batch = RemoteBatch(self.context.sshTool, self.context.mpprcFile)
             for node in list(topToolPath.keys()):
-                nodelist = []
-                nodelist.append(node)
                 if os.path.exists(topToolPath[node]):
-                    cmd = "chown -R %s:%s '%s'" % (
-                        self.context.user, self.context.group,
-                        topToolPath[node])
-                    self.context.sshTool.executeCommand(
-                        cmd,
-                        DefaultValue.SUCCESS,
-                        nodelist,
-                        self.context.mpprcFile)
+                    batch.add_change_owner(
+                        "%s:%s" % (self.context.user, self.context.group),
+                        topToolPath[node], True, [node])
 
             # chown chmod top path file
             topDirFile = ClusterConstants.TOP_DIR_FILE
@@ -533,10 +535,8 @@ class PreinstallImpl:
                   "| xargs chown -R -h %s:%s; rm -rf '%s';fi)" % \
                   (topDirFile, topDirFile, self.context.user,
                    self.context.group, topDirFile)
-            self.context.sshTool.executeCommand(cmd,
-                                                DefaultValue.SUCCESS,
-                                                [],
-                                                self.context.mpprcFile)
+            batch.add("chown top path", cmd)
+            batch.execute()
 
             # change owner of packages
             self.context.logger.debug("Changing package path permission.")
@@ -608,10 +608,8 @@ class PreinstallImpl:
             if self.context.mpprcFile != "":
                 cmd += " -s '%s' -g %s" % (
                     self.context.mpprcFile, self.context.group)
-            self.context.sshTool.executeCommand(cmd,
-                                                DefaultValue.SUCCESS,
-                                                [],
-                                                self.context.mpprcFile)
+            batch = RemoteBatch(self.context.sshTool, self.context.mpprcFile)
+            batch.add(ACTION_SET_TOOL_ENV, cmd)
             cmd = "%s -t %s -u %s -g %s -P %s -l %s" % (
                 OMCommand.getLocalScript("Local_PreInstall"),
                 ACTION_PREPARE_PATH,
@@ -620,11 +618,8 @@ class PreinstallImpl:
                 self.context.clusterToolPath,
                 self.context.localLog)
             # prepare cluster tool package path
-            self.context.sshTool.executeCommand(
-                cmd,
-                DefaultValue.SUCCESS,
-                [],
-                self.context.mpprcFile)
+            batch.add(ACTION_PREPARE_PATH, cmd)
+            batch.execute()
         except Exception as e:
             raise Exception(str(e))
 
@@ -721,34 +716,6 @@ class PreinstallImpl:
             raise Exception(str(e))
         self.context.logger.log("Successfully created SSH trust for [%s] user." % self.context.user)
 
-    def checkOSVersion(self):
-        """
-        function:
-          check if os version is support
-        precondition:
-        postcondition:
-        input:NA
-        output:NA
-        hiden info:support os version
-        ppp:
-        """
-        self.context.logger.log("Checking OS version.", "addStep")
-        try:
-            # Checking OS version
-            cmd = "%s -t %s -u %s -l %s" % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_CHECK_OS_VERSION,
-                self.context.user,
-                self.context.localLog)
-            CmdExecutor.execCommandWithMode(
-                cmd,
-                self.context.sshTool,
-                self.context.localMode or self.context.isSingle,
-                self.context.mpprcFile)
-        except Exception as e:
-            raise Exception(str(e))
-        self.context.logger.log("Successfully checked OS version.", "constant")
-
     def createOSUser(self):
         """
         function:
@@ -921,57 +888,175 @@ class PreinstallImpl:
         if (error_message.find("GAUSS-50305") > 0):
             raise Exception(str(error_message))
 
-    def createDirs(self):
+    def fixNewPathOwner(self):
         """
-        function: create directorys
+        function: fix new created path's owner after create user for single
+                  cluster
         input: NA
         output: NA
         """
-        self.context.logger.log("Creating cluster's path.", "addStep")
-        try:
-            # fix new created path's owner after create user for single cluster
-            if self.context.isSingle:
-                self.context.logger.debug(
-                    "Paths need to be fixed owner:%s."
-                    % self.context.needFixOwnerPaths)
-                for onePath in self.context.needFixOwnerPaths:
-                    FileUtil.changeOwner(self.context.user, onePath,
-                                         recursive=True, cmd_type="shell", link=True)
-
-                topDirFile = ClusterConstants.TOP_DIR_FILE
-                if os.path.exists(topDirFile):
-                    keylist = FileUtil.readFile(topDirFile)
-                    if keylist != []:
-                        for key in keylist:
-                            FileUtil.changeOwner(self.context.user, key.strip(),
-                                               True, "shell", link=True)
-
-                    FileUtil.removeFile(topDirFile)
-
-            # create the directory on all nodes
-            cmd = "%s -t %s -u %s -g %s -Q %s -X '%s' -l '%s'" % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_CREATE_CLUSTER_PATHS,
-                self.context.user,
-                self.context.group,
-                self.context.clusterToolPath,
-                self.context.xmlFile,
-                self.context.localLog)
-            # check the env file
-            if self.context.mpprcFile != "":
-                cmd += " -s '%s'" % self.context.mpprcFile
-            # exec the cmd
-            CmdExecutor.execCommandWithMode(
-                cmd,
-                self.context.sshTool,
-                self.context.localMode or self.context.isSingle,
-                self.context.mpprcFile)
-            self.context.logger.debug(
-                f"The cmd of the create cluster path: {cmd}.")
-        except Exception as e:
-            raise Exception(str(e))
-        self.context.logger.log("Successfully created cluster's path.",
-                                "constant")
+        if not self.context.isSingle:
+            return
+        self.context.logger.debug(
+            "Paths need to be fixed owner:%s."
+            % self.context.needFixOwnerPaths)
+        for onePath in self.context.needFixOwnerPaths:
+            FileUtil.changeOwner(self.context.user, onePath,
+                                 recursive=True, cmd_type="shell", link=True)
+
+        topDirFile = ClusterConstants.TOP_DIR_FILE
+        if os.path.exists(topDirFile):
+            keylist = FileUtil.readFile(topDirFile)
+            if keylist != []:
+                for key in keylist:
+                    FileUtil.changeOwner(self.context.user, key.strip(),
+                                         True, "shell", link=True)
+
+            FileUtil.removeFile(topDirFile)
+
+    def getPrepareSteps(self):
+        """
+        function: get the steps run on every node before the OS parameters
+                  are set
+        input: NA
+        output: list of (action, start message, finish message)
+        """
+        return [(ACTION_CHECK_OS_SOFTWARE, "Checking OS software.",
+                 "Successfully check os software."),
+                (ACTION_CHECK_OS_VERSION, "Checking OS version.",
+                 "Successfully checked OS version."),
+                (ACTION_CREATE_CLUSTER_PATHS, "Creating cluster's path.",
+                 "Successfully created cluster's path.")]
+
+    def getConfigureSteps(self):
+        """
+        function: get the steps run on every node after the OS parameters
+                  are set
+        input: NA
+        output: list of (action, start message, finish message)
+        """
+        return [(ACTION_PREPARE_USER_CRON_SERVICE, "Preparing CRON service.",
+                 "Successfully prepared CRON service.")]
+
+    def getLibrarySteps(self):
+        """
+        function: get the steps setting the dynamic link library, run after
+                  the virtual IP is set
+        input: NA
+        output: list of (action, start message, finish message)
+        """
+        return [(ACTION_SET_LIBRARY, "Setting the dynamic link library.",
+                 "Successfully set the dynamic link library.")]
+
+    def getOptimizeSteps(self):
+        """
+        function: get the steps run on every node after the core path and
+                  pssh are set
+        input: NA
+        output: list of (action, start message, finish message)
+        """
+        return []
+
+    def getFusedActionCmd(self, actions):
+        """
+        function: get the command running several actions of the local
+                  script in one call, it carries the options of all of them
+        input: actions
+        output: cmd
+        """
+        cmd = "%s -t %s -u %s -g %s -Q %s -X '%s' -l '%s'" % (
+            OMCommand.getLocalScript("Local_PreInstall"),
+            ACTION_SEPARATOR.join(actions),
+            self.context.user,
+            self.context.group,
+            self.context.clusterToolPath,
+            self.context.xmlFile,
+            self.context.localLog)
+        for param in self.context.envParams:
+            cmd += " -e \\\"%s\\\"" % param
+        if self.context.mpprcFile != "":
+            cmd += " -s '%s'" % self.context.mpprcFile
+        return cmd
+
+    @staticmethod
+    def parseActionResults(output):
+        """
+        function: split the output of the local script into the results of
+                  its actions, the output printed before a result record
+                  belongs to that action
+        input: output
+        output: dict of action to (status, output), the output after the
+                last record is kept under None
+        """
+        results = {}
+        lines = []
+        for line in output.splitlines():
+            if not line.startswith(ACTION_RESULT_FLAG):
+                lines.append(line)
+                continue
+            try:
+                record = json.loads(line[len(ACTION_RESULT_FLAG):])
+            except ValueError:
+                lines.append(line)
+                continue
+            text = "\n".join(lines).strip() or record.get("error", "")
+            results[record.get("action")] = (record.get("status"), text)
+            lines = []
+        results[None] = (None, "\n".join(lines).strip())
+        return results
+
+    def runFusedSteps(self, steps):
+        """
+        function: run the actions of several steps with one call of the
+                  local script per node. Every step is logged before the
+                  call, the local script runs them in their order, and a
+                  failed action is reported with every node it failed on.
+                  The local script prints no result record for a single
+                  action, its exit status is the result then
+        input: steps, list of (action, start message, finish message), a
+               step without action is only logged
+        output: NA
+        """
+        if not steps:
+            return
+        for (_, startMessage, _) in steps:
+            self.context.logger.log(startMessage, "addStep")
+        actions = [action for (action, _, _) in steps if action]
+        outputs = {}
+        statuses = {}
+        cmd = ""
+        if actions:
+            cmd = self.getFusedActionCmd(actions)
+            self.context.logger.debug("Command for running %s: %s"
+                                      % (", ".join(actions), cmd))
+            if self.context.localMode or self.context.isSingle:
+                (status, output) = subprocess.getstatusoutput(cmd)
+                outputs[NetUtil.GetHostIpOrName()] = output
+                statuses[NetUtil.GetHostIpOrName()] = status == 0
+            else:
+                (resultMap, _) = self.context.sshTool.getSshStatusOutput(
+                    cmd, [], self.context.mpprcFile)
+                outputs = self.context.sshTool.parseSshOutput(
+                    self.context.sshTool.hostNames)
+                statuses = dict(
+                    (host, resultMap.get(host) == DefaultValue.SUCCESS)
+                    for host in outputs.keys())
+        results = dict((host, self.parseActionResults(output))
+                       for (host, output) in outputs.items())
+        for (action, _, finishMessage) in steps:
+            errors = []
+            for host in sorted(results.keys()) if action else []:
+                (status, output) = results[host].get(action,
+                                                     results[host][None])
+                if action not in results[host]:
+                    status = ACTION_SUCCESS if statuses[host] \
+                        else ACTION_FAILED
+                if status != ACTION_SUCCESS:
+                    errors.append("[%s] %s:\n%s" % (host, action, output))
+            if errors:
+                raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
+                                + " Error:\n%s" % "\n".join(errors))
+            self.context.logger.log(finishMessage, "constant")
 
     def setAndCheckOSParameter(self):
         """
@@ -1095,31 +1180,6 @@ class PreinstallImpl:
 
         self.context.logger.debug("Successfully check OS parameters.")
 
-    def prepareCronService(self):
-        """
-        function: preparing CRON service
-        input: NA
-        output: NA
-        """
-        self.context.logger.log("Preparing CRON service.", "addStep")
-        try:
-            # Preparing CRON service
-            cmd = "%s -t %s -u %s -l %s" % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_PREPARE_USER_CRON_SERVICE,
-                self.context.user,
-                self.context.localLog)
-            CmdExecutor.execCommandWithMode(
-                cmd,
-                self.context.sshTool,
-                self.context.localMode or self.context.isSingle,
-                self.context.mpprcFile)
-        except Exception as e:
-            raise Exception(str(e))
-        # Successfully prepared CRON service
-        self.context.logger.log("Successfully prepared CRON service.",
-                                "constant")
-
     def prepareSshdService(self):
         """
         function: preparing SSH service
@@ -1147,50 +1207,6 @@ class PreinstallImpl:
         self.context.logger.log("Successfully prepared SSH service.",
                                 "constant")
 
-    def setEnvParameter(self):
-        """
-        function: setting cluster environmental variables
-        input: NA
-        output: NA
-        """
-        pass
-
-    def setLibrary(self):
-        """
-        function: setting the dynamic link library
-        input: NA
-        output: NA
-        """
-        self.context.logger.log("Setting the dynamic link library.", "addStep")
-        try:
-            # Setting the dynamic link library
-            cmd = "%s -t %s -u %s -l %s " % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_SET_LIBRARY,
-                self.context.user,
-                self.context.localLog)
-            self.context.logger.debug("Command for setting library: %s" % cmd)
-            # exec the cmd for set library
-            CmdExecutor.execCommandWithMode(
-                cmd,
-                self.context.sshTool,
-                self.context.localMode or self.context.isSingle,
-                self.context.mpprcFile)
-        except Exception as e:
-            # failed to set the dynamic link library
-            raise Exception(str(e))
-        # Successfully set the dynamic link library
-        self.context.logger.log("Successfully set the dynamic link library.",
-                                "constant")
-
-    def setCgroup(self):
-        """
-        function: setting Cgroup
-        input: NA
-        output: NA
-        """
-        pass
-
     def setCorePath(self):
         """
         function: setting core path
@@ -1462,34 +1478,6 @@ class PreinstallImpl:
                     raise Exception(ErrorCode.GAUSS_502["GAUSS_50232"] % (
                         dataInst.datadir, appPath))
 
-    def checkOSSoftware(self):
-        """
-        function: setting the dynamic link library
-        input: NA
-        output: NA
-        """
-        self.context.logger.log("Checking OS software.", "addStep")
-        try:
-            # Checking software
-            cmd = "%s -t %s -u %s -l %s " % (
-                OMCommand.getLocalScript("Local_PreInstall"),
-                ACTION_CHECK_OS_SOFTWARE,
-                self.context.user,
-                self.context.localLog)
-            self.context.logger.debug("Checking OS software: %s" % cmd)
-            # exec the cmd for Checking software
-            CmdExecutor.execCommandWithMode(
-                cmd,
-                self.context.sshTool,
-                self.context.localMode or self.context.isSingle,
-                self.context.mpprcFile)
-        except Exception as e:
-            # failed to Check software
-            raise Exception(str(e))
-        # Successfully Check software
-        self.context.logger.log("Successfully check os software.",
-                                "constant")
-
     def get_package_path(self):
         """
         get package path, then can get script path, /package_path/script/
@@ -1562,30 +1550,26 @@ class PreinstallImpl:
         # change tool env path
         self.changeToolEnv()
         # the end of functions which do not use in in local mode
-        #check software
-        self.checkOSSoftware()
-        # check os version
-        self.checkOSVersion()
-        # create path and set mode
-        self.createDirs()
+        # fix the owner of the paths created before the user
+        self.fixNewPathOwner()
+        # check software and os version, create path and set mode
+        # with one call on every node
+        self.runFusedSteps(self.getPrepareSteps())
         # set os parameters
         self.setAndCheckOSParameter()
-        # prepare cron service for user
-        self.prepareCronService()
-        # set environment parameters
-        self.setEnvParameter()
+        # prepare cron service for user and set environment parameters
+        # with one call on every node
+        self.runFusedSteps(self.getConfigureSteps())
         # set virtual IP
         self.setVirtualIp()
         # set Library
-        self.setLibrary()
+        self.runFusedSteps(self.getLibrarySteps())
         # set core path
         self.setCorePath()
         # set core path
         self.setPssh()
-        # set cgroup
-        self.setCgroup()
-
-        self.setArmOptimization()
+        # set cgroup and arm optimization with one call on every node
+        self.runFusedSteps(self.getOptimizeSteps())
         # fix server package mode
         self.fixServerPackageOwner()
 
@@ -16,8 +16,8 @@
 # ----------------------------------------------------------------------------
 import sys
 import subprocess
-import time
 import os
+import json
 
 sys.path.append(sys.path[0] + "/../")
 
@@ -30,6 +30,7 @@ from domain_utils.cluster_file.cluster_dir import ClusterDir
 from base_utils.os.env_util import EnvUtil
 from base_utils.os.file_util import FileUtil
 from base_utils.os.net_util import NetUtil
+from base_utils.os.proc_killer import ProcKiller, KILL_RESULT_FLAG
 
 
 class UninstallImpl:
@@ -139,20 +140,9 @@ class UninstallImpl:
         # check and kill all processes about
         # clean cm_agent,cm_server,gs_gtm,gaussdb(CN/DN) and etcd.
         self.logger.debug("Checking and killing processes.", "addStep")
-        # local mode, kill all process in local node
-        if self.localMode:
-            for prog_name in ["cm_agent", "cm_server", "gaussdb",
-                              "CheckDataDiskUsage"]:
-                DefaultValue.KillAllProcess(self.user, prog_name)
-        # kill process in all nodes
-        else:
-            cm_agent_file = "%s/bin/cm_agent" % self.clusterInfo.appPath
-            cm_server_file = "%s/bin/cm_server" % self.clusterInfo.appPath
-            gaussdb_file = "%s/bin/gaussdb" % self.clusterInfo.appPath
-            check_file = "CheckDataDiskUsage"
-            for prog_name in [cm_agent_file, cm_server_file, gaussdb_file,
-                              check_file]:
-                self.CheckAndKillAliveProc(prog_name)
+        progFiles = ["%s/bin/%s" % (self.clusterInfo.appPath, name)
+                      for name in ["cm_agent", "cm_server", "gaussdb"]]
+        self.CheckAndKillAliveProc(progFiles, ["CheckDataDiskUsage"])
         self.logger.debug("Successfully checked and killed processes.", "constant")
 
     def StopCluster(self):
@@ -193,40 +183,66 @@ class UninstallImpl:
         else:
             self.cm_stop_cluster()
 
-    def CheckAndKillAliveProc(self, procFileName):
+    def CheckAndKillAliveProc(self, procFiles, keywords=None):
         """
         function: When uninstall gaussdb cluster. After it is stopped,
                   We must make sure that all process
                   about gaussdb cluster have been stopped. Not including
-                  om_monitor.
-        input : procFileName
+                  om_monitor. The processes are stopped with SIGTERM and
+                  then SIGKILL, and every process is reported.
+        input : procFiles, the programs whose processes are stopped
+                keywords, a process whose command line holds one of them
+                is stopped too
         output: NA
         """
-        try:
-            failedNodes = []
+        keywords = keywords or []
+        if self.localMode:
+            hostName = NetUtil.GetHostIpOrName()
+            reports = {hostName: ProcKiller(procFiles, keywords).kill()}
+            failedNodes = {}
+        else:
             validNodeName = self.clusterInfo.getClusterNodeNames()
-            # the command for killing all process
-            cmd_check_kill = DefaultValue.killInstProcessCmd(procFileName,
-                                                             True, 9, False)
-            # use sshTool to kill process in all nodes
-            (status, output) = self.sshTool.getSshStatusOutput(cmd_check_kill,
-                                                               validNodeName)
-            # get the node which not be killed
+            cmd = "%s -U %s -P '%s' -l '%s'" % (
+                OMCommand.getLocalScript("Local_Kill_Process"), self.user,
+                ",".join(procFiles), self.localLog)
+            if keywords:
+                cmd += " -K '%s'" % ",".join(keywords)
+            self.logger.debug("Command for killing processes: %s" % cmd)
+            status = self.sshTool.getSshStatusOutput(cmd, validNodeName,
+                                                     self.mpprcFile)[0]
+            outputMap = self.sshTool.parseSshOutput(validNodeName)
+            reports = {}
+            failedNodes = {}
             for node in validNodeName:
-                if (status[node] != DefaultValue.SUCCESS):
-                    failedNodes.append(node)
-            # kill process in nodes again
-            if (len(failedNodes)):
-                time.sleep(1)
-                (status, output) = self.sshTool.getSshStatusOutput(
-                    cmd_check_kill, failedNodes)
-                for node in failedNodes:
-                    # if still fail, throw error
-                    if (status[node] != DefaultValue.SUCCESS):
-                        raise Exception(output)
-
-        except Exception as e:
-            raise Exception(str(e))
+                reports[node] = []
+                others = []
+                for line in outputMap.get(node, "").splitlines():
+                    if line.strip().startswith(KILL_RESULT_FLAG):
+                        reports[node].append(json.loads(
+                            line.strip()[len(KILL_RESULT_FLAG):]))
+                    elif line.strip():
+                        others.append(line.strip())
+                if status[node] != DefaultValue.SUCCESS:
+                    failedNodes[node] = "\n".join(others)
+        errors = []
+        for (node, report) in reports.items():
+            for process in report:
+                self.logger.debug(
+                    "[%s] process %s (%s) %s after %s in %.3fs. %s"
+                    % (node, process["pid"], process["cmdline"],
+                       process["status"], process["signal"],
+                       process["duration"], process["error"]))
+            for process in ProcKiller.get_survivors(report):
+                errors.append("[%s] process %s (%s) is %s. %s"
+                              % (node, process["pid"], process["cmdline"],
+                                 process["status"], process["error"]))
+        for (node, output) in failedNodes.items():
+            if output:
+                errors.append("[%s] %s" % (node, output))
+        if errors or failedNodes:
+            raise Exception(ErrorCode.GAUSS_516["GAUSS_51606"] % "cluster"
+                            + " Error:\n%s" % "\n".join(
+                                errors or sorted(failedNodes.keys())))
 
     def CleanInstance(self):
         """
@@ -422,12 +438,8 @@ class UninstallImpl:
         input : NA
         output: NA
         """
-        if (self.localMode):
-            DefaultValue.KillAllProcess(self.user, "etcd")
-        # kill process in all nodes
-        else:
-            etcd_file = "%s/bin/etcd" % self.clusterInfo.appPath
-            self.CheckAndKillAliveProc(etcd_file)
+        etcd_file = "%s/bin/etcd" % self.clusterInfo.appPath
+        self.CheckAndKillAliveProc([etcd_file])
 
     def check_drop_node(self):
         """
@@ -42,6 +42,7 @@ from gspylib.component.CM.CM_OLAP.CM_OLAP import CM_OLAP
 from impl.upgrade.UpgradeConst import GreyUpgradeStep
 from impl.upgrade.UpgradeConst import DualClusterStage
 import impl.upgrade.UpgradeConst as const
+from base_utils.common.span_tracer import mark_step
 from base_utils.executor.cmd_executor import CmdExecutor
 from base_utils.executor.local_remote_cmd import LocalRemoteCmd
 from base_utils.os.cmd_util import CmdUtil
@@ -5453,7 +5454,7 @@ class UpgradeImpl:
         """
         try:
             # record step info on local node
-
+            mark_step("%s:%d" % (action, step))
             tempPath = self.context.upgradeBackupPath
             filePath = os.path.join(tempPath, const.INPLACE_UPGRADE_STEP_FILE)
             cmd = "echo \"%s:%d\" > %s" % (action, step, filePath)
@@ -24,6 +24,7 @@ import os
 import subprocess
 import pwd
 import traceback
+import math
 
 sys.path.append(sys.path[0] + "/../")
 from gspylib.common.GaussLog import GaussLog
@@ -35,6 +36,7 @@ from domain_utils.cluster_file.cluster_dir import ClusterDir
 from domain_utils.cluster_file.cluster_log import ClusterLog
 from base_utils.os.env_util import EnvUtil
 from base_utils.os.file_util import FileUtil
+from base_utils.os.dir_size import DirSize
 from domain_utils.cluster_file.package_info import PackageInfo
 from domain_utils.cluster_file.version_info import VersionInfo
 from base_utils.os.net_util import NetUtil
@@ -123,21 +125,18 @@ class CheckUpgrade():
 
         # check if the current app path is correct size,
         # there should be no personal data
-        cmd = "du -hms %s | awk '{print $1}'" % os.path.realpath(self.appPath)
-        (status, output) = subprocess.getstatusoutput(cmd)
-        if (status != 0):
-            g_logger.logExit(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
-                             + " ERROR: %s" % str(output))
-        appSize = output
-
-        cmd = "du -hms %s/lib/postgresql/pg_plugin | awk '{print $1}'" \
-              % os.path.realpath(self.appPath)
-        (status, output) = subprocess.getstatusoutput(cmd)
-        if (status != 0):
-            g_logger.logExit(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd +
-                             " ERROR: %s" % str(output))
-        pluginSize = output
-        if int(appSize) - int(pluginSize) > Const.MAX_APP_SIZE:
+        appPath = os.path.realpath(self.appPath)
+        try:
+            appSize = DirSize.get_size(appPath, allocated=True)
+            pluginSize = DirSize.get_size(
+                "%s/lib/postgresql/pg_plugin" % appPath, allocated=True)
+        except OSError as e:
+            g_logger.logExit(ErrorCode.GAUSS_502["GAUSS_50219"]
+                             % ("the size of %s" % appPath)
+                             + " ERROR: %s" % str(e))
+        # round each size up to MB like du -m did
+        if math.ceil(appSize / (1024 * 1024)) - \
+                math.ceil(pluginSize / (1024 * 1024)) > Const.MAX_APP_SIZE:
             g_logger.logExit(ErrorCode.GAUSS_504["GAUSS_50401"]
                              % (self.appPath, "%dM" % Const.MAX_APP_SIZE) +
                              "\nThere may be personal data in path %s,"
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : CollectConfig.py reads the configuration files of every
+#                instance on the local node and prints them as one json line.
+#############################################################################
+
+import getopt
+import json
+import os
+import sys
+
+sys.path.append(sys.path[0] + "/../")
+from gspylib.common.GaussLog import GaussLog
+from gspylib.common.DbClusterInfo import dbClusterInfo
+from gspylib.common.ErrorCode import ErrorCode
+from gspylib.common.ParameterParsecheck import Parameter
+from base_utils.os.net_util import NetUtil
+from domain_utils.cluster_file.conf_file import GucConfFile, HbaConfFile, \
+    GUC_CONF_FILE, HBA_CONF_FILE
+
+ROLE_DATANODE = "datanode"
+ROLE_CM_AGENT = "cm_agent"
+ROLE_CM_SERVER = "cm_server"
+CM_AGENT_CONF_FILE = "cm_agent.conf"
+CM_SERVER_CONF_FILE = "cm_server.conf"
+
+
+def usage():
+    """
+Usage:
+    python3 CollectConfig.py -h|--help
+    python3 CollectConfig.py -U user
+
+    General options:
+      -U                               Cluster user.
+      -h, --help                       Show help information for this utility,
+                                       and exit the command line mode.
+    """
+    print(usage.__doc__)
+
+
+def readConfFile(confFile):
+    """
+    function: read one configuration file
+    input : confFile
+    output: dict, or list for pg_hba.conf, None if it does not exist
+    """
+    if not os.path.isfile(confFile):
+        return None
+    if os.path.basename(confFile) == HBA_CONF_FILE:
+        return HbaConfFile(confFile).get_entries()
+    return GucConfFile(confFile).get_parameters()
+
+
+def collectInstances(dbNode):
+    """
+    function: collect the configuration files of the local instances
+    input : dbNode
+    output: list
+    """
+    instances = []
+    roleFiles = [(ROLE_DATANODE, dbNode.datanodes,
+                  [GUC_CONF_FILE, HBA_CONF_FILE]),
+                 (ROLE_CM_AGENT, dbNode.cmagents, [CM_AGENT_CONF_FILE]),
+                 (ROLE_CM_SERVER, dbNode.cmservers, [CM_SERVER_CONF_FILE])]
+    for (role, instList, fileNames) in roleFiles:
+        for inst in instList:
+            files = {}
+            for fileName in fileNames:
+                files[fileName] = readConfFile(
+                    os.path.join(inst.datadir, fileName))
+            instances.append({"role": role,
+                              "instance_id": inst.instanceId,
+                              "datadir": inst.datadir,
+                              "files": files})
+    return instances
+
+
+def main():
+    """
+    main function
+    """
+    try:
+        (opts, args) = getopt.getopt(sys.argv[1:], "U:h", ["help"])
+    except Exception as e:
+        usage()
+        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"] % str(e))
+
+    if (len(args) > 0):
+        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"]
+                               % str(args[0]))
+
+    user = ""
+    for (key, value) in opts:
+        if (key == "-h" or key == "--help"):
+            usage()
+            sys.exit(0)
+        elif (key == "-U"):
+            user = value
+        else:
+            GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"] % key)
+
+        Parameter.checkParaVaild(key, value)
+
+    if (user == ""):
+        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50001"]
+                               % 'U' + ".")
+    try:
+        clusterInfo = dbClusterInfo()
+        clusterInfo.initFromStaticConfig(user)
+        hostName = NetUtil.GetHostIpOrName()
+        dbNode = clusterInfo.getDbNodeByName(hostName)
+        if dbNode is None:
+            raise Exception(ErrorCode.GAUSS_516["GAUSS_51619"] % hostName)
+        print(json.dumps({"node": hostName,
+                          "instances": collectInstances(dbNode)}))
+    except Exception as e:
+        GaussLog.exitWithError("Errors:%s" % str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -232,9 +232,10 @@ class ConfigHba(LocalBaseOM):
         """
         ip_segment_list = list(set(['.'.join(
             remove_ip.split('.')[:2]) + ".0.0/16" for remove_ip in self.removeIps]))
-        for ip_segment in ip_segment_list:
-            ip_remove_str = "-h \"host    replication    all    %s\" " % ip_segment
-            component.doGUCConfig("set", ip_remove_str, True)
+        hbaRemoved = ["host    replication    all    %s" % ip_segment
+                      for ip_segment in ip_segment_list]
+        if hbaRemoved:
+            component.doConfFileConfig("set", hbaRemoved=hbaRemoved)
 
     def __configAnInstance(self, component):
         """
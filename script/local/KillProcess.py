@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description : KillProcess.py stops the processes of the instances on the
+#               local node and prints one result per process.
+#############################################################################
+
+import sys
+import getopt
+import json
+
+sys.path.append(sys.path[0] + "/../")
+from gspylib.common.GaussLog import GaussLog
+from gspylib.common.ErrorCode import ErrorCode
+from gspylib.common.ParameterParsecheck import Parameter
+from domain_utils.cluster_file.cluster_log import ClusterLog
+from domain_utils.domain_common.cluster_constants import ClusterConstants
+from base_utils.os.proc_killer import ProcKiller, DEFAULT_TERM_TIMEOUT, \
+    KILL_RESULT_FLAG
+
+PATH_SEPARATOR = ","
+
+
+class KillProcess():
+    """
+    stop the processes of the instances on the local node
+    """
+
+    def __init__(self):
+        """
+        function: initialize the parameters
+        input: NA
+        output: NA
+        """
+        self.user = ""
+        self.paths = []
+        self.keywords = []
+        self.termTimeout = DEFAULT_TERM_TIMEOUT
+        self.logFile = ""
+        self.logger = None
+
+    def usage(self):
+        """
+KillProcess.py is a utility to stop the processes of the instances.
+
+Usage:
+    python3 KillProcess.py -? | --help
+    python3 KillProcess.py -U USER [-P PATHS] [-K KEYWORDS] [-t SECS]
+                           [-l LOGFILE]
+
+General options:
+    -U USER                  the database program and cluster owner
+    -P PATHS                 comma separated paths, a process running from
+                             or in one of them is stopped
+    -K KEYWORDS              comma separated process names, a process
+                             with one of these names is stopped
+    -t SECS                  seconds to wait after SIGTERM before SIGKILL
+    -l LOGFILE               log file
+    -?, --help               show this help, then exit
+        """
+        print(self.usage.__doc__)
+
+    def parseCommandLine(self):
+        """
+        function: Check input parameters
+        input : NA
+        output: NA
+        """
+        try:
+            opts, args = getopt.getopt(sys.argv[1:], "U:P:K:t:l:h?",
+                                       ["help"])
+        except getopt.GetoptError as e:
+            GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"] % str(e))
+
+        if (len(args) > 0):
+            GaussLog.exitWithError(
+                ErrorCode.GAUSS_500["GAUSS_50000"] % str(args[0]))
+
+        for key, value in opts:
+            if key == "-U":
+                self.user = value
+            elif key == "-P":
+                self.paths = [path for path in value.split(PATH_SEPARATOR)
+                              if path]
+            elif key == "-K":
+                self.keywords = [word for word in
+                                 value.split(PATH_SEPARATOR) if word]
+            elif key == "-t":
+                self.termTimeout = float(value)
+            elif key == "-l":
+                self.logFile = value
+            elif key == "--help" or key == "-h" or key == "-?":
+                self.usage()
+                sys.exit(0)
+            else:
+                GaussLog.exitWithError(
+                    ErrorCode.GAUSS_500["GAUSS_50000"] % key)
+            Parameter.checkParaVaild(key, value)
+
+        if self.user == "":
+            GaussLog.exitWithError(
+                ErrorCode.GAUSS_500["GAUSS_50001"] % 'U' + ".")
+        if not self.paths and not self.keywords:
+            GaussLog.exitWithError(
+                ErrorCode.GAUSS_500["GAUSS_50001"] % 'P or -K' + ".")
+        if self.logFile == "":
+            self.logFile = ClusterLog.getOMLogPath(
+                ClusterConstants.LOCAL_LOG_FILE, self.user)
+
+    def init(self):
+        """
+        function: Init logger
+        input : NA
+        output: NA
+        """
+        self.logger = GaussLog(self.logFile, "KillProcess")
+
+    def doKill(self):
+        """
+        function: stop the processes and print the result of each
+        input  : NA
+        output : True if every process is gone
+        """
+        self.logger.debug("Stopping the processes of %s, keywords %s."
+                          % (self.paths, self.keywords))
+        killer = ProcKiller(self.paths, self.keywords,
+                            term_timeout=self.termTimeout)
+        report = killer.kill()
+        for process in report:
+            self.logger.debug("Process %s (%s) %s after %s in %.3fs. %s"
+                              % (process["pid"], process["cmdline"],
+                                 process["status"], process["signal"],
+                                 process["duration"], process["error"]))
+            print("%s%s" % (KILL_RESULT_FLAG, json.dumps(process)))
+        survivors = ProcKiller.get_survivors(report)
+        self.logger.debug("Stopped %d processes, %d still alive."
+                          % (len(report) - len(survivors), len(survivors)))
+        self.logger.closeLog()
+        return not survivors
+
+
+def main():
+    """
+    main function
+    """
+    try:
+        killProcess = KillProcess()
+        killProcess.parseCommandLine()
+        killProcess.init()
+        if not killProcess.doKill():
+            sys.exit(1)
+    except Exception as e:
+        GaussLog.exitWithError(str(e))
+
+
+if __name__ == "__main__":
+    main()
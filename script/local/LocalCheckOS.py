@@ -21,11 +21,13 @@
 import os
 import sys
 import subprocess
-import glob
 import getopt
 import subprocess
 import platform
 import time
+import io
+import json
+import contextlib
 from datetime import datetime
 
 localDirPath = os.path.dirname(os.path.realpath(__file__))
@@ -39,11 +41,11 @@ from gspylib.common.Common import DefaultValue
 from gspylib.common.ErrorCode import ErrorCode
 from base_utils.os.cmd_util import CmdUtil
 from domain_utils.cluster_file.config_param import ConfigParam
-from base_utils.os.disk_util import DiskUtil
 from domain_utils.cluster_file.version_info import VersionInfo
 from base_utils.os.net_util import NetUtil
 from domain_utils.domain_common.cluster_constants import ClusterConstants
 from os_platform.linux_distro import LinuxDistro
+from base_utils.os.os_snapshot import OSSnapshot, DEFAULT_SNAPSHOT_TTL
 from os_platform.common import SUPPORT_RHEL6X_VERSION_LIST, \
     SUPPORT_RHEL7X_VERSION_LIST, SUPPORT_SUSE12X_VERSION_LIST, \
     SUPPORT_SUSE11X_VERSION_LIST, SUPPORT_RHEL8X_VERSION_LIST
@@ -77,6 +79,28 @@ ACTION_SET_THP_SERVICE = "Set_THP_Service"
 ACTION_SET_LOGICAL_BLOCK = "Set_Logical_Block"
 ACTION_SET_IO_REQUEST = "Set_IO_REQUEST"
 ACTION_SET_ASYNCHRONOUS_IO_REQUEST = "Set_Asynchronous_IO_Request"
+ACTION_COLLECT_OS_SNAPSHOT = "Collect_OS_Snapshot"
+
+SUPPORT_ACTION_LIST = [ACTION_CHECK_OS_VERSION, ACTION_CHECK_KERNEL_VERSION,
+                       ACTION_CHECK_UNICODE, ACTION_CHECK_TIMEZONE,
+                       ACTION_CHECK_DISK_CONFIGURE,
+                       ACTION_CHECK_BLOCKDEV_CONFIGURE,
+                       ACTION_CHECK_IO_CONFIGURE, ACTION_CHECK_IO_REQUEST,
+                       ACTION_CHECK_ASYNCHRONOUS_IO_REQUEST,
+                       ACTION_CHECK_LOGICAL_BLOCK,
+                       ACTION_CHECK_NETWORK_CONFIGURE,
+                       ACTION_CHECK_NETWORK_BOND_MODE,
+                       ACTION_CHECK_SWAP_MEMORY_CONFIGURE,
+                       ACTION_CHECK_TIME_CONSISTENCY,
+                       ACTION_CHECK_FIREWALL_SERVICE,
+                       ACTION_CHECK_THP_SERVICE,
+                       ACTION_SET_BLOCKDEV_CONFIGURE,
+                       ACTION_SET_NETWORK_CONFIGURE, ACTION_SET_IO_CONFIGURE,
+                       ACTION_SET_REMOVEIPC_VALUE, ACTION_SET_SESSION_PROCESS,
+                       ACTION_SET_THP_SERVICE, ACTION_SET_LOGICAL_BLOCK,
+                       ACTION_SET_IO_REQUEST,
+                       ACTION_SET_ASYNCHRONOUS_IO_REQUEST,
+                       ACTION_COLLECT_OS_SNAPSHOT]
 
 #############################################################################
 # Global variables
@@ -92,6 +116,20 @@ g_logger = None
 g_opts = None
 g_clusterInfo = None
 netWorkBondInfo = None
+g_snapshot = None
+
+
+def getSnapshot():
+    """
+    function : Get the OS fact snapshot shared by all collectors
+    input  : NA
+    output : dict
+    """
+    global g_snapshot
+    if g_snapshot is None:
+        ttl = g_opts.snapshotTtl if g_opts else DEFAULT_SNAPSHOT_TTL
+        g_snapshot = OSSnapshot.load(ttl)
+    return g_snapshot
 
 
 ###########################################################################
@@ -153,24 +191,12 @@ def collectMounts():
     output : Instantion
     """
     data = mounts()
-    p = subprocess.Popen(["mount"], shell=False, stdout=subprocess.PIPE,
-                         stderr=subprocess.PIPE)
-    result = p.communicate()
-    data.errormsg = result[1].decode().strip()
-    if p.returncode:
-        return data
-
-    for line in result[0].decode().splitlines():
+    for (partition, directory, fstype, options) in getSnapshot()["mounts"]:
         mdata = GSMount()
-        words = line.strip().split()
-        mdata.partition = words[0]
-        mdata.dir = words[2]
-        mdata.type = words[4]
-        # get the options string
-        tmpa = words[5]
-        tmpb = tmpa.strip().strip("()")
-        tmpc = tmpb.split(",")
-        for op in tmpc:
+        mdata.partition = partition
+        mdata.dir = directory
+        mdata.type = fstype
+        for op in options:
             mdata.options.add(op)
         data.entries[mdata.partition] = mdata
     return data
@@ -201,33 +227,20 @@ def collectBlockdev():
     output : Instantion
     """
     data = blockdev()
-    devices = list()
-    try:
-        # If the directory of '/' is disk array, all disk prereads will be set
-        devlist = DiskUtil.getDevices()
-        cmd = "mount | awk '{if( $3==\"/\" ) print $1}' |" \
-              " sed 's/\/dev\///' | sed 's/[0-9]//'"
-        (status, output) = subprocess.getstatusoutput(cmd)
-        if (status != 0):
-            g_logger.logExit(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
-                             + " Error: \n%s" % output)
-        for dev in devlist:
-            if (dev.strip() == output.strip()):
-                continue
-            devices.append("/dev/%s" % dev)
-    except Exception as e:
-        data.errormsg = e.__str__()
-
-    for d in devices:
-        p = subprocess.Popen(["/sbin/blockdev", "--getra", "%s" % d],
-                             shell=False, stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE)
-        result = p.communicate()
-        data.errormsg += result[1].decode().strip()
-        if p.returncode:
+    snapshot = getSnapshot()
+    # If the directory of '/' is disk array, all disk prereads will be set
+    rootDev = snapshot["root_device"].replace("/dev/", "", 1)
+    for digit in rootDev:
+        if digit.isdigit():
+            rootDev = rootDev.replace(digit, "", 1)
+            break
+    for (dev, info) in snapshot["block_devices"].items():
+        if dev == rootDev:
             continue
-        data.ra[d] = result[0].decode().strip()
-
+        if info["read_ahead"] is None:
+            data.errormsg += "Failed to get readahead of /dev/%s." % dev
+            continue
+        data.ra["/dev/%s" % dev] = str(info["read_ahead"])
     return data
 
 
@@ -256,14 +269,9 @@ def collectUname():
     output : Instantion
     """
     data = uname()
-    p = subprocess.Popen(["uname", "-r"], shell=False,
-                         stdout=subprocess.PIPE,
-                         stderr=subprocess.PIPE)
-    result = p.communicate()
-    data.errormsg = result[1].decode().strip()
-    if p.returncode:
-        return data
-    data.output = result[0].decode().strip()
+    data.output = getSnapshot()["kernel"]
+    if not data.output:
+        data.errormsg = "Failed to read /proc/sys/kernel/osrelease."
     return data
 
 
@@ -327,12 +335,7 @@ def collectTimeZone():
     output : Instantion
     """
     data = timezone()
-    cmd = "date -R | awk -F ' ' '{print $NF}'"
-    status, output = subprocess.getstatusoutput(cmd)
-    if status != 0:
-        raise Exception((ErrorCode.GAUSS_505["GAUSS_50502"] % "TimeZone") +
-                        ("The cmd is : %s" % cmd))
-    data.output = output
+    data.output = getSnapshot()["timezone"]
     return data
 
 
@@ -421,34 +424,11 @@ def collectIOschedulers():
     output : Instantion
     """
     data = ioschedulers()
-    devices = set()
-    try:
-        files = DiskUtil.getDevices()
-        for f in files:
-            fname = "/sys/block/%s/queue/scheduler" % f
-            words = fname.split("/")
-            if len(words) != 6:
-                continue
-            devices.add(words[3].strip())
-    except Exception as e:
-        data.errormsg = e.__str__()
-
-    for d in devices:
-        try:
-            with open("/sys/block/%s/queue/scheduler" % d, 'r') as fd:
-                scheduler = fd.read()
-            words = scheduler.split("[")
-            if len(words) != 2:
-                continue
-            words = words[1].split("]")
-            if len(words) != 2:
-                continue
-            data.devices[d] = words[0].strip()
-            data.all_item[d] = scheduler.replace("[", "").replace("]",
-                                                                 "").split()
-        except Exception as e:
-            data.errormsg += e.__str__()
-
+    for (dev, info) in getSnapshot()["block_devices"].items():
+        if not info["scheduler"]:
+            continue
+        data.devices[dev] = info["scheduler"]
+        data.all_item[dev] = info["schedulers"]
     return data
 
 
@@ -476,28 +456,10 @@ def collectIORequest():
     input  : NA
     output : Dict
     """
-    data = ioRequest()
-    devices = []
-
-    try:
-        files = glob.glob("/sys/block/*/queue/nr_requests")
-        for f in files:
-            words = f.split("/")
-            if len(words) != 6:
-                continue
-            devices.append(words[3].strip())
-    except Exception as e:
-        data.errormsg = e.__str__()
-
     result = {}
-    for d in devices:
-        try:
-            with open("/sys/block/%s/queue/nr_requests" % d, 'r') as fd:
-                request = fd.read()
-            result[d] = request
-        except Exception as e:
-            data.errormsg += e.__str__()
-
+    for (dev, info) in getSnapshot()["block_devices"].items():
+        if info["nr_requests"]:
+            result[dev] = info["nr_requests"]
     return result
 
 
@@ -525,15 +487,10 @@ def collectAsynchronousIORequest():
     input  : NA
     output : List
     """
-    data = AsynchronousIoRequest()
     result = []
-    try:
-        with open("/proc/sys/fs/aio-max-nr", 'r') as fd:
-            request = fd.read()
-            result.append(request)
-    except Exception as e:
-        data.errormsg += e.__str__()
-
+    request = getSnapshot()["aio_max_nr"]
+    if request:
+        result.append(request)
     return result
 
 
@@ -561,28 +518,10 @@ def collectLogicalBlock():
     input  : NA
     output : Dict
     """
-    data = LogicalBlock()
-    devices = set()
-
-    try:
-        files = glob.glob("/sys/block/*/queue/logical_block_size")
-        for f in files:
-            words = f.split("/")
-            if len(words) != 6:
-                continue
-            devices.add(words[3].strip())
-    except Exception as e:
-        data.errormsg = e.__str__()
-
     result = {}
-    for d in devices:
-        try:
-            with open("/sys/block/%s/queue/logical_block_size" % d, 'r') as fd:
-                request = fd.read()
-            result[d] = request
-        except Exception as e:
-            data.errormsg += e.__str__()
-
+    for (dev, info) in getSnapshot()["block_devices"].items():
+        if info["logical_block_size"]:
+            result[dev] = info["logical_block_size"]
     return result
 
 
@@ -631,25 +570,11 @@ def collectTHPServer():
     output : instantion
     """
     data = THPServer()
-    THPFile = getTHPandOSInitFile()[0]
-    if (os.path.exists(THPFile)):
-        cmd = "grep '\[never\]' %s | wc -l" % THPFile
-        (status, output) = subprocess.getstatusoutput(cmd)
-        if (status != 0):
-            g_logger.debug("Failed to obtain THP service status. Commands for"
-                           " obtaining THP server status: %s." % cmd)
-            g_logger.logExit(ErrorCode.GAUSS_510["GAUSS_51001"]
-                             + " Error: \n%s" % output)
-        if (output.strip().isdigit()):
-            num = int(output.strip())
-        else:
-            num = 1
-        if (num > 0):
-            data.status = "disabled"
-        else:
-            data.status = "enabled"
-    else:
+    THPStatus = getSnapshot()["thp_enabled"]
+    if THPStatus is None or "[never]" in THPStatus:
         data.status = "disabled"
+    else:
+        data.status = "enabled"
     return data
 
 
@@ -1317,23 +1242,10 @@ def collectSwapInfo():
     output : Instantion
     """
     data = swapinfo()
-    cmd = "cat /proc/meminfo | grep SwapTotal"
-    status, output = subprocess.getstatusoutput(cmd)
-    if status != 0:
-        raise Exception((ErrorCode.GAUSS_505["GAUSS_50502"] % "SwapTotal") +
-                        ("The cmd is:%s" % cmd))
-    try:
-        listname = output.strip().split(' ')
-        val = int(listname[len(listname) - 2])
-        factor = listname[len(listname) - 1]
-        if factor == 'kB':
-            data.swapvalue = val * 1024
-        elif factor == '':
-            data.swapvalue = val
-
-    except Exception as e:
-        raise Exception(ErrorCode.GAUSS_505["GAUSS_50502"] % "SwapTotal"
-                        + " Error: \n%s" % str(e))
+    meminfo = getSnapshot()["meminfo"]
+    if "SwapTotal" not in meminfo:
+        raise Exception(ErrorCode.GAUSS_505["GAUSS_50502"] % "SwapTotal")
+    data.swapvalue = meminfo["SwapTotal"]
     return data
 
 
@@ -1344,23 +1256,10 @@ def collectMemInfo():
     output : Instantion
     """
     data = meminfo()
-    cmd = "cat /proc/meminfo | grep MemTotal"
-    status, output = subprocess.getstatusoutput(cmd)
-    if status != 0:
-        raise Exception((ErrorCode.GAUSS_505["GAUSS_50502"] % "MemTotal") +
-                        ("The cmd is %s " % cmd))
-    try:
-        listname = output.strip().split(' ')
-        val = int(listname[len(listname) - 2])
-        factor = listname[len(listname) - 1]
-        if factor == 'kB':
-            data.memvalue = val * 1024
-        elif factor == '':
-            data.memvalue = val
-
-    except Exception as e:
-        raise Exception(ErrorCode.GAUSS_505["GAUSS_50502"] % "MemTotal"
-                        + " Error: \n%s" % str(e))
+    memInfo = getSnapshot()["meminfo"]
+    if "MemTotal" not in memInfo:
+        raise Exception(ErrorCode.GAUSS_505["GAUSS_50502"] % "MemTotal")
+    data.memvalue = memInfo["MemTotal"]
     return data
 
 
@@ -1919,6 +1818,8 @@ class CmdOptions():
         self.mtuValue = ""
         self.hostname = ""
         self.mppdbfile = ""
+        self.actionList = []
+        self.snapshotTtl = DEFAULT_SNAPSHOT_TTL
 
 
 #########################################################
@@ -1944,14 +1845,18 @@ def usage():
     """
 Usage:
  python3 --help | -?
- python3 LocalCheckOS -t action [-l logfile] [-X xmlfile] [-V]
+ python3 LocalCheckOS -t action[,action...] [-l logfile] [-X xmlfile] [-V]
 Common options:
- -t                                The type of action.
+ -t                                The type of action. Several actions
+                                   separated by ',' are run in one pass
+                                   and reported as one json line.
  -s                                the path of MPPDB file
  -l --log-file=logfile             The path of log file.
  -? --help                         Show this help screen.
  -X --xmlfile = xmlfile            Cluster config file
     --ntp-server                   NTP server node's IP.
+    --snapshot-ttl                 Seconds a cached OS snapshot is reused,
+                                   0 means always collect a new one.
  -V --version
     """
     print(usage.__doc__)
@@ -1967,7 +1872,8 @@ def parseCommandLine():
         opts, args = getopt.getopt(sys.argv[1:], "t:s:l:X:V?",
                                    ["help", "log-file=", "xmlfile=",
                                     "MTUvalue=", "hostname=",
-                                    "ntp-server=", "version"])
+                                    "ntp-server=", "version",
+                                    "snapshot-ttl="])
     except Exception as e:
         usage()
         GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"]
@@ -2000,6 +1906,11 @@ def parseCommandLine():
             g_opts.mtuValue = value
         elif (key == "--hostname"):
             g_opts.hostname = value
+        elif (key == "--snapshot-ttl"):
+            if not value.isdigit():
+                GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50003"]
+                                       % ("-snapshot-ttl", "integer"))
+            g_opts.snapshotTtl = int(value)
         Parameter.checkParaVaild(key, value)
 
 
@@ -2011,32 +1922,11 @@ def checkParameter():
     """
     if (g_opts.action == ""):
         GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50001"] % 't' + '.')
-    if (g_opts.action != ACTION_CHECK_OS_VERSION
-            and g_opts.action != ACTION_CHECK_KERNEL_VERSION
-            and g_opts.action != ACTION_CHECK_UNICODE
-            and g_opts.action != ACTION_CHECK_TIMEZONE
-            and g_opts.action != ACTION_CHECK_DISK_CONFIGURE
-            and g_opts.action != ACTION_CHECK_BLOCKDEV_CONFIGURE
-            and g_opts.action != ACTION_CHECK_IO_CONFIGURE
-            and g_opts.action != ACTION_CHECK_IO_REQUEST
-            and g_opts.action != ACTION_CHECK_ASYNCHRONOUS_IO_REQUEST
-            and g_opts.action != ACTION_CHECK_LOGICAL_BLOCK
-            and g_opts.action != ACTION_CHECK_NETWORK_CONFIGURE
-            and g_opts.action != ACTION_CHECK_NETWORK_BOND_MODE
-            and g_opts.action != ACTION_CHECK_SWAP_MEMORY_CONFIGURE
-            and g_opts.action != ACTION_CHECK_TIME_CONSISTENCY
-            and g_opts.action != ACTION_CHECK_FIREWALL_SERVICE
-            and g_opts.action != ACTION_CHECK_THP_SERVICE
-            and g_opts.action != ACTION_SET_BLOCKDEV_CONFIGURE
-            and g_opts.action != ACTION_SET_NETWORK_CONFIGURE
-            and g_opts.action != ACTION_SET_IO_CONFIGURE
-            and g_opts.action != ACTION_SET_REMOVEIPC_VALUE
-            and g_opts.action != ACTION_SET_SESSION_PROCESS
-            and g_opts.action != ACTION_SET_THP_SERVICE
-            and g_opts.action != ACTION_SET_LOGICAL_BLOCK
-            and g_opts.action != ACTION_SET_IO_REQUEST
-            and g_opts.action != ACTION_SET_ASYNCHRONOUS_IO_REQUEST):
-        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50004"] % "t")
+    g_opts.actionList = [action.strip() for action in
+                         g_opts.action.split(",") if action.strip()]
+    for action in g_opts.actionList:
+        if action not in SUPPORT_ACTION_LIST:
+            GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50004"] % "t")
 
     if (g_opts.logFile == ""):
         dirName = os.path.dirname(os.path.realpath(__file__))
@@ -2062,14 +1952,15 @@ def getLocalIPAddr():
     return Ips
 
 
-def doLocalCheck():
+def doLocalCheck(action):
     """
     function: check OS item on local node
-    input : NA
+    input : action
     output: NA
     """
 
     global netWorkBondInfo
+    global g_snapshot
     netWorkBondInfo = netWork()
 
     function_dict = {ACTION_CHECK_OS_VERSION: CheckPlatformInfo,
@@ -2098,29 +1989,58 @@ def doLocalCheck():
                           ACTION_SET_LOGICAL_BLOCK: CheckClogicalBlock}
     function_keys_true = list(function_dict_true.keys())
 
-    if (g_opts.action in function_keys):
-        function_dict[g_opts.action]()
-    elif (g_opts.action in function_keys_false):
-        function_dict_false[g_opts.action](False)
-    elif (g_opts.action in function_keys_true):
-        function_dict_true[g_opts.action](True)
-    elif (g_opts.action == ACTION_CHECK_ASYNCHRONOUS_IO_REQUEST):
+    if (action == ACTION_COLLECT_OS_SNAPSHOT):
+        print(json.dumps(getSnapshot()))
+    elif (action in function_keys):
+        function_dict[action]()
+    elif (action in function_keys_false):
+        function_dict_false[action](False)
+    elif (action in function_keys_true):
+        function_dict_true[action](True)
+    elif (action == ACTION_CHECK_ASYNCHRONOUS_IO_REQUEST):
         if (g_opts.confFile != "" and g_opts.confFile is not None):
             CheckAsyIOrequests(False)
-    elif (g_opts.action == ACTION_CHECK_NETWORK_CONFIGURE):
+    elif (action == ACTION_CHECK_NETWORK_CONFIGURE):
         for localAddres in nodeIps:
             CheckNetWorkCardPara(localAddres, False)
-    elif (g_opts.action == ACTION_CHECK_NETWORK_BOND_MODE):
+    elif (action == ACTION_CHECK_NETWORK_BOND_MODE):
         CheckNetWorkBonding(DefaultValue.getIpByHostName(), True)
-    elif (g_opts.action == ACTION_SET_NETWORK_CONFIGURE):
+    elif (action == ACTION_SET_NETWORK_CONFIGURE):
         for localAddres in nodeIps:
             CheckNetWorkCardPara(localAddres, True)
-    elif (g_opts.action == ACTION_SET_ASYNCHRONOUS_IO_REQUEST):
+    elif (action == ACTION_SET_ASYNCHRONOUS_IO_REQUEST):
         if (g_opts.confFile != "" and g_opts.confFile is not None):
             CheckAsyIOrequests(True)
     else:
         g_logger.logExit(ErrorCode.GAUSS_500["GAUSS_50004"] % 't' +
-                         " Value: %s." % g_opts.action)
+                         " Value: %s." % action)
+    if action.startswith("Set_"):
+        # the OS has been changed, later runs must not reuse the snapshot
+        OSSnapshot.invalidate()
+        g_snapshot = None
+
+
+def doBatchCheck():
+    """
+    function: run several actions in one pass and print one json line
+              with the status and output of every action
+    input : NA
+    output: NA
+    """
+    results = {}
+    for action in g_opts.actionList:
+        buf = io.StringIO()
+        status = 0
+        with contextlib.redirect_stdout(buf):
+            try:
+                doLocalCheck(action)
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                status = 1
+                print(str(e))
+        results[action] = {"status": status, "output": buf.getvalue()}
+    print(json.dumps(results))
 
 
 if __name__ == '__main__':
@@ -2137,7 +2057,10 @@ if __name__ == '__main__':
     try:
         nodeIps = []
         nodeIps = getLocalIPAddr()
-        doLocalCheck()
+        if len(g_opts.actionList) > 1:
+            doBatchCheck()
+        else:
+            doLocalCheck(g_opts.action)
         g_logger.closeLog()
     except Exception as e:
         g_logger.logExit(str(e))
@@ -21,9 +21,9 @@
 #############################################################################
 import subprocess
 import getopt
+import json
 import os
 import sys
-import time
 
 sys.path.append(sys.path[0] + "/../")
 from gspylib.common.GaussLog import GaussLog
@@ -35,6 +35,8 @@ from domain_utils.cluster_file.cluster_log import ClusterLog
 from base_utils.os.file_util import FileUtil
 from domain_utils.domain_common.cluster_constants import ClusterConstants
 from domain_utils.cluster_os.cluster_user import ClusterUser
+from base_utils.os.disk_bench import DiskBench, DEFAULT_BLOCK_SIZE, \
+    DEFAULT_IODEPTH, DEFAULT_RUNTIME, DEFAULT_FILE_SIZE, ALL_MODES
 
 ACTION_SSDPerfCheck = "SSDPerfCheck"
 INDENTATION_VALUE = 37
@@ -52,6 +54,12 @@ class CmdOptions():
     action = ""
     logFile = ""
     user = ""
+    benchModes = list(ALL_MODES)
+    blockSize = DEFAULT_BLOCK_SIZE
+    iodepth = DEFAULT_IODEPTH
+    runtime = DEFAULT_RUNTIME
+    fileSize = DEFAULT_FILE_SIZE
+    outputFormat = "text"
 
 
 g_opts = CmdOptions()
@@ -94,60 +102,59 @@ class LocalPerformanceCheck():
             raise Exception(ErrorCode.GAUSS_530["GAUSS_53005"])
         # Concurrent execution
         pool = ThreadPool(DefaultValue.getCpuSet())
-        pool.map(self.CheckSingleSSDPerf, diskDevList)
+        results = pool.map(self.CheckSingleSSDPerf, diskDevList)
         pool.close()
         pool.join()
+        if g_opts.outputFormat == "json":
+            # one line per node so that the caller can parse ssh output
+            print(json.dumps({"disks": results}))
 
     def CheckSingleSSDPerf(self, diskDev):
         """
         function: check Single SSD performance
         input : diskDev
-        output: NA
+        output: dict
         """
+        devlist = diskDev.split(':')
+        dev = devlist[0]
+        diskDir = devlist[1]
+        report = {"device": dev, "path": diskDir}
         try:
-            devlist = diskDev.split(':')
-            dev = devlist[0]
-            diskDir = devlist[1]
-            # get current time
-            currentTime = time.strftime("%Y-%m-%d_%H%M%S")
-            # get tmp File
-            tmpFile = os.path.join(diskDir, "%s-%s-%d" % ("tmpfile_SSDperf",
-                                                          currentTime,
-                                                          os.getpid()))
-            cmd = "dd if=/dev/zero of=%s bs=8M count=2560 oflag=direct &&" \
-                  % tmpFile
-            cmd += "dd if=%s of=/dev/null bs=8M count=2560 iflag=direct" \
-                   % tmpFile
-            (status, output) = subprocess.getstatusoutput(cmd)
-            if (status == 0):
-                output = output.split("\n")
-                writeInfolist = output[2].strip().split(",")
-                readInfolist = output[5].strip().split(",")
-                result = "        %s (%s) Path (%s)\n" \
-                         "            %s:    %s\n" \
-                         "            %s:    %s\n            %s:    %s\n" \
-                         "            %s:    %s\n            %s:    %s" \
-                         % (dev.split('/')[2], dev, diskDir,
-                            "Data size".ljust(INDENTATION_VALUE),
-                            writeInfolist[0][:-7],
-                            "Write time".ljust(INDENTATION_VALUE),
-                            (writeInfolist[1]).strip(),
-                            "Write speed".ljust(INDENTATION_VALUE),
-                            (writeInfolist[2]).strip(),
-                            "Read time".ljust(INDENTATION_VALUE),
-                            (readInfolist[1]).strip(),
-                            "Read speed".ljust(INDENTATION_VALUE),
-                            (readInfolist[2]).strip())
-                g_logger.log(result)
-            else:
-                raise Exception(ErrorCode.GAUSS_514["GAUSS_51400"] % cmd
-                                + " Error:\n%s" % output)
-            os.remove(tmpFile)
+            bench = DiskBench(diskDir, g_opts.blockSize, g_opts.iodepth,
+                              g_opts.runtime, g_opts.fileSize,
+                              g_opts.benchModes)
+            report.update(bench.run())
+            if g_opts.outputFormat != "json":
+                g_logger.log(self.formatResult(dev, diskDir, report))
             g_logger.debug("Successfully checked SSD performance.")
         except Exception as e:
-            os.remove(tmpFile)
-            g_logger.log("%s failed." % g_opts.action)
+            report["error"] = str(e)
+            if g_opts.outputFormat != "json":
+                g_logger.log("%s failed." % g_opts.action)
             g_logger.debug(str(e))
+        return report
+
+    def formatResult(self, dev, diskDir, report):
+        """
+        function: format benchmark result of one disk as text
+        input : dev, diskDir, report
+        output: str
+        """
+        lines = ["        %s (%s) Path (%s)" % (dev.split('/')[-1], dev,
+                                                  diskDir)]
+        for result in report["results"]:
+            lines.append("            %s:" % result["mode"])
+            items = [("Block size", "%d" % result["block_size"]),
+                     ("Iodepth", "%d" % result["iodepth"]),
+                     ("IOPS", "%s" % result["iops"]),
+                     ("Bandwidth", "%s MB/s" % result["bandwidth_mb"]),
+                     ("Average latency", "%s us" % result["lat_avg_us"]),
+                     ("P99 latency", "%s us" % result["lat_p99_us"]),
+                     ("Max latency", "%s us" % result["lat_max_us"])]
+            for (name, value) in items:
+                lines.append("                %s:    %s"
+                             % (name.ljust(INDENTATION_VALUE), value))
+        return "\n".join(lines)
 
 
 def usage():
@@ -157,10 +164,19 @@ Internal use only.
 Usage:
     python3 --help | -?
     python3 LocalPerformanceCheck.py -t action [-l logfile] [-U username]
+        [--bench-mode=MODES] [--block-size=SIZE] [--iodepth=NUM]
+        [--runtime=SECONDS] [--file-size=SIZE] [--format=text|json]
 Common options:
     -t                                The type of action.
     -U                                The user and group name.
     -l                                The path of log file.
+    --bench-mode                      Comma separated benchmark modes:
+                                      seqwrite,seqread,randwrite,randread.
+    --block-size                      Block size of each IO, such as 8K.
+    --iodepth                         Number of concurrent IO workers.
+    --runtime                         Duration of each mode in seconds.
+    --file-size                       Size of the test file, such as 1G.
+    --format                          Output format, text or json.
     -? --help                         Show this help screen.
     """
     print(usage.__doc__)
@@ -191,7 +207,10 @@ def parseCommandLine():
     output: NA
     """
     try:
-        (opts, args) = getopt.getopt(sys.argv[1:], "t:U:l:", ["help"])
+        (opts, args) = getopt.getopt(sys.argv[1:], "t:U:l:",
+                                      ["help", "bench-mode=", "block-size=",
+                                       "iodepth=", "runtime=", "file-size=",
+                                       "format="])
     except Exception as e:
         # print help information
         usage()
@@ -213,6 +232,19 @@ def parseCommandLine():
             g_opts.logFile = value
         elif (key == "-U"):
             g_opts.user = value
+        elif (key == "--bench-mode"):
+            g_opts.benchModes = [mode.strip() for mode in value.split(",")
+                                 if mode.strip()]
+        elif (key == "--block-size"):
+            g_opts.blockSize = value
+        elif (key == "--iodepth"):
+            g_opts.iodepth = value
+        elif (key == "--runtime"):
+            g_opts.runtime = value
+        elif (key == "--file-size"):
+            g_opts.fileSize = value
+        elif (key == "--format"):
+            g_opts.outputFormat = value
 
         Parameter.checkParaVaild(key, value)
 
@@ -232,6 +264,14 @@ def checkParameter():
     # check if absolute path
     if (not os.path.isabs(g_opts.logFile)):
         GaussLog.exitWithError(ErrorCode.GAUSS_502["GAUSS_50213"] % "log")
+    # check benchmark options
+    for mode in g_opts.benchModes:
+        if mode not in ALL_MODES:
+            GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50004"]
+                                   % "-bench-mode" + " Error: %s." % mode)
+    if g_opts.outputFormat not in ("text", "json"):
+        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50004"]
+                               % "-format")
     # check if installed SSD
     if not DefaultValue.checkSSDInstalled():
         GaussLog.exitWithError(ErrorCode.GAUSS_530["GAUSS_53008"])
@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+#############################################################################
+# Copyright (c) 2020 Huawei Technologies Co.,Ltd.
+#
+# openGauss is licensed under Mulan PSL v2.
+# You can use this software according to the terms
+# and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#
+#          http://license.coscl.org.cn/MulanPSL2
+#
+# THIS SOFTWARE IS PROVIDED ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OF ANY KIND,
+# EITHER EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT,
+# MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ----------------------------------------------------------------------------
+# Description  : OmAgent.py is an optional agent of the cluster user on one
+#                node. It keeps the om modules imported and the static
+#                configuration parsed, and runs the local scripts sent over
+#                a unix socket in a process forked from itself. Called with
+#                the path of a local script, it is the client, and runs the
+#                script itself when no agent is running.
+#############################################################################
+
+import json
+import os
+import socket
+import struct
+import sys
+
+# the client only needs the modules above, it runs before every step and
+# must start fast. The agent imports the om modules when it starts.
+LOCAL_DIR = os.path.dirname(os.path.realpath(__file__))
+AGENT_SOCKET_NAME = "om_agent_%d.sock"
+# local scripts the agent runs, the client runs any other script itself
+AGENT_SCRIPTS = ["CheckConfig.py", "InitInstance.py", "LocalCheck.py",
+                 "Backup.py"]
+ACTION_START = "start"
+ACTION_STOP = "stop"
+ACTION_STATUS = "status"
+# seconds without a request before the agent exits
+DEFAULT_IDLE_TIMEOUT = 3600
+# seconds before a failed read of the static configuration is retried
+REFRESH_RETRY_INTERVAL = 60
+MESSAGE_HEADER = "!I"
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def usage():
+    """
+Usage:
+    python3 OmAgent.py -h|--help
+    python3 OmAgent.py -t start|stop|status [-U user] [-l logfile]
+                       [--idle-timeout=SECS]
+    python3 OmAgent.py SCRIPT [ARGS]
+
+    General options:
+      -t                               start, stop or query the agent.
+      -U                               Cluster user, the current user by
+                                       default.
+      -l                               Path of log file.
+      --idle-timeout=SECS              The agent exits after this many
+                                       seconds without a request, 3600 by
+                                       default. 0 means never.
+      -h, --help                       Show help information for this utility,
+                                       and exit the command line mode.
+
+    SCRIPT is one of %s, it runs in the agent of the
+    current user if one runs on this node.
+    """
+    print(usage.__doc__ % ", ".join(AGENT_SCRIPTS))
+
+
+def getSocketPath(uid=None):
+    """
+    function: get the socket of the agent of a user, in the temporary
+              directory of the cluster
+    input : uid
+    output: path, or "" if PGHOST is not set
+    """
+    tmpDir = os.getenv("PGHOST", "")
+    if not tmpDir:
+        return ""
+    if uid is None:
+        uid = os.getuid()
+    return os.path.join(tmpDir, AGENT_SOCKET_NAME % uid)
+
+
+def sendMessage(sock, message):
+    """
+    function: send a json message with its length in front
+    input : sock, message
+    output: NA
+    """
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(struct.pack(MESSAGE_HEADER, len(data)) + data)
+
+
+def recvExactly(sock, size):
+    """
+    function: receive size bytes
+    input : sock, size
+    output: bytes
+    """
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise ValueError("The connection was closed.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recvMessage(sock):
+    """
+    function: receive a json message sent by sendMessage
+    input : sock
+    output: dict
+    """
+    headerSize = struct.calcsize(MESSAGE_HEADER)
+    (size,) = struct.unpack(MESSAGE_HEADER, recvExactly(sock, headerSize))
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError("The message is too large: %d bytes." % size)
+    return json.loads(recvExactly(sock, size).decode("utf-8"))
+
+
+def runClient(script, args):
+    """
+    function: run a local script in the agent, or in a new interpreter
+              if no agent accepts it
+    input : script, args
+    output: NA
+    """
+    script = os.path.realpath(script)
+    socketPath = getSocketPath()
+    response = None
+    if socketPath and os.path.basename(script) in AGENT_SCRIPTS and \
+            os.path.exists(socketPath):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socketPath)
+            sendMessage(sock, {"script": script,
+                               "args": args,
+                               "cwd": os.getcwd(),
+                               "env": dict(os.environ)})
+            response = recvMessage(sock)
+        except (OSError, ValueError):
+            response = None
+        finally:
+            sock.close()
+    if response is None or response.get("refused"):
+        os.execv(sys.executable, [sys.executable, script] + args)
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stdout.flush()
+    sys.stderr.write(response.get("stderr", ""))
+    sys.stderr.flush()
+    sys.exit(response.get("status", 1))
+
+
+class OmAgent(object):
+    """
+    agent running the local scripts of one user
+    """
+
+    def __init__(self, user, socketPath, idleTimeout, logger):
+        """
+        function: constructor
+        input : user, socketPath, idleTimeout, logger
+        output: NA
+        """
+        self.user = user
+        self.socketPath = socketPath
+        self.pidFile = socketPath + ".pid"
+        self.idleTimeout = idleTimeout
+        self.logger = logger
+        self.server = None
+        self.running = True
+        self.children = set()
+        self.refreshFailed = 0
+        self.moduleStamps = {}
+
+    def preload(self):
+        """
+        function: import the modules of the local scripts and parse the
+                  static configuration, the forked processes inherit both
+        input : NA
+        output: NA
+        """
+        import runpy
+        from gspylib.common import DbClusterInfo
+        for name in AGENT_SCRIPTS:
+            path = os.path.join(LOCAL_DIR, name)
+            try:
+                # the module body only, __name__ is not __main__
+                runpy.run_path(path, run_name="__om_agent__")
+            except Exception as e:
+                self.logger.debug("Failed to preload %s. Error: %s"
+                                  % (name, str(e)))
+        DbClusterInfo.enableStaticConfigCache()
+        self.refreshClusterInfo()
+        self.moduleStamps = self.getModuleStamps()
+
+    @staticmethod
+    def getFileStamp(path):
+        """
+        function: get the inode, size and modification time of a file
+        input : path
+        output: tuple, None if the file does not exist
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def getModuleStamps(self):
+        """
+        function: get the stamps of the om files the agent has loaded, the
+                  local scripts and the modules under the script directory
+        input : NA
+        output: dict of path to stamp
+        """
+        root = os.path.dirname(LOCAL_DIR) + os.sep
+        paths = set(os.path.join(LOCAL_DIR, name) for name in AGENT_SCRIPTS)
+        for module in list(sys.modules.values()):
+            path = getattr(module, "__file__", None)
+            if path and os.path.realpath(path).startswith(root):
+                paths.add(os.path.realpath(path))
+        return dict((path, self.getFileStamp(path)) for path in paths)
+
+    def getChangedModule(self):
+        """
+        function: find a loaded om file that was replaced or changed since
+                  the agent started, as gs_upgradectl does, the processes
+                  forked from the agent would still run the old code
+        input : NA
+        output: path, "" if nothing changed
+        """
+        for (path, stamp) in self.moduleStamps.items():
+            if self.getFileStamp(path) != stamp:
+                return path
+        return ""
+
+    def refreshClusterInfo(self):
+        """
+        function: parse the static configuration again if it changed
+        input : NA
+        output: NA
+        """
+        import time
+        from gspylib.common.DbClusterInfo import dbClusterInfo
+        # a node without a static configuration yet is not retried on
+        # every request
+        if time.time() - self.refreshFailed < REFRESH_RETRY_INTERVAL:
+            return
+        try:
+            dbClusterInfo().initFromStaticConfig(self.user)
+            self.refreshFailed = 0
+        except Exception as e:
+            self.refreshFailed = time.time()
+            self.logger.debug("Failed to read the static configuration. "
+                              "Error: %s" % str(e))
+
+    def isRunning(self):
+        """
+        function: check whether an agent accepts connections on the socket
+        input : NA
+        output: bool
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socketPath)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def daemonize(self):
+        """
+        function: detach from the terminal and the ssh session
+        input : NA
+        output: NA
+        """
+        if os.fork() > 0:
+            os._exit(0)
+        os.setsid()
+        if os.fork() > 0:
+            os._exit(0)
+        devNull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devNull, fd)
+        os.close(devNull)
+        os.chdir("/")
+
+    def start(self):
+        """
+        function: start the agent in the background
+        input : NA
+        output: NA
+        """
+        from gspylib.common.ErrorCode import ErrorCode
+        if self.isRunning():
+            self.logger.log("The om agent is already running.")
+            return
+        if os.path.exists(self.socketPath):
+            os.remove(self.socketPath)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        oldMask = os.umask(0o177)
+        try:
+            self.server.bind(self.socketPath)
+        except OSError as e:
+            raise Exception(ErrorCode.GAUSS_502["GAUSS_50206"]
+                            % self.socketPath + " Error:\n%s" % str(e))
+        finally:
+            os.umask(oldMask)
+        self.server.listen(128)
+        self.logger.log("The om agent is listening on %s." % self.socketPath)
+        self.daemonize()
+        with open(self.pidFile, "w") as fp:
+            fp.write("%d\n" % os.getpid())
+        try:
+            self.preload()
+            self.serve()
+        finally:
+            self.server.close()
+            for path in (self.socketPath, self.pidFile):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.logger.debug("The om agent exited.")
+
+    def stop(self):
+        """
+        function: stop the agent
+        input : NA
+        output: NA
+        """
+        import signal
+        if not os.path.isfile(self.pidFile):
+            self.logger.log("The om agent is not running.")
+            return
+        with open(self.pidFile, "r") as fp:
+            pid = int(fp.read().strip())
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            os.remove(self.pidFile)
+        self.logger.log("The om agent has been stopped.")
+
+    def status(self):
+        """
+        function: print whether the agent runs
+        input : NA
+        output: NA
+        """
+        if self.isRunning():
+            self.logger.log("The om agent is running on %s."
+                            % self.socketPath)
+        else:
+            self.logger.log("The om agent is not running.")
+
+    def onTerm(self, signum, frame):
+        """
+        function: stop accepting requests
+        input : signum, frame
+        output: NA
+        """
+        self.running = False
+
+    def reapChildren(self):
+        """
+        function: wait for the finished request processes
+        input : NA
+        output: NA
+        """
+        for pid in list(self.children):
+            try:
+                (donePid, _) = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                donePid = pid
+            if donePid:
+                self.children.discard(pid)
+
+    def serve(self):
+        """
+        function: accept requests until stopped or idle. Every request is
+                  handled in a process forked from the agent, the agent
+                  itself stays single threaded so that forking is safe
+        input : NA
+        output: NA
+        """
+        import select
+        import signal
+        import time
+        signal.signal(signal.SIGTERM, self.onTerm)
+        lastRequest = time.monotonic()
+        while self.running:
+            self.reapChildren()
+            if self.idleTimeout > 0 and not self.children and \
+                    time.monotonic() - lastRequest > self.idleTimeout:
+                self.logger.debug("The om agent has been idle for %d "
+                                  "seconds." % self.idleTimeout)
+                break
+            try:
+                (readable, _, _) = select.select([self.server], [], [], 1)
+            except InterruptedError:
+                continue
+            if not readable:
+                continue
+            (conn, _) = self.server.accept()
+            lastRequest = time.monotonic()
+            changed = self.getChangedModule()
+            if changed:
+                # the client runs the script in a new interpreter, and so
+                # do the later ones, as the socket is removed on exit
+                self.logger.log("The om agent exits, %s changed since it "
+                                "started." % changed)
+                try:
+                    sendMessage(conn, {"refused": True})
+                except OSError:
+                    pass
+                conn.close()
+                break
+            self.refreshClusterInfo()
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    self.server.close()
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    self.handle(conn)
+                except Exception as e:
+                    self.logger.debug("Failed to handle the request. "
+                                      "Error: %s" % str(e))
+                    code = 1
+                finally:
+                    os._exit(code)
+            self.children.add(pid)
+            conn.close()
+
+    def checkPeer(self, conn):
+        """
+        function: accept requests of the agent user only
+        input : conn
+        output: bool
+        """
+        credentials = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                      struct.calcsize("3i"))
+        (_, uid, _) = struct.unpack("3i", credentials)
+        return uid == os.getuid()
+
+    def handle(self, conn):
+        """
+        function: run one local script and send its result
+        input : conn
+        output: NA
+        """
+        import select
+        import signal
+        import tempfile
+        request = recvMessage(conn)
+        script = os.path.realpath(request.get("script", ""))
+        if not self.checkPeer(conn) or \
+                os.path.dirname(script) != LOCAL_DIR or \
+                os.path.basename(script) not in AGENT_SCRIPTS:
+            sendMessage(conn, {"refused": True})
+            return
+        self.logger.debug("Run %s in the om agent." % script)
+        stdout = tempfile.TemporaryFile()
+        stderr = tempfile.TemporaryFile()
+        # the write end of the pipe is not inherited by the programs the
+        # script runs, it is closed when the script exits
+        (doneRead, doneWrite) = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            os.close(doneRead)
+            self.runScript(script, request, stdout, stderr)
+        os.close(doneWrite)
+        # a client killed by a pssh timeout closes the connection, the
+        # script and the processes it started are killed then
+        clientGone = False
+        try:
+            while True:
+                (readable, _, _) = select.select([conn, doneRead], [], [])
+                if doneRead in readable:
+                    break
+                if not conn.recv(1):
+                    clientGone = True
+                    self.logger.debug("The client of %s exited." % script)
+                    try:
+                        os.killpg(pid, signal.SIGKILL)
+                    except OSError:
+                        os.kill(pid, signal.SIGKILL)
+                    break
+        finally:
+            os.close(doneRead)
+        (_, waitStatus) = os.waitpid(pid, 0)
+        status = os.WEXITSTATUS(waitStatus) \
+            if os.WIFEXITED(waitStatus) else 1
+        if clientGone:
+            return
+        stdout.seek(0)
+        stderr.seek(0)
+        sendMessage(conn, {"status": status,
+                           "stdout": stdout.read().decode("utf-8", "replace"),
+                           "stderr": stderr.read().decode("utf-8",
+                                                          "replace")})
+
+    def runScript(self, script, request, stdout, stderr):
+        """
+        function: run a local script as __main__ in this forked process,
+                  with the arguments, environment and directory of the
+                  client
+        input : script, request, stdout, stderr
+        output: NA, the process exits with the exit code of the script
+        """
+        import runpy
+        import traceback
+        code = 0
+        try:
+            os.setpgid(0, 0)
+            devNull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devNull, 0)
+            os.dup2(stdout.fileno(), 1)
+            os.dup2(stderr.fileno(), 2)
+            os.environ.clear()
+            os.environ.update(request.get("env", {}))
+            os.chdir(request.get("cwd", "/"))
+            sys.argv = [script] + list(request.get("args", []))
+            sys.path[0] = os.path.dirname(script)
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                sys.stderr.write("%s\n" % e.code)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(code & 0xff)
+
+
+def main():
+    """
+    main function
+    """
+    import getopt
+    import pwd
+    sys.path.append(sys.path[0] + "/../")
+    from gspylib.common.GaussLog import GaussLog
+    from gspylib.common.ErrorCode import ErrorCode
+    from gspylib.common.ParameterParsecheck import Parameter
+    from domain_utils.cluster_file.cluster_log import ClusterLog
+    from domain_utils.domain_common.cluster_constants import ClusterConstants
+
+    try:
+        (opts, args) = getopt.getopt(sys.argv[1:], "t:U:l:h",
+                                     ["help", "idle-timeout="])
+    except Exception as e:
+        usage()
+        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"] % str(e))
+
+    if (len(args) > 0):
+        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"]
+                               % str(args[0]))
+
+    action = ""
+    user = pwd.getpwuid(os.getuid()).pw_name
+    logFile = ""
+    idleTimeout = DEFAULT_IDLE_TIMEOUT
+    for (key, value) in opts:
+        if (key == "-h" or key == "--help"):
+            usage()
+            sys.exit(0)
+        elif (key == "-t"):
+            action = value
+        elif (key == "-U"):
+            user = value
+        elif (key == "-l"):
+            logFile = os.path.realpath(value)
+        elif (key == "--idle-timeout"):
+            if not value.isdigit():
+                GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50003"]
+                                       % ("-idle-timeout", "integer"))
+            idleTimeout = int(value)
+        else:
+            GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"] % key)
+
+        Parameter.checkParaVaild(key, value)
+
+    if (action not in [ACTION_START, ACTION_STOP, ACTION_STATUS]):
+        GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50004"] % 't' + ".")
+    if (os.getuid() == 0):
+        GaussLog.exitWithError(ErrorCode.GAUSS_501["GAUSS_50105"])
+    socketPath = getSocketPath()
+    if (socketPath == ""):
+        GaussLog.exitWithError(ErrorCode.GAUSS_518["GAUSS_51802"] % "PGHOST")
+    if (logFile == ""):
+        logFile = ClusterLog.getOMLogPath(ClusterConstants.LOCAL_LOG_FILE,
+                                          user, "")
+    try:
+        logger = GaussLog(logFile, "OmAgent")
+        agent = OmAgent(user, socketPath, idleTimeout, logger)
+        if (action == ACTION_START):
+            agent.start()
+        elif (action == ACTION_STOP):
+            agent.stop()
+        else:
+            agent.status()
+    except Exception as e:
+        GaussLog.exitWithError(str(e))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1].endswith(".py"):
+        runClient(sys.argv[1], sys.argv[2:])
+    main()
@@ -21,6 +21,7 @@
 #############################################################################
 
 import getopt
+import json
 import sys
 import os
 import shutil
@@ -87,6 +88,14 @@ ACTION_SET_CGROUP = "set_cgroup"
 ACTION_CHECK_CONFIG = "check_config"
 ACTION_DSS_NIT = "dss_init"
 
+# several actions may be given as "-t action1,action2", they run in the
+# given order and every action prints one result record
+ACTION_SEPARATOR = ","
+ACTION_RESULT_FLAG = "[PREINSTALL_ACTION_RESULT]"
+ACTION_SUCCESS = "Success"
+ACTION_FAILED = "Failed"
+ACTION_SKIPPED = "Skipped"
+
 g_nodeInfo = None
 envConfig = {}
 configuredIps = []
@@ -119,6 +128,7 @@ class PreInstall(LocalBaseOM):
         function: constructor
         """
         self.action = ""
+        self.actions = []
         self.userInfo = ""
         self.user = ""
         self.group = ""
@@ -173,7 +183,8 @@ Usage:
     [-e "envpara=value" [...]] [-w warningserverip] [-h nodename]
     [-s mpprc_file] [--check_empty] [-l log]
 Common options:
-    -t                                The type of action.
+    -t                                The type of action, several actions
+                                      separated by "," run in order.
     -u                                The OS user of cluster.
     -g                                The OS user's group of cluster.
     -X                                The XML file path.
@@ -227,7 +238,10 @@ Common options:
                 self.tmpFile = value
 
             Parameter.checkParaVaild(key, value)
-        self.action = parameter_map["-t"]
+        self.actions = [action.strip() for action in
+                        parameter_map["-t"].split(ACTION_SEPARATOR)
+                        if action.strip()]
+        self.action = self.actions[0] if self.actions else ""
         self.user = parameter_map["-u"]
         self.group = parameter_map["-g"]
         self.clusterConfig = parameter_map["-X"]
@@ -239,7 +253,21 @@ Common options:
 
     def checkParameter(self):
         """
-        function: Check parameter from command line
+        function: Check parameter from command line for every action
+        input : NA
+        output: NA
+        """
+        if not self.actions:
+            GaussLog.exitWithError(
+                ErrorCode.GAUSS_500["GAUSS_50001"] % 't' + ".")
+        for action in self.actions:
+            self.action = action
+            self.checkActionParameter()
+        self.action = self.actions[0]
+
+    def checkActionParameter(self):
+        """
+        function: Check parameter from command line for the current action
         input : NA
         output: NA
         """
@@ -2914,92 +2942,143 @@ Common options:
         except Exception as e:
             GaussLog.exitWithError(str(e))
 
+        if len(self.actions) > 1:
+            self.runActions()
+            return
         try:
-            if self.action == ACTION_PREPARE_PATH:
-                self.prepareGivenPath(self.preparePath, self.checkEmpty)
-            elif self.action == ACTION_CHECK_OS_VERSION:
-                self.checkOSVersion()
-            elif self.action == ACTION_CREATE_OS_USER:
-                self.createOSUser()
-            elif self.action == ACTION_CHECK_OS_USER:
-                global checkOSUser
-                checkOSUser = True
-                self.createOSUser()
-            elif self.action == ACTION_CHECK_HOSTNAME_MAPPING:
-                self.checkMappingForHostName()
-            elif self.action == ACTION_CREATE_CLUSTER_PATHS:
-                self.createClusterPaths()
-            elif self.action == ACTION_SET_FINISH_FLAG:
-                self.checkAbrt()
-                self.checkRemoveIpc()
-                self.setFinishFlag()
-            elif self.action == ACTION_SET_TOOL_ENV:
-                self.setToolEnv()
-            elif self.action == ACTION_SET_USER_ENV:
-                self.setDBUerProfile()
-            elif self.action == ACTION_PREPARE_USER_CRON_SERVICE:
-                self.prepareUserCronService()
-            elif self.action == ACTION_PREPARE_USER_SSHD_SERVICE:
-                self.prepareUserSshdService()
-            elif self.action == ACTION_SET_LIBRARY:
-                self.setLibrary()
-            elif self.action == ACTION_SET_VIRTUALIP:
-                FileUtil.modifyFileOwnerFromGPHOME(self.logger.logFile)
-                self.setVirtualIp()
-            elif self.action == ACTION_INIT_GAUSSLOG:
-                self.initGaussLog()
-            elif self.action == ACTION_CHECK_DISK_SPACE:
-                self.checkDiskSpace()
-            elif self.action == ACTION_SET_ARM_OPTIMIZATION:
-                self.checkPlatformArm()
-                if ARM_PLATE:
-                    self.setArmOptimization()
-                else:
-                    self.logger.debug("The plate is not arm,"
-                                      " skip set arm options.")
-            elif self.action == ACTION_CHECK_ENVFILE:
-                (checkstatus, checkoutput) = \
-                    ProfileFile.check_env_file(self.mpprcFile)
-                if self.mpprcFile != "":
-                    envfile = self.mpprcFile + " and /etc/profile"
-                else:
-                    envfile = "/etc/profile and ~/.bashrc"
-                if not checkstatus:
-                    self.logger.logExit(ErrorCode.GAUSS_518["GAUSS_51808"]
-                                        % checkoutput + "Please check %s."
-                                        % envfile)
-            elif self.action == ACTION_SET_WHITELIST:
-                self.logger.debug("Start setting white list.")
-                confFile = os.path.join(
-                    os.path.dirname(os.path.realpath(__file__)),
-                    "../../agent/om_agent.conf")
-                if os.path.isfile(confFile):
-                    self.getWhiteList(confFile)
-                    if self.checkWhiteList():
-                        self.clearIptables()
-                        self.setWhiteList()
-                else:
-                    self.logger.debug("White list file not exist,"
-                                      " skip set white list.")
-            elif self.action == ACTION_CHECK_OS_SOFTWARE:
-                self.checkOSSoftware()
-            elif self.action == ACTION_FIX_SERVER_PACKAGE_OWNER:
-                self.fix_server_pkg_permission()
-            elif self.action == ACTION_DSS_NIT:
-                self.dss_init()
-            elif self.action == ACTION_CHANGE_TOOL_ENV:
-                self.changeToolEnv()
-            elif self.action == ACTION_SET_CGROUP:
-                self.checkaio()
-                self.setCgroup()
-            elif self.action == ACTION_CHECK_CONFIG:
-                self.check_config()
-            else:
-                self.logger.logExit(ErrorCode.GAUSS_500["GAUSS_50000"]
-                                    % self.action)
+            self.doAction()
         except Exception as e:
             self.logger.logExit(str(e))
 
+    def runActions(self):
+        """
+        function: run the actions in the given order and print one result
+                  record per action. The actions after a failed one are
+                  skipped, and the process exits with 1 if one failed
+        input  : NA
+        output : NA
+        """
+        moduleName = self.logger.moduleName
+        failed = False
+        for action in self.actions:
+            record = {"action": action, "status": ACTION_SKIPPED,
+                      "duration": 0.0, "error": ""}
+            if not failed:
+                self.action = action
+                self.logger.moduleName = action
+                startTime = time.time()
+                try:
+                    self.doAction()
+                    record["status"] = ACTION_SUCCESS
+                except SystemExit as e:
+                    # an action may end the process when it is done, and
+                    # logExit has printed its error already
+                    if e.code:
+                        record["status"] = ACTION_FAILED
+                        record["error"] = "Exit with code %s." % e.code
+                    else:
+                        record["status"] = ACTION_SUCCESS
+                except Exception as e:
+                    record["status"] = ACTION_FAILED
+                    record["error"] = str(e)
+                    self.logger.error(str(e))
+                record["duration"] = round(time.time() - startTime, 3)
+                failed = record["status"] == ACTION_FAILED
+            print("%s %s" % (ACTION_RESULT_FLAG, json.dumps(record)))
+            sys.stdout.flush()
+        self.logger.moduleName = moduleName
+        if failed:
+            sys.exit(1)
+
+    def doAction(self):
+        """
+        function: run the current action
+        input  : NA
+        output : NA
+        """
+        if self.action == ACTION_PREPARE_PATH:
+            self.prepareGivenPath(self.preparePath, self.checkEmpty)
+        elif self.action == ACTION_CHECK_OS_VERSION:
+            self.checkOSVersion()
+        elif self.action == ACTION_CREATE_OS_USER:
+            self.createOSUser()
+        elif self.action == ACTION_CHECK_OS_USER:
+            global checkOSUser
+            checkOSUser = True
+            self.createOSUser()
+        elif self.action == ACTION_CHECK_HOSTNAME_MAPPING:
+            self.checkMappingForHostName()
+        elif self.action == ACTION_CREATE_CLUSTER_PATHS:
+            self.createClusterPaths()
+        elif self.action == ACTION_SET_FINISH_FLAG:
+            self.checkAbrt()
+            self.checkRemoveIpc()
+            self.setFinishFlag()
+        elif self.action == ACTION_SET_TOOL_ENV:
+            self.setToolEnv()
+        elif self.action == ACTION_SET_USER_ENV:
+            self.setDBUerProfile()
+        elif self.action == ACTION_PREPARE_USER_CRON_SERVICE:
+            self.prepareUserCronService()
+        elif self.action == ACTION_PREPARE_USER_SSHD_SERVICE:
+            self.prepareUserSshdService()
+        elif self.action == ACTION_SET_LIBRARY:
+            self.setLibrary()
+        elif self.action == ACTION_SET_VIRTUALIP:
+            FileUtil.modifyFileOwnerFromGPHOME(self.logger.logFile)
+            self.setVirtualIp()
+        elif self.action == ACTION_INIT_GAUSSLOG:
+            self.initGaussLog()
+        elif self.action == ACTION_CHECK_DISK_SPACE:
+            self.checkDiskSpace()
+        elif self.action == ACTION_SET_ARM_OPTIMIZATION:
+            self.checkPlatformArm()
+            if ARM_PLATE:
+                self.setArmOptimization()
+            else:
+                self.logger.debug("The plate is not arm,"
+                                  " skip set arm options.")
+        elif self.action == ACTION_CHECK_ENVFILE:
+            (checkstatus, checkoutput) = \
+                ProfileFile.check_env_file(self.mpprcFile)
+            if self.mpprcFile != "":
+                envfile = self.mpprcFile + " and /etc/profile"
+            else:
+                envfile = "/etc/profile and ~/.bashrc"
+            if not checkstatus:
+                self.logger.logExit(ErrorCode.GAUSS_518["GAUSS_51808"]
+                                    % checkoutput + "Please check %s."
+                                    % envfile)
+        elif self.action == ACTION_SET_WHITELIST:
+            self.logger.debug("Start setting white list.")
+            confFile = os.path.join(
+                os.path.dirname(os.path.realpath(__file__)),
+                "../../agent/om_agent.conf")
+            if os.path.isfile(confFile):
+                self.getWhiteList(confFile)
+                if self.checkWhiteList():
+                    self.clearIptables()
+                    self.setWhiteList()
+            else:
+                self.logger.debug("White list file not exist,"
+                                  " skip set white list.")
+        elif self.action == ACTION_CHECK_OS_SOFTWARE:
+            self.checkOSSoftware()
+        elif self.action == ACTION_FIX_SERVER_PACKAGE_OWNER:
+            self.fix_server_pkg_permission()
+        elif self.action == ACTION_DSS_NIT:
+            self.dss_init()
+        elif self.action == ACTION_CHANGE_TOOL_ENV:
+            self.changeToolEnv()
+        elif self.action == ACTION_SET_CGROUP:
+            self.checkaio()
+            self.setCgroup()
+        elif self.action == ACTION_CHECK_CONFIG:
+            self.check_config()
+        else:
+            self.logger.logExit(ErrorCode.GAUSS_500["GAUSS_50000"]
+                                % self.action)
+
 
 if __name__ == '__main__':
     """
@@ -29,6 +29,8 @@ from domain_utils.cluster_file.cluster_log import ClusterLog
 from domain_utils.domain_common.cluster_constants import ClusterConstants
 from base_utils.os.env_util import EnvUtil
 from gspylib.component.DSS.dss_checker import DssConfig
+from gspylib.threads.InstanceScheduler import InstanceScheduler, \
+    getInstanceRank, RANK_PREREQUISITE
 
 
 class Start(LocalBaseOM):
@@ -51,6 +53,7 @@ class Start(LocalBaseOM):
         self.installPath = ""
         self.security_mode = ""
         self.cluster_number = None
+        self.parallelJobs = 0
 
     def usage(self):
         """
@@ -58,13 +61,14 @@ gs_start is a utility to start the database
 
 Uasge:
     gs_start -? | --help
-    gs_start -U USER [-D DATADIR][-t SECS][-l LOGFILE]
+    gs_start -U USER [-D DATADIR][-t SECS][-l LOGFILE][--parallel-jobs=NUM]
 
 General options:
     -U USER                  the database program and cluster owner")
     -D DATADIR               data directory of instance
     -t SECS                  seconds to wait
     -l LOGFILE               log file
+    --parallel-jobs=NUM      instances started at the same time
     -?, --help               show this help, then exit
         """
         print(self.usage.__doc__)
@@ -78,7 +82,7 @@ General options:
         try:
             opts, args = getopt.getopt(sys.argv[1:], "U:D:R:l:t:h?",
                                        ["help", "security-mode=",
-                                        "cluster_number="])
+                                        "cluster_number=", "parallel-jobs="])
         except getopt.GetoptError as e:
             GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"] % str(e))
 
@@ -104,6 +108,8 @@ General options:
                 self.security_mode = value
             elif key == "--cluster_number":
                 self.cluster_number = value
+            elif key == "--parallel-jobs":
+                self.parallelJobs = int(value)
             else:
                 GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"]
                                        % key)
@@ -138,40 +144,59 @@ General options:
         input  : NA
         output : NA
         """
-        isDataDirCorrect = False
         is_dss_mode = EnvUtil.is_dss_mode(self.user)
-        for dn in self.dnCons:
-            if self.dataDir != "" and dn.instInfo.datadir != self.dataDir:
-                continue
-            try:
-                if is_dss_mode:
-                    DssConfig.wait_for_process_start(self.logger, 'dssserver', 'dssserver -D')
-                    DssConfig.set_cm_manual_flag(dn.instInfo.instanceId,
-                                                 'start', self.logger)
-                if self.cluster_number:
-                    dn.start(self.time_out,
-                             self.security_mode,
-                             self.cluster_number,
-                             is_dss_mode=is_dss_mode)
-                else:
-                    dn.start(self.time_out,
-                             self.security_mode,
-                             is_dss_mode=is_dss_mode)
-            finally:
-                if is_dss_mode:
-                    # recover the parameters of the cma resource file.
-                    cma_paths = DssConfig.get_cm_inst_path(self.dbNodeInfo)
-                    if cma_paths and DssConfig.get_cma_res_value(
-                            cma_paths[0], key='restart_delay') != str(
-                                DssConfig.DMS_DEFAULT_RESTART_DELAY):
-                        DssConfig.reload_cm_resource(
-                            self.logger,
-                            timeout=DssConfig.DMS_DEFAULT_RESTART_DELAY)
-
-            isDataDirCorrect = True
-
-        if not isDataDirCorrect:
+        dnList = [dn for dn in self.dnCons if self.dataDir == "" or
+                  dn.instInfo.datadir == self.dataDir]
+        if not dnList:
             raise Exception(ErrorCode.GAUSS_536["GAUSS_53610"] % self.dataDir)
+        # the primaries are started before the standbys, the instances of
+        # the same rank at the same time
+        scheduler = InstanceScheduler(self.logger, self.parallelJobs)
+        if is_dss_mode:
+            scheduler.addJob("dssserver",
+                             lambda: DssConfig.wait_for_process_start(
+                                 self.logger, 'dssserver', 'dssserver -D'),
+                             RANK_PREREQUISITE)
+        for dn in dnList:
+            scheduler.addJob("dn_%s" % dn.instInfo.instanceId,
+                             lambda dn=dn: self.startInstance(dn, is_dss_mode),
+                             getInstanceRank(dn.instInfo))
+        try:
+            results = scheduler.run()
+        finally:
+            if is_dss_mode:
+                # recover the parameters of the cma resource file.
+                cma_paths = DssConfig.get_cm_inst_path(self.dbNodeInfo)
+                if cma_paths and DssConfig.get_cma_res_value(
+                        cma_paths[0], key='restart_delay') != str(
+                            DssConfig.DMS_DEFAULT_RESTART_DELAY):
+                    DssConfig.reload_cm_resource(
+                        self.logger,
+                        timeout=DssConfig.DMS_DEFAULT_RESTART_DELAY)
+        self.logger.debug("Start of the instances:\n%s"
+                          % InstanceScheduler.formatResults(results))
+        errors = InstanceScheduler.getErrors(results)
+        if errors:
+            raise Exception(errors)
+
+    def startInstance(self, dn, is_dss_mode):
+        """
+        function: start one DN instance
+        input  : dn, is_dss_mode
+        output : NA
+        """
+        if is_dss_mode:
+            DssConfig.set_cm_manual_flag(dn.instInfo.instanceId,
+                                         'start', self.logger)
+        if self.cluster_number:
+            dn.start(self.time_out,
+                     self.security_mode,
+                     self.cluster_number,
+                     is_dss_mode=is_dss_mode)
+        else:
+            dn.start(self.time_out,
+                     self.security_mode,
+                     is_dss_mode=is_dss_mode)
 
 
 def main():
@@ -26,6 +26,8 @@ from gspylib.common.LocalBaseOM import LocalBaseOM
 from gspylib.common.ParameterParsecheck import Parameter
 from domain_utils.cluster_file.cluster_log import ClusterLog
 from domain_utils.domain_common.cluster_constants import ClusterConstants
+from gspylib.threads.InstanceScheduler import InstanceScheduler, \
+    getInstanceRank
 
 
 class Stop(LocalBaseOM):
@@ -47,6 +49,7 @@ class Stop(LocalBaseOM):
         self.logger = None
         self.stopMode = ""
         self.installPath = ""
+        self.parallelJobs = 0
 
     def usage(self):
         """
@@ -55,6 +58,7 @@ gs_stop is a utility to stop the database
 Uasge:
     gs_stop -? | --help
     gs_stop -U USER [-D DATADIR][-t SECS][-l LOGFILE][-m SHUTDOWN-MODE]
+            [--parallel-jobs=NUM]
 
 General options:
     -U USER                  the database program and cluster owner")
@@ -62,6 +66,7 @@ General options:
     -t SECS                  seconds to wait
     -l LOGFILE               log file
     -m SHUTDOWN-MODE         the modes of stop
+    --parallel-jobs=NUM      instances stopped at the same time
     -?, --help               show this help, then exit
         """
         print(self.usage.__doc__)
@@ -74,7 +79,7 @@ General options:
         """
         try:
             opts, args = getopt.getopt(sys.argv[1:], "U:D:l:t:R:m:h?",
-                                       ["help"])
+                                       ["help", "parallel-jobs="])
         except getopt.GetoptError as e:
             GaussLog.exitWithError(ErrorCode.GAUSS_500["GAUSS_50000"] % str(e))
 
@@ -96,6 +101,8 @@ General options:
                 self.logFile = value
             elif key == "-R":
                 self.installPath = value
+            elif key == "--parallel-jobs":
+                self.parallelJobs = int(value)
             elif key == "--help" or key == "-h" or key == "-?":
                 self.usage()
                 sys.exit(0)
@@ -133,14 +140,24 @@ General options:
         input  : NA
         output : NA
         """
-        isDataDirCorrect = False
-        for dn in self.dnCons:
-            if self.dataDir != "" and dn.instInfo.datadir != self.dataDir:
-                continue
-            dn.stop(self.stopMode, self.time_out)
-            isDataDirCorrect = True
-        if not isDataDirCorrect:
+        dnList = [dn for dn in self.dnCons if self.dataDir == "" or
+                  dn.instInfo.datadir == self.dataDir]
+        if not dnList:
             raise Exception(ErrorCode.GAUSS_536["GAUSS_53610"] % self.dataDir)
+        # the standbys are stopped before the primaries, the instances of
+        # the same rank at the same time
+        scheduler = InstanceScheduler(self.logger, self.parallelJobs)
+        for dn in dnList:
+            scheduler.addJob("dn_%s" % dn.instInfo.instanceId,
+                             lambda dn=dn: dn.stop(self.stopMode,
+                                                   self.time_out),
+                             getInstanceRank(dn.instInfo))
+        results = scheduler.run(reverse=True)
+        self.logger.debug("Stop of the instances:\n%s"
+                          % InstanceScheduler.formatResults(results))
+        errors = InstanceScheduler.getErrors(results)
+        if errors:
+            raise Exception(errors)
 
 
 def main():